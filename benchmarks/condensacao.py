@@ -0,0 +1,57 @@
+"""Conferência das regras da condensação local em frases de assembleia
+
+Uso:
+    python benchmarks/condensacao.py
+
+Cada caso passa pelo Condensador.limpar. Números por extenso e artigos
+("um voto contrário", "apartamento dois dois") precisam sobreviver inteiros;
+hesitações ("hum", "umm", "hã") e disfluências ("eu vou, eu vou falar",
+"fal- falar") precisam sumir. Sai com código 1 se algum
+caso falhar.
+"""
+import os
+import re
+import sys
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_SRC)
+
+# (entrada, trechos que devem continuar, trechos que devem sumir)
+CASOS = [
+    ("Houve um voto contrário e uma abstenção.", ["um voto contrário", "uma abstenção"], []),
+    ("Eu tenho um apartamento e um carro.", ["um apartamento", "um carro"], []),
+    ("Um morador pediu a palavra.", ["Um morador"], []),
+    ("O apartamento dois dois votou contra.", ["dois dois"], []),
+    ("Foram três votos a favor, dois contra e um, um só de abstenção.", ["três votos", "dois contra", "um, um só"], []),
+    ("Ficou aprovado com um, uma, uma abstenção.", ["um, uma, uma abstenção"], []),
+    ("Hum, eu acho que, umm, a proposta é boa.", ["eu acho que", "a proposta é boa"], ["Hum", "umm"]),
+    ("Hã, vamos começar a reunião, né?", ["vamos começar a reunião."], ["Hã", "né"]),
+    ("Eu vou, eu vou falar da obra.", ["Eu vou falar da obra."], ["eu vou, eu vou"]),
+    ("Eu eu vou, eu vou falar da obra.", ["Eu vou falar da obra."], ["eu eu", "eu vou, eu vou"]),
+    ("Eu quero fal- falar da obra.", ["Eu quero falar da obra."], ["fal-"]),
+]
+
+
+def main():
+    from condensacao import Condensador
+
+    falhas = []
+    for entrada, ficam, somem in CASOS:
+        saida = Condensador().limpar(entrada)
+        faltando = [t for t in ficam if t.lower() not in saida.lower()]
+        sobrando = [t for t in somem if re.search(rf"(?i)(?<!\w){re.escape(t)}(?!\w)", saida)]
+        if faltando or sobrando:
+            falhas.append((entrada, saida, faltando, sobrando))
+        print(f"{'✅' if not (faltando or sobrando) else '❌'} {entrada!r} -> {saida!r}")
+
+    if falhas:
+        for entrada, saida, faltando, sobrando in falhas:
+            print(f"❌ {entrada!r} -> {saida!r}: perdeu {faltando}, manteve {sobrando}")
+        return 1
+    print(f"✅ {len(CASOS)} casos: números e artigos preservados, hesitações e repetições removidas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
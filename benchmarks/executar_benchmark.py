@@ -0,0 +1,260 @@
+"""Benchmark ponta a ponta com servidores locais no lugar da AssemblyAI e da OpenAI
+
+Uso:
+    python benchmarks/executar_benchmark.py --duracoes 10,60,240,480 --latencia 0.05
+
+Cada duração roda em um subprocesso próprio, para que o pico de RSS seja isolado.
+Mede transcrever_audio, gerar_ata_formal e uma execução headless dos workers do Qt.
+
+O subprocesso usa uma pasta temporária como HOME e como pasta de temporários:
+cache, arquivo de busca, cadastro e histórico (~/.transcrever_ata) do usuário
+não recebem as reuniões sintéticas. Um arquivo gravado fora dela vira erro.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from servidores_falsos import AssemblyAIHandler, ConfigServidor, OpenAIHandler, ServidorFalso
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo em MB"""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta em KB, macOS em bytes
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+
+def criar_audio_sintetico(minutos, bytes_por_segundo):
+    """Cria um arquivo esparso com o tamanho de uma gravação da duração pedida"""
+    arquivo = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
+    arquivo.truncate(int(minutos * 60 * bytes_por_segundo))
+    arquivo.close()
+    return arquivo.name
+
+
+def configurar_ambiente(url_assembly, url_openai, intervalo_polling, pasta):
+    """Servidores falsos e pasta descartável no lugar do HOME (antes de importar src/)"""
+    # O cache do tiktoken fica onde já estava ($TMPDIR/data-gym-cache por padrão): trocar o TMPDIR
+    # baixaria o cl100k_base de novo em cada cenário (e falharia sem rede)
+    if not os.environ.get("TIKTOKEN_CACHE_DIR") and not os.environ.get("DATA_GYM_CACHE_DIR"):
+        os.environ["TIKTOKEN_CACHE_DIR"] = os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = pasta
+    os.environ["TMPDIR"] = tempfile.tempdir = os.path.join(pasta, "tmp")
+    os.makedirs(tempfile.tempdir, exist_ok=True)
+    os.environ["ASSEMBLYAI_BASE_URL"] = url_assembly
+    os.environ["ASSEMBLYAI_API_KEY"] = "benchmark"
+    os.environ["ASSEMBLYAI_INTERVALO_POLLING"] = str(intervalo_polling)
+    os.environ["OPENAI_BASE_URL"] = url_openai + "/v1"
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+
+
+def estado_pasta(pasta):
+    """{caminho: (tamanho, mtime)} dos arquivos de uma pasta"""
+    estado = {}
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            estado[caminho] = (info.st_size, info.st_mtime_ns)
+    return estado
+
+
+def caminhos_fora(pasta):
+    """Caminhos padrão (CAMINHO_*_PADRAO, PASTA_*_PADRAO) dos módulos carregados que não ficam em pasta"""
+    fora = []
+    for nome, modulo in list(sys.modules.items()):
+        if not getattr(modulo, "__file__", None) or not modulo.__file__.startswith(DIR_SRC):
+            continue
+        for atributo, valor in vars(modulo).items():
+            if (atributo.startswith(("CAMINHO_", "PASTA_")) and atributo.endswith("_PADRAO")
+                    and isinstance(valor, str) and not os.path.abspath(valor).startswith(pasta + os.sep)):
+                fora.append(f"{nome}.{atributo} = {valor}")
+    return fora
+
+
+def executar_workers(caminho_audio, texto, caminho_saida):
+    """Executa AssemblyAIStreamWorker e AtaWorker num loop de eventos sem janela"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QCoreApplication, QEventLoop, QThreadPool
+    from transcrever import AssemblyAIStreamWorker, API_KEY
+    from main import AtaWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    tempos = {}
+
+    loop = QEventLoop()
+    erros = []
+    inicio = time.perf_counter()
+    worker = AssemblyAIStreamWorker(API_KEY, caminho_audio)
+    worker.error.connect(lambda msg: (erros.append(msg), loop.quit()))
+    worker.finished.connect(loop.quit)
+    worker.start()
+    loop.exec()
+    worker.wait()
+    tempos["worker_transcricao"] = time.perf_counter() - inicio
+
+    loop = QEventLoop()
+    inicio = time.perf_counter()
+    ata_worker = AtaWorker(texto, caminho_saida)
+    ata_worker.signals.error.connect(lambda msg: (erros.append(msg), loop.quit()))
+    ata_worker.signals.finished.connect(loop.quit)
+    QThreadPool.globalInstance().start(ata_worker)
+    loop.exec()
+    QThreadPool.globalInstance().waitForDone()
+    tempos["worker_ata"] = time.perf_counter() - inicio
+
+    del app
+    return tempos, erros
+
+
+def executar_cenario(args):
+    """Roda um único cenário (uma duração) e imprime o resultado em JSON"""
+    config = ConfigServidor(
+        latencia=args.latencia,
+        vazao_bytes=args.vazao,
+        taxa_falha=args.taxa_falha,
+        limite_por_segundo=args.limite,
+        fator_processamento=args.fator_processamento,
+        latencia_por_token=args.latencia_por_token,
+        bytes_por_segundo_audio=args.bytes_por_segundo,
+    )
+    pasta_usuario = os.path.join(os.path.expanduser("~"), ".transcrever_ata")
+    antes = estado_pasta(pasta_usuario)
+    pasta = os.path.realpath(tempfile.mkdtemp(prefix="executar_benchmark_"))
+    resultado = {"minutos": args.cenario, "tempos": {}, "erros": []}
+
+    with ServidorFalso(AssemblyAIHandler, config) as assembly, ServidorFalso(OpenAIHandler, config) as openai:
+        configurar_ambiente(assembly.url, openai.url, args.intervalo_polling, pasta)
+        caminho_audio = criar_audio_sintetico(args.cenario, args.bytes_por_segundo)
+        caminho_saida = tempfile.mktemp(suffix=".docx")
+        from transcrever import transcrever_audio
+        from gerar_ata import gerar_ata_formal
+
+        try:
+            inicio = time.perf_counter()
+            texto = transcrever_audio(caminho_audio, status_callback=lambda msg: None)
+            resultado["tempos"]["transcrever_audio"] = time.perf_counter() - inicio
+            resultado["palavras"] = len(texto.split())
+
+            inicio = time.perf_counter()
+            gerar_ata_formal(texto, caminho_saida=caminho_saida, status_callback=lambda msg: None)
+            resultado["tempos"]["gerar_ata_formal"] = time.perf_counter() - inicio
+
+            if not args.sem_workers:
+                tempos, erros = executar_workers(caminho_audio, texto, caminho_saida)
+                resultado["tempos"].update(tempos)
+                resultado["erros"].extend(erros)
+        except Exception as e:
+            resultado["erros"].append(f"{type(e).__name__}: {e}")
+        finally:
+            for caminho in (caminho_audio, caminho_saida):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+        resultado["api"] = {"assemblyai": assembly.metricas.resumo(), "openai": openai.metricas.resumo()}
+
+    resultado["erros"].extend(f"Caminho fora da pasta do benchmark: {c}" for c in caminhos_fora(pasta))
+    depois = estado_pasta(pasta_usuario)
+    resultado["erros"].extend(f"Benchmark alterou {c}" for c in sorted(depois) if depois[c] != antes.get(c))
+    shutil.rmtree(pasta, ignore_errors=True)
+
+    resultado["pico_rss_mb"] = pico_rss_mb()
+    tempo_total = resultado["tempos"].get("transcrever_audio", 0) + resultado["tempos"].get("gerar_ata_formal", 0)
+    resultado["vazao_min_audio_por_s"] = args.cenario / tempo_total if tempo_total else 0.0
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+def imprimir_relatorio(resultados):
+    print(f"{'min':>5} {'palavras':>9} {'transcr.(s)':>11} {'ata(s)':>8} {'min/s':>7} {'RSS(MB)':>8}  chamadas API")
+    for r in resultados:
+        tempos = r.get("tempos", {})
+        chamadas = ", ".join(
+            f"{servico}.{endpoint}={dados['chamadas']} (p50 {dados['p50'] * 1000:.0f}ms, p95 {dados['p95'] * 1000:.0f}ms, erros {dados['erros']})"
+            for servico, endpoints in r.get("api", {}).items()
+            for endpoint, dados in endpoints.items()
+        )
+        print(
+            f"{r['minutos']:>5} {r.get('palavras', 0):>9} {tempos.get('transcrever_audio', 0):>11.2f} "
+            f"{tempos.get('gerar_ata_formal', 0):>8.2f} {r.get('vazao_min_audio_por_s', 0):>7.2f} "
+            f"{r.get('pico_rss_mb', 0):>8.1f}  {chamadas}"
+        )
+        for erro in r.get("erros", []):
+            print(f"      ❌ {erro.splitlines()[0]}")
+
+
+def argumentos_para_cenario(argv):
+    """Remove de argv as opções que só fazem sentido no processo principal"""
+    repassar = []
+    pular = False
+    for arg in argv:
+        if pular:
+            pular = False
+        elif arg == "--duracoes":
+            pular = True
+        elif not arg.startswith("--duracoes=") and arg != "--json":
+            repassar.append(arg)
+    return repassar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline de transcrição e geração de ata")
+    parser.add_argument("--duracoes", default="10,60,240,480", help="Durações das reuniões em minutos")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência por requisição (s)")
+    parser.add_argument("--vazao", type=int, default=0, help="Vazão do upload em bytes/s (0 = ilimitada)")
+    parser.add_argument("--taxa-falha", type=float, default=0.0, help="Probabilidade de HTTP 500")
+    parser.add_argument("--limite", type=int, default=0, help="Requisições por segundo antes de HTTP 429")
+    parser.add_argument("--fator-processamento", type=float, default=0.001, help="Segundos de processamento por segundo de áudio")
+    parser.add_argument("--latencia-por-token", type=float, default=0.0, help="Segundos por token gerado no chat")
+    parser.add_argument("--bytes-por-segundo", type=int, default=4000, help="Bytes de áudio por segundo de gravação")
+    parser.add_argument("--intervalo-polling", type=float, default=0.2, help="Intervalo de polling usado pelo cliente (s)")
+    parser.add_argument("--sem-workers", action="store_true", help="Não executa os workers do Qt")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    parser.add_argument("--cenario", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario is not None:
+        executar_cenario(args)
+        return 0
+
+    repassar = argumentos_para_cenario(sys.argv[1:])
+
+    resultados = []
+    for duracao in args.duracoes.split(","):
+        processo = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--cenario", duracao.strip()] + repassar,
+            capture_output=True, text=True,
+        )
+        linhas = [l for l in processo.stdout.splitlines() if l.startswith("{")]
+        if processo.returncode != 0 or not linhas:
+            resultados.append({"minutos": float(duracao), "erros": [processo.stderr.strip() or "falha no subprocesso"]})
+            continue
+        resultados.append(json.loads(linhas[-1]))
+
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+    else:
+        imprimir_relatorio(resultados)
+    # Erros de API, de geração ou arquivos gravados fora da pasta do benchmark
+    return 1 if any(r.get("erros") for r in resultados) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Conferência da extração local de horário e números em frases de assembleia
+
+Uso:
+    python benchmarks/extracao_local.py
+
+Cada frase passa por extrair_horario_inicio; o horário precisa sair igual ao
+esperado e, quando há um, com confiança no limiar (LIMIAR_CONFIANCA) para não
+ir ao LLM. Durações e números que não são horas não podem virar horário. Os
+números ditados ("três zero dois") passam por numero_por_extenso. Sai com
+código 1 se algum caso falhar.
+"""
+import os
+import sys
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_SRC)
+
+# (frase, horário esperado ou None)
+HORARIOS = [
+    ("São dezenove e quarenta, vamos dar início à assembleia.", "19h40"),
+    ("Boa noite, vamos começar às 8 da noite.", "20h00"),
+    ("Boa noite, são dezenove, vamos começar.", "19h00"),
+    ("Vamos dar início às dezenove horas.", "19h00"),
+    ("Iniciamos às sete e meia da noite.", "19h30"),
+    ("Iniciamos às 19:30. Encerramos às 21h.", "19h30"),
+    ("Boa noite, às 8 horas da noite iniciamos.", "20h00"),
+    ("A reunião durou 2 horas.", None),
+    ("Foram duas horas de reunião.", None),
+    ("As duas propostas foram votadas.", None),
+    ("São três as propostas da pauta.", None),
+    ("Começamos, são vinte e três presentes.", None),
+]
+# (texto, número esperado)
+NUMEROS = [
+    ("trezentos e dois", 302),
+    ("três zero dois", 302),
+    ("dois dois", 22),
+    ("dois mil e vinte e seis", 2026),
+]
+
+
+def main():
+    from extracao_local import LIMIAR_CONFIANCA, extrair_horario_inicio, numero_por_extenso
+
+    falhas = []
+    for frase, esperado in HORARIOS:
+        horario, confianca = extrair_horario_inicio(frase)
+        ok = horario == esperado and (esperado is None or confianca >= LIMIAR_CONFIANCA)
+        if not ok:
+            falhas.append(f"{frase!r}: {horario} ({confianca:.2f}), esperado {esperado}")
+        print(f"{'✅' if ok else '❌'} {frase!r} -> {horario} ({confianca:.2f})")
+    for texto, esperado in NUMEROS:
+        numero = numero_por_extenso(texto)
+        if numero != esperado:
+            falhas.append(f"{texto!r}: {numero}, esperado {esperado}")
+        print(f"{'✅' if numero == esperado else '❌'} {texto!r} -> {numero}")
+
+    if falhas:
+        for falha in falhas:
+            print(f"❌ {falha}")
+        return 1
+    print(f"✅ {len(HORARIOS) + len(NUMEROS)} casos: horários e números reconhecidos, durações ignoradas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
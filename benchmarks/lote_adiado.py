@@ -0,0 +1,107 @@
+"""Modo adiado (API de lotes) ponta a ponta contra o servidor OpenAI falso
+
+Uso:
+    python benchmarks/lote_adiado.py --reunioes 3 --minutos 60 --taxa-falha-lote 0.1
+
+Gera reuniões sintéticas, envia todas num único lote (lote_ata.LotesAtas),
+acompanha as fases de extração e redação no endpoint /v1/batches local e
+confere se cada .docx foi montado. Compara os pedidos feitos em lote com as
+chamadas interativas que gerar_ata_formal faria para as mesmas atas.
+
+Sai com código 1 se alguma ata não foi gerada.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from reuniao_sintetica import gerar_reuniao
+from servidores_falsos import ConfigServidor, OpenAIHandler, ServidorFalso
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix="lote_adiado_")
+    config = ConfigServidor(latencia=args.latencia, duracao_lote=args.duracao_lote,
+                            taxa_falha_lote=args.taxa_falha_lote)
+    with ServidorFalso(OpenAIHandler, config) as openai:
+        os.environ["OPENAI_BASE_URL"] = openai.url + "/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        from lote_ata import LotesAtas, preparar_ata
+
+        inicio = time.perf_counter()
+        atas = []
+        for i in range(args.reunioes):
+            reuniao = gerar_reuniao(args.minutos, semente=i)
+            atas.append(preparar_ata(reuniao["text"], os.path.join(pasta, f"ata_{i + 1}.docx"),
+                                     enunciados=reuniao["utterances"]))
+        preparo = time.perf_counter() - inicio
+
+        mensagens = []
+        lotes = LotesAtas(os.path.join(pasta, "lotes.sqlite3"), report=mensagens.append)
+        lote_id = lotes.criar(atas)
+        lotes.acompanhar(intervalo=args.intervalo)
+        total = time.perf_counter() - inicio
+        estado = lotes.listar()[0]["estado"]
+        lotes.fechar()
+
+        chamadas = openai.metricas.resumo()
+        interativas = sum(len(a["blocos"]) + (1 if a["mensagens_extracao"] else 0) for a in atas)
+        return {
+            "lote": lote_id,
+            "estado": estado,
+            "atas": [{"caminho": a["caminho_saida"], "gerada": os.path.exists(a["caminho_saida"]),
+                      "blocos": len(a["blocos"])} for a in atas],
+            "preparo_s": preparo,
+            "total_s": total,
+            "lotes_enviados": chamadas.get("lote", {}).get("chamadas", 0),
+            "pedidos_em_lote": chamadas.get("pedido_lote", {}).get("chamadas", 0),
+            "chamadas_interativas": chamadas.get("chat", {}).get("chamadas", 0),
+            "chamadas_interativas_sem_lote": interativas,
+            "mensagens": mensagens,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modo adiado (lotes) contra o servidor OpenAI falso")
+    parser.add_argument("--reunioes", type=int, default=3, help="Assembleias no mesmo lote")
+    parser.add_argument("--minutos", type=float, default=60, help="Duração de cada reunião sintética")
+    parser.add_argument("--duracao-lote", type=float, default=1.0, help="Segundos até o lote falso ficar pronto")
+    parser.add_argument("--taxa-falha-lote", type=float, default=0.0, help="Probabilidade de erro por pedido")
+    parser.add_argument("--latencia", type=float, default=0.01, help="Latência por requisição HTTP (s)")
+    parser.add_argument("--intervalo", type=float, default=0.2, help="Segundos entre consultas ao lote")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    args = parser.parse_args()
+
+    # Cadastro, cache e arquivo de busca numa pasta descartável
+    os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="lote_adiado_home_")
+
+    resultado = executar(args)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        for mensagem in resultado["mensagens"]:
+            if not mensagem.startswith(("Criando", "Adicionando", "Salvando", "Atualizando")):
+                print(f"  {mensagem}")
+        print(f"Lote {resultado['lote']}: {resultado['estado']} em {resultado['total_s']:.1f}s "
+              f"(preparo local {resultado['preparo_s']:.1f}s)")
+        print(f"  {resultado['lotes_enviados']} lote(s) enviados, {resultado['pedidos_em_lote']} pedidos respondidos em lote, "
+              f"{resultado['chamadas_interativas']} chamadas interativas "
+              f"(sem lote: {resultado['chamadas_interativas_sem_lote']})")
+
+    faltando = [a["caminho"] for a in resultado["atas"] if not a["gerada"]]
+    if faltando or resultado["estado"] != "concluido":
+        print(f"❌ Atas não geradas: {', '.join(faltando) or resultado['estado']}")
+        return 1
+    print(f"✅ {len(resultado['atas'])} ata(s) montadas a partir do lote")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Teto de memória do modo de memória limitada (tracemalloc e RSS)
+
+Uso:
+    python benchmarks/memoria_ata.py --duracoes 60,240,480 --comparar
+
+Cada duração roda num subprocesso próprio (RSS isolado); os servidores falsos
+ficam no processo principal, para que a reunião sintética que eles montam não
+entre na conta. No subprocesso, com tracemalloc ligado, são medidos os picos
+acima do que já estava alocado (a transcrição em si conta na fase que a lê):
+
+- transcricao: o polling que baixa o JSON final (com as palavras) e o lê;
+- ata: gerar_ata_formal completo (extração, condensação, blocos, redação e
+  .docx) no modo de memória limitada.
+
+Com --comparar, a ata também é gerada no modo normal, só para referência.
+Sai com código 1 se o pico do tracemalloc ou o RSS máximo de alguma duração
+passar do teto (TETOS_MB, ou --teto-tracemalloc/--teto-rss para todas).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from executar_benchmark import pico_rss_mb
+from servidores_falsos import AssemblyAIHandler, ConfigServidor, OpenAIHandler, ServidorFalso
+
+# minutos: (pico do tracemalloc por fase, RSS máximo) em MB, com folga sobre o medido
+# (8h: transcrição 2,6 MB e ata 5,5 MB, RSS 191 MB; antes eram 64 MB, 10,5 MB e 257 MB)
+TETOS_MB = {
+    60: (4, 205),
+    240: (7, 210),
+    480: (10, 225),
+}
+# Um byte de "áudio" por segundo: o upload não pesa e a duração continua certa
+BYTES_POR_SEGUNDO = 1
+
+
+def medir_fase(funcao):
+    """(resultado, pico do tracemalloc em MB acima do que já estava alocado, segundos) de uma fase"""
+    import tracemalloc
+
+    antes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, (tracemalloc.get_traced_memory()[1] - antes) / (1024 * 1024), time.perf_counter() - inicio
+
+
+def executar_cenario(args):
+    """Mede uma duração (subprocesso) e imprime o resultado em JSON"""
+    import tracemalloc
+
+    from gerar_ata import gerar_ata_formal
+    from indice_bm25 import _CACHE_INDICES
+    from transcrever import API_KEY, poll_transcription, request_transcription, upload_file
+
+    caminho_audio = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False).name
+    with open(caminho_audio, "wb") as arquivo:
+        arquivo.truncate(int(args.cenario * 60 * BYTES_POR_SEGUNDO))
+    pasta = tempfile.mkdtemp(prefix="memoria_ata_")
+    resultado = {"minutos": args.cenario, "fases": {}}
+
+    transcript_id = request_transcription(upload_file(caminho_audio, API_KEY), API_KEY)
+    tracemalloc.start()
+    dados, pico, tempo = medir_fase(lambda: poll_transcription(transcript_id, API_KEY, completo=True))
+    resultado["fases"]["transcricao"] = {"pico_mb": pico, "tempo_s": tempo}
+    texto, enunciados = dados["text"], dados.get("utterances")
+    del dados
+    resultado["palavras"] = texto.count(" ") + 1
+    resultado["texto_mb"] = len(texto.encode("utf-8")) / (1024 * 1024)
+
+    # Aquecimento: codificador do tiktoken, cliente e modelo do .docx carregam uma vez só
+    gerar_ata_formal("Bom dia a todos.\nA proposta foi aprovada.", os.path.join(pasta, "aquecimento.docx"),
+                     status_callback=lambda msg: None, memoria_limitada=True)
+
+    modos = [("ata", True)] + ([("ata_normal", False)] if args.comparar else [])
+    for nome, limitada in modos:
+        # Cada modo paga a montagem do índice BM25 da extração, como na primeira ata da transcrição
+        _CACHE_INDICES.clear()
+        caminho_saida = os.path.join(pasta, f"{nome}.docx")
+        _, pico, tempo = medir_fase(lambda: gerar_ata_formal(
+            texto, caminho_saida, status_callback=lambda msg: None, enunciados=enunciados,
+            memoria_limitada=limitada,
+        ))
+        resultado["fases"][nome] = {"pico_mb": pico, "tempo_s": tempo, "gerada": os.path.exists(caminho_saida)}
+        if nome == "ata":
+            # O RSS é o máximo do processo: lido antes do modo normal, que não tem teto
+            resultado["pico_rss_mb"] = pico_rss_mb()
+    tracemalloc.stop()
+    os.remove(caminho_audio)
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+def executar(args):
+    config = ConfigServidor(latencia=0.0, fator_processamento=0.0, bytes_por_segundo_audio=BYTES_POR_SEGUNDO)
+    resultados = []
+    with ServidorFalso(AssemblyAIHandler, config) as assembly, ServidorFalso(OpenAIHandler, config) as openai:
+        ambiente = dict(
+            os.environ,
+            ASSEMBLYAI_BASE_URL=assembly.url, ASSEMBLYAI_API_KEY="benchmark", ASSEMBLYAI_INTERVALO_POLLING="0.05",
+            OPENAI_BASE_URL=openai.url + "/v1", OPENAI_API_KEY="benchmark",
+            # Cadastro, cache e arquivo de busca numa pasta descartável
+            HOME=tempfile.mkdtemp(prefix="memoria_ata_home_"),
+        )
+        ambiente["USERPROFILE"] = ambiente["HOME"]
+        for minutos in args.duracoes:
+            comando = [sys.executable, os.path.abspath(__file__), "--cenario", str(minutos)]
+            if args.comparar:
+                comando.append("--comparar")
+            processo = subprocess.run(comando, capture_output=True, text=True, env=ambiente)
+            linhas = [l for l in processo.stdout.splitlines() if l.startswith("{")]
+            if processo.returncode != 0 or not linhas:
+                resultados.append({"minutos": minutos, "erro": processo.stderr.strip() or "falha no subprocesso"})
+            else:
+                resultados.append(json.loads(linhas[-1]))
+    return resultados
+
+
+def tetos(minutos, args):
+    padrao = TETOS_MB.get(int(minutos)) or TETOS_MB[max(TETOS_MB)]
+    return (args.teto_tracemalloc or padrao[0], args.teto_rss or padrao[1])
+
+
+def imprimir_relatorio(resultados, args):
+    print(f"{'min':>5} {'palavras':>9} {'texto(MB)':>9} {'fase':<12} {'pico(MB)':>9} {'teto':>6} {'tempo(s)':>9}")
+    for r in resultados:
+        if "erro" in r:
+            print(f"{r['minutos']:>5} ❌ {r['erro'].splitlines()[-1]}")
+            continue
+        teto_pico, teto_rss = tetos(r["minutos"], args)
+        for nome, fase in r["fases"].items():
+            teto = f"{teto_pico:>6.0f}" if nome != "ata_normal" else f"{'-':>6}"
+            print(f"{r['minutos']:>5.0f} {r['palavras']:>9} {r['texto_mb']:>9.2f} {nome:<12} "
+                  f"{fase['pico_mb']:>9.1f} {teto} {fase['tempo_s']:>9.1f}")
+        print(f"{'':>5} {'':>9} {'':>9} {'RSS máximo':<12} {r['pico_rss_mb']:>9.1f} {teto_rss:>6.0f}")
+
+
+def estouros(resultados, args):
+    mensagens = []
+    for r in resultados:
+        if "erro" in r:
+            mensagens.append(f"{r['minutos']:.0f} min: {r['erro'].splitlines()[-1]}")
+            continue
+        teto_pico, teto_rss = tetos(r["minutos"], args)
+        for nome in ("transcricao", "ata"):
+            if r["fases"][nome]["pico_mb"] > teto_pico:
+                mensagens.append(f"{r['minutos']:.0f} min: {nome} usou {r['fases'][nome]['pico_mb']:.1f} MB "
+                                 f"(teto {teto_pico:.0f} MB)")
+        if not r["fases"]["ata"]["gerada"]:
+            mensagens.append(f"{r['minutos']:.0f} min: ata não gerada")
+        if r["pico_rss_mb"] > teto_rss:
+            mensagens.append(f"{r['minutos']:.0f} min: RSS de {r['pico_rss_mb']:.1f} MB (teto {teto_rss:.0f} MB)")
+    return mensagens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Picos de memória do modo de memória limitada")
+    parser.add_argument("--duracoes", default="60,240,480", help="Durações das reuniões em minutos")
+    parser.add_argument("--teto-tracemalloc", type=float, help="Pico do tracemalloc aceito por fase (MB), para todas as durações")
+    parser.add_argument("--teto-rss", type=float, help="RSS máximo aceito (MB), para todas as durações")
+    parser.add_argument("--comparar", action="store_true", help="Gera também a ata no modo normal, para referência")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    parser.add_argument("--cenario", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario is not None:
+        executar_cenario(args)
+        return 0
+
+    args.duracoes = [float(d) for d in args.duracoes.split(",")]
+    resultados = executar(args)
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+    else:
+        imprimir_relatorio(resultados, args)
+
+    problemas = estouros(resultados, args)
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+    print("✅ Picos de memória dentro dos tetos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Tempo e precisão do recorte de trechos em gravações longas
+
+Uso:
+    python benchmarks/recorte_audio.py --horas 1,4,8 --orcamento-s 0.5
+
+Gera um MP3 CBR sintético de cada duração (quadros válidos com o número do
+quadro no conteúdo, sem áudio de verdade) e recorta trechos no começo, no meio
+e no fim pelo recorte_audio.recortar_trecho, sem margem. O primeiro e o último
+quadro de cada recorte dizem o instante real cortado, comparado com o pedido.
+Depois exporta as votações de uma reunião sintética da mesma duração.
+
+Sem ffmpeg no PATH mede o caminho por bytes do MP3; com ffmpeg, a cópia de
+stream. Sai com código 1 se um recorte passar de --orcamento-s ou errar o
+instante em mais de --tolerancia-ms.
+"""
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from reuniao_sintetica import gerar_reuniao
+
+# MPEG-1 Layer III, 32 kbps, 44,1 kHz, mono: 1152 amostras por quadro
+KBPS = 32
+TAXA = 44100
+AMOSTRAS_POR_QUADRO = 1152
+MS_POR_QUADRO = 1000 * AMOSTRAS_POR_QUADRO / TAXA
+TRECHOS = ((0.0, 90), (0.5, 90), (0.97, 90))  # (posição relativa, segundos)
+
+
+def criar_mp3(caminho, horas):
+    """MP3 CBR com preenchimento como o de um encoder (média exata de KBPS); devolve o nº de quadros"""
+    quadros = int(horas * 3600 * 1000 / MS_POR_QUADRO)
+    tamanho_base, resto = divmod(144 * KBPS * 1000, TAXA)
+    acumulado = 0
+    with open(caminho, "wb") as f:
+        for n in range(quadros):
+            acumulado += resto
+            preenchimento = acumulado >= TAXA
+            if preenchimento:
+                acumulado -= TAXA
+            cabecalho = bytes((0xFF, 0xFB, 0x10 | (0x02 if preenchimento else 0), 0xC4))
+            # Conteúdo: o número do quadro, para conferir onde o recorte começou e terminou
+            f.write(cabecalho + struct.pack(">I", n) + bytes(tamanho_base + preenchimento - 8))
+    return quadros
+
+
+def quadros_do_recorte(caminho):
+    """(primeiro, último) número de quadro gravado no recorte, seguindo os cabeçalhos"""
+    tamanho_base = 144 * KBPS * 1000 // TAXA
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    posicao, numeros = 0, []
+    while posicao + 8 <= len(dados) and dados[posicao] == 0xFF:
+        numeros.append(struct.unpack(">I", dados[posicao + 4:posicao + 8])[0])
+        posicao += tamanho_base + ((dados[posicao + 2] >> 1) & 1)
+    return numeros[0], numeros[-1]
+
+
+def executar(args):
+    from recorte_audio import exportar_votacoes, recortar_trecho
+
+    resultados = []
+    pasta = tempfile.mkdtemp(prefix="recorte_audio_")
+    try:
+        for horas in args.horas:
+            caminho = os.path.join(pasta, f"gravacao_{horas:g}h.mp3")
+            inicio = time.perf_counter()
+            total_quadros = criar_mp3(caminho, horas)
+            resultado = {"horas": horas, "mb": os.path.getsize(caminho) / (1024 * 1024),
+                         "geracao_s": time.perf_counter() - inicio, "recortes": []}
+            duracao_ms = total_quadros * MS_POR_QUADRO
+            for posicao, segundos in TRECHOS:
+                pedido_inicio = int(posicao * (duracao_ms - segundos * 1000))
+                pedido_fim = pedido_inicio + segundos * 1000
+                destino = os.path.join(pasta, f"trecho_{horas:g}h_{posicao:g}.mp3")
+                inicio = time.perf_counter()
+                recortar_trecho(caminho, pedido_inicio, pedido_fim, destino, margem_ms=0)
+                tempo = time.perf_counter() - inicio
+                primeiro, ultimo = quadros_do_recorte(destino)
+                resultado["recortes"].append({
+                    "inicio_ms": pedido_inicio,
+                    "tempo_s": tempo,
+                    "erro_inicio_ms": primeiro * MS_POR_QUADRO - pedido_inicio,
+                    "erro_fim_ms": (ultimo + 1) * MS_POR_QUADRO - pedido_fim,
+                })
+
+            enunciados = [{k: v for k, v in e.items() if k != "words"}
+                          for e in gerar_reuniao(horas * 60)["utterances"]]
+            inicio = time.perf_counter()
+            recortes = exportar_votacoes(caminho, enunciados, os.path.join(pasta, f"votacoes_{horas:g}h"),
+                                         report=lambda msg: None)
+            resultado["votacoes"] = {"recortes": len(recortes), "tempo_s": time.perf_counter() - inicio}
+            os.remove(caminho)
+            resultados.append(resultado)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo e precisão do recorte de trechos de áudio")
+    parser.add_argument("--horas", default="1,4,8", help="Durações das gravações sintéticas")
+    parser.add_argument("--orcamento-s", type=float, default=0.5, help="Tempo máximo aceito por recorte")
+    parser.add_argument("--tolerancia-ms", type=float, default=100.0, help="Erro máximo aceito nos instantes")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    args = parser.parse_args()
+    args.horas = [float(h) for h in args.horas.split(",")]
+
+    modo = "ffmpeg (-c copy)" if shutil.which("ffmpeg") else "bytes do MP3 (sem ffmpeg)"
+    resultados = executar(args)
+    if args.json:
+        print(json.dumps({"modo": modo, "resultados": resultados}, ensure_ascii=False, indent=2))
+    else:
+        print(f"Recorte por {modo}")
+        print(f"{'horas':>5} {'MB':>7} {'início':>9} {'tempo(ms)':>10} {'erro início(ms)':>16} {'erro fim(ms)':>13}")
+        for r in resultados:
+            for c in r["recortes"]:
+                print(f"{r['horas']:>5g} {r['mb']:>7.1f} {c['inicio_ms'] / 1000:>8.0f}s {c['tempo_s'] * 1000:>10.1f} "
+                      f"{c['erro_inicio_ms']:>16.1f} {c['erro_fim_ms']:>13.1f}")
+            v = r["votacoes"]
+            print(f"{'':>5} {'':>7} votações: {v['recortes']} recortes em {v['tempo_s']:.2f}s")
+
+    problemas = []
+    for r in resultados:
+        for c in r["recortes"]:
+            if c["tempo_s"] > args.orcamento_s:
+                problemas.append(f"{r['horas']:g}h: recorte em {c['inicio_ms'] / 1000:.0f}s levou {c['tempo_s']:.2f}s")
+            if max(abs(c["erro_inicio_ms"]), abs(c["erro_fim_ms"])) > args.tolerancia_ms:
+                problemas.append(f"{r['horas']:g}h: recorte em {c['inicio_ms'] / 1000:.0f}s errou o instante "
+                                 f"({c['erro_inicio_ms']:.0f} / {c['erro_fim_ms']:.0f} ms)")
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+    print(f"✅ Recortes abaixo de {args.orcamento_s:.2f}s e dentro de {args.tolerancia_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
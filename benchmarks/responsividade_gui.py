@@ -0,0 +1,266 @@
+"""Responsividade da janela principal com transcrições grandes (sem tela)
+
+Uso:
+    python benchmarks/responsividade_gui.py --palavras 1000,10000,50000,200000 --orcamento-ms 250
+
+Roda o MainWindow com QT_QPA_PLATFORM=offscreen e reuniões sintéticas de cada
+tamanho. Um QTimer de precisão bate a cada --intervalo-ms; o atraso de cada
+batida é a latência do laço de eventos, e a maior distância entre batidas é o
+maior travamento ("stall") visto pela secretária. Cenários:
+
+- exibir: transcrição completa chegando do worker (enunciados com orador) e o
+  fim da transcrição (estimativa da ata na barra de status);
+- exibir_texto: mesma coisa com texto corrido (servidor de jobs);
+- digitacao: 300 trechos curtos acrescentados ao fim de uma transcrição já grande;
+- rolagem: saltos da barra de rolagem com as alturas medidas sob demanda;
+- leitura: texto completo lido de volta (equivalente ao antigo toPlainText);
+- dialogo: abrir o diálogo de informações (cadastro e regras locais) e pedir
+  as pautas à IA, com um servidor OpenAI falso de --latencia-ia segundos.
+
+Os tempos incluem o trabalho dos workers até a tela ficar ociosa (estimativa
+da ata, análise local do diálogo, resposta da IA).
+
+Sai com código 1 se algum cenário travar o laço por mais de --orcamento-ms.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from reuniao_sintetica import PALAVRAS_POR_MINUTO, gerar_reuniao
+from servidores_falsos import ConfigServidor, OpenAIHandler, ServidorFalso
+
+TRECHOS_DIGITACAO = 300
+TEMPO_MAXIMO_CENARIO = 120
+
+
+class MonitorLaco:
+    """Mede o intervalo real entre batidas de um QTimer de precisão"""
+
+    def __init__(self, intervalo_ms):
+        from PySide6.QtCore import QElapsedTimer, Qt, QTimer
+
+        self.intervalo_ms = intervalo_ms
+        self.relogio = QElapsedTimer()
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(intervalo_ms)
+        self.timer.timeout.connect(self.bater)
+        self.intervalos = []
+        self.ultima = None
+
+    def bater(self):
+        agora = self.relogio.nsecsElapsed() / 1e6
+        if self.ultima is not None:
+            self.intervalos.append(agora - self.ultima)
+        self.ultima = agora
+
+    def iniciar(self):
+        self.intervalos = []
+        self.ultima = None
+        self.relogio.start()
+        self.timer.start()
+
+    def parar(self):
+        self.timer.stop()
+        # Batida pendente durante o último passo também conta
+        self.bater()
+        atrasos = sorted(max(0.0, i - self.intervalo_ms) for i in self.intervalos) or [0.0]
+        return {
+            "maior_travamento_ms": max(self.intervalos or [0.0]),
+            "latencia_p50_ms": statistics.median(atrasos),
+            "latencia_p95_ms": atrasos[int(0.95 * (len(atrasos) - 1))],
+            "latencia_p99_ms": atrasos[int(0.99 * (len(atrasos) - 1))],
+        }
+
+
+def executar_no_laco(app, monitor, passos, ocioso=lambda: True):
+    """Roda cada passo numa volta do laço de eventos, como sinais vindos dos workers
+
+    Termina quando o último passo rodou e ocioso() é verdadeiro; devolve as
+    medidas do monitor e o tempo total (até a tela ficar ociosa).
+    """
+    from PySide6.QtCore import QEventLoop, QTimer
+
+    laco = QEventLoop()
+    pendentes = list(passos)
+    inicio = time.perf_counter()
+    fim = [None]
+
+    def proximo():
+        if pendentes:
+            pendentes.pop(0)()
+            QTimer.singleShot(0, proximo)
+        elif ocioso() or time.perf_counter() - inicio > TEMPO_MAXIMO_CENARIO:
+            fim[0] = time.perf_counter()
+            # Algumas batidas depois do fim, para ver o que ficou agendado
+            QTimer.singleShot(50, laco.quit)
+        else:
+            QTimer.singleShot(1, proximo)
+
+    monitor.iniciar()
+    QTimer.singleShot(monitor.intervalo_ms * 2, proximo)
+    laco.exec()
+    medidas = monitor.parar()
+    medidas["tempo_ms"] = (fim[0] - inicio) * 1000
+    return medidas
+
+
+def tela_ociosa(janela):
+    visao = janela.visao_transcricao
+    return not visao.timer_ajuste.isActive() and janela.worker_estimativa is None
+
+
+def pintar(janela):
+    """Força a pintura da área visível (offscreen não pinta sozinho)"""
+    janela.visao_transcricao.viewport().grab()
+
+
+def cenarios(app, janela, monitor, reuniao, url_openai):
+    from types import SimpleNamespace
+
+    enunciados = [{k: v for k, v in e.items() if k != "words"} for e in reuniao["utterances"]]
+    texto = reuniao["text"]
+    resultados = {}
+
+    def exibir(com_enunciados):
+        def chegada():
+            janela.modelo_transcricao.limpar()
+            # O worker guarda os enunciados e emite o texto completo
+            janela.worker = SimpleNamespace(enunciados=enunciados if com_enunciados else None)
+            janela.append_character(texto)
+
+        def fim_transcricao():
+            janela.transcricao_finalizada()
+
+        return executar_no_laco(app, monitor, [chegada, fim_transcricao, lambda: pintar(janela)],
+                                lambda: tela_ociosa(janela))
+
+    resultados["exibir_texto"] = exibir(False)
+    resultados["exibir"] = exibir(True)
+
+    palavras = "e a proposta foi colocada em votação pelos presentes".split()
+    trechos = [" " + " ".join(palavras[:1 + i % len(palavras)]) for i in range(TRECHOS_DIGITACAO)]
+    resultados["digitacao"] = executar_no_laco(
+        app, monitor, [lambda t=t: janela.append_character(t) for t in trechos] + [lambda: pintar(janela)],
+        lambda: tela_ociosa(janela),
+    )
+
+    barra = janela.visao_transcricao.verticalScrollBar()
+    saltos = [barra.maximum() * f // 10 for f in (0, 5, 2, 9, 10)]
+    resultados["rolagem"] = executar_no_laco(
+        app, monitor, [p for v in saltos for p in (lambda v=v: barra.setValue(v), lambda: pintar(janela))],
+        lambda: tela_ociosa(janela),
+    )
+
+    lido = {}
+    resultados["leitura"] = executar_no_laco(
+        app, monitor, [lambda: lido.setdefault("texto", janela.modelo_transcricao.texto_completo())],
+    )
+    resultados["leitura"]["caracteres"] = len(lido["texto"])
+
+    from dialog_info_assembleia import DialogInfoAssembleia
+
+    dialogo = {}
+
+    def abrir():
+        dialogo["d"] = DialogInfoAssembleia(janela, lido["texto"])
+        dialogo["d"].show()
+
+    def pedir_pautas():
+        d = dialogo["d"]
+        d.detectar_por_ia("pautas", d.btn_ia_pautas)
+
+    def ia_respondeu():
+        d = dialogo.get("d")
+        return d is not None and d.worker_analise is None and d.btn_ia_pautas.isEnabled()
+
+    resultados["dialogo"] = executar_no_laco(app, monitor, [abrir, pedir_pautas], ia_respondeu)
+    dialogo["d"].close()
+    dialogo["d"].deleteLater()
+    return resultados
+
+
+def executar(args):
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    # Mensagens modais parariam o benchmark: registra e segue
+    avisos = []
+    for tipo in ("information", "warning", "critical"):
+        setattr(QMessageBox, tipo, staticmethod(lambda _pai, titulo, texto, *a, **k: avisos.append(f"{titulo}: {texto}")))
+
+    app = QApplication.instance() or QApplication([])
+    resultados = []
+    config = ConfigServidor(latencia=args.latencia_ia)
+    with ServidorFalso(OpenAIHandler, config) as openai:
+        os.environ["OPENAI_BASE_URL"] = openai.url + "/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        from main import MainWindow
+
+        monitor = MonitorLaco(args.intervalo_ms)
+        for palavras in args.palavras:
+            reuniao = gerar_reuniao(palavras / PALAVRAS_POR_MINUTO)
+            janela = MainWindow()
+            janela.resize(1000, 700)
+            janela.show()
+            medidas = cenarios(app, janela, monitor, reuniao, openai.url)
+            janela.worker = None
+            janela.close()
+            janela.deleteLater()
+            resultados.append({"palavras": len(reuniao["text"].split()), "cenarios": medidas})
+    return resultados, avisos
+
+
+def imprimir_relatorio(resultados, orcamento_ms):
+    print(f"{'palavras':>9} {'cenário':<13} {'tempo(ms)':>10} {'stall(ms)':>10} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for r in resultados:
+        for nome, m in r["cenarios"].items():
+            alerta = "  ❌" if m["maior_travamento_ms"] > orcamento_ms else ""
+            print(f"{r['palavras']:>9} {nome:<13} {m['tempo_ms']:>10.1f} {m['maior_travamento_ms']:>10.1f} "
+                  f"{m['latencia_p50_ms']:>7.1f} {m['latencia_p95_ms']:>7.1f} {m['latencia_p99_ms']:>7.1f}{alerta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência do laço de eventos da interface com transcrições grandes")
+    parser.add_argument("--palavras", default="1000,10000,50000,200000", help="Tamanhos das transcrições")
+    parser.add_argument("--orcamento-ms", type=float, default=250.0, help="Maior travamento aceito por cenário")
+    parser.add_argument("--intervalo-ms", type=int, default=5, help="Intervalo do timer que mede o laço")
+    parser.add_argument("--latencia-ia", type=float, default=0.5, help="Latência do servidor OpenAI falso (s)")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    args = parser.parse_args()
+    args.palavras = [int(p) for p in args.palavras.split(",")]
+
+    # Cadastro, cache e histórico numa pasta descartável, sem tocar nos dados do usuário
+    os.environ["HOME"] = os.environ["USERPROFILE"] = tempfile.mkdtemp(prefix="responsividade_gui_")
+
+    resultados, avisos = executar(args)
+    if args.json:
+        print(json.dumps({"resultados": resultados, "avisos": avisos}, ensure_ascii=False, indent=2))
+    else:
+        imprimir_relatorio(resultados, args.orcamento_ms)
+        for aviso in avisos:
+            print(f"      ⚠ {aviso.splitlines()[0]}")
+
+    estouros = [(r["palavras"], nome, m["maior_travamento_ms"])
+                for r in resultados for nome, m in r["cenarios"].items() if m["maior_travamento_ms"] > args.orcamento_ms]
+    if estouros:
+        for palavras, nome, stall in estouros:
+            print(f"❌ {nome} com {palavras} palavras travou a interface por {stall:.0f} ms "
+                  f"(orçamento {args.orcamento_ms:.0f} ms)")
+        return 1
+    print(f"✅ Nenhum travamento acima de {args.orcamento_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Gera reuniões sintéticas (texto, enunciados e palavras) para os benchmarks"""
+import random
+
+PALAVRAS_POR_MINUTO = 130
+
+NOMES = ["Maria Souza", "João Pereira", "Ana Lima", "Carlos Alves", "Fernanda Rocha", "Paulo Mendes"]
+
+FRASES = [
+    "Boa noite a todos, vamos dar início à assembleia do condomínio.",
+    "Para presidir a assembleia foi convidada a senhora {nome}, do apartamento {apto}.",
+    "O secretário será o senhor {nome}, apartamento {apto}.",
+    "O próximo item da pauta é a pintura da fachada do prédio.",
+    "Foram apresentados três orçamentos, o menor deles de {valor} reais.",
+    "A síndica explicou que o fundo de reserva cobre parte da despesa.",
+    "É, né, tipo assim, eu acho que a gente precisa pensar melhor nisso.",
+    "Colocada em votação, a proposta recebeu {votos} votos favoráveis.",
+    "Houve {contra} votos contrários e {abst} abstenções.",
+    "O morador do apartamento {apto} pediu a palavra sobre a garagem.",
+    "Ficou decidido que a administradora enviará nova cotação em trinta dias.",
+    "A taxa condominial será reajustada a partir do próximo mês.",
+    "Alguém mais quer se manifestar sobre esse ponto?",
+    "Não, não, não, eu só queria entender o valor da multa.",
+]
+
+
+def gerar_reuniao(minutos, semente=42, oradores=4):
+    """Retorna dict com 'text', 'utterances' e 'words' no formato da AssemblyAI"""
+    rnd = random.Random(semente)
+    total_palavras = int(minutos * PALAVRAS_POR_MINUTO)
+    ms_por_palavra = 60000 // PALAVRAS_POR_MINUTO
+
+    enunciados = []
+    palavras = []
+    tempo = 0
+    contagem = 0
+    while contagem < total_palavras:
+        speaker = chr(ord("A") + rnd.randrange(oradores))
+        frases = []
+        for _ in range(rnd.randint(1, 4)):
+            frases.append(rnd.choice(FRASES).format(
+                nome=rnd.choice(NOMES),
+                apto=rnd.choice([101, 202, 302, 404, 1201]),
+                valor=rnd.randint(10, 90) * 1000,
+                votos=rnd.randint(5, 30),
+                contra=rnd.randint(0, 5),
+                abst=rnd.randint(0, 3),
+            ))
+        texto = " ".join(frases)
+        inicio = tempo
+        palavras_enunciado = []
+        for palavra in texto.split():
+            palavras_enunciado.append({
+                "text": palavra,
+                "start": tempo,
+                "end": tempo + ms_por_palavra - 50,
+                "confidence": 0.95,
+                "speaker": speaker,
+            })
+            tempo += ms_por_palavra
+        contagem += len(palavras_enunciado)
+        palavras.extend(palavras_enunciado)
+        enunciados.append({
+            "speaker": speaker,
+            "text": texto,
+            "start": inicio,
+            "end": tempo,
+            "confidence": 0.95,
+            "words": palavras_enunciado,
+        })
+
+    return {
+        "text": " ".join(e["text"] for e in enunciados),
+        "utterances": enunciados,
+        "words": palavras,
+        "audio_duration": minutos * 60,
+    }
@@ -0,0 +1,574 @@
+"""Servidores locais que imitam a AssemblyAI e as APIs de chat e de lotes da OpenAI
+
+Usados pelos benchmarks para medir o desempenho sem rede e sem custo.
+Latência, vazão, taxa de falhas e limite de requisições são configuráveis.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from reuniao_sintetica import gerar_reuniao
+
+
+class ConfigServidor:
+    """Parâmetros de simulação compartilhados pelos servidores falsos"""
+
+    def __init__(self, latencia=0.05, vazao_bytes=0, taxa_falha=0.0, limite_por_segundo=0,
+                 fator_processamento=0.001, latencia_por_token=0.0, bytes_por_segundo_audio=4000,
+                 incluir_palavras=True, duracao_lote=1.0, taxa_falha_lote=0.0, semente=42, vazao_download=0):
+        self.latencia = latencia                          # segundos por requisição
+        self.vazao_bytes = vazao_bytes                    # bytes/s no upload (0 = ilimitado)
+        self.vazao_download = vazao_download              # bytes/s nas respostas (0 = ilimitado)
+        self.taxa_falha = taxa_falha                      # probabilidade de HTTP 500
+        self.limite_por_segundo = limite_por_segundo      # requisições/s antes de HTTP 429 (0 = sem limite)
+        self.fator_processamento = fator_processamento    # segundos de processamento por segundo de áudio
+        self.latencia_por_token = latencia_por_token      # segundos por token gerado no chat
+        self.bytes_por_segundo_audio = bytes_por_segundo_audio
+        self.incluir_palavras = incluir_palavras
+        self.duracao_lote = duracao_lote                  # segundos até um lote ficar pronto
+        self.taxa_falha_lote = taxa_falha_lote            # probabilidade de erro em cada pedido de um lote
+        self.semente = semente
+
+
+class Metricas:
+    """Contadores e latências por endpoint, seguros entre threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chamadas = {}
+        self.latencias = {}
+        self.erros = {}
+
+    def registrar(self, endpoint, duracao, status):
+        with self.lock:
+            self.chamadas[endpoint] = self.chamadas.get(endpoint, 0) + 1
+            self.latencias.setdefault(endpoint, []).append(duracao)
+            if status >= 400:
+                self.erros[endpoint] = self.erros.get(endpoint, 0) + 1
+
+    def resumo(self):
+        with self.lock:
+            resultado = {}
+            for endpoint, valores in self.latencias.items():
+                ordenados = sorted(valores)
+                resultado[endpoint] = {
+                    "chamadas": self.chamadas[endpoint],
+                    "erros": self.erros.get(endpoint, 0),
+                    "p50": percentil(ordenados, 50),
+                    "p95": percentil(ordenados, 95),
+                }
+            return resultado
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class LimitadorTaxa:
+    """Janela deslizante de 1 segundo"""
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.lock = threading.Lock()
+        self.instantes = []
+
+    def permitir(self):
+        if not self.limite:
+            return True
+        agora = time.monotonic()
+        with self.lock:
+            self.instantes = [t for t in self.instantes if agora - t < 1.0]
+            if len(self.instantes) >= self.limite:
+                return False
+            self.instantes.append(agora)
+            return True
+
+
+class _HandlerBase(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def estado(self):
+        return self.server.estado
+
+    def _responder(self, status, corpo, endpoint, inicio, tipo="application/json"):
+        dados = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        vazao = self.estado.config.vazao_download
+        try:
+            if vazao:
+                # Resposta em pedaços, para o cliente poder ler o começo antes do fim chegar
+                for posicao in range(0, len(dados), 64 * 1024):
+                    pedaco = dados[posicao:posicao + 64 * 1024]
+                    self.wfile.write(pedaco)
+                    self.wfile.flush()
+                    time.sleep(len(pedaco) / vazao)
+            else:
+                self.wfile.write(dados)
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente cancelou e fechou a conexão antes da resposta
+            pass
+        self.estado.metricas.registrar(endpoint, time.perf_counter() - inicio, status)
+
+    def _ler_corpo(self, descartar=False):
+        """Lê o corpo (Content-Length ou chunked) respeitando a vazão configurada.
+
+        Com descartar=True devolve apenas o número de bytes, sem guardar o conteúdo.
+        """
+        vazao = self.estado.config.vazao_bytes
+        partes = []
+        total = 0
+        for bloco in self._iterar_corpo():
+            total += len(bloco)
+            if not descartar:
+                partes.append(bloco)
+            if vazao:
+                time.sleep(len(bloco) / vazao)
+        return total if descartar else b"".join(partes)
+
+    def _iterar_corpo(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                linha = self.rfile.readline().strip()
+                if not linha:
+                    # Cliente desistiu no meio do envio (ex.: upload cancelado)
+                    return
+                tamanho = int(linha.split(b";")[0], 16)
+                if tamanho == 0:
+                    self.rfile.readline()
+                    return
+                restante = tamanho
+                while restante > 0:
+                    bloco = self.rfile.read(min(65536, restante))
+                    if not bloco:
+                        return
+                    restante -= len(bloco)
+                    yield bloco
+                self.rfile.readline()
+        restante = int(self.headers.get("Content-Length") or 0)
+        while restante > 0:
+            bloco = self.rfile.read(min(65536, restante))
+            if not bloco:
+                return
+            restante -= len(bloco)
+            yield bloco
+
+    def _simular(self, endpoint, inicio):
+        """Aplica latência, limite de taxa e falhas. Retorna True se já respondeu."""
+        config = self.estado.config
+        if config.latencia:
+            time.sleep(config.latencia)
+        if not self.estado.limitador.permitir():
+            self._responder(429, {"error": "rate limit"}, endpoint, inicio)
+            return True
+        if config.taxa_falha and self.estado.rnd.random() < config.taxa_falha:
+            self._responder(500, {"error": "falha simulada"}, endpoint, inicio)
+            return True
+        return False
+
+
+class CachePrefixo:
+    """Imita o cache de prefixo da OpenAI: a partir de 1024 tokens, em degraus de 128"""
+
+    MINIMO = 1024
+    DEGRAU = 128
+    CARACTERES_POR_TOKEN = 3  # aproximação para português
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prefixos = set()
+
+    def consultar(self, texto):
+        """Registra o prompt e devolve quantos tokens do seu prefixo já estavam em cache"""
+        tokens = len(texto) // self.CARACTERES_POR_TOKEN
+        tamanhos = range(self.MINIMO, tokens + 1, self.DEGRAU)
+        chaves = [hash(texto[:n * self.CARACTERES_POR_TOKEN]) for n in tamanhos]
+        em_cache = 0
+        with self.lock:
+            for n, chave in zip(tamanhos, chaves):
+                if chave not in self.prefixos:
+                    break
+                em_cache = n
+            self.prefixos.update(chaves)
+        return em_cache
+
+
+class EstadoServidor:
+    def __init__(self, config):
+        self.config = config
+        self.metricas = Metricas()
+        self.limitador = LimitadorTaxa(config.limite_por_segundo)
+        self.rnd = random.Random(config.semente)
+        self.lock = threading.Lock()
+        self.uploads = {}
+        self.transcricoes = {}
+        self.cache_prefixo = CachePrefixo()
+        self.arquivos = {}
+        self.lotes = {}
+
+
+class AssemblyAIHandler(_HandlerBase):
+    def do_POST(self):
+        inicio = time.perf_counter()
+        if self.path == "/v2/upload":
+            tamanho = self._ler_corpo(descartar=True)
+            if self._simular("upload", inicio):
+                return
+            upload_id = uuid.uuid4().hex
+            with self.estado.lock:
+                self.estado.uploads[upload_id] = tamanho
+            url = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}/arquivos/{upload_id}"
+            self._responder(200, {"upload_url": url}, "upload", inicio)
+        elif self.path == "/v2/transcript":
+            dados = json.loads(self._ler_corpo() or b"{}")
+            if self._simular("transcript", inicio):
+                return
+            upload_id = dados.get("audio_url", "").rsplit("/", 1)[-1]
+            tamanho = self.estado.uploads.get(upload_id, 0)
+            segundos_audio = tamanho / self.estado.config.bytes_por_segundo_audio
+            transcript_id = uuid.uuid4().hex
+            with self.estado.lock:
+                self.estado.transcricoes[transcript_id] = {
+                    "pronto_em": time.monotonic() + segundos_audio * self.estado.config.fator_processamento,
+                    "minutos": segundos_audio / 60,
+                    "resultado": None,
+                }
+            self._responder(200, {"id": transcript_id, "status": "queued"}, "transcript", inicio)
+        else:
+            self._responder(404, {"error": "não encontrado"}, "desconhecido", inicio)
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        if not self.path.startswith("/v2/transcript/"):
+            self._responder(404, {"error": "não encontrado"}, "desconhecido", inicio)
+            return
+        if self._simular("poll", inicio):
+            return
+        transcript_id = self.path.split("/")[3]
+        job = self.estado.transcricoes.get(transcript_id)
+        if job is None:
+            self._responder(404, {"error": "transcrição inexistente"}, "poll", inicio)
+            return
+        if time.monotonic() < job["pronto_em"]:
+            self._responder(200, {"id": transcript_id, "status": "processing"}, "poll", inicio)
+            return
+        if job["resultado"] is None:
+            reuniao = gerar_reuniao(job["minutos"], semente=self.estado.config.semente)
+            if not self.estado.config.incluir_palavras:
+                reuniao.pop("words")
+                for enunciado in reuniao["utterances"]:
+                    enunciado.pop("words")
+            job["resultado"] = reuniao
+        corpo = {"id": transcript_id, "status": "completed", **job["resultado"]}
+        self._responder(200, corpo, "poll", inicio)
+
+    def do_DELETE(self):
+        inicio = time.perf_counter()
+        transcript_id = self.path.rstrip("/").rsplit("/", 1)[-1]
+        with self.estado.lock:
+            job = self.estado.transcricoes.pop(transcript_id, None)
+        if job is None:
+            self._responder(404, {"error": "transcrição inexistente"}, "delete", inicio)
+            return
+        self._responder(200, {"id": transcript_id, "status": "deleted"}, "delete", inicio)
+
+
+class OpenAIHandler(_HandlerBase):
+    @staticmethod
+    def _notas(ultima_mensagem):
+        """Notas do modo hierárquico: três tópicos por trecho; consolidação reduz à metade"""
+        try:
+            topicos = json.loads(ultima_mensagem)["topicos"]
+            return {"topicos": topicos[:max(1, len(topicos) // 2)]}
+        except (ValueError, KeyError, TypeError):
+            pass
+        palavras = ultima_mensagem.split()
+        passo = max(1, len(palavras) // 3)
+        return {"topicos": [
+            {
+                "titulo": " ".join(palavras[i:i + 4]),
+                "resumo": " ".join(palavras[i:i + 40]),
+                "propostas": [], "votacoes": [], "decisoes": [],
+            }
+            for i in range(0, len(palavras), passo)
+        ][:3]}
+
+    def _completar(self, dados):
+        """Corpo de um chat.completion para o pedido (usado pelo chat e pelos lotes)"""
+        mensagens = dados.get("messages", [])
+        entrada = " ".join(m.get("content", "") for m in mensagens if isinstance(m.get("content"), str))
+        tokens_entrada = max(1, len(entrada) // 4)
+        if '"topicos"' in entrada:
+            conteudo = json.dumps(self._notas(mensagens[-1].get("content", "")), ensure_ascii=False)
+        elif "JSON" in entrada:
+            conteudo = json.dumps({
+                "data_assembleia": "19/10/2026",
+                "horario_inicio": "19h40",
+                "tipo_assembleia": "EXTRAORDINÁRIA",
+                "presidente_nome": "Maria Souza",
+                "presidente_apartamento": "302",
+                "secretario_nome": "João Pereira",
+                "secretario_apartamento": "101",
+                "numero_presentes": "20",
+                "pautas": ["Pintura da fachada"],
+                "decisoes": ["Aprovada a pintura"],
+                "votacao_resultado": {"favoráveis": 12, "contrários": 2, "abstenções": 1},
+            }, ensure_ascii=False)
+        else:
+            # Devolve metade final da entrada, o que aproxima o tamanho de uma ata formal
+            palavras = entrada.split()
+            quantidade = min(len(palavras) // 2, dados.get("max_tokens") or 4000)
+            conteudo = " ".join(palavras[len(palavras) - quantidade:])
+        tokens_saida = max(1, len(conteudo) // 4)
+        tokens_em_cache = self.estado.cache_prefixo.consultar(json.dumps(mensagens, ensure_ascii=False))
+        return {
+            "id": "chatcmpl-" + uuid.uuid4().hex,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": dados.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": conteudo},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": tokens_entrada,
+                "completion_tokens": tokens_saida,
+                "total_tokens": tokens_entrada + tokens_saida,
+                "prompt_tokens_details": {"cached_tokens": tokens_em_cache},
+            },
+        }
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        caminho = self.path.rstrip("/")
+        if caminho.endswith("/files"):
+            self._criar_arquivo(inicio)
+            return
+        if caminho.endswith("/batches"):
+            self._criar_lote(inicio)
+            return
+        if "/batches/" in caminho and caminho.endswith("/cancel"):
+            self._cancelar_lote(caminho.split("/")[-2], inicio)
+            return
+        if caminho not in ("/v1/chat/completions", "/chat/completions"):
+            self._responder(404, {"error": "não encontrado"}, "desconhecido", inicio)
+            return
+        dados = json.loads(self._ler_corpo() or b"{}")
+        if self._simular("chat", inicio):
+            return
+        corpo = self._completar(dados)
+        if dados.get("stream"):
+            self._responder_fluxo(corpo, dados.get("stream_options") or {}, inicio)
+            return
+        if self.estado.config.latencia_por_token:
+            time.sleep(corpo["usage"]["completion_tokens"] * self.estado.config.latencia_por_token)
+        self._responder(200, corpo, "chat", inicio)
+
+    def _responder_fluxo(self, corpo, opcoes, inicio, palavras_por_pedaco=20):
+        """Resposta em server-sent events, com a latência por token distribuída entre os pedaços"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {k: corpo[k] for k in ("id", "created", "model")}
+        palavras = corpo["choices"][0]["message"]["content"].split(" ")
+        pedacos = [" ".join(palavras[i:i + palavras_por_pedaco]) + (" " if i + palavras_por_pedaco < len(palavras) else "")
+                   for i in range(0, len(palavras), palavras_por_pedaco)]
+        eventos = [{"choices": [{"index": 0, "delta": {"role": "assistant", "content": texto}, "finish_reason": None}]}
+                   for texto in pedacos]
+        eventos.append({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if opcoes.get("include_usage"):
+            eventos.append({"choices": [], "usage": corpo["usage"]})
+        espera = corpo["usage"]["completion_tokens"] * self.estado.config.latencia_por_token / len(eventos)
+        status = 200
+        try:
+            for evento in eventos:
+                if espera:
+                    time.sleep(espera)
+                evento = {**base, "object": "chat.completion.chunk", **evento}
+                self.wfile.write(f"data: {json.dumps(evento)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Cliente cancelou: o resto da resposta não é gerado
+            status = 499
+        self.estado.metricas.registrar("chat", time.perf_counter() - inicio, status)
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        partes = self.path.rstrip("/").split("/")
+        if "files" in partes and partes[-1] == "content":
+            arquivo = self.estado.arquivos.get(partes[-2])
+            if arquivo is None:
+                self._responder(404, {"error": "arquivo inexistente"}, "arquivo", inicio)
+                return
+            self._responder(200, arquivo["conteudo"], "arquivo", inicio, tipo="application/octet-stream")
+        elif "batches" in partes:
+            self._consultar_lote(partes[-1], inicio)
+        else:
+            self._responder(404, {"error": "não encontrado"}, "desconhecido", inicio)
+
+    # API de lotes: arquivo JSONL de pedidos -> lote -> arquivo JSONL de respostas
+
+    def _guardar_arquivo(self, conteudo, nome, finalidade):
+        """Chamar com self.estado.lock adquirido"""
+        arquivo = {
+            "id": "file-" + uuid.uuid4().hex,
+            "object": "file",
+            "bytes": len(conteudo),
+            "created_at": int(time.time()),
+            "filename": nome,
+            "purpose": finalidade,
+            "status": "processed",
+        }
+        self.estado.arquivos[arquivo["id"]] = {**arquivo, "conteudo": conteudo}
+        return arquivo
+
+    def _criar_arquivo(self, inicio):
+        corpo = self._ler_corpo()
+        if self._simular("arquivo", inicio):
+            return
+        # multipart/form-data com os campos "purpose" e "file"
+        mensagem = BytesParser(policy=HTTP).parsebytes(
+            b"Content-Type: " + self.headers.get("Content-Type", "").encode("latin-1") + b"\r\n\r\n" + corpo
+        )
+        campos, nome, conteudo = {}, "lote.jsonl", b""
+        for parte in mensagem.iter_parts():
+            campo = parte.get_param("name", header="content-disposition")
+            if campo == "file":
+                nome = parte.get_filename() or nome
+                conteudo = parte.get_payload(decode=True) or b""
+            else:
+                campos[campo] = (parte.get_payload(decode=True) or b"").decode("utf-8")
+        with self.estado.lock:
+            arquivo = self._guardar_arquivo(conteudo, nome, campos.get("purpose", "batch"))
+        self._responder(200, arquivo, "arquivo", inicio)
+
+    def _criar_lote(self, inicio):
+        dados = json.loads(self._ler_corpo() or b"{}")
+        if self._simular("lote", inicio):
+            return
+        if dados.get("input_file_id") not in self.estado.arquivos:
+            self._responder(400, {"error": {"message": "input_file_id inexistente"}}, "lote", inicio)
+            return
+        agora = int(time.time())
+        total = sum(1 for linha in self.estado.arquivos[dados["input_file_id"]]["conteudo"].splitlines() if linha.strip())
+        lote = {
+            "id": "batch_" + uuid.uuid4().hex,
+            "object": "batch",
+            "endpoint": dados.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": dados["input_file_id"],
+            "completion_window": dados.get("completion_window", "24h"),
+            "status": "validating",
+            "created_at": agora,
+            "expires_at": agora + 24 * 3600,
+            "metadata": dados.get("metadata"),
+            "request_counts": {"total": total, "completed": 0, "failed": 0},
+        }
+        with self.estado.lock:
+            self.estado.lotes[lote["id"]] = {"lote": lote, "pronto_em": time.monotonic() + self.estado.config.duracao_lote}
+        self._responder(200, lote, "lote", inicio)
+
+    def _processar_lote(self, lote):
+        """Responde todos os pedidos do arquivo de entrada, como o provedor faz ao fim da janela"""
+        linhas = self.estado.arquivos[lote["input_file_id"]]["conteudo"].decode("utf-8").splitlines()
+        respostas, erros = [], []
+        for linha in filter(str.strip, linhas):
+            pedido = json.loads(linha)
+            if self.estado.config.taxa_falha_lote and self.estado.rnd.random() < self.estado.config.taxa_falha_lote:
+                erros.append({"id": "batch_req_" + uuid.uuid4().hex, "custom_id": pedido["custom_id"],
+                              "response": {"status_code": 500, "body": {"error": {"message": "falha simulada"}}},
+                              "error": None})
+                continue
+            self.estado.metricas.registrar("pedido_lote", 0.0, 200)
+            respostas.append({"id": "batch_req_" + uuid.uuid4().hex, "custom_id": pedido["custom_id"],
+                              "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                                           "body": self._completar(pedido["body"])},
+                              "error": None})
+
+        def jsonl(itens):
+            return "".join(json.dumps(i, ensure_ascii=False) + "\n" for i in itens).encode("utf-8")
+
+        lote["output_file_id"] = self._guardar_arquivo(jsonl(respostas), "saida.jsonl", "batch_output")["id"]
+        if erros:
+            lote["error_file_id"] = self._guardar_arquivo(jsonl(erros), "erros.jsonl", "batch_output")["id"]
+        lote["request_counts"] = {"total": len(respostas) + len(erros), "completed": len(respostas), "failed": len(erros)}
+        lote["status"] = "completed"
+        lote["completed_at"] = int(time.time())
+
+    def _consultar_lote(self, lote_id, inicio):
+        if self._simular("consulta_lote", inicio):
+            return
+        registro = self.estado.lotes.get(lote_id)
+        if registro is None:
+            self._responder(404, {"error": "lote inexistente"}, "consulta_lote", inicio)
+            return
+        with self.estado.lock:
+            lote = registro["lote"]
+            if lote["status"] in ("validating", "in_progress"):
+                if time.monotonic() >= registro["pronto_em"]:
+                    self._processar_lote(lote)
+                else:
+                    lote["status"] = "in_progress"
+            corpo = dict(lote)
+        self._responder(200, corpo, "consulta_lote", inicio)
+
+    def _cancelar_lote(self, lote_id, inicio):
+        registro = self.estado.lotes.get(lote_id)
+        if registro is None:
+            self._responder(404, {"error": "lote inexistente"}, "lote", inicio)
+            return
+        with self.estado.lock:
+            lote = registro["lote"]
+            if lote["status"] in ("validating", "in_progress"):
+                lote["status"] = "cancelled"
+                lote["cancelled_at"] = int(time.time())
+            corpo = dict(lote)
+        self._responder(200, corpo, "lote", inicio)
+
+
+class ServidorFalso:
+    """Sobe um servidor HTTP em thread própria numa porta livre"""
+
+    def __init__(self, handler, config=None):
+        self.config = config or ConfigServidor()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.estado = EstadoServidor(self.config)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, porta = self.httpd.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    @property
+    def metricas(self):
+        return self.httpd.estado.metricas
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,162 @@
+"""Tempo até o primeiro texto e pico de memória ao baixar a transcrição final
+
+Uso:
+    python benchmarks/transcricao_paginada.py --duracoes 60,240,480 --vazao-mb 4
+
+O servidor AssemblyAI falso devolve a reunião sintética completa (com as
+palavras) em pedaços, a --vazao-mb MB/s. Cada duração roda num subprocesso
+próprio, com tracemalloc ligado, e baixa a mesma transcrição de dois jeitos:
+
+- corpo inteiro: requests.get + response.json(), referência do jeito comum;
+- paginada: poll_transcription com ao_receber_pagina, como a interface faz.
+
+Para cada um: segundos até o primeiro enunciado estar disponível, tempo total
+e pico do tracemalloc acima do que já estava alocado. Sai com código 1 se a
+primeira página da leitura paginada passar de --orcamento-primeira-s ou o
+pico passar do teto (TETOS_MB, ou --teto-mb para todas as durações).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+DIR_SRC = os.path.join(os.path.dirname(DIR_BENCH), "src")
+sys.path.insert(0, DIR_BENCH)
+sys.path.insert(0, DIR_SRC)
+
+from memoria_ata import BYTES_POR_SEGUNDO, medir_fase
+from servidores_falsos import AssemblyAIHandler, ConfigServidor, ServidorFalso
+
+# minutos: pico do tracemalloc da leitura paginada em MB, com folga sobre o medido
+# (8h a 4 MB/s: 2,6 MB e primeira página em 0,6s; o corpo inteiro usa 64 MB e leva 4,4s)
+TETOS_MB = {
+    60: 2,
+    240: 4,
+    480: 6,
+}
+
+
+def executar_cenario(args):
+    """Mede uma duração (subprocesso) e imprime o resultado em JSON"""
+    import tracemalloc
+
+    import requests
+
+    from transcrever import API_KEY, BASE_URL, poll_transcription, request_transcription, upload_file
+
+    caminho_audio = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False).name
+    with open(caminho_audio, "wb") as arquivo:
+        arquivo.truncate(int(args.cenario * 60 * BYTES_POR_SEGUNDO))
+    transcript_id = request_transcription(upload_file(caminho_audio, API_KEY), API_KEY)
+    os.remove(caminho_audio)
+    resultado = {"minutos": args.cenario, "modos": {}}
+    tracemalloc.start()
+
+    def corpo_inteiro():
+        inicio = time.perf_counter()
+        response = requests.get(f"{BASE_URL}/v2/transcript/{transcript_id}", headers={"authorization": API_KEY})
+        dados = response.json()
+        resultado["mb"] = len(response.content) / (1024 * 1024)
+        return len(dados["utterances"]), time.perf_counter() - inicio
+
+    def paginada():
+        inicio = time.perf_counter()
+        primeira = []
+
+        def receber(pagina):
+            if not primeira:
+                primeira.append(time.perf_counter() - inicio)
+
+        dados = poll_transcription(transcript_id, API_KEY, completo=True, ao_receber_pagina=receber)
+        return len(dados["utterances"]), primeira[0] if primeira else None
+
+    for nome, funcao in (("corpo_inteiro", corpo_inteiro), ("paginada", paginada)):
+        (enunciados, primeiro_s), pico, tempo = medir_fase(funcao)
+        resultado["modos"][nome] = {"enunciados": enunciados, "primeiro_s": primeiro_s, "tempo_s": tempo,
+                                    "pico_mb": pico}
+    tracemalloc.stop()
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+def executar(args):
+    config = ConfigServidor(latencia=0.0, fator_processamento=0.0, bytes_por_segundo_audio=BYTES_POR_SEGUNDO,
+                            vazao_download=args.vazao_mb * 1024 * 1024)
+    resultados = []
+    with ServidorFalso(AssemblyAIHandler, config) as assembly:
+        ambiente = dict(os.environ, ASSEMBLYAI_BASE_URL=assembly.url, ASSEMBLYAI_API_KEY="benchmark",
+                        ASSEMBLYAI_INTERVALO_POLLING="0.05", OPENAI_API_KEY="benchmark",
+                        HOME=tempfile.mkdtemp(prefix="transcricao_paginada_home_"))
+        ambiente["USERPROFILE"] = ambiente["HOME"]
+        for minutos in args.duracoes:
+            processo = subprocess.run([sys.executable, os.path.abspath(__file__), "--cenario", str(minutos)],
+                                      capture_output=True, text=True, env=ambiente)
+            linhas = [l for l in processo.stdout.splitlines() if l.startswith("{")]
+            if processo.returncode != 0 or not linhas:
+                resultados.append({"minutos": minutos, "erro": processo.stderr.strip() or "falha no subprocesso"})
+            else:
+                resultados.append(json.loads(linhas[-1]))
+    return resultados
+
+
+def teto(minutos, args):
+    return args.teto_mb or TETOS_MB.get(int(minutos)) or TETOS_MB[max(TETOS_MB)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leitura paginada da transcrição final")
+    parser.add_argument("--duracoes", default="60,240,480", help="Durações das reuniões em minutos")
+    parser.add_argument("--vazao-mb", type=float, default=4.0, help="MB/s da resposta do servidor falso")
+    parser.add_argument("--orcamento-primeira-s", type=float, default=1.0,
+                        help="Tempo máximo até a primeira página de enunciados")
+    parser.add_argument("--teto-mb", type=float, help="Pico do tracemalloc aceito (MB), para todas as durações")
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados brutos em JSON")
+    parser.add_argument("--cenario", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario is not None:
+        executar_cenario(args)
+        return 0
+
+    args.duracoes = [float(d) for d in args.duracoes.split(",")]
+    resultados = executar(args)
+    if args.json:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'min':>5} {'MB':>6} {'modo':<14} {'enunciados':>10} {'1º texto(s)':>11} {'total(s)':>9} {'pico(MB)':>9}")
+        for r in resultados:
+            if "erro" in r:
+                print(f"{r['minutos']:>5.0f} ❌ {r['erro'].splitlines()[-1]}")
+                continue
+            for nome, modo in r["modos"].items():
+                print(f"{r['minutos']:>5.0f} {r['mb']:>6.1f} {nome:<14} {modo['enunciados']:>10} "
+                      f"{modo['primeiro_s']:>11.2f} {modo['tempo_s']:>9.2f} {modo['pico_mb']:>9.1f}")
+
+    problemas = []
+    for r in resultados:
+        if "erro" in r:
+            problemas.append(f"{r['minutos']:.0f} min: {r['erro'].splitlines()[-1]}")
+            continue
+        paginada = r["modos"]["paginada"]
+        if paginada["enunciados"] != r["modos"]["corpo_inteiro"]["enunciados"]:
+            problemas.append(f"{r['minutos']:.0f} min: {paginada['enunciados']} enunciados na leitura paginada, "
+                             f"{r['modos']['corpo_inteiro']['enunciados']} no corpo inteiro")
+        if paginada["primeiro_s"] is None or paginada["primeiro_s"] > args.orcamento_primeira_s:
+            problemas.append(f"{r['minutos']:.0f} min: primeira página em {paginada['primeiro_s']}s "
+                             f"(orçamento {args.orcamento_primeira_s:.2f}s)")
+        if paginada["pico_mb"] > teto(r["minutos"], args):
+            problemas.append(f"{r['minutos']:.0f} min: pico de {paginada['pico_mb']:.1f} MB "
+                             f"(teto {teto(r['minutos'], args):.0f} MB)")
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+    print(f"✅ Primeira página em até {args.orcamento_primeira_s:.2f}s e picos dentro dos tetos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""Arquivo pesquisável (SQLite FTS5) de todas as transcrições e atas geradas
+
+Cada documento é guardado em trechos, com condomínio, data, orador e instante
+quando disponíveis, para que uma busca como "pintura da fachada" devolva em
+milissegundos a assembleia e o ponto exato em que o assunto apareceu.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from indice_bm25 import dividir_em_trechos
+
+CAMINHO_ARQUIVO_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "arquivo.sqlite3")
+
+_RE_TERMO = re.compile(r"\w+")
+
+
+class ArquivoBusca:
+    def __init__(self, caminho=None):
+        caminho = caminho or CAMINHO_ARQUIVO_PADRAO
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS documentos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                caminho TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                condominio TEXT,
+                data TEXT,
+                indexado_em REAL NOT NULL,
+                UNIQUE (caminho, tipo)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS trechos USING fts5(
+                texto,
+                orador,
+                documento_id UNINDEXED,
+                inicio_ms UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        self.conexao.commit()
+
+    def indexar(self, caminho, tipo, trechos, condominio=None, data=None, caminho_anterior=None):
+        """Indexa (ou reindexa) um documento
+
+        trechos é uma lista de dicts com "texto" e, opcionalmente, "orador" e "inicio_ms".
+        caminho_anterior: o documento já indexado ali passa para caminho (mesma linha, metadados
+        atualizados), em vez de ficar uma segunda cópia.
+        """
+        caminho = os.path.abspath(caminho)
+        with self.lock:
+            linha = self.conexao.execute(
+                "SELECT id FROM documentos WHERE caminho = ? AND tipo = ?", (caminho, tipo)
+            ).fetchone()
+            anterior = None
+            if caminho_anterior and os.path.abspath(caminho_anterior) != caminho:
+                anterior = self.conexao.execute(
+                    "SELECT id FROM documentos WHERE caminho = ? AND tipo = ?", (os.path.abspath(caminho_anterior), tipo)
+                ).fetchone()
+            if anterior and linha:
+                # Já havia documento nos dois caminhos: fica só o do caminho novo
+                self.conexao.execute("DELETE FROM trechos WHERE documento_id = ?", (anterior[0],))
+                self.conexao.execute("DELETE FROM documentos WHERE id = ?", (anterior[0],))
+            elif anterior:
+                linha = anterior
+            if linha:
+                self.conexao.execute("DELETE FROM trechos WHERE documento_id = ?", (linha[0],))
+                self.conexao.execute(
+                    "UPDATE documentos SET caminho = ?, condominio = ?, data = ?, indexado_em = ? WHERE id = ?",
+                    (caminho, condominio, data, time.time(), linha[0]),
+                )
+                documento_id = linha[0]
+            else:
+                cursor = self.conexao.execute(
+                    "INSERT INTO documentos (caminho, tipo, condominio, data, indexado_em) VALUES (?, ?, ?, ?, ?)",
+                    (caminho, tipo, condominio, data, time.time()),
+                )
+                documento_id = cursor.lastrowid
+            self.conexao.executemany(
+                "INSERT INTO trechos (texto, orador, documento_id, inicio_ms) VALUES (?, ?, ?, ?)",
+                [
+                    (t["texto"], t.get("orador"), documento_id, t.get("inicio_ms"))
+                    for t in trechos if t.get("texto")
+                ],
+            )
+            self.conexao.commit()
+        return documento_id
+
+    def indexar_transcricao(self, caminho, texto, condominio=None, data=None, enunciados=None, caminho_anterior=None):
+        """Transcrição por enunciado (com orador e instante) ou, sem eles, por trechos de sentenças
+
+        enunciados vêm da AssemblyAI (speaker/start/text) ou da tabela da interface (orador/inicio/texto).
+        """
+        if enunciados:
+            trechos = [
+                {
+                    "texto": e.get("text", e.get("texto")),
+                    "orador": e.get("speaker") or e.get("orador") or None,
+                    "inicio_ms": e.get("start", e.get("inicio")),
+                }
+                for e in enunciados
+            ]
+        else:
+            trechos = [{"texto": t} for t in dividir_em_trechos(texto)]
+        return self.indexar(caminho, "transcricao", trechos, condominio, data, caminho_anterior)
+
+    def indexar_ata(self, caminho, paragrafos, condominio=None, data=None):
+        trechos = [{"texto": p} for p in paragrafos if p and p.strip()]
+        return self.indexar(caminho, "ata", trechos, condominio, data)
+
+    def buscar(self, consulta, limite=20, condominio=None, tipo=None):
+        """Trechos mais relevantes (BM25 do FTS5), com metadados e destaque"""
+        termos = _RE_TERMO.findall(consulta)
+        if not termos:
+            return []
+        # Cada termo entre aspas: evita que a sintaxe do FTS5 interprete o texto do usuário
+        expressao = " ".join(f'"{t}"' for t in termos)
+
+        sql = """
+            SELECT d.caminho, d.tipo, d.condominio, d.data, t.orador, t.inicio_ms,
+                   snippet(trechos, 0, '[', ']', '…', 16), bm25(trechos)
+            FROM trechos t
+            JOIN documentos d ON d.id = t.documento_id
+            WHERE trechos MATCH ?
+        """
+        parametros = [expressao]
+        if condominio:
+            sql += " AND d.condominio LIKE ?"
+            parametros.append(f"%{condominio}%")
+        if tipo:
+            sql += " AND d.tipo = ?"
+            parametros.append(tipo)
+        sql += " ORDER BY bm25(trechos) LIMIT ?"
+        parametros.append(limite)
+
+        with self.lock:
+            linhas = self.conexao.execute(sql, parametros).fetchall()
+        return [
+            {
+                "caminho": l[0], "tipo": l[1], "condominio": l[2], "data": l[3],
+                "orador": l[4], "inicio_ms": l[5], "trecho": l[6], "pontuacao": l[7],
+            }
+            for l in linhas
+        ]
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
+
+
+def formatar_resultado(resultado):
+    """Linha legível de um resultado de busca"""
+    partes = [resultado["data"] or "sem data", resultado["condominio"] or "condomínio não informado", resultado["tipo"]]
+    if resultado["orador"]:
+        partes.append(f"orador {resultado['orador']}")
+    if resultado["inicio_ms"] is not None:
+        segundos = int(resultado["inicio_ms"]) // 1000
+        partes.append(f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}")
+    return " | ".join(partes) + f"\n    {resultado['trecho']}"
+
+
+_arquivo = None
+_lock_arquivo = threading.Lock()
+
+
+def obter_arquivo():
+    """Instância compartilhada do arquivo padrão"""
+    global _arquivo
+    with _lock_arquivo:
+        if _arquivo is None:
+            _arquivo = ArquivoBusca()
+        return _arquivo
+
+
+def arquivar_transcricao(caminho, transcricao, enunciados=None, info_assembleia=None):
+    """Indexa uma transcrição concluída, antes de haver ata (falhas só geram aviso)
+
+    Quando a ata é salva, arquivar_assembleia(..., caminho_transcricao=caminho) move este
+    documento para o caminho da ata, com condomínio e data.
+    """
+    info_assembleia = info_assembleia or {}
+    try:
+        obter_arquivo().indexar_transcricao(caminho, transcricao, info_assembleia.get("nome_condominio"),
+                                            info_assembleia.get("data_assembleia"), enunciados)
+    except Exception as e:
+        print(f"Aviso: não foi possível indexar a transcrição para busca: {e}")
+
+
+def arquivar_assembleia(caminho_ata, transcricao, paragrafos, info_assembleia=None, enunciados=None,
+                        caminho_transcricao=None):
+    """Indexa a transcrição e a ata de uma assembleia (falhas não interrompem a geração)
+
+    Com enunciados, cada trecho da transcrição guarda o orador e o instante.
+    caminho_transcricao: onde arquivar_transcricao indexou a mesma transcrição; aquele
+    documento passa a ser o da ata, para a reunião não aparecer duas vezes na busca.
+    """
+    info_assembleia = info_assembleia or {}
+    condominio = info_assembleia.get("nome_condominio")
+    data = info_assembleia.get("data_assembleia")
+    try:
+        arquivo = obter_arquivo()
+        arquivo.indexar_transcricao(caminho_ata, transcricao, condominio, data, enunciados, caminho_transcricao)
+        arquivo.indexar_ata(caminho_ata, paragrafos, condominio, data)
+    except Exception as e:
+        print(f"Aviso: não foi possível indexar a ata para busca: {e}")
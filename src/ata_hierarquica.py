@@ -0,0 +1,213 @@
+"""Modo hierárquico (map-reduce) para assembleias muito longas
+
+No modo por blocos, cada bloco de 3500 tokens vira uma narração independente:
+o contexto se repete e o texto final cresce junto com a reunião. Aqui:
+
+1. map: os blocos são condensados em paralelo em notas estruturadas
+   (tópicos, propostas, votações, decisões), com saída limitada;
+2. reduce: enquanto as notas não couberem em poucas chamadas finais, grupos de
+   notas consecutivas são consolidados (o que junta tópicos repetidos);
+3. no máximo ATA_MAX_SECOES chamadas redigem as seções formais da ata.
+
+Nenhum prompt passa de ATA_ORCAMENTO_TOKENS; o valor é conferido antes de
+cada chamada.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import tiktoken
+
+from perfil import perfilado
+from progresso import relatar
+from prompts import EstatisticasCache, mensagens_consolidacao, mensagens_notas, mensagens_secao_formal
+from roteador_modelos import ModeloFixo, roteador
+
+ORCAMENTO_PROMPT = int(os.getenv("ATA_ORCAMENTO_TOKENS", "12000"))
+# Transcrições acima disso (em tokens) usam o modo hierárquico quando ATA_MODO=auto
+LIMIAR_HIERARQUICO = int(os.getenv("ATA_LIMIAR_HIERARQUICO", "30000"))
+MAX_SECOES = int(os.getenv("ATA_MAX_SECOES", "6"))
+MAX_PARALELO = int(os.getenv("ATA_PARALELO", "4"))
+TOKENS_BLOCO = 3500
+MAX_TOKENS_NOTAS = 800
+MAX_TOKENS_SECAO = 4000
+MAX_NIVEIS = 5
+# Folga para a contagem aproximada das mensagens (papéis, separadores)
+MARGEM = 200
+
+@lru_cache(maxsize=1)
+def _codificador():
+    # Carregado só no primeiro uso: importar o módulo não deve depender de rede
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def contar_tokens(texto):
+    return len(_codificador().encode(texto))
+
+
+def tokens_mensagens(mensagens):
+    return sum(contar_tokens(m["content"]) + 4 for m in mensagens)
+
+
+def usar_modo_hierarquico(transcricao, modo=None):
+    """modo: "blocos", "hierarquico" ou "auto" (padrão: ATA_MODO do .env)"""
+    modo = modo or os.getenv("ATA_MODO", "auto")
+    if modo == "hierarquico":
+        return True
+    if modo == "blocos":
+        return False
+    return contar_tokens(transcricao) > LIMIAR_HIERARQUICO
+
+
+class EstatisticasHierarquia:
+    def __init__(self, cache=None):
+        # Tokens em cache vão para a EstatisticasCache da ata, se quem chamou passou uma
+        self.cache = cache or EstatisticasCache()
+        self.chamadas = 0
+        self.maior_prompt = 0
+        self.niveis = []
+
+    def resumo(self):
+        etapas = " → ".join(f"{n} {rotulo}" for rotulo, n in self.niveis)
+        return (f"Modo hierárquico: {etapas}; {self.chamadas} chamadas, "
+                f"maior prompt {self.maior_prompt} tokens (orçamento {ORCAMENTO_PROMPT})")
+
+
+def _chamar(etapa, client, mensagens, max_tokens, estatisticas, json_saida=False, cancelamento=None, fixo=None):
+    tamanho = tokens_mensagens(mensagens)
+    if tamanho + MARGEM > ORCAMENTO_PROMPT:
+        raise ValueError(f"Prompt de {tamanho} tokens excede o orçamento de {ORCAMENTO_PROMPT} tokens")
+    kwargs = {"response_format": {"type": "json_object"}} if json_saida else {}
+    response = roteador.chamar(
+        etapa, client, fixo=fixo, cancelamento=cancelamento,
+        messages=mensagens, temperature=0.1 if json_saida else 0.2, max_tokens=max_tokens, **kwargs
+    )
+    estatisticas.cache.registrar(response)
+    estatisticas.chamadas += 1
+    estatisticas.maior_prompt = max(estatisticas.maior_prompt, tamanho)
+    return response.choices[0].message.content
+
+
+def ler_topicos(conteudo):
+    """Lista de tópicos da resposta; texto fora do formato vira um único tópico"""
+    try:
+        topicos = json.loads(conteudo).get("topicos")
+        if isinstance(topicos, list):
+            return [t for t in topicos if isinstance(t, dict)]
+    except (ValueError, AttributeError):
+        pass
+    return [{"titulo": "", "resumo": conteudo.strip()}] if conteudo and conteudo.strip() else []
+
+
+def _serializar(topicos):
+    return json.dumps({"topicos": topicos}, ensure_ascii=False)
+
+
+@perfilado("tokenizacao")
+def dividir_em_blocos(transcricao, tamanho):
+    codificador = _codificador()
+    tokens = codificador.encode(transcricao)
+    return [codificador.decode(tokens[i:i + tamanho]) for i in range(0, len(tokens), tamanho)]
+
+
+@perfilado("tokenizacao")
+def agrupar_por_orcamento(topicos, limite):
+    """Grupos de tópicos consecutivos cujo JSON cabe em limite tokens"""
+    grupos, atual, tamanho_atual = [], [], 0
+    for topico in topicos:
+        tamanho = contar_tokens(json.dumps(topico, ensure_ascii=False)) + 2
+        if tamanho > limite:
+            # Tópico isolado maior que o limite (resposta fora do padrão): corta o resumo
+            codificador = _codificador()
+            resumo = codificador.decode(codificador.encode(str(topico.get("resumo", "")))[:limite // 2])
+            topico = dict(topico, resumo=resumo)
+            tamanho = contar_tokens(json.dumps(topico, ensure_ascii=False)) + 2
+        if atual and tamanho_atual + tamanho > limite:
+            grupos.append(atual)
+            atual, tamanho_atual = [], 0
+        atual.append(topico)
+        tamanho_atual += tamanho
+    if atual:
+        grupos.append(atual)
+    return grupos
+
+
+def _espaco_livre(mensagens_vazias, reserva=0):
+    """Tokens disponíveis para o conteúdo variável de um prompt"""
+    livre = ORCAMENTO_PROMPT - tokens_mensagens(mensagens_vazias) - MARGEM - reserva
+    if livre <= 0:
+        raise ValueError(f"ATA_ORCAMENTO_TOKENS={ORCAMENTO_PROMPT} não comporta nem as instruções do prompt")
+    return livre
+
+
+def gerar_secoes_hierarquicas(client, transcricao, info_assembleia, report=print, cancelamento=None,
+                              estatisticas_cache=None):
+    """Lista de textos formais (um por seção) para a transcrição inteira"""
+    estatisticas = EstatisticasHierarquia(estatisticas_cache)
+    executor = ThreadPoolExecutor(max_workers=MAX_PARALELO)
+    try:
+        # 1. map: blocos -> notas
+        tamanho_bloco = min(TOKENS_BLOCO, _espaco_livre(mensagens_notas("", info_assembleia, 0, 0), reserva=20))
+        blocos = dividir_em_blocos(transcricao, tamanho_bloco)
+        estatisticas.niveis.append(("blocos", len(blocos)))
+        report(f"Condensando {len(blocos)} blocos em notas estruturadas...")
+        condensados = [0]
+        lock = threading.Lock()
+
+        def condensar(indice_bloco):
+            indice, bloco = indice_bloco
+            mensagens = mensagens_notas(bloco, info_assembleia, indice + 1, len(blocos))
+            topicos = ler_topicos(_chamar("notas", client, mensagens, MAX_TOKENS_NOTAS, estatisticas, True, cancelamento))
+            with lock:
+                condensados[0] += 1
+                feitos = condensados[0]
+            # Blocos terminam fora de ordem (paralelo); o barramento fica só com o mais recente
+            relatar(report, blocos_feitos=feitos, blocos_total=len(blocos))
+            return topicos
+
+        topicos = [t for notas in executor.map(condensar, enumerate(blocos)) for t in notas]
+        estatisticas.niveis.append(("tópicos", len(topicos)))
+
+        # 2. reduce: consolida até caber em MAX_SECOES chamadas finais
+        limite_secao = _espaco_livre(mensagens_secao_formal("", info_assembleia))
+        limite_consolidacao = _espaco_livre(mensagens_consolidacao("", info_assembleia))
+        grupos = agrupar_por_orcamento(topicos, limite_secao)
+        nivel = 0
+        while len(grupos) > MAX_SECOES and nivel < MAX_NIVEIS:
+            nivel += 1
+            lotes = agrupar_por_orcamento(topicos, limite_consolidacao)
+            report(f"Consolidando notas (nível {nivel}): {len(topicos)} tópicos em {len(lotes)} lotes...")
+
+            def consolidar(lote):
+                mensagens = mensagens_consolidacao(_serializar(lote), info_assembleia)
+                return ler_topicos(_chamar("consolidacao", client, mensagens, MAX_TOKENS_NOTAS, estatisticas, True, cancelamento))
+
+            topicos = [t for notas in executor.map(consolidar, lotes) for t in notas]
+            estatisticas.niveis.append((f"tópicos (nível {nivel})", len(topicos)))
+            grupos = agrupar_por_orcamento(topicos, limite_secao)
+
+        if len(grupos) > MAX_SECOES:
+            # Respostas que não encolhem: segue com mais seções em vez de estourar o orçamento
+            report(f"Aviso: notas ainda ocupam {len(grupos)} seções após {MAX_NIVEIS} níveis de consolidação")
+
+        # 3. seções formais
+        estatisticas.niveis.append(("seções", len(grupos)))
+        report(f"Redigindo {len(grupos)} seções da ata...")
+
+        # Todas as seções com o mesmo modelo, para a ata ter um estilo só
+        modelo_fixo = ModeloFixo()
+
+        def redigir(grupo):
+            mensagens = mensagens_secao_formal(_serializar(grupo), info_assembleia)
+            return _chamar("formal", client, mensagens, MAX_TOKENS_SECAO, estatisticas, cancelamento=cancelamento,
+                           fixo=modelo_fixo)
+
+        secoes = list(executor.map(redigir, grupos))
+    finally:
+        # Cancelado ou com erro: descarta o que ainda não começou
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    report(estatisticas.resumo())
+    return secoes
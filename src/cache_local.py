@@ -0,0 +1,81 @@
+"""Cache em disco (SQLite) para transcrições e respostas do LLM"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CAMINHO_CACHE_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "cache.sqlite3")
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo, lido em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_objeto(obj):
+    """SHA-256 de um objeto serializável em JSON (chaves ordenadas)"""
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class CacheLocal:
+    def __init__(self, caminho=None):
+        caminho = caminho or CAMINHO_CACHE_PADRAO
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                espaco TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                PRIMARY KEY (espaco, chave)
+            )
+        """)
+        self.conexao.commit()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, espaco, chave):
+        with self.lock:
+            linha = self.conexao.execute(
+                "SELECT valor FROM cache WHERE espaco = ? AND chave = ?", (espaco, chave)
+            ).fetchone()
+            if linha is None:
+                self.faltas += 1
+                return None
+            self.acertos += 1
+        return json.loads(linha[0])
+
+    def guardar(self, espaco, chave, valor):
+        with self.lock:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO cache (espaco, chave, valor, criado_em) VALUES (?, ?, ?, ?)",
+                (espaco, chave, json.dumps(valor, ensure_ascii=False), time.time()),
+            )
+            self.conexao.commit()
+
+    def remover(self, espaco, chave):
+        with self.lock:
+            self.conexao.execute("DELETE FROM cache WHERE espaco = ? AND chave = ?", (espaco, chave))
+            self.conexao.commit()
+
+
+_cache = None
+_lock_cache = threading.Lock()
+
+
+def obter_cache():
+    """Cache compartilhado pelo processo (~/.transcrever_ata/cache.sqlite3)"""
+    global _cache
+    with _lock_cache:
+        if _cache is None:
+            _cache = CacheLocal()
+        return _cache
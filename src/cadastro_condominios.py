@@ -0,0 +1,292 @@
+"""Cadastro local dos condomínios administrados
+
+Nome, apelidos, CNPJ, endereço, local habitual da assembleia e a última mesa
+(presidente e secretário) ficam em ~/.transcrever_ata/condominios.sqlite3. O
+condomínio é reconhecido na transcrição sem IA:
+
+1. varredura Aho–Corasick de todos os nomes e apelidos normalizados (sem
+   acentos, minúsculas) — uma passada pelo texto, qualquer que seja o tamanho
+   do cadastro;
+2. se nada aparecer literalmente, busca aproximada palavra a palavra apenas na
+   abertura da reunião, onde o nome costuma ser dito, para pegar grafias da
+   transcrição como "Milenium Residense".
+
+O reconhecido preenche o diálogo de informações e o contexto dos prompts.
+"""
+import difflib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import defaultdict, deque
+
+import regex
+
+CAMINHO_CADASTRO_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "condominios.sqlite3")
+
+# Trecho inicial da transcrição usado na busca aproximada
+CARACTERES_ABERTURA = 20000
+# Busca aproximada: palavras curtas ou genéricas não identificam um condomínio
+TAMANHO_MINIMO_PALAVRA = 4
+SEMELHANCA_MINIMA = 0.8
+PALAVRAS_GENERICAS = {"condominio", "edificio", "residencial", "residence", "conjunto", "predio"}
+
+# Cadastro inicial: o condomínio que antes estava fixo no código
+CONDOMINIOS_INICIAIS = [
+    {
+        "nome": "CONDOMÍNIO MILLENNIUM RESIDENCE",
+        "apelidos": ["Millennium Residence", "Millennium", "Milênio Residence"],
+        "cnpj": "47.688.457/0001-02",
+        "endereco": "Avenida Engenheiro Valdir Pedro Monachesi, n° 1.400, no bairro Aeroporto, em Juiz de Fora, Minas Gerais",
+        "local_habitual": "pelo Zoom dentro do aplicativo Condomob condomínios",
+    },
+]
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples"""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return " ".join(regex.sub(r"[^\w]+", " ", texto).split())
+
+
+def _limite(anterior, posterior):
+    """Casamento só vale em fronteira de palavra"""
+    return not (anterior and anterior.isalnum()) and not (posterior and posterior.isalnum())
+
+
+class AhoCorasick:
+    """Autômato para achar vários padrões numa única passada pelo texto"""
+
+    def __init__(self, padroes):
+        self.transicoes = [{}]
+        self.falha = [0]
+        self.saidas = [[]]
+        for chave, padrao in padroes:
+            estado = 0
+            for caractere in padrao:
+                if caractere not in self.transicoes[estado]:
+                    self.transicoes.append({})
+                    self.falha.append(0)
+                    self.saidas.append([])
+                    self.transicoes[estado][caractere] = len(self.transicoes) - 1
+                estado = self.transicoes[estado][caractere]
+            self.saidas[estado].append((chave, len(padrao)))
+
+        # Links de falha em largura; cada estado herda as saídas do seu link
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self.transicoes[estado].items():
+                fila.append(proximo)
+                falha = self.falha[estado]
+                while falha and caractere not in self.transicoes[falha]:
+                    falha = self.falha[falha]
+                self.falha[proximo] = self.transicoes[falha].get(caractere, 0)
+                self.saidas[proximo] = self.saidas[proximo] + self.saidas[self.falha[proximo]]
+
+    def buscar(self, texto):
+        """Gera (chave, início, fim) de cada ocorrência"""
+        estado = 0
+        for i, caractere in enumerate(texto):
+            while estado and caractere not in self.transicoes[estado]:
+                estado = self.falha[estado]
+            estado = self.transicoes[estado].get(caractere, 0)
+            for chave, tamanho in self.saidas[estado]:
+                yield chave, i - tamanho + 1, i + 1
+
+
+class CadastroCondominios:
+    def __init__(self, caminho=None):
+        caminho = caminho or CAMINHO_CADASTRO_PADRAO
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.row_factory = sqlite3.Row
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS condominios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                nome_normalizado TEXT NOT NULL UNIQUE,
+                apelidos TEXT NOT NULL DEFAULT '[]',
+                cnpj TEXT,
+                endereco TEXT,
+                local_habitual TEXT,
+                presidente_nome TEXT,
+                presidente_apartamento TEXT,
+                secretario_nome TEXT,
+                secretario_apartamento TEXT,
+                atualizado_em REAL NOT NULL
+            )
+        """)
+        self.conexao.commit()
+        self._automato = None
+        if not self.listar():
+            for condominio in CONDOMINIOS_INICIAIS:
+                self.salvar(condominio)
+
+    def fechar(self):
+        self.conexao.close()
+
+    @staticmethod
+    def _para_dict(linha):
+        condominio = dict(linha)
+        condominio["apelidos"] = json.loads(condominio["apelidos"] or "[]")
+        condominio.pop("nome_normalizado", None)
+        return condominio
+
+    def listar(self):
+        with self.lock:
+            linhas = self.conexao.execute("SELECT * FROM condominios ORDER BY nome").fetchall()
+        return [self._para_dict(l) for l in linhas]
+
+    def obter_por_nome(self, nome):
+        """Pelo nome ou por um apelido, ignorando acentos e maiúsculas"""
+        alvo = normalizar(nome)
+        if not alvo:
+            return None
+        for condominio in self.listar():
+            if alvo in {normalizar(n) for n in [condominio["nome"], *condominio["apelidos"]]}:
+                return condominio
+        return None
+
+    def salvar(self, condominio):
+        """Insere ou atualiza (pelo nome); campos ausentes mantêm o valor cadastrado"""
+        nome = condominio["nome"].strip()
+        campos = ["cnpj", "endereco", "local_habitual", "presidente_nome", "presidente_apartamento",
+                  "secretario_nome", "secretario_apartamento"]
+        existente = self.obter_por_nome(nome)
+        with self.lock:
+            if existente:
+                apelidos = list(dict.fromkeys(existente["apelidos"] + list(condominio.get("apelidos") or [])))
+                valores = {c: condominio.get(c) or existente.get(c) for c in campos}
+                self.conexao.execute(
+                    f"UPDATE condominios SET apelidos = ?, {', '.join(f'{c} = ?' for c in campos)}, atualizado_em = ? "
+                    "WHERE id = ?",
+                    [json.dumps(apelidos, ensure_ascii=False), *valores.values(), time.time(), existente["id"]],
+                )
+            else:
+                self.conexao.execute(
+                    f"INSERT INTO condominios (nome, nome_normalizado, apelidos, {', '.join(campos)}, atualizado_em) "
+                    f"VALUES (?, ?, ?, {', '.join('?' for _ in campos)}, ?)",
+                    [nome, normalizar(nome), json.dumps(list(condominio.get("apelidos") or []), ensure_ascii=False),
+                     *(condominio.get(c) for c in campos), time.time()],
+                )
+            self.conexao.commit()
+            self._automato = None
+
+    def remover(self, nome):
+        condominio = self.obter_por_nome(nome)
+        if not condominio:
+            return False
+        with self.lock:
+            self.conexao.execute("DELETE FROM condominios WHERE id = ?", (condominio["id"],))
+            self.conexao.commit()
+            self._automato = None
+        return True
+
+    def _padroes(self, condominios):
+        for condominio in condominios:
+            for nome in {normalizar(n) for n in [condominio["nome"], *condominio["apelidos"]]}:
+                # "condominio millennium residence" também é dito só "millennium residence"
+                sem_prefixo = regex.sub(r"^(?:condominio|edificio|residencial)\s+", "", nome)
+                for padrao in {nome, sem_prefixo}:
+                    if padrao:
+                        yield condominio["id"], padrao
+
+    def identificar(self, transcricao):
+        """Condomínio citado na transcrição (dict do cadastro) ou None"""
+        condominios = {c["id"]: c for c in self.listar()}
+        if not condominios or not transcricao:
+            return None
+        texto = normalizar(transcricao)
+
+        with self.lock:
+            if self._automato is None:
+                self._automato = AhoCorasick(self._padroes(condominios.values()))
+            automato = self._automato
+        # Pontua pelo tamanho do trecho casado: "millennium residence" vale mais que "millennium"
+        pontos = defaultdict(int)
+        for chave, inicio, fim in automato.buscar(texto):
+            anterior = texto[inicio - 1] if inicio > 0 else ""
+            posterior = texto[fim] if fim < len(texto) else ""
+            if _limite(anterior, posterior):
+                pontos[chave] += fim - inicio
+        if pontos:
+            return condominios[max(pontos, key=pontos.get)]
+        return self._identificar_aproximado(texto[:CARACTERES_ABERTURA], condominios.values())
+
+    def _identificar_aproximado(self, abertura, condominios):
+        """Cada palavra distintiva do nome precisa ter uma parecida na abertura"""
+        vocabulario = {p for p in abertura.split() if len(p) >= TAMANHO_MINIMO_PALAVRA}
+        semelhancas = {}
+
+        def semelhanca(palavra):
+            if palavra not in semelhancas:
+                parecidas = difflib.get_close_matches(palavra, vocabulario, n=1, cutoff=SEMELHANCA_MINIMA)
+                semelhancas[palavra] = difflib.SequenceMatcher(None, palavra, parecidas[0]).ratio() if parecidas else 0.0
+            return semelhancas[palavra]
+
+        pontos = defaultdict(float)
+        for id_condominio, padrao in self._padroes(condominios):
+            palavras = [p for p in padrao.split() if len(p) >= TAMANHO_MINIMO_PALAVRA and p not in PALAVRAS_GENERICAS]
+            notas = [semelhanca(p) for p in palavras]
+            if notas and min(notas) >= SEMELHANCA_MINIMA:
+                pontos[id_condominio] = max(pontos[id_condominio], sum(n * len(p) for n, p in zip(notas, palavras)))
+        if not pontos:
+            return None
+        melhores = sorted(pontos.values(), reverse=True)
+        if len(melhores) > 1 and melhores[0] == melhores[1]:
+            # Empate entre condomínios diferentes: melhor perguntar ao usuário do que chutar
+            return None
+        melhor = max(pontos, key=pontos.get)
+        return next(c for c in condominios if c["id"] == melhor)
+
+
+def campos_do_condominio(condominio):
+    """Campos de info_assembleia que vêm do cadastro"""
+    if not condominio:
+        return {}
+    campos = {
+        "nome_condominio": condominio["nome"],
+        "cnpj_condominio": condominio.get("cnpj") or "",
+        "endereco_condominio": condominio.get("endereco") or "",
+        "local_realizacao": condominio.get("local_habitual") or "",
+    }
+    return {campo: valor for campo, valor in campos.items() if valor}
+
+
+def registrar_assembleia(info_assembleia, cadastro=None):
+    """Após gerar a ata: cadastra o condomínio novo ou atualiza a última mesa"""
+    nome = (info_assembleia or {}).get("nome_condominio", "").strip()
+    if not nome:
+        return
+    mesa = {}
+    for campo in ("presidente_nome", "presidente_apartamento", "secretario_nome", "secretario_apartamento"):
+        valor = info_assembleia.get(campo)
+        if valor and valor not in ("N/A", "A ser definido"):
+            mesa[campo] = valor
+    try:
+        (cadastro or obter_cadastro()).salvar({
+            "nome": nome,
+            "cnpj": info_assembleia.get("cnpj_condominio"),
+            "endereco": info_assembleia.get("endereco_condominio"),
+            "local_habitual": info_assembleia.get("local_realizacao"),
+            **mesa,
+        })
+    except Exception as e:
+        print(f"Aviso: não foi possível atualizar o cadastro de condomínios: {e}")
+
+
+_cadastro = None
+_lock_cadastro = threading.Lock()
+
+
+def obter_cadastro():
+    global _cadastro
+    with _lock_cadastro:
+        if _cadastro is None:
+            _cadastro = CadastroCondominios()
+        return _cadastro
@@ -0,0 +1,115 @@
+"""Cancelamento cooperativo de transcrições e geração de atas
+
+Substitui o QThread.terminate(), que deixava sockets e arquivos abertos e o job
+remoto rodando. O token é repassado por upload, polling, chamadas ao LLM e
+gravação do .docx; cada etapa confere o token nos seus pontos de espera e
+encerra com Cancelado.
+
+O que é interrompido de fato e o que não é:
+- uploads param no próximo bloco enviado (fluxo_cancelavel);
+- chamadas ao LLM vêm em streaming e a conexão é fechada no próximo pedaço da
+  resposta (roteador_modelos.py), o que encerra a geração no provedor;
+- requisições HTTP curtas feitas com executar (envio do pedido, consultas de
+  status) não são abortadas: quem cancelou segue na hora, mas a requisição
+  termina em segundo plano, limitada pelo timeout dela. Por isso toda chamada
+  passada a executar precisa ter timeout.
+"""
+import threading
+import time
+
+
+class Cancelado(Exception):
+    """Operação interrompida a pedido do usuário"""
+
+
+class TokenCancelamento:
+    def __init__(self):
+        self._evento = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelado(self):
+        return self._evento.is_set()
+
+    def cancelar(self):
+        with self._lock:
+            if self._evento.is_set():
+                return
+            self._evento.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Aviso: erro ao cancelar: {e}")
+
+    def ao_cancelar(self, callback):
+        """Registra uma ação de limpeza; roda na hora se já estiver cancelado"""
+        with self._lock:
+            if not self._evento.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def verificar(self):
+        if self._evento.is_set():
+            raise Cancelado("Operação cancelada pelo usuário")
+
+    def esperar(self, segundos):
+        """time.sleep que acorda assim que o token é cancelado"""
+        self._evento.wait(segundos)
+        self.verificar()
+
+    def executar(self, funcao, *args, **kwargs):
+        """Roda uma chamada bloqueante (HTTP) sem prender quem cancelou
+
+        A chamada segue numa thread auxiliar; se o token for cancelado antes da
+        resposta, o chamador recebe Cancelado na hora e o resultado é descartado.
+        A chamada em si não é interrompida: continua até responder ou estourar o
+        próprio timeout, então use só com requisições curtas e com timeout.
+        """
+        self.verificar()
+        resultado = {}
+        pronto = threading.Event()
+
+        def alvo():
+            try:
+                resultado["valor"] = funcao(*args, **kwargs)
+            except BaseException as e:
+                resultado["erro"] = e
+            finally:
+                pronto.set()
+
+        threading.Thread(target=alvo, daemon=True).start()
+        while not pronto.wait(0.1):
+            self.verificar()
+        if "erro" in resultado:
+            raise resultado["erro"]
+        return resultado["valor"]
+
+
+def verificar(cancelamento):
+    """Atalho para os parâmetros opcionais cancelamento=None"""
+    if cancelamento is not None:
+        cancelamento.verificar()
+
+
+def executar(cancelamento, funcao, *args, **kwargs):
+    if cancelamento is None:
+        return funcao(*args, **kwargs)
+    return cancelamento.executar(funcao, *args, **kwargs)
+
+
+def esperar(cancelamento, segundos):
+    if cancelamento is None:
+        time.sleep(segundos)
+    else:
+        cancelamento.esperar(segundos)
+
+
+def fluxo_cancelavel(blocos, cancelamento):
+    """Envolve um iterável de bytes do upload: o envio para no próximo bloco"""
+    for bloco in blocos:
+        verificar(cancelamento)
+        yield bloco
@@ -0,0 +1,304 @@
+"""Ponto de entrada sem interface gráfica
+
+Exemplos:
+    python cli.py monitorar "C:\\Gravacoes" --paralelo 2 --metricas 9464
+    python cli.py servidor --host 0.0.0.0 --porta 8765
+    python cli.py buscar "pintura da fachada" --condominio Millennium
+    python cli.py estimar reuniao.mp3 --transcricao reuniao.txt
+    python cli.py pipeline reuniao.mp3 --saida ata.docx
+    python cli.py recortar reuniao.mp3 --inicio 01:12:05 --fim 01:13:40
+    python cli.py --perfil pipeline reuniao.mp3 --saida ata.docx
+    python cli.py --perfil-pasta perfis estimar reuniao.mp3
+    python cli.py condominios adicionar "CONDOMÍNIO SOLAR DAS ÁGUAS" --apelido "Solar das Águas" --cnpj 00.000.000/0001-00
+    python cli.py lote enviar reuniao1.txt reuniao2.txt --pasta-saida atas
+    python cli.py lote acompanhar --intervalo 300
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+
+# .env fora da pasta src (mesma regra do main.py)
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+env_path = os.path.join(project_root, ".env")
+if os.path.exists(env_path):
+    from dotenv import load_dotenv
+    load_dotenv(env_path)
+
+
+def acompanhar_progresso():
+    """Andamento numérico (bytes, blocos) dos eventos de progresso no terminal"""
+    from progresso import ImpressoraProgresso, barramento
+
+    return barramento.assinar(ImpressoraProgresso())
+
+
+def comando_monitorar(args):
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from monitor_pasta import MonitorPasta
+
+    app = QCoreApplication(sys.argv)
+    acompanhar_progresso()
+    if args.metricas:
+        from progresso import ExportadorMetricas, barramento, servir_metricas
+
+        exportador = ExportadorMetricas()
+        barramento.assinar(exportador)
+        servir_metricas(exportador, porta=args.metricas)
+        print(f"📈 Métricas em http://127.0.0.1:{args.metricas}/metrics")
+    monitor = MonitorPasta(
+        args.pasta,
+        caminho_fila=args.fila,
+        max_paralelo=args.paralelo,
+        estabilidade_s=args.estabilidade,
+        pipeline=args.pipeline,
+    )
+    monitor.iniciar()
+
+    # Ctrl+C encerra o loop do Qt; o timer devolve o controle ao Python para tratar o sinal
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(500)
+
+    codigo = app.exec()
+    monitor.parar()
+    return codigo
+
+
+def comando_servidor(args):
+    from servidor_jobs import criar_servidor
+
+    try:
+        httpd = criar_servidor(host=args.host, porta=args.porta, workers=args.workers, pasta_trabalho=args.pasta,
+                               token=args.token)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    print(f"🚀 Servidor de jobs em http://{args.host}:{args.porta} ({args.workers} workers)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.servidor_jobs.parar()
+        httpd.server_close()
+    return 0
+
+
+def comando_buscar(args):
+    from arquivo_busca import ArquivoBusca, formatar_resultado
+
+    arquivo = ArquivoBusca(args.arquivo)
+    resultados = arquivo.buscar(args.consulta, limite=args.limite, condominio=args.condominio, tipo=args.tipo)
+    for resultado in resultados:
+        print(f"{resultado['caminho']}\n  {formatar_resultado(resultado)}")
+    print(f"{len(resultados)} resultado(s)")
+    arquivo.fechar()
+    return 0
+
+
+def comando_estimar(args):
+    from estimativa import estimar_ata, estimar_transcricao, resumo_ata, resumo_transcricao
+
+    if args.audio:
+        print(resumo_transcricao(estimar_transcricao(args.audio)))
+    if args.transcricao:
+        with open(args.transcricao, "r", encoding="utf-8") as f:
+            print(resumo_ata(estimar_ata(f.read())))
+    return 0
+
+
+def comando_pipeline(args):
+    from pipeline_ata import transcrever_e_gerar_ata
+
+    caminhos = args.audio if len(args.audio) > 1 else args.audio[0]
+    acompanhar_progresso()
+    texto, _ = transcrever_e_gerar_ata(caminhos, args.saida)
+    if args.transcricao:
+        with open(args.transcricao, "w", encoding="utf-8") as f:
+            f.write(texto)
+    return 0
+
+
+def comando_recortar(args):
+    from concatenar_audio import MapaArquivos
+    from recorte_audio import MARGEM_MS, ler_instante, recortar_trecho
+
+    mapa = MapaArquivos(args.audio) if len(args.audio) > 1 else None
+    margem = MARGEM_MS if args.margem_ms is None else args.margem_ms
+    inicio = time.perf_counter()
+    destino = recortar_trecho(args.audio, ler_instante(args.inicio), ler_instante(args.fim), args.saida,
+                              mapa_arquivos=mapa, margem_ms=margem)
+    print(f"✓ Trecho salvo em {destino} ({time.perf_counter() - inicio:.2f}s)")
+    return 0
+
+
+def comando_condominios(args):
+    from cadastro_condominios import CadastroCondominios
+
+    cadastro = CadastroCondominios(args.cadastro)
+    if args.acao == "listar":
+        for condominio in cadastro.listar():
+            apelidos = ", ".join(condominio["apelidos"])
+            print(f"{condominio['nome']} (CNPJ {condominio['cnpj'] or '?'})"
+                  f"{f' - apelidos: {apelidos}' if apelidos else ''}\n  {condominio['endereco'] or 'endereço não informado'}")
+    elif args.acao == "adicionar":
+        cadastro.salvar({
+            "nome": args.nome,
+            "apelidos": args.apelido,
+            "cnpj": args.cnpj,
+            "endereco": args.endereco,
+            "local_habitual": args.local,
+        })
+        print(f"✓ {args.nome} cadastrado")
+    elif args.acao == "remover":
+        print(f"✓ {args.nome} removido" if cadastro.remover(args.nome) else f"✗ {args.nome} não está no cadastro")
+    elif args.acao == "identificar":
+        with open(args.transcricao, "r", encoding="utf-8") as f:
+            condominio = cadastro.identificar(f.read())
+        print(condominio["nome"] if condominio else "Nenhum condomínio do cadastro encontrado na transcrição")
+    cadastro.fechar()
+    return 0
+
+
+def comando_lote(args):
+    from estimativa import estimar_ata
+    from lote_ata import FATOR_PRECO_LOTE, LotesAtas, preparar_ata
+
+    lotes = LotesAtas(args.banco)
+    try:
+        if args.acao == "enviar":
+            atas = []
+            for caminho in args.transcricao:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    texto = f.read()
+                nome = os.path.splitext(os.path.basename(caminho))[0] + ".docx"
+                pasta = args.pasta_saida or os.path.dirname(os.path.abspath(caminho))
+                atas.append(preparar_ata(texto, os.path.join(pasta, nome)))
+            if args.pasta_saida:
+                os.makedirs(args.pasta_saida, exist_ok=True)
+            lote_id = lotes.criar(atas)
+            custo = sum(estimar_ata(a["transcricao"])["custo"] for a in atas)
+            print(f"✓ Lote {lote_id} enviado com {len(atas)} ata(s), custo ~US$ {custo * FATOR_PRECO_LOTE:.2f} "
+                  f"(interativo ~US$ {custo:.2f}); acompanhe com: python cli.py lote acompanhar")
+            if args.acompanhar:
+                lotes.acompanhar(args.intervalo)
+        elif args.acao == "acompanhar":
+            lotes.acompanhar(args.intervalo)
+            print("✓ Nenhum lote pendente")
+        elif args.acao == "listar":
+            for lote in lotes.listar():
+                erro = f" - {lote['erro']}" if lote["erro"] else ""
+                print(f"Lote {lote['id']} ({lote['fase']}): {lote['estado']}{erro}")
+                for caminho in lote["atas"]:
+                    print(f"  {caminho}")
+    finally:
+        lotes.fechar()
+    return 0
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Transcrever ATA - modo sem interface")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Perfila as etapas de CPU local (tokenização, JSON, .docx); mesmo que PERFIL_CPU=1")
+    parser.add_argument("--perfil-pasta", metavar="PASTA",
+                        help="Onde gravar os perfis (padrão: PERFIL_PASTA ou ~/.transcrever_ata/perfis); implica --perfil")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    monitorar = subparsers.add_parser("monitorar", help="Gera atas para gravações novas de uma pasta")
+    monitorar.add_argument("pasta", help="Pasta onde o gravador salva os arquivos")
+    monitorar.add_argument("--paralelo", type=int, default=2, help="Gravações processadas ao mesmo tempo")
+    monitorar.add_argument("--estabilidade", type=float, default=5.0,
+                           help="Segundos sem mudança de tamanho antes de considerar a cópia concluída")
+    monitorar.add_argument("--fila", help="Arquivo SQLite da fila de jobs")
+    monitorar.add_argument("--pipeline", action="store_true",
+                           help="Gera a ata enquanto a gravação ainda está sendo transcrita")
+    monitorar.add_argument("--metricas", type=int, metavar="PORTA",
+                           help="Expõe as métricas de progresso (formato Prometheus) nesta porta")
+    monitorar.set_defaults(funcao=comando_monitorar)
+
+    servidor = subparsers.add_parser("servidor", help="Servidor local de jobs compartilhado pelas estações")
+    servidor.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 para aceitar outras máquinas")
+    servidor.add_argument("--porta", type=int, default=8765)
+    servidor.add_argument("--workers", type=int, default=4, help="Jobs processados ao mesmo tempo")
+    servidor.add_argument("--pasta", help="Pasta de trabalho para áudios e atas")
+    servidor.add_argument("--token", help="Token exigido das estações (padrão: TRANSCREVER_SERVIDOR_TOKEN)")
+    servidor.set_defaults(funcao=comando_servidor)
+
+    buscar = subparsers.add_parser("buscar", help="Busca nas transcrições e atas já geradas")
+    buscar.add_argument("consulta", help="Palavras a procurar")
+    buscar.add_argument("--condominio", help="Filtra pelo nome do condomínio")
+    buscar.add_argument("--tipo", choices=["ata", "transcricao"])
+    buscar.add_argument("--limite", type=int, default=20)
+    buscar.add_argument("--arquivo", help="Arquivo SQLite do índice de busca")
+    buscar.set_defaults(funcao=comando_buscar)
+
+    estimar = subparsers.add_parser("estimar", help="Prevê tempo e custo a partir do histórico local")
+    estimar.add_argument("audio", nargs="*", help="Gravação(ões) da assembleia")
+    estimar.add_argument("--transcricao", help="Transcrição (.txt) para estimar a geração da ata")
+    estimar.set_defaults(funcao=comando_estimar)
+
+    pipeline = subparsers.add_parser("pipeline", help="Transcreve e gera a ata com as duas etapas sobrepostas")
+    pipeline.add_argument("audio", nargs="+", help="Gravação(ões) da assembleia, em ordem")
+    pipeline.add_argument("--saida", default="ata_gerada.docx", help="Arquivo .docx da ata")
+    pipeline.add_argument("--transcricao", help="Também grava a transcrição neste .txt")
+    pipeline.set_defaults(funcao=comando_pipeline)
+
+    recortar = subparsers.add_parser("recortar", help="Recorta o áudio de um trecho (tempos da transcrição)")
+    recortar.add_argument("audio", nargs="+", help="Gravação(ões) da assembleia, na ordem em que foram transcritas")
+    recortar.add_argument("--inicio", required=True, help="Início do trecho (hh:mm:ss)")
+    recortar.add_argument("--fim", required=True, help="Fim do trecho (hh:mm:ss)")
+    recortar.add_argument("--saida", help="Arquivo do recorte (padrão: ao lado da gravação)")
+    recortar.add_argument("--margem-ms", type=int, default=None,
+                          help="Folga antes e depois do trecho (padrão RECORTE_MARGEM_MS)")
+    recortar.set_defaults(funcao=comando_recortar)
+
+    condominios = subparsers.add_parser("condominios", help="Cadastro local dos condomínios administrados")
+    condominios.add_argument("--cadastro", help="Arquivo SQLite do cadastro")
+    acoes = condominios.add_subparsers(dest="acao", required=True)
+    acoes.add_parser("listar", help="Lista os condomínios cadastrados")
+    adicionar = acoes.add_parser("adicionar", help="Cadastra ou atualiza um condomínio")
+    adicionar.add_argument("nome", help='Nome como deve sair na ata (ex.: "CONDOMÍNIO SOLAR DAS ÁGUAS")')
+    adicionar.add_argument("--apelido", action="append", default=[],
+                           help="Outra forma de citar o condomínio na reunião (pode repetir)")
+    adicionar.add_argument("--cnpj")
+    adicionar.add_argument("--endereco", help="Endereço como deve sair no parágrafo de abertura")
+    adicionar.add_argument("--local", help="Local habitual das assembleias")
+    remover = acoes.add_parser("remover", help="Remove um condomínio do cadastro")
+    remover.add_argument("nome")
+    identificar = acoes.add_parser("identificar", help="Mostra o condomínio reconhecido numa transcrição")
+    identificar.add_argument("transcricao", help="Transcrição (.txt)")
+    condominios.set_defaults(funcao=comando_condominios)
+
+    lote = subparsers.add_parser("lote", help="Atas sem urgência pela API de lotes da OpenAI (metade do preço, até 24h)")
+    # Opções comuns às ações, aceitas depois do nome da ação
+    opcoes_lote = argparse.ArgumentParser(add_help=False)
+    opcoes_lote.add_argument("--banco", help="Arquivo SQLite dos lotes")
+    opcoes_lote.add_argument("--intervalo", type=float,
+                             help="Segundos entre consultas ao provedor (padrão LOTE_INTERVALO_S)")
+    acoes_lote = lote.add_subparsers(dest="acao", required=True)
+    enviar = acoes_lote.add_parser("enviar", parents=[opcoes_lote], help="Empacota as transcrições num lote e envia")
+    enviar.add_argument("transcricao", nargs="+", help="Transcrição(ões) (.txt); cada uma vira uma ata")
+    enviar.add_argument("--pasta-saida", help="Pasta dos .docx (padrão: ao lado de cada transcrição)")
+    enviar.add_argument("--acompanhar", action="store_true", help="Fica aguardando e monta as atas ao final")
+    acoes_lote.add_parser("acompanhar", parents=[opcoes_lote],
+                          help="Consulta os lotes pendentes até terminarem e monta as atas")
+    acoes_lote.add_parser("listar", parents=[opcoes_lote], help="Lista os lotes e suas atas")
+    lote.set_defaults(funcao=comando_lote)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.perfil or args.perfil_pasta:
+        from perfil import ativar
+
+        print(f"📊 Perfil de CPU ativado ({ativar(args.perfil_pasta)})")
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
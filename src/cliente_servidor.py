@@ -0,0 +1,136 @@
+"""Cliente do servidor local de jobs (servidor_jobs.py)
+
+Quando TRANSCREVER_SERVIDOR_URL está definido no .env, o MainWindow usa estas
+funções no lugar de transcrever_audio e gerar_ata_formal: o trabalho roda no
+servidor e a estação só envia o áudio e baixa o resultado.
+"""
+import os
+import socket
+import time
+
+import requests
+
+from arquivo_busca import arquivar_assembleia
+from cancelamento import Cancelado, esperar, executar, fluxo_cancelavel
+from concatenar_audio import fluxo_concatenado, normalizar_caminhos
+from perfil import medir
+from progresso import CAMPOS_NUMERICOS, ETAPAS_FINAIS, TRANSCRICAO, UPLOAD, como_progresso, contar_bytes, relatar
+
+SERVIDOR_URL = (os.getenv("TRANSCREVER_SERVIDOR_URL") or "").rstrip("/")
+ID_CLIENTE = os.getenv("TRANSCREVER_CLIENTE") or socket.gethostname()
+# Token compartilhado exigido pelo servidor (o mesmo TRANSCREVER_SERVIDOR_TOKEN dele)
+TOKEN = os.getenv("TRANSCREVER_SERVIDOR_TOKEN") or ""
+INTERVALO_CONSULTA = 1.0
+
+
+def _headers():
+    return {"X-Cliente": ID_CLIENTE, "X-Token": TOKEN}
+
+
+def cancelar_job(job_id):
+    """Pede ao servidor que cancele o job (melhor esforço)"""
+    try:
+        requests.post(f"{SERVIDOR_URL}/jobs/{job_id}/cancelar", headers=_headers(), timeout=10)
+    except requests.RequestException as e:
+        print(f"Aviso: não foi possível cancelar o job {job_id} no servidor: {e}")
+
+
+def _aguardar(job, status_callback=None, timeout=None, cancelamento=None):
+    """Consulta o job até concluir; no cancelamento local, cancela também o job no servidor"""
+    try:
+        return _consultar(job, status_callback, timeout, cancelamento)
+    except Cancelado:
+        cancelar_job(job["id"])
+        raise
+
+
+def _consultar(job, status_callback, timeout, cancelamento):
+    """Repassa as mensagens e os eventos tipados do servidor até o job terminar"""
+    inicio = time.time()
+    ultimo_progresso = None
+    ultimo_evento = None
+    while True:
+        evento = job.get("evento")
+        if evento and evento["instante"] != ultimo_evento and evento["etapa"] not in ETAPAS_FINAIS:
+            # Etapa e quantidades do servidor; o evento final fica com o dono do job local
+            campos = {c: evento[c] for c in CAMPOS_NUMERICOS if evento.get(c) is not None}
+            relatar(status_callback, evento["mensagem"], evento["etapa"], **campos)
+            ultimo_evento = evento["instante"]
+            ultimo_progresso = job["progresso"]
+        elif job["progresso"] != ultimo_progresso:
+            relatar(status_callback, job["progresso"])
+            ultimo_progresso = job["progresso"]
+        if job["estado"] == "concluido":
+            return job
+        if job["estado"] == "erro":
+            raise Exception(f"Erro no servidor: {job['erro']}")
+        if job["estado"] == "cancelado":
+            raise Cancelado()
+        if timeout and time.time() - inicio > timeout:
+            raise TimeoutError("Timeout aguardando o servidor de jobs")
+        esperar(cancelamento, INTERVALO_CONSULTA)
+        response = executar(cancelamento, requests.get, f"{SERVIDOR_URL}/jobs/{job['id']}", headers=_headers(),
+                            timeout=10)
+        response.raise_for_status()
+        job = response.json()
+
+
+def transcrever_remoto(caminho_arquivo, status_callback=None, cancelamento=None):
+    """Mesma interface de transcrever_audio, executado no servidor"""
+    progresso = como_progresso(status_callback)
+
+    def report(msg, etapa=None):
+        progresso.relatar(msg, etapa)
+        print(msg)
+
+    caminhos = normalizar_caminhos(caminho_arquivo)
+    total = sum(os.path.getsize(c) for c in caminhos)
+    report("📤 Enviando áudio ao servidor...", UPLOAD)
+    if len(caminhos) > 1:
+        dados = contar_bytes(fluxo_cancelavel(fluxo_concatenado(caminhos), cancelamento), total, progresso)
+        response = requests.post(f"{SERVIDOR_URL}/jobs/transcricao", headers=_headers(), data=dados)
+    else:
+        with open(caminhos[0], "rb") as f:
+            dados = fluxo_cancelavel(iter(lambda: f.read(1024 * 1024), b""), cancelamento)
+            response = requests.post(f"{SERVIDOR_URL}/jobs/transcricao", headers=_headers(),
+                                     data=contar_bytes(dados, total, progresso))
+    response.raise_for_status()
+
+    report("⏳ Aguardando o servidor...", TRANSCRICAO)
+    job = _aguardar(response.json(), progresso, cancelamento=cancelamento)
+    response = requests.get(f"{SERVIDOR_URL}/jobs/{job['id']}/resultado", headers=_headers())
+    response.raise_for_status()
+    with medir("json"):
+        texto = response.json()["texto"]
+    report("✅ Transcrição concluída!")
+    return texto
+
+
+def gerar_ata_remoto(transcricao, caminho_saida="ata_gerada.docx", status_callback=None, info_assembleia=None,
+                     cancelamento=None, enunciados=None, caminho_transcricao=None):
+    """Mesma interface de gerar_ata_formal, executado no servidor
+
+    enunciados e caminho_transcricao ficam na estação: só o arquivo de busca local os usa.
+    """
+    report = como_progresso(status_callback or print)
+
+    report("Enviando transcrição ao servidor...")
+    response = requests.post(
+        f"{SERVIDOR_URL}/jobs/ata",
+        headers=_headers(),
+        json={"transcricao": transcricao, "info_assembleia": info_assembleia},
+    )
+    response.raise_for_status()
+    job = _aguardar(response.json(), report, cancelamento=cancelamento)
+
+    response = requests.get(f"{SERVIDOR_URL}/jobs/{job['id']}/resultado", headers=_headers(), stream=True)
+    response.raise_for_status()
+    with open(caminho_saida, "wb") as f:
+        for bloco in response.iter_content(1024 * 1024):
+            f.write(bloco)
+
+    # O arquivo de busca é local: cada estação indexa as atas que baixou
+    from docx import Document
+    paragrafos = [p.text for p in Document(caminho_saida).paragraphs]
+    arquivar_assembleia(caminho_saida, transcricao, paragrafos, info_assembleia, enunciados, caminho_transcricao)
+    report(f"Ata gerada com sucesso: {caminho_saida}")
@@ -0,0 +1,222 @@
+import bisect
+import os
+import re
+import shutil
+import subprocess
+
+TAMANHO_BLOCO = 1024 * 1024  # 1 MB por leitura
+
+# Formatos que podem ser emendados byte a byte (fluxos de quadros independentes)
+EXTENSOES_CONCATENAVEIS = {".mp3"}
+
+
+def normalizar_caminhos(caminhos):
+    """Aceita um caminho ou uma lista e devolve sempre uma lista"""
+    if isinstance(caminhos, (str, os.PathLike)):
+        return [os.fspath(caminhos)]
+    return [os.fspath(c) for c in caminhos]
+
+
+def ordenar_naturalmente(caminhos):
+    """Ordem dos nomes com os números pelo valor: "parte2" antes de "parte10" (gravações divididas)"""
+    def chave(caminho):
+        nome = os.path.basename(caminho).lower()
+        return [(0, int(p), "") if p.isdigit() else (1, 0, p) for p in re.split(r"(\d+)", nome) if p]
+    return sorted(normalizar_caminhos(caminhos), key=chave)
+
+
+def duracao_audio(caminho):
+    """Duração em segundos via ffprobe (None se não for possível medir)"""
+    try:
+        import ffmpeg
+        info = ffmpeg.probe(caminho)
+        return float(info["format"]["duration"])
+    except Exception as e:
+        print(f"Aviso: não foi possível obter a duração de {caminho}: {e}")
+        return None
+
+
+class MapaArquivos:
+    """Guarda o deslocamento de cada arquivo dentro do áudio concatenado"""
+
+    def __init__(self, caminhos, duracoes=None):
+        self.caminhos = normalizar_caminhos(caminhos)
+        if duracoes is None:
+            duracoes = [duracao_audio(c) for c in self.caminhos]
+        self.duracoes_ms = [int(d * 1000) if d is not None else None for d in duracoes]
+
+        # inicios_ms[i] = instante (no áudio emendado) em que começa o arquivo i
+        self.inicios_ms = []
+        acumulado = 0
+        for duracao in self.duracoes_ms:
+            self.inicios_ms.append(acumulado)
+            if duracao is None:
+                acumulado = None
+                break
+            acumulado += duracao
+        self.completo = acumulado is not None
+
+    def localizar(self, ms):
+        """Converte um timestamp do áudio emendado em (caminho, ms dentro do arquivo)"""
+        if not self.completo:
+            raise ValueError("Durações desconhecidas: não é possível mapear timestamps")
+        indice = max(0, bisect.bisect_right(self.inicios_ms, ms) - 1)
+        return self.caminhos[indice], ms - self.inicios_ms[indice]
+
+    def para_global(self, caminho, ms):
+        """Converte (caminho, ms local) em timestamp do áudio emendado"""
+        indice = self.caminhos.index(os.fspath(caminho))
+        if indice >= len(self.inicios_ms):
+            raise ValueError("Durações desconhecidas: não é possível mapear timestamps")
+        return self.inicios_ms[indice] + ms
+
+
+def tamanho_id3(cabecalho):
+    """Tamanho da tag ID3v2 no início de um MP3 (0 se não houver)"""
+    if len(cabecalho) < 10 or cabecalho[:3] != b"ID3":
+        return 0
+    tamanho = 0
+    for byte in cabecalho[6:10]:
+        tamanho = (tamanho << 7) | (byte & 0x7F)
+    rodape = 10 if cabecalho[5] & 0x10 else 0
+    return 10 + tamanho + rodape
+
+
+def fim_do_audio(f):
+    """Posição onde terminam os quadros de um MP3, antes das tags ID3v1 e APEv2 do fim do arquivo"""
+    fim = f.seek(0, os.SEEK_END)
+    # ID3v1: 128 bytes começando com "TAG"
+    if fim >= 128:
+        f.seek(fim - 128)
+        if f.read(3) == b"TAG":
+            fim -= 128
+    # APEv2: rodapé de 32 bytes "APETAGEX" com o tamanho da tag (cabeçalho opcional à parte)
+    if fim >= 32:
+        f.seek(fim - 32)
+        rodape = f.read(32)
+        if rodape[:8] == b"APETAGEX":
+            tamanho = int.from_bytes(rodape[12:16], "little")
+            if int.from_bytes(rodape[20:24], "little") & 0x80000000:
+                tamanho += 32
+            if tamanho <= fim:
+                fim -= tamanho
+    return fim
+
+
+def _ler_arquivo(caminho, pular_id3=False, pular_rodape=False):
+    """Bytes do arquivo; nas emendas, sem as tags que ficariam no meio do áudio"""
+    with open(caminho, "rb") as f:
+        restante = fim_do_audio(f) if pular_rodape else f.seek(0, os.SEEK_END)
+        f.seek(0)
+        if pular_id3:
+            inicio = tamanho_id3(f.read(10))
+            f.seek(inicio)
+            restante -= inicio
+        while restante > 0:
+            bloco = f.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def _ler_ffmpeg(caminhos):
+    """Decodifica e reencoda em MP3 via ffmpeg, lendo a saída em blocos"""
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("ffmpeg não encontrado: necessário para juntar arquivos que não são MP3")
+    comando = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    for caminho in caminhos:
+        comando += ["-i", caminho]
+    entradas = "".join(f"[{i}:a]" for i in range(len(caminhos)))
+    comando += [
+        "-filter_complex", f"{entradas}concat=n={len(caminhos)}:v=0:a=1[a]",
+        "-map", "[a]", "-f", "mp3", "pipe:1",
+    ]
+    processo = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            bloco = processo.stdout.read(TAMANHO_BLOCO)
+            if not bloco:
+                break
+            yield bloco
+        if processo.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou: {processo.stderr.read().decode(errors='replace')}")
+    finally:
+        if processo.poll() is None:
+            processo.kill()
+        processo.stdout.close()
+        processo.stderr.close()
+
+
+def fluxo_concatenado(caminhos):
+    """Gera os bytes dos arquivos em sequência, sem carregar tudo na memória"""
+    caminhos = normalizar_caminhos(caminhos)
+    for caminho in caminhos:
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+    extensoes = {os.path.splitext(c)[1].lower() for c in caminhos}
+    if extensoes <= EXTENSOES_CONCATENAVEIS:
+        for i, caminho in enumerate(caminhos):
+            yield from _ler_arquivo(caminho, pular_id3=i > 0, pular_rodape=i < len(caminhos) - 1)
+    else:
+        yield from _ler_ffmpeg(caminhos)
+
+
+def _segmentar_ffmpeg(caminho, janela_s, duracao, pasta):
+    """Cortes por tempo com cópia do stream (-c copy): sem reencodar, quase instantâneo"""
+    extensao = os.path.splitext(caminho)[1]
+    segmentos = []
+    inicio = 0.0
+    while inicio < duracao:
+        destino = os.path.join(pasta, f"segmento_{len(segmentos):03d}{extensao}")
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+             "-ss", f"{inicio:.3f}", "-t", f"{janela_s:.3f}", "-i", caminho, "-c", "copy", destino],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        segmentos.append((destino, inicio))
+        inicio += janela_s
+    return segmentos
+
+
+def _segmentar_bytes(caminho, janela_s, duracao, pasta):
+    """MP3 sem ffmpeg: corta por tamanho (os decodificadores ressincronizam no próximo frame)"""
+    tamanho = os.path.getsize(caminho)
+    bytes_por_janela = max(TAMANHO_BLOCO, int(tamanho * janela_s / duracao))
+    segmentos = []
+    with open(caminho, "rb") as origem:
+        while True:
+            inicio_bytes = origem.tell()
+            destino = os.path.join(pasta, f"segmento_{len(segmentos):03d}.mp3")
+            copiado = 0
+            with open(destino, "wb") as f:
+                while copiado < bytes_por_janela:
+                    bloco = origem.read(min(TAMANHO_BLOCO, bytes_por_janela - copiado))
+                    if not bloco:
+                        break
+                    f.write(bloco)
+                    copiado += len(bloco)
+            if not copiado:
+                os.remove(destino)
+                break
+            segmentos.append((destino, duracao * inicio_bytes / tamanho))
+    return segmentos
+
+
+def segmentar_audio(caminho, janela_s, pasta, duracao=None):
+    """Divide a gravação em janelas de janela_s segundos dentro de pasta
+
+    Retorna [(caminho_segmento, inicio_s), ...] em ordem. duracao pode ser
+    informada quando já conhecida (ou estimada, sem ffprobe).
+    """
+    duracao = duracao or duracao_audio(caminho)
+    if not duracao:
+        raise RuntimeError(f"Não foi possível medir a duração de {caminho}")
+    if duracao <= janela_s:
+        return [(caminho, 0.0)]
+    if shutil.which("ffmpeg"):
+        return _segmentar_ffmpeg(caminho, janela_s, duracao, pasta)
+    if os.path.splitext(caminho)[1].lower() in EXTENSOES_CONCATENAVEIS:
+        return _segmentar_bytes(caminho, janela_s, duracao, pasta)
+    raise RuntimeError("ffmpeg não encontrado: necessário para dividir arquivos que não são MP3")
@@ -0,0 +1,234 @@
+"""Condensação local da transcrição antes da redação pelo LLM
+
+A fala de uma assembleia tem muito que não muda o conteúdo da ata e que o LLM
+cobra como qualquer outro token:
+
+- vícios de linguagem ("né", "tipo assim", "hã", "ééé");
+- disfluências: palavras e começos de frase repetidos ("eu vou, eu vou
+  falar"), palavras cortadas ("fal- falar");
+- vários enunciados seguidos do mesmo orador (cada um numa linha);
+- frases repetidas quase iguais (eco de dois microfones, alguém repetindo a
+  proposta para quem chegou).
+
+Tudo por regras, sem IA. Números são preservados ("apartamento dois dois" é o
+22) e frases curtas também ("Sim." de cada morador é voto), por isso a
+deduplicação só olha frases a partir de MIN_PALAVRAS_DUPLICADA palavras.
+"""
+import os
+import unicodedata
+from collections import Counter, deque
+from functools import lru_cache
+
+import regex
+
+from extracao_local import VALORES
+from memoria_limitada import iterar_linhas
+
+# ATA_CONDENSAR=0 manda a transcrição sem alterações para o LLM
+CONDENSAR = os.getenv("ATA_CONDENSAR", "1").strip().lower() not in ("0", "false", "nao", "não")
+MIN_PALAVRAS_DUPLICADA = 6
+SEMELHANCA_DUPLICADA = 0.85
+# Quantas frases anteriores são comparadas com cada frase nova
+JANELA_DUPLICADAS = 8
+TOKENS_BLOCO = 3500
+
+# Interjeições e hesitações, sozinhas entre vírgulas/pontos ("um" sozinho é artigo/numeral: só "umm", "hum")
+_HESITACOES = regex.compile(
+    r"(?i)(?<![\w-])(?:h+[ãa]+h*|[ãa]+h+|ã{2,}|a{3,}h*|é{2,}|e{3,}h*|h+u+m+|h+m+|u+h+u+m+|u+m{2,}|a+h+n+|eh|uh)(?![\w-])[,.…]*"
+)
+# Marcadores de conversa que não entram numa ata
+_MARCADORES = regex.compile(
+    r"(?i)(?<![\w-])(?:tipo assim|vamos dizer assim|digamos assim|por assim dizer|sabe\?|entendeu\?|"
+    r"(?<=,\s?)tá\?)(?![\w-])[,]?"
+)
+# "né" de confirmação: ", né?" vira ponto final; entre vírgulas some
+_NE_FINAL = regex.compile(r"(?i),?\s*\bné\b\s*\?")
+_NE = regex.compile(r"(?i),?\s*\bné\b,?")
+# "É, ..." no começo de frase (o verbo "é" no meio da frase fica)
+_E_INICIAL = regex.compile(r"(?i)(?:^|(?<=[.!?]\s))é(?:[,.…]+\s*|\s+é\b[,.…]*\s*)")
+# Palavra cortada seguida da palavra inteira: "fal- falar"
+_CORTADA = regex.compile(r"(?<![\w-])\w+-\s+(?=\w)")
+# Unidade (1 a 4 palavras) repetida em seguida: "o o", "eu vou, eu vou"
+_REPETICAO = regex.compile(r"(?i)(?<!\w)((?:\w+[ ,]+){0,3}?\w+)(?:[ ,]+\1)+(?!\w)")
+_FRASES = regex.compile(r"(?<=[.!?…])\s+")
+_ESPACOS = regex.compile(r"[ \t]+")
+_PONTUACAO = regex.compile(r"\s+([,.!?…])")
+_VIRGULAS = regex.compile(r",(?:\s*,)+")
+_VIRGULA_PONTO = regex.compile(r",\s*([.!?…])")
+_INICIO_SUJO = regex.compile(r"^[\s,.…]+")
+# Frase que ficou começando em minúscula depois de uma remoção ("todos, né. Hã, vamos")
+_MINUSCULA_INICIAL = regex.compile(r"([.!?]\s+)(\p{Ll})")
+
+
+@lru_cache(maxsize=1)
+def _codificador():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def contar_tokens(texto):
+    return len(_codificador().encode(texto))
+
+
+def _numerica(unidade):
+    return all(p.isdigit() or p.lower() in VALORES for p in regex.split(r"[ ,]+", unidade) if p)
+
+
+def _normalizada(frase):
+    frase = unicodedata.normalize("NFKD", frase.lower())
+    return regex.findall(r"\w+", "".join(c for c in frase if not unicodedata.combining(c)))
+
+
+class EstatisticasCondensacao:
+    def __init__(self):
+        self.tokens_antes = 0
+        self.tokens_depois = 0
+        self.removidos = Counter()
+
+    @property
+    def economizados(self):
+        return self.tokens_antes - self.tokens_depois
+
+    def resumo(self):
+        if not self.tokens_antes:
+            return "Condensação local: transcrição vazia"
+        blocos_antes = -(-self.tokens_antes // TOKENS_BLOCO)
+        blocos_depois = -(-self.tokens_depois // TOKENS_BLOCO) if self.tokens_depois else 0
+        detalhes = ", ".join(f"{n} {tipo}" for tipo, n in self.removidos.most_common() if n)
+        return (f"Condensação local: {self.tokens_antes} → {self.tokens_depois} tokens "
+                f"(-{self.economizados}, {100 * self.economizados / self.tokens_antes:.1f}%), "
+                f"~{blocos_antes} → ~{blocos_depois} blocos" + (f"; {detalhes}" if detalhes else ""))
+
+
+class Condensador:
+    """Aplica as regras enunciado a enunciado, lembrando as frases recentes
+
+    Uma instância pode receber a transcrição aos pedaços (janelas do modo em
+    pipeline): as frases repetidas são reconhecidas entre pedaços e as
+    estatísticas se acumulam.
+    """
+
+    def __init__(self):
+        self.estatisticas = EstatisticasCondensacao()
+        self.recentes = deque(maxlen=JANELA_DUPLICADAS)
+
+    def _substituir(self, padrao, troca, texto, tipo):
+        texto, n = padrao.subn(troca, texto)
+        self.estatisticas.removidos[tipo] += n
+        return texto
+
+    def _sem_repeticao(self, m):
+        if _numerica(m.group(1)):
+            return m.group(0)
+        self.estatisticas.removidos["repetições"] += 1
+        return m.group(1)
+
+    def limpar(self, texto):
+        """Vícios de linguagem e disfluências de um enunciado"""
+        texto = self._substituir(_MARCADORES, "", texto, "vícios de linguagem")
+        texto = self._substituir(_NE_FINAL, ".", texto, "vícios de linguagem")
+        texto = self._substituir(_NE, ",", texto, "vícios de linguagem")
+        texto = self._substituir(_HESITACOES, "", texto, "hesitações")
+        texto = self._substituir(_E_INICIAL, "", texto, "hesitações")
+        texto = self._substituir(_CORTADA, "", texto, "palavras cortadas")
+        # Até estabilizar: "Eu eu vou, eu vou" só vira "Eu vou" na segunda passada
+        while True:
+            sem_repeticao = _REPETICAO.sub(self._sem_repeticao, texto)
+            if sem_repeticao == texto:
+                break
+            texto = sem_repeticao
+
+        texto = _ESPACOS.sub(" ", texto)
+        texto = _PONTUACAO.sub(r"\1", texto)
+        texto = _VIRGULAS.sub(",", texto)
+        texto = _VIRGULA_PONTO.sub(r"\1", texto)
+        texto = _INICIO_SUJO.sub("", texto).strip()
+        texto = _MINUSCULA_INICIAL.sub(lambda m: m.group(1) + m.group(2).upper(), texto)
+        return texto[:1].upper() + texto[1:]
+
+    def _duplicada(self, palavras):
+        if len(palavras) < MIN_PALAVRAS_DUPLICADA:
+            return False
+        conjunto = set(palavras)
+        # "recebeu 12 votos" e "recebeu 15 votos" são votações diferentes, por mais parecidas que sejam
+        numeros = [p for p in palavras if p.isdigit() or p in VALORES]
+        for anterior, numeros_anterior in self.recentes:
+            if numeros != numeros_anterior:
+                continue
+            if anterior == conjunto or len(anterior & conjunto) / len(anterior | conjunto) >= SEMELHANCA_DUPLICADA:
+                return True
+        self.recentes.append((conjunto, numeros))
+        return False
+
+    def sem_duplicadas(self, texto):
+        frases = []
+        for frase in _FRASES.split(texto):
+            if frase and self._duplicada(_normalizada(frase)):
+                self.estatisticas.removidos["frases repetidas"] += 1
+                continue
+            frases.append(frase)
+        return " ".join(frases)
+
+    def iterar(self, enunciados):
+        """Linhas condensadas uma a uma; guarda só a linha do orador atual"""
+        linha, orador_anterior = None, object()
+        for orador, texto in enunciados:
+            texto = self.sem_duplicadas(self.limpar(texto or ""))
+            if not texto:
+                continue
+            if orador and orador == orador_anterior and linha is not None:
+                # Mesmo orador em enunciados seguidos: um único parágrafo
+                linha = f"{linha} {texto}"
+                self.estatisticas.removidos["enunciados unidos"] += 1
+            else:
+                if linha is not None:
+                    yield linha
+                linha = texto
+            orador_anterior = orador
+        if linha is not None:
+            yield linha
+
+    def condensar(self, enunciados):
+        """enunciados: lista de (orador ou None, texto); devolve o texto condensado"""
+        return "\n".join(self.iterar(enunciados))
+
+    def processar(self, transcricao, enunciados=None):
+        """Condensa mais um trecho; com enunciados, ordem e oradores vêm deles"""
+        pares = _pares(transcricao, enunciados)
+        texto = self.condensar(pares)
+        self.estatisticas.tokens_antes += contar_tokens(transcricao or "\n".join(t or "" for _, t in pares))
+        self.estatisticas.tokens_depois += contar_tokens(texto)
+        return texto
+
+    def fluxo(self, transcricao, enunciados=None):
+        """Como processar, mas devolve as linhas uma a uma sem montar o texto inteiro"""
+        def contados():
+            for orador, texto in iterar_pares(transcricao, enunciados):
+                self.estatisticas.tokens_antes += contar_tokens(texto or "")
+                yield orador, texto
+
+        for linha in self.iterar(contados()):
+            self.estatisticas.tokens_depois += contar_tokens(linha)
+            yield linha
+
+
+def iterar_pares(transcricao, enunciados):
+    if enunciados:
+        # Enunciados da AssemblyAI (speaker/text) ou do modelo da tabela (orador/texto)
+        return ((e.get("speaker") or e.get("orador"), e.get("text", e.get("texto", ""))) for e in enunciados)
+    return ((None, linha) for linha in iterar_linhas(transcricao or ""))
+
+
+def _pares(transcricao, enunciados):
+    return list(iterar_pares(transcricao, enunciados))
+
+
+def condensar_transcricao(transcricao, enunciados=None):
+    """(texto condensado, EstatisticasCondensacao)
+
+    Com enunciados, a ordem e os oradores vêm deles (e unem-se os seguidos do
+    mesmo orador); sem, cada linha da transcrição é um enunciado.
+    """
+    condensador = Condensador()
+    texto = condensador.processar(transcricao, enunciados)
+    return texto, condensador.estatisticas
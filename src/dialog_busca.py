@@ -0,0 +1,73 @@
+"""Janela de busca nas transcrições e atas já geradas (arquivo_busca.py)"""
+import os
+
+from PySide6.QtCore import Qt, QTimer, QUrl
+from PySide6.QtGui import QDesktopServices
+from PySide6.QtWidgets import (
+    QComboBox, QDialog, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout
+)
+
+from arquivo_busca import formatar_resultado, obter_arquivo
+
+TIPOS = [("Todos", None), ("Atas", "ata"), ("Transcrições", "transcricao")]
+
+
+class DialogBusca(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Buscar em atas anteriores")
+        self.resize(700, 450)
+
+        self.campoBusca = QLineEdit()
+        self.campoBusca.setPlaceholderText('Ex.: pintura da fachada')
+        self.campoCondominio = QLineEdit()
+        self.campoCondominio.setPlaceholderText("Condomínio (opcional)")
+        self.comboTipo = QComboBox()
+        for rotulo, _ in TIPOS:
+            self.comboTipo.addItem(rotulo)
+        self.listaResultados = QListWidget()
+        self.listaResultados.setWordWrap(True)
+        self.labelResumo = QLabel()
+
+        filtros = QHBoxLayout()
+        filtros.addWidget(self.campoCondominio)
+        filtros.addWidget(self.comboTipo)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.campoBusca)
+        layout.addLayout(filtros)
+        layout.addWidget(self.listaResultados)
+        layout.addWidget(self.labelResumo)
+
+        # Busca enquanto digita, sem consultar a cada tecla
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.buscar)
+        self.campoBusca.textChanged.connect(self.timer.start)
+        self.campoCondominio.textChanged.connect(self.timer.start)
+        self.comboTipo.currentIndexChanged.connect(self.timer.start)
+        self.listaResultados.itemDoubleClicked.connect(self.abrir_documento)
+
+    def buscar(self):
+        self.listaResultados.clear()
+        consulta = self.campoBusca.text().strip()
+        if not consulta:
+            self.labelResumo.clear()
+            return
+        resultados = obter_arquivo().buscar(
+            consulta,
+            condominio=self.campoCondominio.text().strip() or None,
+            tipo=TIPOS[self.comboTipo.currentIndex()][1],
+        )
+        for resultado in resultados:
+            item = QListWidgetItem(f"{os.path.basename(resultado['caminho'])} | {formatar_resultado(resultado)}")
+            item.setData(Qt.UserRole, resultado["caminho"])
+            self.listaResultados.addItem(item)
+        self.labelResumo.setText(f"{len(resultados)} resultado(s). Clique duas vezes para abrir o documento.")
+
+    def abrir_documento(self, item):
+        caminho = item.data(Qt.UserRole)
+        if os.path.exists(caminho):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(caminho))
+        else:
+            self.labelResumo.setText(f"Arquivo não encontrado: {caminho}")
@@ -1,15 +1,104 @@
 import os
 from PySide6.QtWidgets import QDialog, QMessageBox, QLineEdit, QComboBox, QDateEdit, QTimeEdit, QTextEdit, QSpinBox, QPushButton
-from PySide6.QtCore import QTimer, QDate, QTime
+from PySide6.QtCore import QTimer, QDate, QTime, QObject, QRunnable, QThreadPool, Signal
 from PySide6.QtUiTools import QUiLoader
 from PySide6.QtCore import QFile, QIODevice
 
 
+def detectar_campo(transcricao, campo):
+    """Pergunta ao LLM o nome do condomínio ou as pautas, a partir dos trechos relevantes"""
+    from openai import OpenAI
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    from indice_bm25 import trechos_relevantes
+
+    consultas = {
+        'nome_condominio': "condomínio edifício residencial residence nome",
+        'pautas': ["pauta item ordem do dia assunto", "proposta votação aprovada discutir"]
+    }
+    contexto = trechos_relevantes(transcricao, consultas[campo], k=6, max_caracteres=2000)
+
+    prompts = {
+        'nome_condominio': f"Dos seguintes trechos de uma transcrição de assembleia, extraia apenas o nome do condomínio: {contexto}",
+        'pautas': f"Dos seguintes trechos de uma transcrição, liste as principais pautas/assuntos discutidos, separados por vírgula: {contexto}"
+    }
+
+    from roteador_modelos import roteador
+
+    response = roteador.chamar(
+        "deteccao",
+        client,
+        messages=[
+            {"role": "system", "content": "Extraia apenas a informação solicitada da transcrição, sem explicações adicionais."},
+            {"role": "user", "content": prompts[campo]}
+        ],
+        temperature=0.1,
+        max_tokens=200,
+    )
+    return response.choices[0].message.content.strip()
+
+
+def analisar_transcricao(transcricao):
+    """(condomínio do cadastro ou None, campos das regras locais) citados na transcrição"""
+    condominio, campos = None, {}
+    try:
+        from cadastro_condominios import obter_cadastro
+        condominio = obter_cadastro().identificar(transcricao)
+    except Exception as e:
+        print(f"Erro ao consultar o cadastro de condomínios: {e}")
+    try:
+        from extracao_local import campos_resolvidos
+        campos = campos_resolvidos(transcricao)
+    except Exception as e:
+        print(f"Erro ao preencher por regras locais: {e}")
+    return condominio, campos
+
+
+class AnaliseLocalSignals(QObject):
+    concluido = Signal(object, object)
+
+
+class AnaliseLocalWorker(QRunnable):
+    def __init__(self, transcricao):
+        super().__init__()
+        self.transcricao = transcricao
+        self.signals = AnaliseLocalSignals()
+
+    def run(self):
+        self.signals.concluido.emit(*analisar_transcricao(self.transcricao))
+
+
+class DeteccaoIASignals(QObject):
+    concluido = Signal(str)
+    erro = Signal(str)
+
+
+class DeteccaoIAWorker(QRunnable):
+    def __init__(self, transcricao, campo):
+        super().__init__()
+        self.transcricao = transcricao
+        self.campo = campo
+        self.signals = DeteccaoIASignals()
+
+    def run(self):
+        try:
+            self.signals.concluido.emit(detectar_campo(self.transcricao, self.campo))
+        except Exception as e:
+            self.signals.erro.emit(str(e))
+
+
 class DialogInfoAssembleia(QDialog):
     def __init__(self, parent=None, transcricao=""):
         super().__init__(parent)
         self.transcricao = transcricao
         self.ui_widget = None
+        # Campos alterados pelo usuário ou preenchidos pela IA: a análise local não os sobrescreve
+        self.campos_editados = set()
+        # Preenchimento feito pelo próprio diálogo (não conta como edição do usuário)
+        self.preenchendo = False
         
         # Carregar o arquivo .ui
         self.load_ui()
@@ -24,7 +113,28 @@ class DialogInfoAssembleia(QDialog):
         self.setup_connections()
         
         # Preencher valores padrão
-        self.preencherValoresPadrao()
+        self.preenchendo = True
+        try:
+            self.preencherValoresPadrao()
+        finally:
+            self.preenchendo = False
+
+        # Condomínio reconhecido no cadastro local (nome, endereço, local, última mesa)
+        self.condominio = None
+        self.worker_ia = None
+
+        # Cadastro e regras locais percorrem a transcrição inteira: rodam no pool de
+        # threads e preenchem os campos ainda não editados quando terminam, sem segurar a
+        # abertura do diálogo; até lá o OK fica desabilitado
+        self.worker_analise = None
+        self.texto_btn_ok = self.btn_ok.text() if self.btn_ok else ""
+        if self.transcricao and self.transcricao.strip():
+            if self.btn_ok:
+                self.btn_ok.setEnabled(False)
+                self.btn_ok.setText("Analisando transcrição...")
+            self.worker_analise = AnaliseLocalWorker(self.transcricao)
+            self.worker_analise.signals.concluido.connect(self.analiseLocalConcluida)
+            QThreadPool.globalInstance().start(self.worker_analise)
 
     def load_ui(self):
         """Carrega o arquivo .ui do Qt Designer"""
@@ -230,60 +340,83 @@ class DialogInfoAssembleia(QDialog):
         else:
             print("✗ btn_ok não encontrado para conectar sinal")
 
+        # Qualquer alteração fora de self.preenchendo é do usuário
+        sinais = [
+            (self.edit_nome_condominio, "textChanged"), (self.edit_endereco_condominio, "textChanged"),
+            (self.edit_local_realizacao, "textChanged"), (self.edit_presidente_nome, "textChanged"),
+            (self.edit_presidente_apto, "textChanged"), (self.edit_secretario_nome, "textChanged"),
+            (self.edit_secretario_apto, "textChanged"), (self.edit_pautas, "textChanged"),
+            (self.date_assembleia, "dateChanged"), (self.time_inicio, "timeChanged"),
+            (self.combo_tipo_assembleia, "currentIndexChanged"), (self.spin_presentes, "valueChanged"),
+        ]
+        for widget, sinal in sinais:
+            if widget:
+                getattr(widget, sinal).connect(lambda *_, w=widget: self.marcarEditado(w))
+
+    def marcarEditado(self, widget):
+        if not self.preenchendo:
+            self.campos_editados.add(widget)
+
+    def preencher(self, widget, funcao, valor, somente_livres=False):
+        """Aplica funcao(valor) sem contar como edição; com somente_livres, respeita os campos editados"""
+        if not widget or (somente_livres and widget in self.campos_editados):
+            return False
+        self.preenchendo = True
+        try:
+            funcao(valor)
+        finally:
+            self.preenchendo = False
+        return True
+
     def detectar_por_ia(self, campo, botao):
         """Detecta informações usando IA"""
         if not self.transcricao or not self.transcricao.strip():
             QMessageBox.information(self, "Aviso", "Nenhuma transcrição disponível para detecção por IA.")
             return
 
+        # Nome do condomínio: o cadastro local resolve sem chamar a IA
+        if campo == 'nome_condominio' and self.preencherPorCadastro():
+            texto_original = botao.text()
+            botao.setText("✓")
+            QTimer.singleShot(1500, lambda: self.resetar_botao_ia(botao, texto_original))
+            return
+
         botao.setEnabled(False)
         texto_original = botao.text()
         botao.setText("...")
 
-        try:
-            from openai import OpenAI
-            import os
-            from dotenv import load_dotenv
-
-            load_dotenv()
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-            prompts = {
-                'nome_condominio': f"Da seguinte transcrição de assembleia, extraia apenas o nome do condomínio: {self.transcricao[:1000]}",
-                'pautas': f"Da seguinte transcrição, liste as principais pautas/assuntos discutidos, separados por vírgula: {self.transcricao[:2000]}"
-            }
-
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "Extraia apenas a informação solicitada da transcrição, sem explicações adicionais."},
-                    {"role": "user", "content": prompts[campo]}
-                ],
-                temperature=0.1,
-                max_tokens=200,
-            )
-
-            resultado = response.choices[0].message.content.strip()
-            sucesso = False
+        # A chamada ao LLM roda no pool de threads: o diálogo continua respondendo enquanto espera
+        self.worker_ia = DeteccaoIAWorker(self.transcricao, campo)
+        self.worker_ia.signals.concluido.connect(lambda resultado: self.deteccao_concluida(campo, botao, texto_original, resultado))
+        self.worker_ia.signals.erro.connect(lambda msg: self.deteccao_erro(botao, texto_original, msg))
+        QThreadPool.globalInstance().start(self.worker_ia)
 
-            if campo == 'nome_condominio' and resultado and self.edit_nome_condominio:
-                self.edit_nome_condominio.setText(resultado)
-                sucesso = True
-            elif campo == 'pautas' and resultado and self.edit_pautas:
-                self.edit_pautas.setPlainText(resultado)
-                sucesso = True
+    def deteccao_concluida(self, campo, botao, texto_original, resultado):
+        self.worker_ia = None
+        sucesso = False
 
-            if sucesso:
-                botao.setText("✓")
-                QTimer.singleShot(1500, lambda: self.resetar_botao_ia(botao, texto_original))
-            else:
-                QMessageBox.warning(self, "IA - Não encontrado", f"Não foi possível detectar {campo.replace('_', ' ')} na transcrição. Tente preencher manualmente.")
-                self.resetar_botao_ia(botao, texto_original)
+        # O que a IA preencheu conta como editado: a análise local não sobrescreve
+        if campo == 'nome_condominio' and resultado and self.edit_nome_condominio:
+            self.edit_nome_condominio.setText(resultado)
+            self.campos_editados.add(self.edit_nome_condominio)
+            sucesso = True
+        elif campo == 'pautas' and resultado and self.edit_pautas:
+            self.edit_pautas.setPlainText(resultado)
+            self.campos_editados.add(self.edit_pautas)
+            sucesso = True
 
-        except Exception as e:
-            QMessageBox.critical(self, "Erro na IA", f"Erro na detecção por IA: {str(e)}")
+        if sucesso:
+            botao.setText("✓")
+            QTimer.singleShot(1500, lambda: self.resetar_botao_ia(botao, texto_original))
+        else:
+            QMessageBox.warning(self, "IA - Não encontrado", f"Não foi possível detectar {campo.replace('_', ' ')} na transcrição. Tente preencher manualmente.")
             self.resetar_botao_ia(botao, texto_original)
 
+    def deteccao_erro(self, botao, texto_original, msg):
+        self.worker_ia = None
+        QMessageBox.critical(self, "Erro na IA", f"Erro na detecção por IA: {msg}")
+        self.resetar_botao_ia(botao, texto_original)
+
     def resetar_botao_ia(self, botao, texto_original="IA"):
         """Reseta o botão IA para o estado original"""
         if botao:
@@ -293,14 +426,7 @@ class DialogInfoAssembleia(QDialog):
     def preencherValoresPadrao(self):
         """Preenche valores padrão nos campos"""
         try:
-            if self.edit_nome_condominio:
-                self.edit_nome_condominio.setText("CONDOMÍNIO MILLENNIUM RESIDENCE")
-                print("✓ Nome do condomínio preenchido")
-            
-            if self.edit_endereco_condominio:
-                self.edit_endereco_condominio.setText("Avenida Engenheiro Valdir Pedro Monachesi, 1.400, Aeroporto, Juiz de Fora/MG")
-                print("✓ Endereço preenchido")
-            
+            # Nome e endereço do condomínio vêm do cadastro (preencherPorCadastro)
             if self.edit_local_realizacao:
                 self.edit_local_realizacao.setText("pelo Zoom dentro do aplicativo Condomob condomínios")
                 print("✓ Local de realização preenchido")
@@ -326,6 +452,98 @@ class DialogInfoAssembleia(QDialog):
         except Exception as e:
             print(f"Erro ao preencher valores padrão: {e}")
 
+    def analiseLocalConcluida(self, condominio, campos):
+        """Resultado da análise em segundo plano: só preenche campos que o usuário e a IA não tocaram"""
+        self.worker_analise = None
+        if condominio:
+            self.aplicarCadastro(condominio, somente_livres=True)
+        else:
+            print("✗ Condomínio não encontrado no cadastro")
+        # O que as regras locais acharam na transcrição prevalece sobre a sugestão do cadastro
+        self.aplicarRegrasLocais(campos, somente_livres=True)
+        if self.btn_ok:
+            self.btn_ok.setText(self.texto_btn_ok)
+            self.btn_ok.setEnabled(True)
+
+    def preencherPorCadastro(self):
+        """Preenche os dados do condomínio citado na transcrição; True se reconheceu"""
+        if not self.transcricao or not self.transcricao.strip():
+            return False
+        if self.condominio:
+            return self.aplicarCadastro(self.condominio)
+        try:
+            from cadastro_condominios import obter_cadastro
+            condominio = obter_cadastro().identificar(self.transcricao)
+        except Exception as e:
+            print(f"Erro ao consultar o cadastro de condomínios: {e}")
+            return False
+        if not condominio:
+            print("✗ Condomínio não encontrado no cadastro")
+            return False
+        return self.aplicarCadastro(condominio)
+
+    def aplicarCadastro(self, condominio, somente_livres=False):
+        """Preenche nome, endereço, local e a última mesa do condomínio reconhecido"""
+        self.condominio = condominio
+
+        campos = [
+            (self.edit_nome_condominio, 'nome'),
+            (self.edit_endereco_condominio, 'endereco'),
+            (self.edit_local_realizacao, 'local_habitual'),
+            # Última mesa como sugestão; apartamentos achados na transcrição prevalecem depois
+            (self.edit_presidente_nome, 'presidente_nome'),
+            (self.edit_presidente_apto, 'presidente_apartamento'),
+            (self.edit_secretario_nome, 'secretario_nome'),
+            (self.edit_secretario_apto, 'secretario_apartamento'),
+        ]
+        for widget, chave in campos:
+            if widget and condominio.get(chave):
+                self.preencher(widget, widget.setText, condominio[chave], somente_livres)
+
+        print(f"✓ Condomínio reconhecido pelo cadastro: {condominio['nome']}")
+        return True
+
+    def cnpjCondominio(self, nome):
+        """CNPJ do cadastro para o nome digitado (o diálogo não tem campo de CNPJ)"""
+        try:
+            from cadastro_condominios import obter_cadastro
+            condominio = obter_cadastro().obter_por_nome(nome)
+            if condominio:
+                return condominio.get('cnpj') or ""
+        except Exception as e:
+            print(f"Erro ao consultar o cadastro de condomínios: {e}")
+        return ""
+
+    def aplicarRegrasLocais(self, campos, somente_livres=False):
+        """Preenche data, horário, tipo, apartamentos e presentes achados sem chamar a IA"""
+        try:
+            if self.date_assembleia and 'data_assembleia' in campos:
+                data = QDate.fromString(campos['data_assembleia'], "dd/MM/yyyy")
+                if data.isValid():
+                    self.preencher(self.date_assembleia, self.date_assembleia.setDate, data, somente_livres)
+            if self.time_inicio and 'horario_inicio' in campos:
+                hora = QTime.fromString(campos['horario_inicio'], "hh'h'mm")
+                if hora.isValid():
+                    self.preencher(self.time_inicio, self.time_inicio.setTime, hora, somente_livres)
+            if self.combo_tipo_assembleia and 'tipo_assembleia' in campos:
+                indice = self.combo_tipo_assembleia.findText(campos['tipo_assembleia'])
+                if indice >= 0:
+                    self.preencher(self.combo_tipo_assembleia, self.combo_tipo_assembleia.setCurrentIndex, indice,
+                                   somente_livres)
+            if self.edit_presidente_apto and 'presidente_apartamento' in campos:
+                self.preencher(self.edit_presidente_apto, self.edit_presidente_apto.setText,
+                               campos['presidente_apartamento'], somente_livres)
+            if self.edit_secretario_apto and 'secretario_apartamento' in campos:
+                self.preencher(self.edit_secretario_apto, self.edit_secretario_apto.setText,
+                               campos['secretario_apartamento'], somente_livres)
+            if self.spin_presentes and 'numero_presentes' in campos:
+                self.preencher(self.spin_presentes, self.spin_presentes.setValue, int(campos['numero_presentes']),
+                               somente_livres)
+
+            print(f"✓ Campos preenchidos por regras locais: {', '.join(campos) or 'nenhum'}")
+        except Exception as e:
+            print(f"Erro ao preencher por regras locais: {e}")
+
     def obterInformacoes(self):
         """Retorna dicionário com todas as informações preenchidas"""
         try:
@@ -335,8 +553,11 @@ class DialogInfoAssembleia(QDialog):
             
             pautas = [p.strip() for p in pautas_texto.split(',') if p.strip()] if pautas_texto else ["assuntos diversos"]
 
+            nome_condominio = self.edit_nome_condominio.text().strip() if self.edit_nome_condominio else ""
+
             return {
-                'nome_condominio': self.edit_nome_condominio.text().strip() if self.edit_nome_condominio else "",
+                'nome_condominio': nome_condominio,
+                'cnpj_condominio': self.cnpjCondominio(nome_condominio),
                 'endereco_condominio': self.edit_endereco_condominio.text().strip() if self.edit_endereco_condominio else "",
                 'tipo_assembleia': self.combo_tipo_assembleia.currentText() if self.combo_tipo_assembleia else "EXTRAORDINÁRIA",
                 'data_assembleia': self.date_assembleia.date().toString("dd/MM/yyyy") if self.date_assembleia else "",
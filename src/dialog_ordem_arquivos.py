@@ -0,0 +1,69 @@
+"""Ordem das gravações de uma assembleia dividida em vários arquivos
+
+A emenda (concatenar_audio.py) segue exatamente esta ordem. A lista começa em
+ordem natural dos nomes ("parte2" antes de "parte10"); o usuário arrasta os
+itens ou usa Subir/Descer quando os nomes não dizem a ordem real.
+"""
+import os
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView, QDialog, QDialogButtonBox, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton,
+    QVBoxLayout
+)
+
+
+class DialogOrdemArquivos(QDialog):
+    def __init__(self, caminhos, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Ordem das gravações")
+        self.resize(600, 350)
+
+        self.listaArquivos = QListWidget()
+        self.listaArquivos.setDragDropMode(QAbstractItemView.InternalMove)
+        for caminho in caminhos:
+            item = QListWidgetItem(os.path.basename(caminho))
+            item.setData(Qt.UserRole, caminho)
+            item.setToolTip(caminho)
+            self.listaArquivos.addItem(item)
+        self.listaArquivos.setCurrentRow(0)
+
+        self.btnSubir = QPushButton("Subir")
+        self.btnDescer = QPushButton("Descer")
+        self.btnSubir.clicked.connect(lambda: self.mover(-1))
+        self.btnDescer.clicked.connect(lambda: self.mover(1))
+        botoes = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        botoes.accepted.connect(self.accept)
+        botoes.rejected.connect(self.reject)
+
+        mover = QVBoxLayout()
+        mover.addWidget(self.btnSubir)
+        mover.addWidget(self.btnDescer)
+        mover.addStretch()
+        lista = QHBoxLayout()
+        lista.addWidget(self.listaArquivos)
+        lista.addLayout(mover)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("As gravações serão emendadas nesta ordem (arraste para reordenar):"))
+        layout.addLayout(lista)
+        layout.addWidget(botoes)
+
+    def mover(self, deslocamento):
+        linha = self.listaArquivos.currentRow()
+        destino = linha + deslocamento
+        if linha < 0 or not 0 <= destino < self.listaArquivos.count():
+            return
+        item = self.listaArquivos.takeItem(linha)
+        self.listaArquivos.insertItem(destino, item)
+        self.listaArquivos.setCurrentRow(destino)
+
+    def caminhos(self):
+        return [self.listaArquivos.item(i).data(Qt.UserRole) for i in range(self.listaArquivos.count())]
+
+    @staticmethod
+    def obterOrdem(parent=None, caminhos=()):
+        """Lista na ordem escolhida, ou None se o usuário cancelar"""
+        dialog = DialogOrdemArquivos(caminhos, parent)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            return dialog.caminhos()
+        return None
@@ -0,0 +1,243 @@
+"""Estimativa prévia de tempo e custo, e ETA ao vivo a partir do histórico local
+
+Antes de transcrever: duração e codec do áudio (ffprobe) dão o tempo de upload
+e de transcrição. Antes de gerar a ata: os tokens da transcrição (tiktoken)
+dão o número de blocos, o tempo e o custo do LLM. As taxas vêm das últimas
+execuções registradas em ~/.transcrever_ata/historico.sqlite3; sem histórico,
+valores de referência conservadores.
+"""
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from functools import lru_cache
+
+from concatenar_audio import normalizar_caminhos
+
+CAMINHO_HISTORICO_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "historico.sqlite3")
+
+# Segundos por unidade de cada etapa, usados enquanto não há histórico
+TAXAS_PADRAO = {
+    "upload": 1 / 1_500_000,   # s por byte (~1,5 MB/s)
+    "transcricao": 0.25,       # s por segundo de áudio
+    "llm": 0.012,              # s por token de entrada da transcrição
+}
+AMOSTRAS_HISTORICO = 20
+
+# Preços de referência em US$ (ajuste conforme o contrato)
+PRECO_ASSEMBLYAI_HORA = float(os.getenv("PRECO_ASSEMBLYAI_HORA", "0.37"))
+PRECOS_MODELOS = {
+    # modelo: (entrada, saída) por 1M tokens
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+# Saída do LLM em proporção à entrada de cada bloco (redação formal ~ 60% do trecho)
+PROPORCAO_SAIDA = 0.6
+TOKENS_BLOCO = 3500
+# Bitrate presumido quando o ffprobe não está disponível
+BYTES_POR_SEGUNDO_PADRAO = 16_000  # mp3 a 128 kbps
+
+
+@lru_cache(maxsize=1)
+def _codificador():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def formatar_duracao(segundos):
+    segundos = int(round(segundos))
+    if segundos < 60:
+        return f"{segundos}s"
+    minutos = segundos // 60
+    if minutos < 60:
+        return f"{minutos} min"
+    return f"{minutos // 60}h{minutos % 60:02d}"
+
+
+class Historico:
+    """Tempos reais de cada etapa (quantidade processada e segundos gastos)"""
+
+    def __init__(self, caminho=None):
+        caminho = caminho or CAMINHO_HISTORICO_PADRAO
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS execucoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                etapa TEXT NOT NULL,
+                quantidade REAL NOT NULL,
+                segundos REAL NOT NULL,
+                registrado_em REAL NOT NULL
+            )
+        """)
+        self.conexao.commit()
+
+    def registrar(self, etapa, quantidade, segundos):
+        if quantidade <= 0 or segundos <= 0:
+            return
+        with self.lock:
+            self.conexao.execute(
+                "INSERT INTO execucoes (etapa, quantidade, segundos, registrado_em) VALUES (?, ?, ?, ?)",
+                (etapa, quantidade, segundos, time.time()),
+            )
+            self.conexao.commit()
+
+    def taxa(self, etapa):
+        """Mediana das últimas execuções (segundos por unidade)"""
+        with self.lock:
+            linhas = self.conexao.execute(
+                "SELECT segundos / quantidade FROM execucoes WHERE etapa = ? ORDER BY id DESC LIMIT ?",
+                (etapa, AMOSTRAS_HISTORICO),
+            ).fetchall()
+        if not linhas:
+            return TAXAS_PADRAO[etapa]
+        return statistics.median(l[0] for l in linhas)
+
+    def amostras(self, etapa):
+        with self.lock:
+            return self.conexao.execute("SELECT COUNT(*) FROM execucoes WHERE etapa = ?", (etapa,)).fetchone()[0]
+
+
+_historico = None
+_lock_historico = threading.Lock()
+
+
+def obter_historico():
+    global _historico
+    with _lock_historico:
+        if _historico is None:
+            _historico = Historico()
+        return _historico
+
+
+def sondar_audio(caminho):
+    """Duração (s), codec e tamanho (bytes); sem ffprobe, duração pelo bitrate presumido"""
+    tamanho = os.path.getsize(caminho)
+    try:
+        import ffmpeg
+        info = ffmpeg.probe(caminho)
+        duracao = float(info["format"]["duration"])
+        codec = next((s.get("codec_name") for s in info["streams"] if s.get("codec_type") == "audio"), None)
+        return {"duracao": duracao, "codec": codec or "?", "tamanho": tamanho, "medido": True}
+    except Exception:
+        return {"duracao": tamanho / BYTES_POR_SEGUNDO_PADRAO, "codec": "?", "tamanho": tamanho, "medido": False}
+
+
+def estimar_transcricao(caminho_arquivo, historico=None):
+    """Prévia de upload e transcrição para um arquivo ou lista de gravações"""
+    historico = historico or obter_historico()
+    sondagens = [sondar_audio(c) for c in normalizar_caminhos(caminho_arquivo)]
+    duracao = sum(s["duracao"] for s in sondagens)
+    tamanho = sum(s["tamanho"] for s in sondagens)
+    etapas = {
+        "upload": tamanho * historico.taxa("upload"),
+        "transcricao": duracao * historico.taxa("transcricao"),
+    }
+    return {
+        "duracao_audio": duracao,
+        "codecs": sorted({s["codec"] for s in sondagens}),
+        "duracao_medida": all(s["medido"] for s in sondagens),
+        "tamanho": tamanho,
+        "quantidades": {"upload": tamanho, "transcricao": duracao},
+        "etapas": etapas,
+        "total": sum(etapas.values()),
+        "custo": duracao / 3600 * PRECO_ASSEMBLYAI_HORA,
+    }
+
+
+def estimar_ata(transcricao, historico=None, modelo=None):
+    """Prévia de blocos, tokens, tempo e custo da geração da ata"""
+    historico = historico or obter_historico()
+    modelo = modelo or (os.getenv("MODELOS_FORMAL") or "gpt-4o").split(",")[0].strip()
+    tokens = len(_codificador().encode(transcricao))
+    blocos = max(1, -(-tokens // TOKENS_BLOCO))
+    saida = min(tokens * PROPORCAO_SAIDA, blocos * 4000)
+    preco_entrada, preco_saida = PRECOS_MODELOS.get(modelo, PRECOS_MODELOS["gpt-4o"])
+    etapas = {"llm": tokens * historico.taxa("llm")}
+    return {
+        "tokens": tokens,
+        "blocos": blocos,
+        "modelo": modelo,
+        "quantidades": {"llm": tokens},
+        "etapas": etapas,
+        "total": etapas["llm"],
+        "custo": (tokens * preco_entrada + saida * preco_saida) / 1_000_000,
+    }
+
+
+def resumo_transcricao(estimativa):
+    duracao = formatar_duracao(estimativa["duracao_audio"])
+    if not estimativa["duracao_medida"]:
+        duracao = "~" + duracao
+    etapas = estimativa["etapas"]
+    return (f"Áudio {duracao} ({', '.join(estimativa['codecs'])}): upload ~{formatar_duracao(etapas['upload'])}, "
+            f"transcrição ~{formatar_duracao(etapas['transcricao'])}, total ~{formatar_duracao(estimativa['total'])}, "
+            f"custo ~US$ {estimativa['custo']:.2f}")
+
+
+def resumo_ata(estimativa):
+    return (f"Ata: {estimativa['blocos']} blocos, {estimativa['tokens']} tokens, "
+            f"~{formatar_duracao(estimativa['total'])} com {estimativa['modelo']}, custo ~US$ {estimativa['custo']:.2f}")
+
+
+class AcompanhamentoETA:
+    """ETA ao vivo: estimativa das etapas restantes, corrigida pelo andamento real
+
+    Ao final de cada etapa o tempo real vai para o histórico, melhorando as
+    próximas estimativas.
+    """
+
+    def __init__(self, estimativa, historico=None):
+        self.historico = historico or obter_historico()
+        self.quantidades = dict(estimativa["quantidades"])
+        self.previsto = dict(estimativa["etapas"])
+        self.ordem = list(estimativa["etapas"])
+        self.etapa_atual = None
+        self.inicio_etapa = None
+        self.fracao = 0.0
+
+    def iniciar_etapa(self, etapa):
+        if etapa == self.etapa_atual or etapa not in self.previsto:
+            return
+        if self.etapa_atual:
+            self.concluir_etapa()
+        self.etapa_atual = etapa
+        self.inicio_etapa = time.monotonic()
+        self.fracao = 0.0
+
+    def progresso(self, feito, total):
+        """Andamento dentro da etapa atual (ex.: blocos do LLM)"""
+        if total:
+            self.fracao = min(1.0, feito / total)
+
+    def concluir_etapa(self):
+        if not self.etapa_atual:
+            return
+        segundos = time.monotonic() - self.inicio_etapa
+        self.historico.registrar(self.etapa_atual, self.quantidades[self.etapa_atual], segundos)
+        self.ordem = self.ordem[self.ordem.index(self.etapa_atual) + 1:]
+        self.etapa_atual = None
+        self.inicio_etapa = None
+
+    def restante(self):
+        """Segundos estimados até o fim"""
+        total = 0.0
+        for etapa in self.ordem:
+            previsto = self.previsto[etapa]
+            if etapa != self.etapa_atual:
+                total += previsto
+                continue
+            decorrido = time.monotonic() - self.inicio_etapa
+            if self.fracao > 0:
+                # Com andamento conhecido, projeta pelo ritmo real da etapa
+                previsto = decorrido / self.fracao
+            total += max(previsto - decorrido, 0.0)
+        return total
+
+    def texto(self):
+        restante = self.restante()
+        if restante < 1:
+            return "ETA: finalizando..."
+        return f"ETA: ~{formatar_duracao(restante)} restantes"
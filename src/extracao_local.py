@@ -0,0 +1,298 @@
+"""Extração local (sem IA) de campos com padrões regulares em português falado
+
+Resolve datas, horários, apartamentos, número de presentes, tipo da assembleia e
+resultados de votação direto da transcrição, com uma confiança entre 0 e 1 para
+cada campo. Só os campos não resolvidos precisam ir para o LLM.
+"""
+import regex
+from datetime import datetime
+
+LIMIAR_CONFIANCA = 0.75
+
+UNIDADES = {
+    "zero": 0, "um": 1, "uma": 1, "dois": 2, "duas": 2, "três": 3, "tres": 3, "quatro": 4,
+    "cinco": 5, "seis": 6, "sete": 7, "oito": 8, "nove": 9,
+}
+DEZ_A_DEZENOVE = {
+    "dez": 10, "onze": 11, "doze": 12, "treze": 13, "catorze": 14, "quatorze": 14,
+    "quinze": 15, "dezesseis": 16, "dezessete": 17, "dezoito": 18, "dezenove": 19,
+}
+DEZENAS = {
+    "vinte": 20, "trinta": 30, "quarenta": 40, "cinquenta": 50, "sessenta": 60,
+    "setenta": 70, "oitenta": 80, "noventa": 90,
+}
+CENTENAS = {
+    "cem": 100, "cento": 100, "duzentos": 200, "duzentas": 200, "trezentos": 300, "trezentas": 300,
+    "quatrocentos": 400, "quatrocentas": 400, "quinhentos": 500, "quinhentas": 500,
+    "seiscentos": 600, "seiscentas": 600, "setecentos": 700, "setecentas": 700,
+    "oitocentos": 800, "oitocentas": 800, "novecentos": 900, "novecentas": 900,
+}
+VALORES = {**UNIDADES, **DEZ_A_DEZENOVE, **DEZENAS, **CENTENAS, "mil": 1000}
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+_PALAVRA_NUM = "|".join(sorted(VALORES, key=len, reverse=True))
+# Número em algarismos ou por extenso ("trezentos e dois", "dois mil e vinte e seis")
+NUM_EXTENSO = rf"(?:{_PALAVRA_NUM})(?:\s+(?:e\s+)?(?:{_PALAVRA_NUM}))*"
+NUM = rf"(?:\d+|{NUM_EXTENSO})"
+_MES = "|".join(MESES)
+
+RE_DATA_NUMERICA = regex.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{2,4})\b")
+RE_DATA_EXTENSO = regex.compile(
+    rf"\b(?:dia\s+)?(?P<dia>{NUM})\s+de\s+(?P<mes>{_MES})(?:\s+de\s+(?P<ano>{NUM}))?\b",
+    regex.IGNORECASE,
+)
+_PERIODO = r"(?:\s+(?P<periodo>da noite|da tarde|da manhã))?"
+RE_HORA_NUMERICA = regex.compile(
+    r"\b(?P<h>[01]?\d|2[0-3])\s*(?:h|:|horas?)\s*(?P<m>[0-5]\d)?\b" + _PERIODO, regex.IGNORECASE
+)
+# Horário com "horas", "e meia", o período ou minutos por extenso ("dezenove e quarenta"); a hora
+# sozinha só vale perto da abertura (extrair_horario_inicio). "as duas propostas" e "são três as
+# propostas" não são horários
+RE_HORA_EXTENSO = regex.compile(
+    rf"\b(?:às|as|são|a partir das)\s+(?P<hora>\d{{1,2}}\b(?![.:,]\d)|{NUM_EXTENSO})"
+    rf"(?:(?P<horas>\s+horas?)(?:\s+e\s+(?P<minutos>{NUM_EXTENSO})(?:\s+minutos?)?)?)?"
+    r"(?:\s+e\s+(?P<meia>meia))?" + _PERIODO,
+    regex.IGNORECASE,
+)
+# Depois de uma hora sozinha: fim da oração ("são dezenove, vamos começar")
+RE_FIM_ORACAO = regex.compile(r"\s*(?:[,.;!?]|$)")
+# "durou 2 horas", "por três horas", "duas horas de reunião": duração, não horário
+RE_DURACAO_ANTES = regex.compile(
+    r"(?:\bdur\w*|\bpor|\bhá|\bfaz|\blevou|\bcerca de|\bmais de|\bmenos de|\bquase)\s+(?:umas?\s+)?$",
+    regex.IGNORECASE,
+)
+RE_DURACAO_DEPOIS = regex.compile(r"^\s*(?:de\s+(?:duração|reunião|assembleia|atraso|discussão)|seguidas)\b",
+                                  regex.IGNORECASE)
+RE_APARTAMENTO = regex.compile(
+    rf"\b(?:apartamento|apto\.?|unidade)\s+(?:n[ºo°.]*\s*)?(?P<numero>{NUM})\b",
+    regex.IGNORECASE,
+)
+RE_FAVORAVEIS = regex.compile(rf"\b(?P<n>{NUM})\s+votos?\s+(?:favoráveis|favoravel|favorável|a favor)", regex.IGNORECASE)
+RE_CONTRARIOS = regex.compile(rf"\b(?P<n>{NUM})\s+votos?\s+(?:contrários|contrário|contra)", regex.IGNORECASE)
+RE_ABSTENCOES = regex.compile(rf"\b(?P<n>{NUM})\s+(?:abstenções|abstenção|abstencoes)", regex.IGNORECASE)
+RE_PRESENTES = regex.compile(
+    rf"\b(?P<n>{NUM})\s+(?:condôminos\s+|moradores\s+|pessoas\s+|unidades\s+)?presentes\b",
+    regex.IGNORECASE,
+)
+RE_TIPO = regex.compile(r"\bassembleia\s+(?:geral\s+)?(?P<tipo>extraordinária|ordinária)\b", regex.IGNORECASE)
+RE_INICIO = regex.compile(r"início|inici|começ|abertura|boa noite|boa tarde", regex.IGNORECASE)
+RE_ENCERRAMENTO = regex.compile(r"encerr|términ|termin|fim d[ao]|fechamento", regex.IGNORECASE)
+RE_SENTENCA = regex.compile(r"[^.!?]+[.!?]?")
+
+
+def numero_por_extenso(texto):
+    """Converte "trezentos e dois", "três zero dois", "doze" ou "302" em inteiro (None se não reconhecer)"""
+    texto = texto.strip().lower()
+    if texto.isdigit():
+        return int(texto)
+    palavras = texto.split()
+    if len(palavras) > 1 and all(p in UNIDADES for p in palavras):
+        # Ditado algarismo por algarismo: "três zero dois" é 302, "dois dois" é 22
+        return int("".join(str(UNIDADES[p]) for p in palavras))
+    total = 0
+    atual = 0
+    for palavra in texto.split():
+        if palavra == "e":
+            continue
+        valor = VALORES.get(palavra)
+        if valor is None:
+            return None
+        if valor == 1000:
+            total += (atual or 1) * 1000
+            atual = 0
+        else:
+            atual += valor
+    return total + atual
+
+
+def _partes_extenso(texto):
+    """Valores de cada palavra numérica, na ordem ("dezenove e quarenta" -> [19, 40])"""
+    return [int(p) if p.isdigit() else VALORES[p] for p in texto.lower().split() if p.isdigit() or p in VALORES]
+
+
+def _juntar_dezena(partes):
+    """Consome uma dezena seguida de unidade ("vinte e três") ou um único valor"""
+    if len(partes) >= 2 and partes[0] in DEZENAS.values() and partes[1] < 10:
+        return partes[0] + partes[1], partes[2:]
+    return partes[0], partes[1:]
+
+
+def hora_por_extenso(texto, meia=False, periodo=None):
+    """Interpreta "dezenove e quarenta", "sete e meia da noite" etc. como (hora, minuto)"""
+    partes = _partes_extenso(texto)
+    if not partes:
+        return None
+    hora, resto = _juntar_dezena(partes)
+    minuto = 0
+    if resto:
+        minuto, _ = _juntar_dezena(resto)
+    if meia:
+        minuto = 30
+    if periodo and periodo.lower() in ("da noite", "da tarde") and hora < 12:
+        hora += 12
+    if hora > 23 or minuto > 59:
+        return None
+    return hora, minuto
+
+
+def _sentencas(texto):
+    for m in RE_SENTENCA.finditer(texto):
+        yield m.start(), m.group()
+
+
+def extrair_data(texto):
+    m = RE_DATA_NUMERICA.search(texto)
+    if m:
+        dia, mes, ano = (int(g) for g in m.groups())
+        if ano < 100:
+            ano += 2000
+        if 1 <= dia <= 31 and 1 <= mes <= 12:
+            return f"{dia:02d}/{mes:02d}/{ano}", 0.9
+    for m in RE_DATA_EXTENSO.finditer(texto):
+        dia = numero_por_extenso(m.group("dia"))
+        if not dia or dia > 31:
+            continue
+        mes = MESES[m.group("mes").lower()]
+        if m.group("ano"):
+            ano = numero_por_extenso(m.group("ano"))
+            if ano and ano >= 1900:
+                return f"{dia:02d}/{mes:02d}/{ano}", 0.85
+        return f"{dia:02d}/{mes:02d}/{datetime.now().year}", 0.6
+    return None, 0.0
+
+
+def _na_abertura(texto, posicao):
+    """Palavra de abertura por perto, sem encerramento na mesma frase antes do horário"""
+    antes = texto[max(0, posicao - 120):posicao]
+    frase = regex.split(r"[.!?]", antes)[-1]
+    return bool(RE_INICIO.search(antes + texto[posicao:posicao + 60])) and not RE_ENCERRAMENTO.search(frase)
+
+
+def _duracao(texto, inicio, fim):
+    return bool(RE_DURACAO_ANTES.search(texto[max(0, inicio - 30):inicio])
+                or RE_DURACAO_DEPOIS.match(texto[fim:fim + 30]))
+
+
+def extrair_horario_inicio(texto):
+    """Horário falado perto de palavras de abertura; sem elas, o primeiro com menos confiança
+
+    Vale "às dezenove horas", "sete e meia da noite", "às 8 da noite", "são
+    dezenove e quarenta" (minutos de 10 a 59 por extenso) e, perto da abertura
+    e no fim da oração, a hora sozinha a partir das 13 ("são dezenove, vamos
+    começar"). Durações ("durou 2 horas") não contam. Horários diferentes perto
+    da abertura deixam a confiança abaixo do limiar: o LLM decide.
+    """
+    candidatos = []
+    ocupados = []
+    for m in RE_HORA_EXTENSO.finditer(texto):
+        if _duracao(texto, m.start(), m.end()):
+            continue
+        hora = m.group("hora") + (f" {m.group('minutos')}" if m.group("minutos") else "")
+        resultado = hora_por_extenso(hora, bool(m.group("meia")), m.group("periodo"))
+        if not resultado:
+            continue
+        explicito = m.group("horas") or m.group("meia") or m.group("periodo") or resultado[1] >= 10
+        if not explicito and (resultado[0] < 13 or not _na_abertura(texto, m.start())
+                              or not RE_FIM_ORACAO.match(texto, m.end())):
+            continue
+        candidatos.append((m.start(), resultado))
+        ocupados.append((m.start(), m.end()))
+    for m in RE_HORA_NUMERICA.finditer(texto):
+        if _duracao(texto, m.start(), m.end()) or any(i < m.end() and m.start() < f for i, f in ocupados):
+            continue
+        hora, minuto = int(m.group("h")), int(m.group("m") or 0)
+        if m.group("periodo") and m.group("periodo").lower() in ("da noite", "da tarde") and hora < 12:
+            hora += 12
+        candidatos.append((m.start(), (hora, minuto)))
+    if not candidatos:
+        return None, 0.0
+
+    candidatos.sort()
+    na_abertura = [c for c in candidatos if _na_abertura(texto, c[0])]
+    if na_abertura:
+        posicao, (hora, minuto) = na_abertura[0]
+        confianca = 0.85 if len({h for _, h in na_abertura}) == 1 else 0.7
+    else:
+        posicao, (hora, minuto) = candidatos[0]
+        confianca = 0.7 if posicao < len(texto) * 0.1 else 0.5
+    return f"{hora:02d}h{minuto:02d}", confianca
+
+
+def extrair_apartamento(texto, papel):
+    """Apartamento citado na mesma sentença que o papel ("presid", "secretári")"""
+    for _, sentenca in _sentencas(texto):
+        if papel not in sentenca.lower():
+            continue
+        m = RE_APARTAMENTO.search(sentenca)
+        if m:
+            numero = numero_por_extenso(m.group("numero"))
+            if numero:
+                return str(numero), 0.85
+    return None, 0.0
+
+
+def extrair_votacao(texto):
+    """Último resultado de votação, juntando favoráveis, contrários e abstenções próximos"""
+    favoraveis = list(RE_FAVORAVEIS.finditer(texto))
+    if not favoraveis:
+        return None, 0.0
+    ultimo = favoraveis[-1]
+    janela_inicio = max(0, ultimo.start() - 300)
+    janela = texto[janela_inicio:ultimo.end() + 300]
+
+    resultado = {"favoráveis": numero_por_extenso(ultimo.group("n")), "contrários": 0, "abstenções": 0}
+    encontrados = 1
+    m = RE_CONTRARIOS.search(janela)
+    if m:
+        resultado["contrários"] = numero_por_extenso(m.group("n"))
+        encontrados += 1
+    m = RE_ABSTENCOES.search(janela)
+    if m:
+        resultado["abstenções"] = numero_por_extenso(m.group("n"))
+        encontrados += 1
+    if resultado["favoráveis"] is None:
+        return None, 0.0
+    return resultado, {1: 0.6, 2: 0.75, 3: 0.85}[encontrados]
+
+
+def extrair_presentes(texto):
+    for m in RE_PRESENTES.finditer(texto):
+        numero = numero_por_extenso(m.group("n"))
+        if numero:
+            return str(numero), 0.8
+    return None, 0.0
+
+
+def extrair_tipo(texto):
+    tipos = [m.group("tipo").upper() for m in RE_TIPO.finditer(texto)]
+    if not tipos:
+        return None, 0.0
+    tipo = max(set(tipos), key=tipos.count)
+    return tipo, 0.9 if tipos.count(tipo) == len(tipos) else 0.7
+
+
+def extrair_campos_locais(texto):
+    """Retorna {campo: (valor, confiança)} para os campos reconhecidos por regras"""
+    campos = {
+        "data_assembleia": extrair_data(texto),
+        "horario_inicio": extrair_horario_inicio(texto),
+        "tipo_assembleia": extrair_tipo(texto),
+        "presidente_apartamento": extrair_apartamento(texto, "presid"),
+        "secretario_apartamento": extrair_apartamento(texto, "secretári"),
+        "numero_presentes": extrair_presentes(texto),
+        "votacao_resultado": extrair_votacao(texto),
+    }
+    return {campo: resultado for campo, resultado in campos.items() if resultado[0] is not None}
+
+
+def campos_resolvidos(texto, limiar=LIMIAR_CONFIANCA):
+    """Apenas os valores com confiança suficiente para dispensar o LLM"""
+    return {
+        campo: valor
+        for campo, (valor, confianca) in extrair_campos_locais(texto).items()
+        if confianca >= limiar
+    }
@@ -0,0 +1,151 @@
+"""Fila de jobs persistente em SQLite, que sobrevive a reinícios do processo
+
+Um job que falha volta para a fila só depois de uma espera que dobra a cada
+tentativa (ESPERA_BASE_S, 2x, 4x...) até ESPERA_MAXIMA_S, para que uma API fora
+do ar não consuma todas as tentativas em segundos.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+ESPERA_BASE_S = 30.0
+ESPERA_MAXIMA_S = 30 * 60.0
+
+
+class FilaJobs:
+    def __init__(self, caminho_banco, max_tentativas=3, espera_base_s=ESPERA_BASE_S, espera_maxima_s=ESPERA_MAXIMA_S):
+        self.max_tentativas = max_tentativas
+        self.espera_base_s = espera_base_s
+        self.espera_maxima_s = espera_maxima_s
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho_banco, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo TEXT NOT NULL,
+                chave TEXT NOT NULL UNIQUE,
+                dados TEXT NOT NULL,
+                prioridade INTEGER NOT NULL DEFAULT 0,
+                estado TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                erro TEXT,
+                resultado TEXT,
+                criado_em REAL NOT NULL,
+                atualizado_em REAL NOT NULL,
+                disponivel_em REAL NOT NULL DEFAULT 0
+            )
+        """)
+        colunas = [linha[1] for linha in self.conexao.execute("PRAGMA table_info(jobs)")]
+        if "disponivel_em" not in colunas:
+            # Banco criado antes da espera entre tentativas
+            self.conexao.execute("ALTER TABLE jobs ADD COLUMN disponivel_em REAL NOT NULL DEFAULT 0")
+        self.conexao.execute("CREATE INDEX IF NOT EXISTS jobs_fila ON jobs (estado, prioridade DESC, id)")
+        # Jobs interrompidos por um encerramento anterior voltam para a fila
+        self.conexao.execute(
+            "UPDATE jobs SET estado = ?, atualizado_em = ? WHERE estado = ?",
+            (PENDENTE, time.time(), PROCESSANDO),
+        )
+        self.conexao.commit()
+
+    def adicionar(self, tipo, chave, dados, prioridade=0):
+        """Enfileira um job; retorna o id, ou None se a chave já existe"""
+        agora = time.time()
+        with self.lock:
+            cursor = self.conexao.execute(
+                "INSERT OR IGNORE INTO jobs (tipo, chave, dados, prioridade, estado, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tipo, chave, json.dumps(dados, ensure_ascii=False), prioridade, PENDENTE, agora, agora),
+            )
+            self.conexao.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def proximo(self, tipo=None):
+        """Reserva o próximo job pendente cuja espera já passou (maior prioridade, mais antigo)"""
+        with self.lock:
+            consulta = ("SELECT id, tipo, chave, dados, prioridade, tentativas FROM jobs "
+                        "WHERE estado = ? AND disponivel_em <= ?")
+            parametros = [PENDENTE, time.time()]
+            if tipo:
+                consulta += " AND tipo = ?"
+                parametros.append(tipo)
+            linha = self.conexao.execute(consulta + " ORDER BY prioridade DESC, id LIMIT 1", parametros).fetchone()
+            if linha is None:
+                return None
+            self.conexao.execute(
+                "UPDATE jobs SET estado = ?, tentativas = tentativas + 1, atualizado_em = ? WHERE id = ?",
+                (PROCESSANDO, time.time(), linha[0]),
+            )
+            self.conexao.commit()
+        return {
+            "id": linha[0], "tipo": linha[1], "chave": linha[2], "dados": json.loads(linha[3]),
+            "prioridade": linha[4], "tentativas": linha[5] + 1,
+        }
+
+    def concluir(self, job_id, resultado=None):
+        with self.lock:
+            self.conexao.execute(
+                "UPDATE jobs SET estado = ?, resultado = ?, erro = NULL, atualizado_em = ? WHERE id = ?",
+                (CONCLUIDO, json.dumps(resultado, ensure_ascii=False), time.time(), job_id),
+            )
+            self.conexao.commit()
+
+    def espera(self, tentativas):
+        """Segundos até a próxima tentativa depois de `tentativas` falhas"""
+        return min(self.espera_base_s * 2 ** (tentativas - 1), self.espera_maxima_s)
+
+    def falhar(self, job_id, erro):
+        """Registra o erro; o job volta para a fila, após a espera, até esgotar as tentativas"""
+        agora = time.time()
+        with self.lock:
+            tentativas = self.conexao.execute("SELECT tentativas FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            estado = PENDENTE if tentativas < self.max_tentativas else ERRO
+            self.conexao.execute(
+                "UPDATE jobs SET estado = ?, erro = ?, atualizado_em = ?, disponivel_em = ? WHERE id = ?",
+                (estado, str(erro), agora, agora + self.espera(tentativas), job_id),
+            )
+            self.conexao.commit()
+        return estado
+
+    def proxima_disponibilidade(self, tipo=None):
+        """Segundos até o próximo job pendente em espera poder rodar (None se não há nenhum)"""
+        consulta = "SELECT MIN(disponivel_em) FROM jobs WHERE estado = ?"
+        parametros = [PENDENTE]
+        if tipo:
+            consulta += " AND tipo = ?"
+            parametros.append(tipo)
+        with self.lock:
+            instante = self.conexao.execute(consulta, parametros).fetchone()[0]
+        return None if instante is None else max(0.0, instante - time.time())
+
+    def obter(self, job_id):
+        with self.lock:
+            linha = self.conexao.execute(
+                "SELECT id, tipo, chave, dados, prioridade, estado, tentativas, erro, resultado FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if linha is None:
+            return None
+        return {
+            "id": linha[0], "tipo": linha[1], "chave": linha[2], "dados": json.loads(linha[3]),
+            "prioridade": linha[4], "estado": linha[5], "tentativas": linha[6], "erro": linha[7],
+            "resultado": json.loads(linha[8]) if linha[8] else None,
+        }
+
+    def existe(self, chave):
+        with self.lock:
+            return self.conexao.execute("SELECT 1 FROM jobs WHERE chave = ?", (chave,)).fetchone() is not None
+
+    def contar(self, estado):
+        with self.lock:
+            return self.conexao.execute("SELECT COUNT(*) FROM jobs WHERE estado = ?", (estado,)).fetchone()[0]
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
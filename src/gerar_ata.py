@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -7,6 +8,18 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 import tiktoken
 from datetime import datetime
+from indice_bm25 import trechos_relevantes
+from extracao_local import campos_resolvidos
+from roteador_modelos import ModeloFixo, roteador
+from arquivo_busca import arquivar_assembleia
+from cadastro_condominios import campos_do_condominio, obter_cadastro, registrar_assembleia
+from cancelamento import Cancelado, verificar
+from condensacao import CONDENSAR, Condensador, condensar_transcricao
+from memoria_limitada import MEMORIA_LIMITADA, SecoesEmDisco, iterar_blocos, iterar_linhas
+from perfil import perfilado
+from progresso import DOCUMENTO, EXTRACAO, REDACAO, como_progresso, relatar
+from ata_hierarquica import gerar_secoes_hierarquicas, usar_modo_hierarquico
+from prompts import EstatisticasCache, mensagens_conteudo_formal
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -47,45 +60,75 @@ def criar_titulo_ata(doc, data_assembleia, tipo_assembleia="EXTRAORDINÁRIA"):
     run.font.size = Pt(12)
     run.font.bold = True
 
-def extrair_info_assembleia(transcricao):
-    """Extrai informações específicas da assembleia usando IA"""
+# Campos extraídos: descrição para o prompt e consulta usada no índice BM25
+CAMPOS_EXTRACAO = {
+    "data_assembleia": ("Data da assembleia (formato DD/MM/AAAA)", "data dia mês ano assembleia realizada"),
+    "horario_inicio": ("Horário de início", "horário hora início iniciou começou boa noite"),
+    "tipo_assembleia": ('Se é "ORDINÁRIA" ou "EXTRAORDINÁRIA"', "assembleia geral ordinária extraordinária"),
+    "presidente_nome": ("Nome do presidente da mesa", "presidente presidir mesa convidado convidada"),
+    "presidente_apartamento": ("Apartamento do presidente", "presidente presidir apartamento unidade"),
+    "secretario_nome": ("Nome do secretário", "secretário secretária secretariar"),
+    "secretario_apartamento": ("Apartamento do secretário", "secretário secretária apartamento unidade"),
+    "numero_presentes": ("Quantos presentes na assembleia", "presentes presença quórum moradores condôminos"),
+    "pautas": ("Lista das pautas principais discutidas", "pauta item ordem do dia assunto"),
+    "decisoes": ("Lista das principais decisões tomadas", "decidido aprovado aprovada decisão ficou"),
+    "votacao_resultado": ("Resultado das votações (favoráveis, contrários, abstenções)", "votação votos favoráveis contrários abstenções"),
+}
+# Parâmetros das chamadas ao LLM, os mesmos no modo interativo e no modo em lote (lote_ata.py)
+PARAMETROS_EXTRACAO = {"temperature": 0.1, "max_tokens": 1000}
+PARAMETROS_FORMAL = {"temperature": 0.2, "max_tokens": 4000}
+
+def preparar_extracao(transcricao):
+    """(campos já resolvidos, mensagens para o LLM ou None se nada faltou)
+
+    Datas, horários, apartamentos e votações são resolvidos primeiro por regras
+    locais (extracao_local.py) e os dados do condomínio pelo cadastro
+    (cadastro_condominios.py); o prompt só pede os campos que faltaram.
+    """
+    info = campos_resolvidos(transcricao)
+    # Nome, CNPJ, endereço e local vêm do cadastro quando o condomínio é reconhecido
+    info.update(campos_do_condominio(obter_cadastro().identificar(transcricao)))
+    faltantes = [campo for campo in CAMPOS_EXTRACAO if campo not in info]
+    if not faltantes:
+        return info, None
+
+    contexto = trechos_relevantes(
+        transcricao, [CAMPOS_EXTRACAO[c][1] for c in faltantes], k=4, max_caracteres=6000
+    )
+    lista_campos = "\n".join(
+        f"{i}. {campo}: {CAMPOS_EXTRACAO[campo][0]}" for i, campo in enumerate(faltantes, 1)
+    )
     prompt = f"""
 Analise esta transcrição de assembleia de condomínio e extraia as seguintes informações específicas em formato JSON:
 
-1. data_assembleia: Data da assembleia (formato DD/MM/AAAA)
-2. horario_inicio: Horário de início
-3. tipo_assembleia: Se é "ORDINÁRIA" ou "EXTRAORDINÁRIA"
-4. presidente_nome: Nome do presidente da mesa
-5. presidente_apartamento: Apartamento do presidente
-6. secretario_nome: Nome do secretário
-7. secretario_apartamento: Apartamento do secretário
-8. numero_presentes: Quantos presentes na assembleia
-9. pautas: Lista das pautas principais discutidas
-10. decisoes: Lista das principais decisões tomadas
-11. votacao_resultado: Resultado das votações (favoráveis, contrários, abstenções)
-
-Transcrição:
-{transcricao[:3000]}...
+{lista_campos}
+
+Trechos relevantes da transcrição:
+{contexto}
 
 Responda APENAS com um JSON válido, sem explicações adicionais.
 """
-    
+    mensagens = [
+        {"role": "system", "content": "Você extrai informações específicas de transcrições de assembleias e responde apenas com JSON válido."},
+        {"role": "user", "content": prompt}
+    ]
+    return info, mensagens
+
+
+def concluir_extracao(info, conteudo):
+    """Junta a resposta do LLM (JSON) aos campos resolvidos localmente
+
+    conteudo None ou inválido: valores padrão, mantendo o que foi resolvido localmente.
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Você extrai informações específicas de transcrições de assembleias e responde apenas com JSON válido."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=1000,
-        )
-        
-        import json
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        # Fallback com dados padrão
-        return {
+        if conteudo is None:
+            raise ValueError("sem resposta do LLM")
+        extraido = json.loads(conteudo)
+        extraido.update(info)
+        return extraido
+    except Exception:
+        # Fallback com dados padrão (mantendo o que foi resolvido localmente)
+        padrao = {
             "data_assembleia": datetime.now().strftime("%d/%m/%Y"),
             "horario_inicio": "19h40",
             "tipo_assembleia": "EXTRAORDINÁRIA",
@@ -98,6 +141,34 @@ Responda APENAS com um JSON válido, sem explicações adicionais.
             "decisoes": ["Decisões a serem definidas"],
             "votacao_resultado": {"favoráveis": 0, "contrários": 0, "abstenções": 0}
         }
+        padrao.update(info)
+        return padrao
+
+
+def extrair_info_assembleia(transcricao, cancelamento=None):
+    """Extrai informações específicas da assembleia usando IA
+
+    Só os campos que as regras locais e o cadastro não resolveram vão ao LLM
+    (ver preparar_extracao).
+    """
+    info, mensagens = preparar_extracao(transcricao)
+    if mensagens is None:
+        return info
+
+    try:
+        response = roteador.chamar(
+            "extracao",
+            client,
+            cancelamento=cancelamento,
+            messages=mensagens,
+            **PARAMETROS_EXTRACAO,
+        )
+        conteudo = response.choices[0].message.content
+    except Cancelado:
+        raise
+    except Exception:
+        conteudo = None
+    return concluir_extracao(info, conteudo)
 
 def criar_paragrafo_abertura(doc, info):
     """Cria o parágrafo de abertura padrão"""
@@ -124,7 +195,14 @@ def criar_paragrafo_abertura(doc, info):
     if info.get('secretario_apartamento') and info['secretario_apartamento'] != 'N/A':
         secretario_info += f", apto. {info['secretario_apartamento']}"
     
-    texto_abertura = f"""Aos {data_completa}, às {info['horario_inicio']}, iniciou-se a Assembleia geral {info['tipo_assembleia']} do {info.get('nome_condominio', 'Condomínio')}, CNPJ n° 47.688.457/0001-02, situado à Avenida Engenheiro Valdir Pedro Monachesi, n° 1.400, no bairro Aeroporto, em Juiz de Fora, Minas Gerais, {info.get('local_realizacao', '')}, conforme {info['numero_presentes']} presentes, para deliberar sobre a seguinte pauta: {pautas_texto}. Para presidir a assembleia foi convidado(a) {presidente_info}, e para secretariá-la, {secretario_info}. A leitura do edital de convocação foi realizada, porém, dispensada a leitura da ata da última assembleia, que teve a aprovação de todos."""
+    # CNPJ e endereço do cadastro de condomínios; sem cadastro, a frase é omitida
+    identificacao = ""
+    if info.get('cnpj_condominio'):
+        identificacao += f", CNPJ n° {info['cnpj_condominio']}"
+    if info.get('endereco_condominio'):
+        identificacao += f", situado à {info['endereco_condominio']}"
+
+    texto_abertura = f"""Aos {data_completa}, às {info['horario_inicio']}, iniciou-se a Assembleia geral {info['tipo_assembleia']} do {info.get('nome_condominio', 'Condomínio')}{identificacao}, {info.get('local_realizacao', '')}, conforme {info['numero_presentes']} presentes, para deliberar sobre a seguinte pauta: {pautas_texto}. Para presidir a assembleia foi convidado(a) {presidente_info}, e para secretariá-la, {secretario_info}. A leitura do edital de convocação foi realizada, porém, dispensada a leitura da ata da última assembleia, que teve a aprovação de todos."""
     
     abertura.add_run(texto_abertura)
 
@@ -142,59 +220,44 @@ def converter_data_por_extenso(data_str):
     except:
         return "data a ser definida"
 
+@perfilado("tokenizacao")
 def dividir_texto_em_blocos(texto, max_tokens=3500):
     """Divide texto em blocos menores"""
+    return [bloco for bloco, _ in dividir_com_tokens(texto, max_tokens)]
+
+def dividir_com_tokens(texto, max_tokens=3500):
+    """Mesmos blocos de dividir_texto_em_blocos, como pares (bloco, tokens) para o progresso"""
     tokenizer = tiktoken.get_encoding("cl100k_base")
     tokens = tokenizer.encode(texto)
     blocos = []
     for i in range(0, len(tokens), max_tokens):
         bloco_tokens = tokens[i:i+max_tokens]
-        bloco_texto = tokenizer.decode(bloco_tokens)
-        blocos.append(bloco_texto)
+        blocos.append((tokenizer.decode(bloco_tokens), len(bloco_tokens)))
     return blocos
 
-def gerar_conteudo_formal(bloco_texto, info_assembleia):
-    """Gera conteúdo formal baseado no modelo padrão"""
-    prompt = f"""
-Você é um redator profissional de atas de assembleia de condomínio seguindo o padrão da Contato Administração.
+def gerar_conteudo_formal(bloco_texto, info_assembleia, cancelamento=None, estatisticas_cache=None, modelo_fixo=None):
+    """Gera conteúdo formal baseado no modelo padrão
 
-IMPORTANTE: Transforme este trecho da transcrição em texto formal seguindo EXATAMENTE o estilo da ata modelo fornecida:
+    estatisticas_cache: EstatisticasCache da ata em andamento, opcional.
+    modelo_fixo: ModeloFixo compartilhado pelos blocos da ata, para todos saírem do mesmo modelo.
+    """
+    # Instruções e contexto vêm antes do trecho para formar um prefixo que o provedor reaproveita
+    mensagens = mensagens_conteudo_formal(bloco_texto, info_assembleia)
 
-CARACTERÍSTICAS DO MODELO:
-- Texto narrativo em terceira pessoa
-- Linguagem formal e técnica 
-- Parágrafos longos e detalhados
-- Sempre mencionar valores monetários por extenso entre parênteses
-- Incluir detalhes técnicos como CNPJ, endereços, frações ideais
-- Usar títulos em negrito para seções principais
-- Manter sequência cronológica dos fatos
-
-CONTEXTO DA ASSEMBLEIA:
-- Condomínio: Millennium Residence
-- CNPJ: 47.688.457/0001-02
-- Endereço: Avenida Engenheiro Valdir Pedro Monachesi, 1.400, Aeroporto, Juiz de Fora/MG
-- Presidente: {info_assembleia.get('presidente_nome', 'N/A')}
-- Secretário: {info_assembleia.get('secretario_nome', 'N/A')}
-
-NÃO inclua cabeçalhos, títulos principais ou assinaturas - apenas o conteúdo narrativo do trecho.
-
-Trecho da transcrição:
-{bloco_texto}
-
-Transforme em texto formal seguindo o padrão:
-"""
-    
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "Você reescreve transcrições seguindo o padrão formal de atas da Contato Administração de Condomínios."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=4000,
+        response = roteador.chamar(
+            "formal",
+            client,
+            fixo=modelo_fixo,
+            cancelamento=cancelamento,
+            messages=mensagens,
+            **PARAMETROS_FORMAL,
         )
+        if estatisticas_cache is not None:
+            estatisticas_cache.registrar(response)
         return response.choices[0].message.content
+    except Cancelado:
+        raise
     except Exception as e:
         raise RuntimeError(f"Erro ao gerar conteúdo formal: {e}")
 
@@ -236,69 +299,160 @@ def criar_assinaturas(doc, info):
     run = assinaturas.add_run(f"Secretário: {info['secretario_nome']}")
     run.font.bold = True
 
-def gerar_ata_formal(transcricao, caminho_saida="ata_gerada.docx", status_callback=None, info_assembleia=None):
-    """Função principal que gera a ata completa"""
+def redigir_em_fluxo(transcricao, enunciados, info_assembleia, progresso, cancelamento=None, estatisticas_cache=None):
+    """Redação no modo de memória limitada (ver memoria_limitada.py)
+
+    Condensação, divisão em blocos e redação encadeadas como geradores: só um
+    bloco por vez fica em memória e cada seção redigida vai para o disco.
+    Devolve um SecoesEmDisco, que quem chamou deve fechar.
+    """
+    progresso.relatar("Memória limitada: redigindo bloco a bloco...", REDACAO)
+    condensador = Condensador() if CONDENSAR else None
+    linhas = condensador.fluxo(transcricao, enunciados) if condensador else iterar_linhas(transcricao)
+    secoes = SecoesEmDisco()
+    modelo_fixo = ModeloFixo()
+    tokens = 0
+    try:
+        # Sem a transcrição inteira dividida não se sabe o total de blocos de antemão
+        for i, (bloco, tokens_bloco) in enumerate(iterar_blocos(linhas, max_tokens=3500)):
+            progresso.relatar(f"Processando bloco {i+1}...", blocos_feitos=i, tokens=tokens)
+            secoes.acrescentar(gerar_conteudo_formal(bloco, info_assembleia, cancelamento, estatisticas_cache,
+                                                     modelo_fixo))
+            tokens += tokens_bloco
+    except BaseException:
+        secoes.fechar()
+        raise
+    progresso.relatar(blocos_feitos=len(secoes), blocos_total=len(secoes), tokens=tokens)
+    if condensador:
+        progresso(condensador.estatisticas.resumo())
+    return secoes
+
+@perfilado("docx")
+def salvar_documento_ata(transcricao, secoes, info_assembleia, caminho_saida, report=print, cancelamento=None,
+                         enunciados=None, caminho_transcricao=None):
+    """Monta o .docx (cabeçalho, abertura, seções formais, encerramento) e grava
+
+    Usado por gerar_ata_formal e pela passada final do modo em pipeline.
+    enunciados, quando há, vão para o arquivo de busca com orador e instante; caminho_transcricao
+    é onde a transcrição já foi indexada (arquivo_busca.arquivar_assembleia).
+    """
+    relatar(report, "Criando documento...", DOCUMENTO)
+    doc = docx.Document()
     
-    def report(msg):
-        if status_callback:
-            status_callback(msg)
-        else:
-            print(msg)
+    # Configurar margens
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Inches(1)
+        section.bottom_margin = Inches(1)
+        section.left_margin = Inches(1)
+        section.right_margin = Inches(1)
+    
+    # Criar estrutura do documento
+    report("Criando cabeçalho...")
+    criar_cabecalho_documento(doc, info_assembleia)
+    
+    report("Criando título...")
+    criar_titulo_ata(doc, info_assembleia['data_assembleia'], info_assembleia['tipo_assembleia'])
+    
+    report("Criando abertura...")
+    criar_paragrafo_abertura(doc, info_assembleia)
+
+    for conteudo_formal in secoes:
+        # Adicionar como parágrafo justificado
+        paragrafo = doc.add_paragraph()
+        paragrafo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        paragrafo.add_run(conteudo_formal)
+
+    report("Criando encerramento...")
+    criar_paragrafo_encerramento(doc, info_assembleia)
+    
+    report("Adicionando assinaturas...")
+    criar_assinaturas(doc, info_assembleia)
+    
+    verificar(cancelamento)
+    report("Salvando documento...")
+    # Grava ao lado e só substitui no fim, para o cancelamento não deixar um .docx pela metade
+    caminho_temporario = caminho_saida + ".tmp"
+    doc.save(caminho_temporario)
+    if cancelamento is not None and cancelamento.cancelado:
+        os.remove(caminho_temporario)
+        cancelamento.verificar()
+    os.replace(caminho_temporario, caminho_saida)
+
+    report("Atualizando arquivo de busca...")
+    arquivar_assembleia(caminho_saida, transcricao, [p.text for p in doc.paragraphs], info_assembleia, enunciados,
+                        caminho_transcricao)
+    registrar_assembleia(info_assembleia)
+
+def gerar_ata_formal(transcricao, caminho_saida="ata_gerada.docx", status_callback=None, info_assembleia=None, modo=None,
+                     cancelamento=None, enunciados=None, memoria_limitada=None, caminho_transcricao=None):
+    """Função principal que gera a ata completa
+
+    modo: "blocos", "hierarquico" ou "auto" (ver ata_hierarquica.py); None usa ATA_MODO do .env.
+    cancelamento: TokenCancelamento opcional; um .docx incompleto nunca é gravado.
+    enunciados: opcional; com os oradores, a condensação une as falas seguidas de cada um.
+    memoria_limitada: redige bloco a bloco com as seções em disco (sempre por blocos);
+    None usa ATA_MEMORIA_LIMITADA do .env.
+    caminho_transcricao: onde a transcrição já foi indexada para busca; o documento passa para a ata.
+    """
+    if memoria_limitada is None:
+        memoria_limitada = MEMORIA_LIMITADA
+    
+    # Sem status_callback as mensagens vão para o terminal, como antes
+    progresso = como_progresso(status_callback or print)
     
     try:
         # Usa informações fornecidas pelo usuário ou valores padrão
         if info_assembleia is None:
-            report("Extraindo informações da assembleia...")
-            info_assembleia = extrair_info_assembleia(transcricao)
+            progresso.relatar("Extraindo informações da assembleia...", EXTRACAO)
+            info_assembleia = extrair_info_assembleia(transcricao, cancelamento)
         else:
-            report("Usando informações fornecidas pelo usuário...")
-        
-        report("Criando documento...")
-        doc = docx.Document()
-        
-        # Configurar margens
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = Inches(1)
-            section.bottom_margin = Inches(1)
-            section.left_margin = Inches(1)
-            section.right_margin = Inches(1)
-        
-        # Criar estrutura do documento
-        report("Criando cabeçalho...")
-        criar_cabecalho_documento(doc, info_assembleia)
-        
-        report("Criando título...")
-        criar_titulo_ata(doc, info_assembleia['data_assembleia'], info_assembleia['tipo_assembleia'])
+            progresso.relatar("Usando informações fornecidas pelo usuário...", EXTRACAO)
         
-        report("Criando abertura...")
-        criar_paragrafo_abertura(doc, info_assembleia)
-        
-        # Processar conteúdo em blocos
-        report("Dividindo transcrição em blocos...")
-        blocos = dividir_texto_em_blocos(transcricao, max_tokens=3500)
-        report(f"Processando {len(blocos)} blocos de conteúdo...")
-        
-        for i, bloco in enumerate(blocos):
-            report(f"Processando bloco {i+1}/{len(blocos)}...")
-            conteudo_formal = gerar_conteudo_formal(bloco, info_assembleia)
-            
-            # Adicionar como parágrafo justificado
-            paragrafo = doc.add_paragraph()
-            paragrafo.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            paragrafo.add_run(conteudo_formal)
-        
-        report("Criando encerramento...")
-        criar_paragrafo_encerramento(doc, info_assembleia)
-        
-        report("Adicionando assinaturas...")
-        criar_assinaturas(doc, info_assembleia)
+        estatisticas_cache = EstatisticasCache()
+        if memoria_limitada:
+            secoes = redigir_em_fluxo(transcricao, enunciados, info_assembleia, progresso, cancelamento,
+                                      estatisticas_cache)
+        else:
+            # Só a redação recebe o texto condensado; extração e arquivo de busca ficam com a transcrição original
+            texto_redacao = transcricao
+            if CONDENSAR:
+                texto_redacao, condensacao = condensar_transcricao(transcricao, enunciados)
+                progresso(condensacao.resumo())
+            if usar_modo_hierarquico(texto_redacao, modo):
+                progresso.relatar("Assembleia longa: usando o modo hierárquico...", REDACAO)
+                secoes = gerar_secoes_hierarquicas(client, texto_redacao, info_assembleia, progresso, cancelamento,
+                                                   estatisticas_cache)
+            else:
+                # Processar conteúdo em blocos
+                progresso.relatar("Dividindo transcrição em blocos...", REDACAO)
+                blocos = dividir_com_tokens(texto_redacao, max_tokens=3500)
+                progresso(f"Processando {len(blocos)} blocos de conteúdo...")
+                secoes = []
+                modelo_fixo = ModeloFixo()
+                tokens = 0
+                for i, (bloco, tokens_bloco) in enumerate(blocos):
+                    progresso.relatar(f"Processando bloco {i+1}/{len(blocos)}...", blocos_feitos=i, blocos_total=len(blocos),
+                                      tokens=tokens)
+                    secoes.append(gerar_conteudo_formal(bloco, info_assembleia, cancelamento, estatisticas_cache,
+                                                        modelo_fixo))
+                    tokens += tokens_bloco
+                progresso.relatar(blocos_feitos=len(blocos), tokens=tokens)
         
-        report("Salvando documento...")
-        doc.save(caminho_saida)
+        progresso(estatisticas_cache.resumo())
+
+        try:
+            salvar_documento_ata(transcricao, secoes, info_assembleia, caminho_saida, progresso, cancelamento,
+                                 enunciados, caminho_transcricao)
+        finally:
+            if memoria_limitada:
+                secoes.fechar()
         
-        report(f"Ata gerada com sucesso: {caminho_saida}")
+        progresso(f"Ata gerada com sucesso: {caminho_saida}")
         
+    except Cancelado:
+        progresso("Geração da ata cancelada.")
+        raise
     except Exception as e:
-        report(f"Erro ao gerar ata: {e}")
-        raise
\ No newline at end of file
+        progresso(f"Erro ao gerar ata: {e}")
+        raise
@@ -0,0 +1,134 @@
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter, OrderedDict
+
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das",
+    "em", "no", "na", "nos", "nas", "por", "para", "pra", "com", "sem", "e", "ou",
+    "que", "se", "ao", "aos", "à", "às", "é", "foi", "ser", "ter", "tem", "eu",
+    "ele", "ela", "eles", "elas", "nós", "você", "vocês", "isso", "isto", "aquilo",
+    "esse", "essa", "este", "esta", "né", "aí", "então", "tipo", "mais", "mas",
+    "já", "lá", "cá", "também", "muito", "bem", "como", "quando", "onde",
+}
+
+_RE_SENTENCA = re.compile(r"(?<=[.!?])\s+")
+_RE_TOKEN = re.compile(r"\w+")
+
+# Cache dos índices por transcrição (o índice é construído uma única vez)
+_CACHE_INDICES = OrderedDict()
+_MAX_CACHE = 4
+
+
+def _sem_acentos(texto):
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def tokenizar(texto):
+    """Tokens em minúsculas, sem acentos e sem stopwords"""
+    return [
+        _sem_acentos(t)
+        for t in _RE_TOKEN.findall(texto.lower())
+        if t not in STOPWORDS
+    ]
+
+
+def dividir_em_trechos(texto, sentencas_por_trecho=2):
+    """Quebra a transcrição em trechos curtos de poucas sentenças"""
+    sentencas = [s.strip() for s in _RE_SENTENCA.split(texto) if s.strip()]
+    return [
+        " ".join(sentencas[i:i + sentencas_por_trecho])
+        for i in range(0, len(sentencas), sentencas_por_trecho)
+    ]
+
+
+class IndiceBM25:
+    """Índice léxico BM25 (Okapi) sobre trechos de uma transcrição"""
+
+    def __init__(self, trechos, k1=1.5, b=0.75):
+        self.trechos = list(trechos)
+        self.k1 = k1
+        self.b = b
+        # Índice invertido: termo -> [(posição do trecho, frequência)]
+        # Montado trecho a trecho, sem guardar um Counter por trecho: o índice
+        # fica no cache e numa gravação de 8h os Counters dobravam o seu tamanho
+        self.postings = {}
+        self.tamanhos = []
+        for i, trecho in enumerate(self.trechos):
+            freq = Counter(tokenizar(trecho))
+            self.tamanhos.append(sum(freq.values()))
+            for termo, tf in freq.items():
+                self.postings.setdefault(termo, []).append((i, tf))
+        self.tamanho_medio = (sum(self.tamanhos) / len(self.tamanhos)) if self.tamanhos else 0.0
+
+        n = len(self.trechos)
+        self.idf = {
+            termo: math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termo, lista in self.postings.items()
+        }
+
+    def pontuar(self, consulta):
+        """Retorna {posição do trecho: pontuação} para os trechos que casam com a consulta"""
+        pontuacoes = {}
+        for termo in set(tokenizar(consulta)):
+            idf = self.idf.get(termo)
+            if idf is None:
+                continue
+            for i, tf in self.postings[termo]:
+                norma = self.k1 * (1 - self.b + self.b * self.tamanhos[i] / (self.tamanho_medio or 1))
+                pontuacoes[i] = pontuacoes.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norma)
+        return pontuacoes
+
+    def buscar(self, consulta, k=5):
+        """Posições dos k trechos mais relevantes, da maior para a menor pontuação"""
+        pontuacoes = self.pontuar(consulta)
+        return sorted(pontuacoes, key=pontuacoes.get, reverse=True)[:k]
+
+
+def obter_indice(texto):
+    """Índice da transcrição, reaproveitado enquanto o texto não mudar"""
+    chave = hashlib.sha1(texto.encode("utf-8")).hexdigest()
+    indice = _CACHE_INDICES.get(chave)
+    if indice is None:
+        indice = IndiceBM25(dividir_em_trechos(texto))
+        _CACHE_INDICES[chave] = indice
+        if len(_CACHE_INDICES) > _MAX_CACHE:
+            _CACHE_INDICES.popitem(last=False)
+    else:
+        _CACHE_INDICES.move_to_end(chave)
+    return indice
+
+
+def trechos_relevantes(texto, consultas, k=5, max_caracteres=4000, incluir_inicio=True):
+    """Junta os top-k trechos de cada consulta, na ordem em que aparecem na transcrição
+
+    consultas pode ser uma string ou uma lista de strings. Com incluir_inicio o
+    primeiro trecho (abertura da assembleia) entra sempre no contexto.
+    """
+    if isinstance(consultas, str):
+        consultas = [consultas]
+    indice = obter_indice(texto)
+    if not indice.trechos:
+        return ""
+
+    selecionados = []
+    if incluir_inicio:
+        selecionados.append(0)
+    # Intercala os resultados das consultas para que todas tenham espaço no orçamento
+    resultados = [indice.buscar(c, k) for c in consultas]
+    for posicao in range(k):
+        for lista in resultados:
+            if posicao < len(lista) and lista[posicao] not in selecionados:
+                selecionados.append(lista[posicao])
+
+    escolhidos = []
+    total = 0
+    for i in selecionados:
+        tamanho = len(indice.trechos[i]) + 5
+        if total + tamanho > max_caracteres and escolhidos:
+            continue
+        escolhidos.append(i)
+        total += tamanho
+
+    return "\n[...]\n".join(indice.trechos[i] for i in sorted(escolhidos))
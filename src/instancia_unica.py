@@ -0,0 +1,107 @@
+"""Instância única da interface: novas aberturas entregam os arquivos à janela já aberta
+
+Cada duplo clique num áudio (ou no atalho) abriria um processo novo, pagando
+de novo a importação do PySide6/OpenAI, o carregamento do .ui e do .qss, e
+começando sem os caches e conexões já aquecidos. Com a instância única, a
+primeira janela escuta num socket local (QLocalServer: named pipe no Windows,
+socket Unix nos demais) e as aberturas seguintes só enviam a lista de
+arquivos e terminam; a janela enfileira os arquivos recebidos.
+
+Protocolo: uma linha JSON {"arquivos": [...]} do cliente, "ok" de resposta.
+Desliga com INSTANCIA_UNICA=0 no .env (cada abertura volta a ser um processo).
+"""
+import getpass
+import hashlib
+import json
+import os
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+INSTANCIA_UNICA = os.getenv("INSTANCIA_UNICA", "1").strip().lower() not in ("0", "false", "nao", "não")
+# Conectar a um servidor local vivo leva poucos ms; mais que isso é instância travada ou inexistente
+TEMPO_CONEXAO_MS = int(os.getenv("INSTANCIA_UNICA_TIMEOUT_MS", "1000"))
+
+
+def nome_servidor():
+    """Nome do socket, por usuário: no Windows os named pipes são visíveis a todas as sessões"""
+    try:
+        usuario = getpass.getuser()
+    except Exception:
+        usuario = os.path.expanduser("~")
+    return "transcrever_ata-" + hashlib.sha1(usuario.encode("utf-8")).hexdigest()[:12]
+
+
+def encaminhar_para_instancia(arquivos, nome=None, timeout_ms=TEMPO_CONEXAO_MS):
+    """Entrega os arquivos à janela já aberta; True se havia uma e ela confirmou
+
+    Chamada antes de criar a QApplication (as chamadas bloqueantes do
+    QLocalSocket dispensam o laço de eventos), para a segunda abertura sair sem
+    importar o resto da interface.
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(nome or nome_servidor())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    try:
+        # Caminhos relativos ao diretório de quem abriu, não ao da janela que recebe
+        mensagem = {"arquivos": [os.path.abspath(a) for a in arquivos]}
+        socket.write((json.dumps(mensagem, ensure_ascii=False) + "\n").encode("utf-8"))
+        if not socket.waitForBytesWritten(timeout_ms):
+            return False
+        while not socket.canReadLine():
+            if not socket.waitForReadyRead(timeout_ms):
+                return False
+        return bytes(socket.readLine()).strip() == b"ok"
+    finally:
+        socket.disconnectFromServer()
+
+
+class ServidorInstancia(QObject):
+    """Escuta as aberturas seguintes e emite os arquivos que elas enviam"""
+    arquivos_recebidos = Signal(list)
+
+    def __init__(self, nome=None, parent=None):
+        super().__init__(parent)
+        self.nome = nome or nome_servidor()
+        self.servidor = QLocalServer(self)
+        # Só o próprio usuário conecta
+        self.servidor.setSocketOptions(QLocalServer.UserAccessOption)
+        self.servidor.newConnection.connect(self.nova_conexao)
+
+    def iniciar(self):
+        """Começa a escutar; False se não foi possível (a janela segue funcionando sozinha)"""
+        if self.servidor.listen(self.nome):
+            return True
+        if self.servidor.serverError() == QLocalSocket.AddressInUseError:
+            # Socket Unix de uma instância que terminou sem fechar: ninguém responde nele
+            QLocalServer.removeServer(self.nome)
+            if self.servidor.listen(self.nome):
+                return True
+        print(f"Aviso: instância única indisponível: {self.servidor.errorString()}")
+        return False
+
+    def nova_conexao(self):
+        while self.servidor.hasPendingConnections():
+            conexao = self.servidor.nextPendingConnection()
+            conexao.readyRead.connect(lambda c=conexao: self.ler(c))
+            conexao.disconnected.connect(conexao.deleteLater)
+            # Dados que chegaram junto com a conexão
+            if conexao.canReadLine():
+                self.ler(conexao)
+
+    def ler(self, conexao):
+        while conexao.canReadLine():
+            linha = bytes(conexao.readLine()).decode("utf-8", errors="replace")
+            try:
+                arquivos = [str(a) for a in json.loads(linha).get("arquivos", [])]
+            except (ValueError, AttributeError) as e:
+                print(f"Aviso: mensagem inválida de outra instância: {e}")
+                conexao.disconnectFromServer()
+                return
+            conexao.write(b"ok\n")
+            conexao.flush()
+            self.arquivos_recebidos.emit(arquivos)
+
+    def fechar(self):
+        self.servidor.close()
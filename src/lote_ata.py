@@ -0,0 +1,331 @@
+"""Modo adiado: atas sem urgência pela API de lotes (Batch API) da OpenAI
+
+A maioria das atas só precisa ficar pronta no dia seguinte. Em vez de uma
+chamada interativa por bloco, o modo adiado empacota os prompts de uma ou
+várias assembleias num arquivo JSONL, envia como um lote (metade do preço,
+resposta em até LOTE_JANELA) e monta os .docx quando os resultados chegam.
+
+Os prompts de redação levam o contexto da assembleia (presidente,
+secretário...), que pode depender da extração. Por isso um lote passa por até
+duas fases no provedor:
+
+- extracao: só as assembleias cujos campos as regras locais e o cadastro não
+  resolveram (ver gerar_ata.preparar_extracao);
+- redacao: um pedido por bloco de cada assembleia, com os mesmos prompts e
+  parâmetros do modo interativo (redação por blocos; o modo hierárquico, com
+  três rodadas dependentes, não é usado aqui).
+
+O andamento fica em ~/.transcrever_ata/lotes.sqlite3 e sobrevive ao fim do
+processo: `python cli.py lote enviar ...` e, mais tarde, `python cli.py lote
+acompanhar`. Pedidos sem resposta (lote expirado, erro num pedido) são
+reenviados num novo lote; esgotadas as tentativas, a extração fica com os
+valores padrão e os blocos restantes são redigidos pela API interativa.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import gerar_ata
+from condensacao import CONDENSAR, condensar_transcricao
+from gerar_ata import (PARAMETROS_EXTRACAO, PARAMETROS_FORMAL, concluir_extracao, dividir_texto_em_blocos,
+                       gerar_conteudo_formal, preparar_extracao, salvar_documento_ata)
+from prompts import mensagens_conteudo_formal
+from roteador_modelos import ModeloFixo, roteador
+
+CAMINHO_LOTES_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "lotes.sqlite3")
+JANELA_LOTE = os.getenv("LOTE_JANELA", "24h")
+INTERVALO_ACOMPANHAMENTO = float(os.getenv("LOTE_INTERVALO_S", "60"))
+MAX_TENTATIVAS = 3
+# Preço do lote em relação às mesmas chamadas interativas
+FATOR_PRECO_LOTE = 0.5
+ENDPOINT = "/v1/chat/completions"
+
+# Estado local de cada lote
+ENVIADO = "enviado"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+EXTRACAO = "extracao"
+REDACAO = "redacao"
+
+# Estados do lote no provedor
+EM_ANDAMENTO = ("validating", "in_progress", "finalizing", "cancelling")
+ENCERRADOS = ("completed", "expired", "cancelled")
+
+
+def _id_extracao(indice):
+    return f"ata-{indice}-extracao"
+
+
+def _id_bloco(indice, bloco):
+    return f"ata-{indice}-bloco-{bloco}"
+
+
+def _ler_id(custom_id):
+    """(índice da ata, índice do bloco ou None para a extração)"""
+    partes = custom_id.split("-")
+    return int(partes[1]), (int(partes[3]) if partes[2] == "bloco" else None)
+
+
+def preparar_ata(transcricao, caminho_saida, info_assembleia=None, enunciados=None):
+    """Tudo o que o lote precisa de uma assembleia, resolvido localmente antes do envio"""
+    ata = {
+        "transcricao": transcricao,
+        "caminho_saida": os.path.abspath(caminho_saida),
+        "info": info_assembleia,
+        "info_local": None,
+        "mensagens_extracao": None,
+        "secoes": {},
+    }
+    if info_assembleia is None:
+        info, mensagens = preparar_extracao(transcricao)
+        if mensagens is None:
+            ata["info"] = info
+        else:
+            ata["info_local"], ata["mensagens_extracao"] = info, mensagens
+    # Só a redação recebe o texto condensado, como em gerar_ata_formal
+    texto_redacao = transcricao
+    if CONDENSAR:
+        texto_redacao, _ = condensar_transcricao(transcricao, enunciados)
+    ata["blocos"] = dividir_texto_em_blocos(texto_redacao, max_tokens=3500)
+    return ata
+
+
+class LotesAtas:
+    """Lotes de atas enviados ao provedor, persistidos em SQLite"""
+
+    def __init__(self, caminho=None, client=None, report=print):
+        caminho = caminho or CAMINHO_LOTES_PADRAO
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Cópia dos JSONL enviados, ao lado do banco
+        self.pasta_arquivos = os.path.join(os.path.dirname(caminho), "lotes")
+        self.client = client
+        self.report = report
+        self.lock = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS lotes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fase TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                batch_id TEXT,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                atas TEXT NOT NULL,
+                erro TEXT,
+                criado_em REAL NOT NULL,
+                atualizado_em REAL NOT NULL
+            )
+        """)
+        self.conexao.commit()
+
+    @property
+    def cliente(self):
+        # Lido a cada uso: testes e benchmarks trocam gerar_ata.client por um servidor local
+        return self.client or gerar_ata.client
+
+    def _obter(self, lote_id):
+        with self.lock:
+            linha = self.conexao.execute(
+                "SELECT id, fase, estado, batch_id, tentativas, atas, erro, criado_em FROM lotes WHERE id = ?",
+                (lote_id,),
+            ).fetchone()
+        if linha is None:
+            raise KeyError(f"Lote {lote_id} não encontrado")
+        return {
+            "id": linha[0], "fase": linha[1], "estado": linha[2], "batch_id": linha[3],
+            "tentativas": linha[4], "atas": json.loads(linha[5]), "erro": linha[6], "criado_em": linha[7],
+        }
+
+    def _gravar(self, lote):
+        with self.lock:
+            self.conexao.execute(
+                "UPDATE lotes SET fase = ?, estado = ?, batch_id = ?, tentativas = ?, atas = ?, erro = ?, "
+                "atualizado_em = ? WHERE id = ?",
+                (lote["fase"], lote["estado"], lote["batch_id"], lote["tentativas"],
+                 json.dumps(lote["atas"], ensure_ascii=False), lote["erro"], time.time(), lote["id"]),
+            )
+            self.conexao.commit()
+
+    def criar(self, atas):
+        """Prepara e envia um lote; atas: dicts de preparar_ata. Devolve o id local do lote"""
+        if not atas:
+            raise ValueError("Nenhuma ata para enviar")
+        fase = EXTRACAO if any(a["info"] is None for a in atas) else REDACAO
+        agora = time.time()
+        with self.lock:
+            cursor = self.conexao.execute(
+                "INSERT INTO lotes (fase, estado, atas, criado_em, atualizado_em) VALUES (?, ?, ?, ?, ?)",
+                (fase, ENVIADO, json.dumps(atas, ensure_ascii=False), agora, agora),
+            )
+            self.conexao.commit()
+            lote_id = cursor.lastrowid
+        lote = self._obter(lote_id)
+        self._enviar(lote)
+        return lote_id
+
+    def _requisicoes(self, lote):
+        """Linhas do JSONL com os pedidos da fase que ainda não têm resposta"""
+        linhas = []
+        for i, ata in enumerate(lote["atas"]):
+            if lote["fase"] == EXTRACAO:
+                if ata["info"] is None:
+                    corpo = {"model": roteador.modelos("extracao")[0], "messages": ata["mensagens_extracao"],
+                             **PARAMETROS_EXTRACAO}
+                    linhas.append({"custom_id": _id_extracao(i), "method": "POST", "url": ENDPOINT, "body": corpo})
+                continue
+            for j, bloco in enumerate(ata["blocos"]):
+                if str(j) in ata["secoes"]:
+                    continue
+                corpo = {"model": roteador.modelos("formal")[0],
+                         "messages": mensagens_conteudo_formal(bloco, ata["info"]), **PARAMETROS_FORMAL}
+                linhas.append({"custom_id": _id_bloco(i, j), "method": "POST", "url": ENDPOINT, "body": corpo})
+        return linhas
+
+    def _enviar(self, lote):
+        linhas = self._requisicoes(lote)
+        os.makedirs(self.pasta_arquivos, exist_ok=True)
+        caminho = os.path.join(self.pasta_arquivos, f"lote-{lote['id']}-{lote['fase']}-{lote['tentativas'] + 1}.jsonl")
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta_arquivos, suffix=".tmp")
+        with os.fdopen(descritor, "w", encoding="utf-8") as f:
+            for linha in linhas:
+                f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+        os.replace(temporario, caminho)
+
+        with open(caminho, "rb") as f:
+            arquivo = self.cliente.files.create(file=f, purpose="batch")
+        batch = self.cliente.batches.create(
+            input_file_id=arquivo.id,
+            endpoint=ENDPOINT,
+            completion_window=JANELA_LOTE,
+            metadata={"lote": str(lote["id"]), "fase": lote["fase"]},
+        )
+        lote.update(batch_id=batch.id, estado=ENVIADO, tentativas=lote["tentativas"] + 1, erro=None)
+        self._gravar(lote)
+        self.report(f"📦 Lote {lote['id']} ({lote['fase']}): {len(linhas)} pedido(s) enviados como {batch.id}")
+
+    def _ler_jsonl(self, arquivo_id):
+        if not arquivo_id:
+            return []
+        texto = self.cliente.files.content(arquivo_id).text
+        return [json.loads(linha) for linha in texto.splitlines() if linha.strip()]
+
+    def _aplicar_resultados(self, lote, batch):
+        """Guarda as respostas recebidas; devolve quantos pedidos falharam"""
+        falhas = 0
+        for resultado in self._ler_jsonl(batch.output_file_id) + self._ler_jsonl(batch.error_file_id):
+            resposta = resultado.get("response") or {}
+            if resultado.get("error") or resposta.get("status_code") != 200:
+                falhas += 1
+                continue
+            indice, bloco = _ler_id(resultado["custom_id"])
+            ata = lote["atas"][indice]
+            conteudo = resposta["body"]["choices"][0]["message"]["content"]
+            if bloco is None:
+                ata["info"] = concluir_extracao(ata["info_local"], conteudo)
+            else:
+                ata["secoes"][str(bloco)] = conteudo
+        return falhas
+
+    def _sem_resposta(self, lote):
+        """Esgotadas as tentativas: padrão na extração, API interativa nos blocos"""
+        for ata in lote["atas"]:
+            if lote["fase"] == EXTRACAO and ata["info"] is None:
+                ata["info"] = concluir_extracao(ata["info_local"], None)
+            elif lote["fase"] == REDACAO:
+                # Mesmo modelo dos blocos que vieram do lote
+                modelo_fixo = ModeloFixo(roteador.modelos("formal")[0])
+                for j, bloco in enumerate(ata["blocos"]):
+                    if str(j) not in ata["secoes"]:
+                        ata["secoes"][str(j)] = gerar_conteudo_formal(bloco, ata["info"], modelo_fixo=modelo_fixo)
+
+    def _montar_documentos(self, lote):
+        for ata in lote["atas"]:
+            secoes = [ata["secoes"][str(j)] for j in range(len(ata["blocos"]))]
+            salvar_documento_ata(ata["transcricao"], secoes, ata["info"], ata["caminho_saida"], self.report)
+            self.report(f"Ata gerada com sucesso: {ata['caminho_saida']}")
+
+    def atualizar(self, lote_id):
+        """Consulta o provedor uma vez e avança o lote o quanto der; devolve o estado local"""
+        lote = self._obter(lote_id)
+        if lote["estado"] != ENVIADO:
+            return lote["estado"]
+        batch = self.cliente.batches.retrieve(lote["batch_id"])
+        if batch.status in EM_ANDAMENTO:
+            contagem = batch.request_counts
+            if contagem is not None:
+                self.report(f"⏳ Lote {lote_id} ({lote['fase']}): {batch.status}, "
+                            f"{contagem.completed}/{contagem.total} pedidos respondidos")
+            return lote["estado"]
+        if batch.status not in ENCERRADOS:
+            # failed: o provedor recusou o arquivo (formato, limites)
+            erros = getattr(batch.errors, "data", None) or []
+            lote.update(estado=ERRO, erro="; ".join(e.message or e.code or "" for e in erros) or batch.status)
+            self._gravar(lote)
+            self.report(f"❌ Lote {lote_id} recusado pelo provedor: {lote['erro']}")
+            return lote["estado"]
+
+        falhas = self._aplicar_resultados(lote, batch)
+        if self._requisicoes(lote):
+            if lote["tentativas"] < MAX_TENTATIVAS:
+                self.report(f"🔁 Lote {lote_id} ({batch.status}, {falhas} falha(s)): reenviando os pedidos sem resposta")
+                self._gravar(lote)
+                self._enviar(lote)
+                return lote["estado"]
+            self.report(f"⚠️ Lote {lote_id}: pedidos sem resposta após {MAX_TENTATIVAS} tentativas")
+            self._sem_resposta(lote)
+
+        if lote["fase"] == EXTRACAO:
+            # Informações completas: os blocos já podem levar o contexto da assembleia
+            lote.update(fase=REDACAO, tentativas=0)
+            self._gravar(lote)
+            self._enviar(lote)
+            return lote["estado"]
+
+        try:
+            self._montar_documentos(lote)
+            lote["estado"] = CONCLUIDO
+        except Exception as e:
+            lote.update(estado=ERRO, erro=f"Erro ao montar as atas: {e}")
+        self._gravar(lote)
+        return lote["estado"]
+
+    def pendentes(self):
+        with self.lock:
+            return [linha[0] for linha in self.conexao.execute(
+                "SELECT id FROM lotes WHERE estado = ? ORDER BY id", (ENVIADO,)
+            )]
+
+    def listar(self):
+        """Resumo de todos os lotes, do mais recente ao mais antigo"""
+        with self.lock:
+            linhas = self.conexao.execute(
+                "SELECT id, fase, estado, batch_id, atas, erro, criado_em FROM lotes ORDER BY id DESC"
+            ).fetchall()
+        return [
+            {"id": i, "fase": fase, "estado": estado, "batch_id": batch_id, "erro": erro, "criado_em": criado_em,
+             "atas": [a["caminho_saida"] for a in json.loads(atas)]}
+            for i, fase, estado, batch_id, atas, erro, criado_em in linhas
+        ]
+
+    def acompanhar(self, intervalo=None, parar=None):
+        """Consulta os lotes pendentes até todos terminarem (ou parar() ser verdadeiro)"""
+        intervalo = INTERVALO_ACOMPANHAMENTO if intervalo is None else intervalo
+        while True:
+            pendentes = self.pendentes()
+            for lote_id in pendentes:
+                try:
+                    self.atualizar(lote_id)
+                except Exception as e:
+                    # Falha de rede numa consulta não derruba o acompanhamento dos outros lotes
+                    self.report(f"Aviso: não foi possível consultar o lote {lote_id}: {e}")
+            if not self.pendentes() or (parar is not None and parar()):
+                return
+            time.sleep(intervalo)
+
+    def fechar(self):
+        with self.lock:
+            self.conexao.close()
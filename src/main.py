@@ -21,65 +21,166 @@ if os.path.exists(env_path):
 else:
     print(f"Aviso: arquivo .env não encontrado em {env_path}")
 
+if __name__ == "__main__":
+    from instancia_unica import INSTANCIA_UNICA, encaminhar_para_instancia
+    # Janela já aberta: ela recebe os arquivos e esta abertura termina aqui, sem carregar a interface
+    if INSTANCIA_UNICA and encaminhar_para_instancia(sys.argv[1:]):
+        sys.exit(0)
+
 import traceback
-from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox, QProgressDialog
-from PySide6.QtCore import QThread, QObject, Signal, QRunnable, QThreadPool
-from PySide6.QtGui import QIcon, QTextCursor
+from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog, QMessageBox, QProgressDialog, QLabel
+from PySide6.QtCore import Qt, QThread, QObject, Signal, QRunnable, QThreadPool, QTimer
+from PySide6.QtGui import QAction, QIcon, QKeySequence
 from transcrever import transcrever_audio
 from gerar_ata import gerar_ata_formal
 from interface import Ui_MainWindow
-from transcrever import AssemblyAIStreamWorker, API_KEY
+from transcrever import AssemblyAIStreamWorker, API_KEY, UPLOAD_ANTECIPADO, UploadAntecipado
 from dialog_info_assembleia import DialogInfoAssembleia  # Nova importação
+from dialog_busca import DialogBusca
+from arquivo_busca import arquivar_transcricao
+from concatenar_audio import normalizar_caminhos, ordenar_naturalmente
+from dialog_ordem_arquivos import DialogOrdemArquivos
+from visao_transcricao import VisaoTranscricao
+from cliente_servidor import SERVIDOR_URL, gerar_ata_remoto, transcrever_remoto
+from cancelamento import Cancelado, TokenCancelamento
+from estimativa import AcompanhamentoETA, estimar_ata, estimar_transcricao, resumo_ata, resumo_transcricao
+from progresso import REDACAO, TRANSCRICAO, UPLOAD, Progresso, barramento, formatar_evento
+from recorte_audio import exportar_votacoes, instante_para_nome, recortar_trecho
+
+SEPARADOR_ARQUIVOS = "; "
+# Tempo máximo de espera pelos workers cancelados ao fechar a janela
+TEMPO_CANCELAMENTO_MS = 5000
+# Etapas dos eventos de progresso -> etapas do histórico usado pelo ETA
+ETAPAS_ETA = {UPLOAD: "upload", TRANSCRICAO: "transcricao", REDACAO: "llm"}
+
+
+class PonteProgresso(QObject):
+    """Leva os eventos do barramento (threads dos workers) para a thread da interface"""
+    evento = Signal(object)
+
 
 class AtaWorkerSignals(QObject):
     finished = Signal()
     error = Signal(str)
-    progress = Signal(str)
+    cancelado = Signal()
 
 
 class AtaWorker(QRunnable):
-    def __init__(self, texto_transcricao, caminho_saida, info_assembleia=None):
+    def __init__(self, texto_transcricao, caminho_saida, info_assembleia=None, enunciados=None,
+                 caminho_transcricao=None):
         super().__init__()
         self.texto_transcricao = texto_transcricao
+        self.enunciados = enunciados
+        # Onde a transcrição já está no arquivo de busca; o documento passa para a ata
+        self.caminho_transcricao = caminho_transcricao
         self.caminho_saida = caminho_saida
         self.info_assembleia = info_assembleia
         self.signals = AtaWorkerSignals()
+        self.cancelamento = TokenCancelamento()
+        self.progresso = Progresso()
 
     def run(self):
         try:
-            self.signals.progress.emit("Dividindo texto em blocos...")
-            gerar_ata_formal(
+            self.progresso.relatar("Dividindo texto em blocos...")
+            # Com servidor de jobs configurado a estação atua apenas como cliente
+            gerar = gerar_ata_remoto if SERVIDOR_URL else gerar_ata_formal
+            gerar(
                 self.texto_transcricao,
                 caminho_saida=self.caminho_saida,
-                status_callback=self.signals.progress.emit,
-                info_assembleia=self.info_assembleia  # Passa as informações
+                status_callback=self.progresso,
+                info_assembleia=self.info_assembleia,  # Passa as informações
+                cancelamento=self.cancelamento,
+                # Oradores de cada fala: condensação local e trechos do arquivo de busca
+                enunciados=self.enunciados,
+                caminho_transcricao=self.caminho_transcricao,
             )
-            self.signals.progress.emit("ATA gerada com sucesso.")
+            self.progresso.concluir("ATA gerada com sucesso.")
             self.signals.finished.emit()
+        except Cancelado:
+            self.progresso.cancelar()
+            self.signals.cancelado.emit()
         except Exception as e:
             tb = traceback.format_exc()
+            self.progresso.falhar(str(e))
             self.signals.error.emit(f"{str(e)}\n{tb}")
 
 
+class EstimativaWorkerSignals(QObject):
+    # geração, resumo para a barra de status, estimativa (None se falhou)
+    concluido = Signal(int, str, object)
+
+
+class EstimativaWorker(QRunnable):
+    """Tokeniza a transcrição fora da thread da interface (centenas de ms num dia inteiro de gravação)"""
+
+    def __init__(self, texto, geracao):
+        super().__init__()
+        self.texto = texto
+        self.geracao = geracao
+        self.signals = EstimativaWorkerSignals()
+
+    def run(self):
+        # Sempre emite: a janela só libera worker_estimativa ao receber o resultado
+        try:
+            estimativa = estimar_ata(self.texto)
+            resumo = resumo_ata(estimativa)
+        except Exception as e:
+            estimativa = None
+            resumo = f"Estimativa da ata indisponível: {e}"
+        self.signals.concluido.emit(self.geracao, resumo, estimativa)
+
+
+class RecorteWorkerSignals(QObject):
+    concluido = Signal(list)
+    erro = Signal(str)
+
+
+class RecorteWorker(QRunnable):
+    """Recortes de áudio fora da thread da interface (exportar as votações chama o ffmpeg várias vezes)"""
+
+    def __init__(self, funcao, *args, **kwargs):
+        super().__init__()
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = RecorteWorkerSignals()
+
+    def run(self):
+        try:
+            resultado = self.funcao(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.erro.emit(str(e))
+            return
+        self.signals.concluido.emit(resultado if isinstance(resultado, list) else [resultado])
+
+
 class WorkerThread(QThread):
     finished = Signal(str)
     error = Signal(str)
-    status = Signal(str)
+    cancelado = Signal()
 
-    def __init__(self, caminho_arquivo):
+    def __init__(self, caminho_arquivo, funcao=transcrever_audio):
         super().__init__()
         self.caminho_arquivo = caminho_arquivo
+        self.funcao = funcao
+        self.cancelamento = TokenCancelamento()
+        self.progresso = Progresso()
 
     def run(self):
         try:
-            texto = transcrever_audio(self.caminho_arquivo, status_callback=self.emit_status)
+            texto = self.funcao(self.caminho_arquivo, status_callback=self.progresso, cancelamento=self.cancelamento)
+            self.progresso.concluir("Transcrição concluída!")
             self.finished.emit(texto)
+        except Cancelado:
+            self.progresso.cancelar()
+            self.cancelado.emit()
         except Exception as e:
             tb = traceback.format_exc()
+            self.progresso.falhar(str(e))
             self.error.emit(f"{str(e)}\n{tb}")
 
-    def emit_status(self, msg):
-        self.status.emit(msg)
+    def cancelar(self):
+        self.cancelamento.cancelar()
 
 
 class MainWindow(QMainWindow):
@@ -92,115 +193,394 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(QIcon(icon_path))
 
         self.threadpool = QThreadPool()
+        # Gravações recebidas de outras aberturas, à espera de a seleção atual ser transcrita
+        self.fila_arquivos = []
+        self.selecao_transcrita = False
+        self.worker_estimativa = None
+        self.geracao_estimativa = 0
+        # Última estimativa da ata e o texto a que ela se refere, reaproveitada ao gerar a ata
+        self.estimativa_ata = None
+        self.texto_estimativa = None
 
         self.ui.btnEscolher.clicked.connect(self.selecionar_arquivo)
+        self.ui.lineEditArquivo.textEdited.connect(self.arquivo_digitado)
         self.ui.btnTranscrever.clicked.connect(self.transcrever)
         self.ui.btnGerar.clicked.connect(self.gerar_ata)
 
+        # A transcrição fica numa tabela virtualizada no lugar do QTextEdit do Designer
+        self.visao_transcricao = VisaoTranscricao(self.ui.background)
+        self.ui.gridLayout.replaceWidget(self.ui.textEdit, self.visao_transcricao)
+        self.ui.textEdit.hide()
+        self.modelo_transcricao = self.visao_transcricao.modelo
+
+        menu_arquivo = self.ui.menubar.addMenu("Arquivo")
+        acao_buscar = menu_arquivo.addAction("Buscar em atas anteriores...")
+        acao_buscar.setShortcut(QKeySequence.Find)
+        acao_buscar.triggered.connect(self.abrir_busca)
+        self.acao_ordem = menu_arquivo.addAction("Ordem das gravações...")
+        self.acao_ordem.setEnabled(False)
+        self.acao_ordem.triggered.connect(self.reordenar_arquivos)
+        menu_arquivo.addSeparator()
+        # Áudio original de um trecho contestado, sem ouvir a gravação inteira (recorte_audio.py)
+        acao_recortar = QAction("Recortar áudio do trecho selecionado...", self)
+        acao_recortar.triggered.connect(self.recortar_trecho_selecionado)
+        menu_arquivo.addAction(acao_recortar)
+        self.visao_transcricao.addAction(acao_recortar)
+        self.visao_transcricao.setContextMenuPolicy(Qt.ActionsContextMenu)
+        acao_votacoes = menu_arquivo.addAction("Exportar áudio das votações...")
+        acao_votacoes.triggered.connect(self.exportar_votacoes)
+
         self.worker = None
         self.progress_dialog = None
+        # Gravações selecionadas, na ordem em que serão emendadas (o campo de texto só as exibe)
+        self.arquivos = []
+        # Páginas de enunciados recebidas durante a leitura da transcrição final
+        self.paginas_recebidas = 0
+        # Upload iniciado ao escolher o arquivo (transcrever.UploadAntecipado)
+        self.upload_antecipado = None
+        self.mapa_arquivos = None
+        # Gravação da transcrição exibida (a seleção pode já ter passado para o próximo da fila)
+        self.audio_transcricao = None
+        # Caminho da transcrição exibida no arquivo de busca (a gravação e, depois da ata, o .docx)
+        self.caminho_arquivado = None
+        self.worker_recorte = None
+
+        # ETA ao vivo (estimativa.py), atualizado a cada segundo durante as operações
+        self.eta = None
+        self.ultima_mensagem = ""
+        self.label_eta = QLabel()
+        self.ui.statusbar.addPermanentWidget(self.label_eta)
+        self.timer_eta = QTimer(self)
+        self.timer_eta.setInterval(1000)
+        self.timer_eta.timeout.connect(self.atualizar_eta)
+
+        # Progresso tipado dos workers (progresso.py); só o job em andamento atualiza a tela
+        self.job_progresso = None
+        self.ponte_progresso = PonteProgresso(self)
+        self.ponte_progresso.evento.connect(self.receber_progresso)
+        self.cancelar_assinatura_progresso = barramento.assinar(self.ponte_progresso.evento.emit)
 
     def selecionar_arquivo(self):
-        caminho, _ = QFileDialog.getOpenFileName(
+        caminhos, _ = QFileDialog.getOpenFileNames(
             self,
-            "Selecione o arquivo de áudio",
+            "Selecione o(s) arquivo(s) de áudio",
             "",
             "Arquivos de Áudio (*.mp3 *.wav *.m4a)"
         )
-        if caminho:
-            self.ui.lineEditArquivo.setText(caminho)
+        if not caminhos:
+            return
+        # Gravações divididas (Zoom, gravador): ordem natural dos nomes, confirmada pelo usuário
+        caminhos = ordenar_naturalmente(caminhos)
+        if len(caminhos) > 1:
+            caminhos = DialogOrdemArquivos.obterOrdem(self, caminhos)
+            if not caminhos:
+                return
+        self.carregar_arquivos(caminhos)
+
+    def carregar_arquivos(self, caminhos):
+        """Seleção já na ordem de emenda"""
+        self.arquivos = list(caminhos)
+        self.selecao_transcrita = False
+        self.ui.lineEditArquivo.setText(SEPARADOR_ARQUIVOS.join(self.arquivos))
+        # Vários arquivos só mudam pelo botão ou pela reordenação; um só pode ser digitado
+        self.ui.lineEditArquivo.setReadOnly(len(self.arquivos) > 1)
+        self.acao_ordem.setEnabled(len(self.arquivos) > 1)
+        self.mostrar_estimativa_transcricao(self.arquivos)
+        self.antecipar_upload(self.arquivos)
+
+    def arquivo_digitado(self, texto):
+        """Caminho digitado ou colado à mão: vale como um único arquivo, mesmo com ponto e vírgula no nome"""
+        self.arquivos = [texto.strip()] if texto.strip() else []
+        self.selecao_transcrita = False
+        self.acao_ordem.setEnabled(False)
+
+    def reordenar_arquivos(self):
+        if len(self.arquivos) < 2 or self.transcricao_em_andamento():
+            return
+        caminhos = DialogOrdemArquivos.obterOrdem(self, self.arquivos)
+        if caminhos and caminhos != self.arquivos:
+            self.carregar_arquivos(caminhos)
+
+    def receber_arquivos(self, caminhos):
+        """Arquivos da linha de comando ou de outra abertura do programa (instância única)"""
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+        existentes = [c for c in caminhos if os.path.isfile(c)]
+        faltando = [c for c in caminhos if not os.path.isfile(c)]
+        if faltando:
+            print(f"Aviso: arquivos ignorados (não encontrados): {', '.join(faltando)}")
+        if not existentes:
+            return
+        # Vários arquivos numa mesma abertura são uma gravação dividida, como na seleção múltipla
+        # (a ordem pode ser corrigida depois em Arquivo > Ordem das gravações)
+        self.fila_arquivos.append(ordenar_naturalmente(existentes))
+        self.abrir_proximo_da_fila()
+
+    def abrir_proximo_da_fila(self):
+        """Carrega o próximo áudio da fila quando a seleção atual já foi transcrita (ou está vazia)"""
+        if not self.fila_arquivos or self.transcricao_em_andamento():
+            self.mostrar_fila()
+            return
+        if self.arquivos_selecionados() and not self.selecao_transcrita:
+            self.mostrar_fila()
+            return
+        self.carregar_arquivos(self.fila_arquivos.pop(0))
+        self.mostrar_fila()
+
+    def mostrar_fila(self):
+        if self.fila_arquivos:
+            self.ui.statusbar.showMessage(f"{len(self.fila_arquivos)} gravação(ões) na fila")
+
+    def antecipar_upload(self, caminhos):
+        """Começa a enviar o áudio enquanto o usuário ainda não clicou em Transcrever"""
+        if self.upload_antecipado and self.upload_antecipado.corresponde(caminhos):
+            return
+        self.descartar_upload_antecipado()
+        # Com servidor de jobs o áudio vai para o servidor, não para a AssemblyAI
+        if not UPLOAD_ANTECIPADO or SERVIDOR_URL or not API_KEY or self.transcricao_em_andamento():
+            return
+        self.upload_antecipado = UploadAntecipado(caminhos, API_KEY).iniciar()
+
+    def descartar_upload_antecipado(self):
+        if self.upload_antecipado:
+            self.upload_antecipado.descartar()
+            self.upload_antecipado = None
+
+    def mostrar_estimativa_transcricao(self, caminhos):
+        try:
+            self.ui.label_status.setText(resumo_transcricao(estimar_transcricao(caminhos)))
+        except Exception as e:
+            print(f"Aviso: não foi possível estimar a transcrição: {e}")
+
+    def mostrar_estimativa_ata(self, texto=None):
+        if texto is None:
+            texto = self.modelo_transcricao.texto_completo()
+        if not texto.strip():
+            return
+        # Só a estimativa do pedido mais recente chega à barra de status
+        self.geracao_estimativa += 1
+        self.estimativa_ata = None
+        self.texto_estimativa = texto
+        self.worker_estimativa = EstimativaWorker(texto, self.geracao_estimativa)
+        self.worker_estimativa.signals.concluido.connect(self.estimativa_ata_pronta)
+        self.threadpool.start(self.worker_estimativa)
+
+    def estimativa_ata_pronta(self, geracao, resumo, estimativa):
+        if geracao != self.geracao_estimativa:
+            return
+        self.worker_estimativa = None
+        self.estimativa_ata = estimativa
+        self.ui.label_status.setText(resumo)
+        self.ui.btnGerar.setToolTip(resumo)
+        # Ata pedida antes da estimativa ficar pronta: o ETA começa agora
+        if estimativa and isinstance(self.worker, AtaWorker) and not self.eta:
+            self.iniciar_eta_ata(estimativa)
+
+    def iniciar_eta_ata(self, estimativa):
+        try:
+            self.iniciar_eta(estimativa, etapa="llm")
+        except Exception as e:
+            self.ui.statusbar.showMessage(f"ETA indisponível: {e}")
+
+    def iniciar_eta(self, estimativa, etapa=None):
+        self.eta = AcompanhamentoETA(estimativa)
+        if etapa:
+            self.eta.iniciar_etapa(etapa)
+        self.atualizar_eta()
+        self.timer_eta.start()
+
+    def encerrar_eta(self, concluido):
+        """Fim da operação: com sucesso, grava os tempos no histórico; com erro ou cancelamento, descarta"""
+        if self.eta and concluido:
+            self.eta.concluir_etapa()
+        self.eta = None
+        # Eventos atrasados do job encerrado não mexem mais na barra de status
+        self.job_progresso = None
+        self.timer_eta.stop()
+        self.label_eta.clear()
+
+    def atualizar_eta(self):
+        if not self.eta:
+            return
+        texto = self.eta.texto()
+        self.label_eta.setText(texto)
+        if self.progress_dialog:
+            self.progress_dialog.setLabelText(f"{self.ultima_mensagem}\n{texto}")
+
+    def abrir_busca(self):
+        DialogBusca(self).exec()
+
+    def arquivos_selecionados(self):
+        """Gravações selecionadas, na ordem de emenda"""
+        return list(self.arquivos)
+
+    def transcricao_em_andamento(self):
+        return isinstance(self.worker, QThread) and self.worker.isRunning()
 
     def transcrever(self):
-        caminho = self.ui.lineEditArquivo.text().strip()
-        if not caminho:
+        # Durante a transcrição o mesmo botão cancela
+        if self.transcricao_em_andamento():
+            self.cancelar_transcricao()
+            return
+
+        caminhos = self.arquivos_selecionados()
+        if not caminhos:
             QMessageBox.warning(self, "Aviso", "Selecione um arquivo primeiro.")
             return
-        if not os.path.exists(caminho):
-            QMessageBox.critical(self, "Erro", "Arquivo não encontrado.")
+        faltando = [c for c in caminhos if not os.path.exists(c)]
+        if faltando:
+            QMessageBox.critical(self, "Erro", "Arquivo não encontrado:\n" + "\n".join(faltando))
             return
+        caminho = caminhos if len(caminhos) > 1 else caminhos[0]
+
+        # Arquivo trocado à mão em lineEditArquivo: o envio antecipado não serve mais
+        antecipado = self.upload_antecipado
+        if antecipado and (SERVIDOR_URL or not antecipado.corresponde(caminhos)):
+            self.descartar_upload_antecipado()
+            antecipado = None
+        self.upload_antecipado = None
 
-        self.ui.textEdit.clear()
+        try:
+            estimativa = estimar_transcricao(caminhos)
+            if antecipado:
+                # Só o que falta enviar entra no ETA (e no histórico de velocidade do upload)
+                restante = 1.0 - antecipado.fracao
+                estimativa["etapas"]["upload"] *= restante
+                estimativa["quantidades"]["upload"] *= restante
+            self.iniciar_eta(estimativa)
+        except Exception as e:
+            print(f"Aviso: ETA indisponível: {e}")
+
+        self.modelo_transcricao.limpar()
+        self.paginas_recebidas = 0
         self.ui.statusbar.showMessage("Iniciando transcrição...")
 
-        self.ui.btnTranscrever.setEnabled(False)
+        self.ui.btnTranscrever.setText("Cancelar transcrição")
+
+        if SERVIDOR_URL:
+            # Cliente leve: transcrição feita pelo servidor de jobs compartilhado
+            self.worker = WorkerThread(caminho, funcao=transcrever_remoto)
+            self.job_progresso = self.worker.progresso.job_id
+            self.worker.finished.connect(self.transcricao_remota_concluida)
+            self.worker.error.connect(self.transcricao_erro)
+            self.worker.cancelado.connect(self.transcricao_cancelada)
+            self.worker.start()
+            return
 
         # OPÇÃO 1: Efeito character-by-character (mais dramático)
-        self.worker = AssemblyAIStreamWorker(API_KEY, caminho)
-        self.worker.partial_transcript.connect(self.update_status_text)
+        self.worker = AssemblyAIStreamWorker(API_KEY, caminho, upload_antecipado=antecipado)
+        self.job_progresso = self.worker.progresso.job_id
+        self.worker.pagina_enunciados.connect(self.receber_pagina_enunciados)
         self.worker.typing_effect.connect(self.append_character)
         self.worker.error.connect(self.transcricao_erro)
         self.worker.finished.connect(self.transcricao_finalizada)
+        self.worker.cancelado.connect(self.transcricao_cancelada)
 
         # OPÇÃO 2: Efeito word-by-word (mais realista)
         # Descomente as linhas abaixo e comente as de cima para usar
         # from transcrever import AssemblyAIRealisticStreamWorker
         # self.worker = AssemblyAIRealisticStreamWorker(API_KEY, caminho)
-        # self.worker.partial_transcript.connect(self.update_status_text)
         # self.worker.word_chunk.connect(self.replace_text)
         # self.worker.error.connect(self.transcricao_erro)
         # self.worker.finished.connect(self.transcricao_finalizada)
 
         self.worker.start()
 
-    def update_status_text(self, texto):
-        """Atualiza apenas mensagens de status, não o texto principal"""
-        if texto == "clear_status":
-            # Limpa o campo de texto para começar o typing
-            self.ui.textEdit.clear()
+    def receber_progresso(self, evento):
+        """Eventos do barramento, já coalescidos; os de jobs encerrados são ignorados"""
+        if evento.job_id != self.job_progresso:
             return
-            
-        if any(emoji in texto for emoji in ['🔄', '📤', '🚀', '⏳']):
-            self.ui.statusbar.showMessage(texto.replace('\n', ' ').strip())
+        if self.eta and evento.etapa in ETAPAS_ETA:
+            self.eta.iniciar_etapa(ETAPAS_ETA[evento.etapa])
+            if evento.fracao is not None:
+                self.eta.progresso(evento.fracao, 1.0)
+        if evento.mensagem or evento.fracao is not None:
+            self.ultima_mensagem = formatar_evento(evento)
+            self.ui.statusbar.showMessage(self.ultima_mensagem)
+            if self.progress_dialog and not self.eta:
+                self.progress_dialog.setLabelText(self.ultima_mensagem)
+        self.atualizar_eta()
 
     def append_character(self, text):
-        """Adiciona texto (pode ser um caractere ou palavra/frase)"""
-        cursor = self.ui.textEdit.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-        # Se receber o texto completo (OPÇÃO 3), substitui tudo
-        if len(text) > 100:  # Provavelmente texto completo
-            self.ui.textEdit.setPlainText(text)
+        """Texto completo da transcrição, emitido uma vez no fim pelo worker"""
+        enunciados = getattr(self.worker, "enunciados", None)
+        if enunciados or self.paginas_recebidas:
+            # As páginas já montaram a tabela enquanto o JSON chegava; só recarrega se faltou alguma
+            if enunciados and self.modelo_transcricao.rowCount() != len(enunciados):
+                self.modelo_transcricao.definir_enunciados(enunciados)
         else:
-            # Adiciona caractere por caractere ou palavra por palavra
-            cursor.insertText(text)
-            
-        self.ui.textEdit.setTextCursor(cursor)
-        
+            self.modelo_transcricao.definir_texto(text)
+
         # Auto-scroll para o final
-        scrollbar = self.ui.textEdit.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-        
-        QApplication.processEvents()
+        self.visao_transcricao.rolar_para_o_fim()
+
+    def receber_pagina_enunciados(self, enunciados):
+        """Página de enunciados chegando enquanto o JSON final é baixado"""
+        self.paginas_recebidas += 1
+        self.modelo_transcricao.acrescentar_enunciados(enunciados)
+        self.ui.statusbar.showMessage(f"Recebendo transcrição... {self.modelo_transcricao.rowCount()} trechos")
 
     def replace_text(self, texto_completo):
         """Substitui todo o texto (para efeito word-by-word)"""
-        self.ui.textEdit.setPlainText(texto_completo)
-        
+        self.modelo_transcricao.definir_texto(texto_completo)
+
         # Auto-scroll para o final
-        scrollbar = self.ui.textEdit.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-        
-        QApplication.processEvents()
+        self.visao_transcricao.rolar_para_o_fim()
 
-    def atualizar_status(self, mensagem):
-        self.ui.statusbar.showMessage(mensagem)
-        if self.progress_dialog:
-            self.progress_dialog.setLabelText(mensagem)
-        QApplication.processEvents()
+    def transcricao_remota_concluida(self, texto):
+        self.modelo_transcricao.definir_texto(texto)
+        self.transcricao_finalizada()
 
-    def transcricao_finalizada(self, _=None):
+    def restaurar_botao_transcrever(self):
+        self.ui.btnTranscrever.setText("Transcrever")
         self.ui.btnTranscrever.setEnabled(True)
+
+    def cancelar_transcricao(self):
+        self.ui.btnTranscrever.setEnabled(False)
+        self.ui.statusbar.showMessage("Cancelando transcrição...")
+        self.worker.cancelar()
+
+    def transcricao_cancelada(self):
+        # Páginas já recebidas de uma transcrição interrompida não devem virar ata
+        self.modelo_transcricao.limpar()
+        self.encerrar_eta(concluido=False)
+        self.restaurar_botao_transcrever()
+        self.ui.statusbar.showMessage("Transcrição cancelada.")
+        self.worker = None
+
+    def transcricao_finalizada(self, _=None):
+        if self.worker is None:
+            # QThread.finished também dispara depois de erro ou cancelamento, já tratados
+            return
+        self.mapa_arquivos = getattr(self.worker, "mapa_arquivos", None)
+        self.audio_transcricao = getattr(self.worker, "audio_path", None)
+        # Transcrição pesquisável mesmo que a ata nunca seja gerada
+        caminho = self.audio_transcricao or getattr(self.worker, "caminho_arquivo", None)
+        self.caminho_arquivado = normalizar_caminhos(caminho)[0] if caminho else None
+        if self.caminho_arquivado:
+            arquivar_transcricao(self.caminho_arquivado, self.modelo_transcricao.texto_completo(),
+                                 getattr(self.worker, "enunciados", None))
+        self.encerrar_eta(concluido=True)
+        self.restaurar_botao_transcrever()
         self.ui.statusbar.showMessage("Transcrição concluída!")
         self.worker = None
+        self.selecao_transcrita = True
+        self.mostrar_estimativa_ata()
+        self.abrir_proximo_da_fila()
 
     def transcricao_erro(self, msg):
-        self.ui.btnTranscrever.setEnabled(True)
+        self.modelo_transcricao.limpar()
+        self.encerrar_eta(concluido=False)
+        self.restaurar_botao_transcrever()
         QMessageBox.critical(self, "Erro na transcrição", msg)
         self.worker = None
         self.ui.statusbar.showMessage("Erro na transcrição.")
 
     def gerar_ata(self):
-        texto_transcricao = self.ui.textEdit.toPlainText()
+        texto_transcricao = self.modelo_transcricao.texto_completo()
         if not texto_transcricao.strip():
             QMessageBox.warning(self, "Aviso", "Nenhuma transcrição disponível para gerar ATA.")
             return
@@ -232,34 +612,129 @@ class MainWindow(QMainWindow):
 
         self.progress_dialog = QProgressDialog("Gerando ATA...", "Cancelar", 0, 0, self)
         self.progress_dialog.setWindowTitle("Aguarde")
-        self.progress_dialog.setCancelButton(None)
         self.progress_dialog.setModal(True)
+        self.progress_dialog.canceled.connect(self.cancelar_ata)
         self.progress_dialog.show()
 
-        self.worker = AtaWorker(texto_transcricao, caminho, info_assembleia)
-        self.worker.signals.progress.connect(self.atualizar_status)
+        enunciados = [dict(e) for e in self.modelo_transcricao.enunciados if e["texto"].strip()]
+        self.worker = AtaWorker(texto_transcricao, caminho, info_assembleia, enunciados, self.caminho_arquivado)
+        self.job_progresso = self.worker.progresso.job_id
         self.worker.signals.finished.connect(self.finalizar_progresso)
         self.worker.signals.error.connect(self.erro_progresso)
+        self.worker.signals.cancelado.connect(self.ata_cancelada)
+
+        # Tokenizar na thread da interface trava a janela: usa a estimativa já feita ou
+        # pede uma nova, que inicia o ETA quando chegar (estimativa_ata_pronta)
+        if self.estimativa_ata and self.texto_estimativa == texto_transcricao:
+            self.iniciar_eta_ata(self.estimativa_ata)
+        elif self.texto_estimativa != texto_transcricao or not self.worker_estimativa:
+            self.mostrar_estimativa_ata(texto_transcricao)
 
         self.threadpool.start(self.worker)
 
-    def finalizar_progresso(self):
+    def fechar_progresso(self):
         if self.progress_dialog:
+            # close() também emite canceled; desconecta antes para não cancelar um job já encerrado
+            self.progress_dialog.canceled.disconnect(self.cancelar_ata)
             self.progress_dialog.close()
             self.progress_dialog = None
+
+    def cancelar_ata(self):
+        if isinstance(self.worker, AtaWorker):
+            self.worker.cancelamento.cancelar()
+        self.progress_dialog = None
+        self.ui.statusbar.showMessage("Cancelando geração da ata...")
+
+    def ata_cancelada(self):
+        self.encerrar_eta(concluido=False)
+        self.fechar_progresso()
+        self.worker = None
+        self.ui.statusbar.showMessage("Geração da ata cancelada.")
+
+    def finalizar_progresso(self):
+        # A transcrição agora está no arquivo de busca sob o caminho da ata
+        if isinstance(self.worker, AtaWorker):
+            self.caminho_arquivado = self.worker.caminho_saida
+        self.encerrar_eta(concluido=True)
+        self.fechar_progresso()
         QMessageBox.information(self, "Sucesso", "Ata gerada com sucesso.")
 
     def erro_progresso(self, msg):
-        if self.progress_dialog:
-            self.progress_dialog.close()
-            self.progress_dialog = None
+        self.encerrar_eta(concluido=False)
+        self.fechar_progresso()
         QMessageBox.critical(self, "Erro", f"Ocorreu um erro:\n{msg}")
 
+    def audio_para_recorte(self):
+        """Gravação da transcrição exibida; avisa e devolve None se não houver"""
+        if self.audio_transcricao:
+            return self.audio_transcricao
+        QMessageBox.warning(self, "Aviso", "Transcreva uma gravação primeiro: os recortes usam os tempos dela.")
+        return None
+
+    def recortar_trecho_selecionado(self):
+        audio = self.audio_para_recorte()
+        if not audio:
+            return
+        trecho = self.visao_transcricao.trecho_selecionado()
+        if not trecho:
+            QMessageBox.warning(self, "Aviso", "Selecione na transcrição as falas com início e fim.")
+            return
+        inicio, fim = trecho
+        audio_inicial = audio if isinstance(audio, str) else audio[0]
+        sugestao = os.path.join(os.path.dirname(audio_inicial),
+                                f"trecho_{instante_para_nome(inicio)}{os.path.splitext(audio_inicial)[1]}")
+        # O stream é copiado, então o recorte mantém o formato da gravação
+        destino, _ = QFileDialog.getSaveFileName(self, "Salvar recorte como...", sugestao,
+                                                 f"Áudio (*{os.path.splitext(audio_inicial)[1]})")
+        if not destino:
+            return
+        self.iniciar_recorte(recortar_trecho, audio, inicio, fim, destino, mapa_arquivos=self.mapa_arquivos)
+
+    def exportar_votacoes(self):
+        audio = self.audio_para_recorte()
+        if not audio:
+            return
+        pasta = QFileDialog.getExistingDirectory(self, "Pasta para os áudios das votações")
+        if not pasta:
+            return
+        self.iniciar_recorte(exportar_votacoes, audio, [dict(e) for e in self.modelo_transcricao.enunciados], pasta,
+                             mapa_arquivos=self.mapa_arquivos, report=lambda msg: None)
+
+    def iniciar_recorte(self, funcao, *args, **kwargs):
+        if self.worker_recorte is not None:
+            self.ui.statusbar.showMessage("Aguarde o recorte em andamento...")
+            return
+        self.ui.statusbar.showMessage("Recortando áudio...")
+        self.worker_recorte = RecorteWorker(funcao, *args, **kwargs)
+        self.worker_recorte.signals.concluido.connect(self.recorte_concluido)
+        self.worker_recorte.signals.erro.connect(self.recorte_erro)
+        self.threadpool.start(self.worker_recorte)
+
+    def recorte_concluido(self, caminhos):
+        self.worker_recorte = None
+        if not caminhos:
+            self.ui.statusbar.showMessage("Nenhuma votação encontrada na transcrição.")
+            return
+        self.ui.statusbar.showMessage(f"{len(caminhos)} recorte(s) salvo(s)")
+        local = caminhos[0] if len(caminhos) == 1 else f"{len(caminhos)} arquivos em {os.path.dirname(caminhos[0])}"
+        QMessageBox.information(self, "Recorte de áudio", f"Áudio salvo: {local}")
+
+    def recorte_erro(self, msg):
+        self.worker_recorte = None
+        self.ui.statusbar.showMessage("Erro ao recortar o áudio.")
+        QMessageBox.critical(self, "Erro no recorte", msg)
+
     def closeEvent(self, event):
-        """Limpa threads ao fechar"""
-        if self.worker and self.worker.isRunning():
-            self.worker.terminate()
-            self.worker.wait(1000)
+        """Cancela os workers e espera, por tempo limitado, que liberem as threads"""
+        self.descartar_upload_antecipado()
+        if self.transcricao_em_andamento():
+            self.worker.cancelar()
+            if not self.worker.wait(TEMPO_CANCELAMENTO_MS):
+                print("Aviso: a transcrição não terminou dentro do tempo de cancelamento")
+        elif isinstance(self.worker, AtaWorker):
+            self.worker.cancelamento.cancelar()
+        self.threadpool.waitForDone(TEMPO_CANCELAMENTO_MS)
+        self.cancelar_assinatura_progresso()
         event.accept()
 
 
@@ -281,4 +756,13 @@ if __name__ == "__main__":
 
     window = MainWindow()
     window.show()
+
+    if INSTANCIA_UNICA:
+        from instancia_unica import ServidorInstancia
+        servidor_instancia = ServidorInstancia(parent=window)
+        servidor_instancia.arquivos_recebidos.connect(window.receber_arquivos)
+        servidor_instancia.iniciar()
+
+    if sys.argv[1:]:
+        window.receber_arquivos([os.path.abspath(a) for a in app.arguments()[1:]])
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""Modo de memória limitada para gravações muito longas (8h ou mais)
+
+No modo normal a transcrição passa por várias cópias inteiras ao mesmo tempo:
+o texto condensado, a lista de tokens de dividir_texto_em_blocos, a lista de
+blocos decodificados e a lista com a redação formal de todos os blocos. Com
+ATA_MEMORIA_LIMITADA=1 (ou memoria_limitada=True em gerar_ata_formal) cada
+etapa vira um gerador e só um item de cada vez fica em memória:
+
+    linhas da transcrição -> condensação -> blocos de tokens -> LLM -> disco
+
+A redação de cada bloco vai para um arquivo temporário (SecoesEmDisco) e é
+relida parágrafo a parágrafo na montagem do .docx. Só a redação por blocos é
+usada: o modo hierárquico precisa das notas de todos os blocos ao mesmo tempo.
+
+O maior consumo de uma transcrição longa, as palavras com timestamp do JSON da
+AssemblyAI, é descartado já na leitura (transcricao_paginada.ler_transcricao),
+em todos os modos.
+"""
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+MEMORIA_LIMITADA = os.getenv("ATA_MEMORIA_LIMITADA", "0").strip().lower() not in ("", "0", "false", "nao", "não")
+
+
+@lru_cache(maxsize=1)
+def _codificador():
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def iterar_linhas(texto):
+    """Linhas de um texto sem montar a lista inteira (str.splitlines copia tudo de uma vez)"""
+    inicio = 0
+    while inicio < len(texto):
+        fim = texto.find("\n", inicio)
+        if fim < 0:
+            fim = len(texto)
+        linha = texto[inicio:fim]
+        if linha.strip():
+            yield linha
+        inicio = fim + 1
+
+
+def iterar_blocos(linhas, max_tokens=3500):
+    """(texto, tokens) de blocos de até max_tokens, codificando uma linha por vez
+
+    Mesmo corte de dividir_texto_em_blocos (a cada max_tokens tokens), mas o
+    buffer nunca passa de um bloco mais uma linha.
+    """
+    codificador = _codificador()
+    buffer = []
+    separador = codificador.encode("\n")
+    for i, linha in enumerate(linhas):
+        if i:
+            buffer.extend(separador)
+        buffer.extend(codificador.encode(linha))
+        while len(buffer) >= max_tokens:
+            bloco, buffer = buffer[:max_tokens], buffer[max_tokens:]
+            yield codificador.decode(bloco), len(bloco)
+    if buffer:
+        yield codificador.decode(buffer), len(buffer)
+
+
+class SecoesEmDisco:
+    """Redação formal dos blocos num arquivo temporário, relida uma seção por vez"""
+
+    def __init__(self, pasta=None):
+        # Uma seção por linha, em JSON (a redação tem quebras de linha)
+        self.arquivo = tempfile.TemporaryFile("w+", encoding="utf-8", dir=pasta)
+        self.quantidade = 0
+
+    def acrescentar(self, texto):
+        self.arquivo.write(json.dumps(texto, ensure_ascii=False) + "\n")
+        self.quantidade += 1
+
+    def __len__(self):
+        return self.quantidade
+
+    def __iter__(self):
+        self.arquivo.flush()
+        self.arquivo.seek(0)
+        for linha in self.arquivo:
+            yield json.loads(linha)
+
+    def fechar(self):
+        self.arquivo.close()
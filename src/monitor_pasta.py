@@ -0,0 +1,226 @@
+"""Serviço que transforma gravações novas de uma pasta em transcrições e atas
+
+Usa QFileSystemWatcher (inotify no Linux, ReadDirectoryChangesW no Windows), de
+modo que a pasta não é varrida periodicamente: ela só é lida quando o sistema
+avisa que algo mudou. Um arquivo só entra na fila depois que tamanho e data de
+modificação ficam estáveis, para não pegar gravações ainda sendo copiadas.
+"""
+import os
+import time
+import traceback
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from fila_jobs import ERRO, FilaJobs
+from progresso import Progresso
+
+EXTENSOES_AUDIO = {".mp3", ".wav", ".m4a"}
+TIPO_JOB = "gravacao"
+# Fora da pasta monitorada, para que escritas no banco não gerem eventos
+CAMINHO_FILA_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "fila.sqlite3")
+
+
+def caminhos_saida(caminho_audio):
+    """Transcrição (.txt) e rascunho da ata (.docx) ao lado da gravação"""
+    base, _ = os.path.splitext(caminho_audio)
+    return base + "_transcricao.txt", base + "_ata.docx"
+
+
+def chave_gravacao(caminho, stat):
+    """Chave do job: a mesma gravação regravada ou substituída (outro tamanho ou data) vira outro job"""
+    return f"{caminho}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def ja_processada(caminho, stat):
+    """Ata mais nova que a gravação, feita antes de a fila existir"""
+    caminho_docx = caminhos_saida(caminho)[1]
+    return os.path.exists(caminho_docx) and os.path.getmtime(caminho_docx) >= stat.st_mtime
+
+
+def prioridade_para(caminho):
+    """Gravações com "urgente" no nome passam na frente"""
+    return 10 if "urgente" in os.path.basename(caminho).lower() else 0
+
+
+class ProcessarGravacaoSignals(QObject):
+    finished = Signal(int, dict)
+    error = Signal(int, str)
+    progress = Signal(int, str)
+
+
+class ProcessarGravacao(QRunnable):
+    def __init__(self, job, pipeline=False):
+        super().__init__()
+        self.job = job
+        self.pipeline = pipeline
+        self.signals = ProcessarGravacaoSignals()
+
+    def run(self):
+        from arquivo_busca import arquivar_transcricao
+        from transcrever import transcrever_audio
+        from gerar_ata import gerar_ata_formal
+
+        job_id = self.job["id"]
+        caminho = self.job["dados"]["caminho"]
+        caminho_txt, caminho_docx = caminhos_saida(caminho)
+        # Eventos tipados no barramento; o texto segue pelo sinal progress
+        progresso = Progresso(f"job-{job_id}", callback=lambda msg: self.signals.progress.emit(job_id, msg))
+        try:
+            if self.pipeline:
+                from pipeline_ata import transcrever_e_gerar_ata
+                texto, _ = transcrever_e_gerar_ata(caminho, caminho_docx, status_callback=progresso)
+            else:
+                dados = transcrever_audio(caminho, status_callback=progresso, completo=True)
+                texto, enunciados = dados.get("text") or "", dados.get("utterances") or []
+            with open(caminho_txt, "w", encoding="utf-8") as f:
+                f.write(texto)
+            if not self.pipeline:
+                # A transcrição fica pesquisável mesmo que a ata falhe; no pipeline ela vai junto com a ata
+                arquivar_transcricao(caminho_txt, texto, enunciados)
+                gerar_ata_formal(texto, caminho_saida=caminho_docx, status_callback=progresso, enunciados=enunciados,
+                                 caminho_transcricao=caminho_txt)
+            progresso.concluir()
+            self.signals.finished.emit(job_id, {"transcricao": caminho_txt, "ata": caminho_docx})
+        except Exception as e:
+            progresso.falhar(str(e))
+            self.signals.error.emit(job_id, f"{str(e)}\n{traceback.format_exc()}")
+
+
+class MonitorPasta(QObject):
+    job_concluido = Signal(int, dict)
+    job_falhou = Signal(int, str)
+
+    def __init__(self, pasta, caminho_fila=None, max_paralelo=2, estabilidade_s=5.0, pipeline=False):
+        super().__init__()
+        self.pasta = os.path.abspath(pasta)
+        self.pipeline = pipeline
+        caminho_fila = caminho_fila or CAMINHO_FILA_PADRAO
+        os.makedirs(os.path.dirname(caminho_fila), exist_ok=True)
+        self.fila = FilaJobs(caminho_fila)
+        self.estabilidade_s = estabilidade_s
+        self.max_paralelo = max_paralelo
+        self.em_execucao = 0
+        self.runnables = {}
+
+        # caminho -> (tamanho, mtime, instante da última mudança)
+        self.candidatos = {}
+
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_paralelo)
+
+        self.watcher = QFileSystemWatcher([self.pasta])
+        self.watcher.directoryChanged.connect(self.varrer)
+        self.watcher.fileChanged.connect(self.arquivo_alterado)
+
+        self.timer_estabilidade = QTimer(self)
+        self.timer_estabilidade.setSingleShot(True)
+        self.timer_estabilidade.timeout.connect(self.verificar_estaveis)
+
+        # Jobs que falharam só voltam depois da espera da fila (FilaJobs.espera)
+        self.timer_retentativa = QTimer(self)
+        self.timer_retentativa.setSingleShot(True)
+        self.timer_retentativa.timeout.connect(self.despachar)
+
+    def iniciar(self):
+        """Considera os arquivos já presentes e retoma os jobs pendentes da fila"""
+        print(f"👀 Monitorando {self.pasta} (até {self.max_paralelo} em paralelo)")
+        self.varrer()
+        self.despachar()
+
+    def varrer(self, _=None):
+        """Chamado quando o sistema avisa que a pasta mudou"""
+        for entrada in os.scandir(self.pasta):
+            caminho = entrada.path
+            if not entrada.is_file() or os.path.splitext(caminho)[1].lower() not in EXTENSOES_AUDIO:
+                continue
+            if caminho in self.candidatos:
+                continue
+            stat = entrada.stat()
+            if self.fila.existe(chave_gravacao(caminho, stat)) or ja_processada(caminho, stat):
+                continue
+            self.candidatos[caminho] = (stat.st_size, stat.st_mtime, time.monotonic())
+            self.watcher.addPath(caminho)
+            print(f"📥 Nova gravação detectada: {os.path.basename(caminho)}")
+        self.agendar_verificacao()
+
+    def arquivo_alterado(self, caminho):
+        """Arquivo ainda sendo escrito: reinicia a contagem de estabilidade"""
+        if caminho not in self.candidatos:
+            return
+        if not os.path.exists(caminho):
+            del self.candidatos[caminho]
+            return
+        stat = os.stat(caminho)
+        self.candidatos[caminho] = (stat.st_size, stat.st_mtime, time.monotonic())
+        self.agendar_verificacao()
+
+    def agendar_verificacao(self):
+        if self.candidatos and not self.timer_estabilidade.isActive():
+            self.timer_estabilidade.start(int(self.estabilidade_s * 1000))
+
+    def verificar_estaveis(self):
+        agora = time.monotonic()
+        for caminho, (tamanho, mtime, ultima_mudanca) in list(self.candidatos.items()):
+            if not os.path.exists(caminho):
+                del self.candidatos[caminho]
+                continue
+            stat = os.stat(caminho)
+            if (stat.st_size, stat.st_mtime) != (tamanho, mtime):
+                self.candidatos[caminho] = (stat.st_size, stat.st_mtime, agora)
+            elif stat.st_size > 0 and agora - ultima_mudanca >= self.estabilidade_s:
+                del self.candidatos[caminho]
+                self.watcher.removePath(caminho)
+                chave = chave_gravacao(caminho, stat)
+                if self.fila.adicionar(TIPO_JOB, chave, {"caminho": caminho}, prioridade_para(caminho)):
+                    print(f"🗂️ Na fila: {os.path.basename(caminho)}")
+        self.agendar_verificacao()
+        self.despachar()
+
+    def despachar(self):
+        while self.em_execucao < self.max_paralelo:
+            job = self.fila.proximo(TIPO_JOB)
+            if job is None:
+                self.agendar_retentativa()
+                break
+            runnable = ProcessarGravacao(job, pipeline=self.pipeline)
+            runnable.signals.finished.connect(self.finalizar_job)
+            runnable.signals.error.connect(self.erro_job)
+            runnable.signals.progress.connect(self.progresso_job)
+            self.runnables[job["id"]] = runnable
+            self.em_execucao += 1
+            print(f"🚀 Processando {os.path.basename(job['dados']['caminho'])} (tentativa {job['tentativas']})")
+            self.pool.start(runnable, job["prioridade"])
+
+    def agendar_retentativa(self):
+        espera = self.fila.proxima_disponibilidade(TIPO_JOB)
+        if espera is not None:
+            # Um pouco depois do instante liberado, para proximo() já encontrar o job
+            self.timer_retentativa.start(int(espera * 1000) + 100)
+
+    def progresso_job(self, job_id, mensagem):
+        if mensagem:
+            print(f"[job {job_id}] {mensagem}")
+
+    def finalizar_job(self, job_id, resultado):
+        self.runnables.pop(job_id, None)
+        self.em_execucao -= 1
+        self.fila.concluir(job_id, resultado)
+        print(f"✅ Ata gerada: {resultado['ata']}")
+        self.job_concluido.emit(job_id, resultado)
+        self.despachar()
+
+    def erro_job(self, job_id, mensagem):
+        self.runnables.pop(job_id, None)
+        self.em_execucao -= 1
+        estado = self.fila.falhar(job_id, mensagem)
+        job = self.fila.obter(job_id)
+        nova_tentativa = f", nova tentativa em {self.fila.espera(job['tentativas']):.0f}s" if estado != ERRO else ""
+        print(f"❌ Job {job_id} falhou ({estado}{nova_tentativa}): {mensagem.splitlines()[0]}")
+        self.job_falhou.emit(job_id, mensagem)
+        self.despachar()
+
+    def parar(self):
+        self.timer_retentativa.stop()
+        self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
+        self.pool.waitForDone()
+        self.fila.fechar()
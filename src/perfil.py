@@ -0,0 +1,238 @@
+"""Perfilamento opcional das etapas que gastam CPU local
+
+Nem toda lentidão é rede: tokenização (tiktoken) na divisão em blocos, a
+montagem do texto palavra a palavra no efeito de digitação, o parse do JSON
+das transcrições grandes e a montagem/gravação do .docx rodam na máquina.
+
+Desligado por padrão. Liga com PERFIL_CPU=1 no .env (GUI, CLI, servidor) ou
+com `python cli.py --perfil <comando>`. Cada etapa marcada com medir() ou
+@perfilado() passa a ser observada por dois perfiladores:
+
+- determinístico (cProfile), por thread: tempo exato por função, gravado em
+  <etapa>.prof (abre com pstats ou snakeviz);
+- por amostragem: uma thread lê a pilha das threads dentro de etapas a cada
+  PERFIL_INTERVALO_AMOSTRA segundos; vê também as etapas que rodam em
+  paralelo e custa pouco. Pilhas em amostras.txt (formato "collapsed" do
+  flamegraph.pl / speedscope).
+
+Ao fim do processo, resumo.txt traz por etapa as chamadas, o tempo total e as
+funções com maior tempo acumulado. Tudo fica em
+~/.transcrever_ata/perfis/<data>-<pid>/ (ou PERFIL_PASTA, ou --perfil-pasta na CLI).
+"""
+import atexit
+import contextlib
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+PASTA_PERFIS_PADRAO = os.path.join(os.path.expanduser("~"), ".transcrever_ata", "perfis")
+INTERVALO_AMOSTRA = float(os.getenv("PERFIL_INTERVALO_AMOSTRA", "0.005"))
+TOP_FUNCOES = int(os.getenv("PERFIL_TOP", "15"))
+
+_nada = contextlib.nullcontext()
+
+
+def _rotulo(codigo):
+    nome = getattr(codigo, "co_qualname", codigo.co_name)
+    return f"{nome} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+
+
+class Perfilador:
+    """Junta os perfis de todas as chamadas de cada etapa durante a execução"""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.estatisticas = {}                 # etapa -> pstats.Stats acumulado
+        self.chamadas = Counter()
+        self.segundos = defaultdict(float)
+        self.amostras = Counter()              # "etapa;f1;f2;..." -> nº de amostras
+        self.ativas = {}                       # thread id -> (etapa mais externa, profundidade da pilha)
+        self.amostrador = None
+        self.parar_amostragem = threading.Event()
+        self.finalizado = False
+
+    @contextlib.contextmanager
+    def medir(self, etapa):
+        # Etapa dentro de etapa na mesma thread: a externa já está perfilando
+        if getattr(self.local, "etapa", None):
+            yield
+            return
+        self.local.etapa = etapa
+        thread = threading.get_ident()
+        # Quadros abaixo de quem abriu a etapa (main, callbacks do Qt) não entram nas amostras
+        quadro, profundidade = sys._getframe(2), 0
+        while quadro is not None:
+            profundidade += 1
+            quadro = quadro.f_back
+        with self.lock:
+            self.ativas[thread] = (etapa, profundidade)
+            self._iniciar_amostrador()
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outra ferramenta de perfil ativa (ex.: depurador): fica só a amostragem
+            perfil = None
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            if perfil is not None:
+                perfil.disable()
+            self.local.etapa = None
+            with self.lock:
+                self.ativas.pop(thread, None)
+                self.chamadas[etapa] += 1
+                self.segundos[etapa] += decorrido
+                if perfil is not None:
+                    if etapa in self.estatisticas:
+                        self.estatisticas[etapa].add(perfil)
+                    else:
+                        self.estatisticas[etapa] = pstats.Stats(perfil)
+
+    def _iniciar_amostrador(self):
+        if self.amostrador is None and not self.finalizado:
+            self.amostrador = threading.Thread(target=self._amostrar, name="perfil-amostragem", daemon=True)
+            self.amostrador.start()
+
+    def _amostrar(self):
+        while not self.parar_amostragem.wait(INTERVALO_AMOSTRA):
+            with self.lock:
+                ativas = dict(self.ativas)
+            if not ativas:
+                continue
+            quadros = sys._current_frames()
+            for thread, (etapa, profundidade) in ativas.items():
+                quadro = quadros.get(thread)
+                pilha = []
+                while quadro is not None:
+                    pilha.append(_rotulo(quadro.f_code))
+                    quadro = quadro.f_back
+                pilha = pilha[:len(pilha) - profundidade + 1]
+                if pilha:
+                    pilha.append(etapa)
+                    with self.lock:
+                        self.amostras[";".join(reversed(pilha))] += 1
+
+    def _top_deterministico(self, estatisticas):
+        linhas = []
+        ordenadas = sorted(estatisticas.stats.items(), key=lambda item: item[1][3], reverse=True)
+        for (arquivo, linha, funcao), (_, chamadas, proprio, acumulado, _) in ordenadas[:TOP_FUNCOES]:
+            local = f"{os.path.basename(arquivo)}:{linha}" if linha else arquivo
+            linhas.append(f"  {acumulado:9.3f}s acum  {proprio:9.3f}s próprio  {chamadas:>8}x  {funcao} ({local})")
+        return linhas
+
+    def _top_amostragem(self, etapa):
+        inclusivo, proprio, total = Counter(), Counter(), 0
+        for pilha, n in self.amostras.items():
+            quadros = pilha.split(";")
+            if quadros[0] != etapa:
+                continue
+            total += n
+            proprio[quadros[-1]] += n
+            for funcao in set(quadros[1:]):
+                inclusivo[funcao] += n
+        linhas = []
+        for funcao, n in inclusivo.most_common(TOP_FUNCOES):
+            linhas.append(f"  {100 * n / total:5.1f}% acum  {100 * proprio[funcao] / total:5.1f}% próprio  {funcao}")
+        return total, linhas
+
+    def resumo(self):
+        with self.lock:
+            etapas = sorted(self.chamadas, key=self.segundos.get, reverse=True)
+            linhas = [f"Perfil de CPU — {datetime.now():%d/%m/%Y %H:%M:%S}, pid {os.getpid()}", ""]
+            for etapa in etapas:
+                linhas.append(f"== {etapa}: {self.chamadas[etapa]} chamadas, {self.segundos[etapa]:.3f}s no total")
+                if etapa in self.estatisticas:
+                    linhas.append(" cProfile (maior tempo acumulado):")
+                    linhas.extend(self._top_deterministico(self.estatisticas[etapa]))
+                total, amostragem = self._top_amostragem(etapa)
+                if total:
+                    linhas.append(f" amostragem ({total} amostras a cada {INTERVALO_AMOSTRA * 1000:g} ms):")
+                    linhas.extend(amostragem)
+                linhas.append("")
+        return "\n".join(linhas)
+
+    def finalizar(self):
+        """Para a amostragem e grava os arquivos da execução; devolve o resumo"""
+        if self.finalizado:
+            return None
+        self.finalizado = True
+        self.parar_amostragem.set()
+        if self.amostrador is not None:
+            self.amostrador.join(timeout=1)
+        if not self.chamadas:
+            return None
+        os.makedirs(self.pasta, exist_ok=True)
+        with self.lock:
+            for etapa, estatisticas in self.estatisticas.items():
+                estatisticas.dump_stats(os.path.join(self.pasta, f"{etapa}.prof"))
+            with open(os.path.join(self.pasta, "amostras.txt"), "w", encoding="utf-8") as f:
+                for pilha, n in self.amostras.most_common():
+                    f.write(f"{pilha} {n}\n")
+        resumo = self.resumo()
+        with open(os.path.join(self.pasta, "resumo.txt"), "w", encoding="utf-8") as f:
+            f.write(resumo)
+        print(f"📊 Perfil de CPU gravado em {self.pasta}")
+        print(resumo)
+        return resumo
+
+
+_perfilador = None
+_lock_perfilador = threading.Lock()
+
+
+def ativar(pasta=None):
+    """Liga o perfilamento para o resto do processo; devolve a pasta da execução"""
+    global _perfilador
+    with _lock_perfilador:
+        if _perfilador is None:
+            base = pasta or os.getenv("PERFIL_PASTA") or PASTA_PERFIS_PADRAO
+            execucao = os.path.join(base, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+            _perfilador = Perfilador(execucao)
+            atexit.register(_perfilador.finalizar)
+        return _perfilador.pasta
+
+
+def ativo():
+    return _perfilador is not None
+
+
+def medir(etapa):
+    """Contexto que perfila o trecho como a etapa dada (nada faz se desligado)"""
+    if _perfilador is None:
+        return _nada
+    return _perfilador.medir(etapa)
+
+
+def perfilado(etapa):
+    """Decorador: perfila cada chamada da função como a etapa dada"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if _perfilador is None:
+                return funcao(*args, **kwargs)
+            with _perfilador.medir(etapa):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def finalizar():
+    """Grava os arquivos agora em vez de esperar o fim do processo"""
+    if _perfilador is not None:
+        return _perfilador.finalizar()
+    return None
+
+
+if os.getenv("PERFIL_CPU", "").strip().lower() not in ("", "0", "false", "nao", "não"):
+    ativar()
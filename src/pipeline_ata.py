@@ -0,0 +1,161 @@
+"""Modo em pipeline: transcrição e geração da ata sobrepostas
+
+A gravação é dividida em janelas de tempo (ffmpeg com cópia do stream). As
+janelas são transcritas em paralelo e entregues em ordem cronológica; assim
+que uma termina, seu texto entra no buffer de blocos e os blocos completos
+(3500 tokens) já seguem para a redação formal enquanto o resto do áudio ainda
+está sendo transcrito. Uma passada final extrai as informações da assembleia
+do texto completo e monta o .docx.
+
+Em reuniões longas o tempo total se aproxima de max(transcrição, geração) em
+vez da soma das duas.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from cancelamento import Cancelado, executar, verificar
+from concatenar_audio import normalizar_caminhos, segmentar_audio
+from condensacao import CONDENSAR, Condensador
+from estimativa import sondar_audio
+from progresso import DOCUMENTO, REDACAO, TRANSCRICAO, como_progresso
+from prompts import EstatisticasCache
+from transcrever import API_KEY, excluir_transcricao, poll_transcription, request_transcription, upload_file
+
+JANELA_SEGUNDOS = float(os.getenv("PIPELINE_JANELA_SEGUNDOS", "900"))
+PARALELO_SEGMENTOS = int(os.getenv("PIPELINE_PARALELO", "4"))
+TOKENS_BLOCO = 3500
+
+
+def _segmentos(caminhos, pasta):
+    """Janelas de todas as gravações, com o instante de início no áudio completo"""
+    segmentos = []
+    deslocamento = 0.0
+    for i, caminho in enumerate(caminhos):
+        sondagem = sondar_audio(caminho)
+        subpasta = os.path.join(pasta, f"arquivo_{i:02d}")
+        os.makedirs(subpasta, exist_ok=True)
+        for segmento, inicio in segmentar_audio(caminho, JANELA_SEGUNDOS, subpasta, duracao=sondagem["duracao"]):
+            segmentos.append((segmento, deslocamento + inicio))
+        deslocamento += sondagem["duracao"]
+    return segmentos
+
+
+def _transcrever_segmento(segmento, inicio_s, cancelamento):
+    """Transcreve uma janela; timestamps dos enunciados passam a valer no áudio completo"""
+    verificar(cancelamento)
+    upload_url = upload_file(segmento, API_KEY, cancelamento=cancelamento)
+    transcript_id = executar(cancelamento, request_transcription, upload_url, API_KEY)
+    try:
+        dados = poll_transcription(transcript_id, API_KEY, timeout=3600, cancelamento=cancelamento, completo=True)
+    except Cancelado:
+        excluir_transcricao(transcript_id, API_KEY)
+        raise
+    deslocamento_ms = int(inicio_s * 1000)
+    enunciados = []
+    for enunciado in dados.get("utterances") or []:
+        enunciado = dict(enunciado)
+        enunciado.pop("words", None)
+        enunciado["start"] = enunciado.get("start", 0) + deslocamento_ms
+        enunciado["end"] = enunciado.get("end", 0) + deslocamento_ms
+        enunciados.append(enunciado)
+    return dados.get("text") or "", enunciados
+
+
+class _Blocos:
+    """Buffer que libera blocos de TOKENS_BLOCO tokens conforme o texto chega"""
+
+    def __init__(self):
+        from gerar_ata import dividir_texto_em_blocos
+        self.dividir = dividir_texto_em_blocos
+        self.buffer = ""
+
+    def acrescentar(self, texto):
+        self.buffer = f"{self.buffer} {texto}".strip()
+        blocos = self.dividir(self.buffer, max_tokens=TOKENS_BLOCO)
+        # O último bloco pode estar incompleto: espera o próximo segmento
+        self.buffer = blocos.pop() if blocos else ""
+        return blocos
+
+    def finalizar(self):
+        restante, self.buffer = self.buffer, ""
+        return [restante] if restante.strip() else []
+
+
+def transcrever_e_gerar_ata(caminho_arquivo, caminho_saida, status_callback=None, info_assembleia=None,
+                            cancelamento=None):
+    """Transcreve e gera a ata em pipeline; devolve (texto, enunciados)
+
+    Sem info_assembleia, os blocos usam as informações extraídas da primeira
+    janela (onde presidente e secretário costumam ser escolhidos) e o documento
+    final usa as extraídas da transcrição completa.
+    """
+    from gerar_ata import extrair_info_assembleia, gerar_conteudo_formal, salvar_documento_ata
+    from roteador_modelos import ModeloFixo
+
+    if not API_KEY:
+        raise Exception("ASSEMBLYAI_API_KEY não encontrada no .env")
+
+    progresso = como_progresso(status_callback)
+
+    def report(msg, etapa=None, **campos):
+        progresso.relatar(msg, etapa, **campos)
+        print(msg)
+
+    pasta = tempfile.mkdtemp(prefix="pipeline_ata_")
+    transcritores = ThreadPoolExecutor(max_workers=PARALELO_SEGMENTOS)
+    # Um único redator: mantém a ordem dos blocos e o prefixo do prompt em cache
+    redator = ThreadPoolExecutor(max_workers=1)
+    try:
+        report("✂️ Dividindo a gravação em janelas de tempo...")
+        segmentos = _segmentos(normalizar_caminhos(caminho_arquivo), pasta)
+        report(f"📤 Transcrevendo {len(segmentos)} janelas em paralelo...", TRANSCRICAO,
+               blocos_feitos=0, blocos_total=len(segmentos))
+        futuros = [transcritores.submit(_transcrever_segmento, s, inicio, cancelamento) for s, inicio in segmentos]
+
+        textos, enunciados, secoes = [], [], []
+        info_blocos = info_assembleia
+        blocos = _Blocos()
+        # Uma instância para todas as janelas: frases repetidas são vistas entre janelas
+        condensador = Condensador() if CONDENSAR else None
+        estatisticas_cache = EstatisticasCache()
+        modelo_fixo = ModeloFixo()
+        for i, futuro in enumerate(futuros):
+            texto, enunciados_segmento = executar(cancelamento, futuro.result)
+            textos.append(texto)
+            enunciados.extend(enunciados_segmento)
+            report(f"⏳ Janela {i + 1}/{len(futuros)} transcrita", blocos_feitos=i + 1)
+            if info_blocos is None:
+                info_blocos = extrair_info_assembleia(texto, cancelamento)
+            texto_redacao = condensador.processar(texto, enunciados_segmento) if condensador else texto
+            for bloco in blocos.acrescentar(texto_redacao):
+                secoes.append(redator.submit(gerar_conteudo_formal, bloco, info_blocos, cancelamento,
+                                             estatisticas_cache, modelo_fixo))
+        for bloco in blocos.finalizar():
+            secoes.append(redator.submit(gerar_conteudo_formal, bloco, info_blocos, cancelamento, estatisticas_cache,
+                                         modelo_fixo))
+
+        transcricao = " ".join(t for t in textos if t)
+        if condensador:
+            report(condensador.estatisticas.resumo())
+        report("✅ Transcrição concluída! Finalizando a redação...", REDACAO, blocos_feitos=0, blocos_total=len(secoes))
+        info_final = info_assembleia or extrair_info_assembleia(transcricao, cancelamento)
+        textos_formais = []
+        for i, secao in enumerate(secoes):
+            report(f"Processando bloco {i + 1}/{len(secoes)}...", blocos_feitos=i)
+            textos_formais.append(executar(cancelamento, secao.result))
+        report(estatisticas_cache.resumo())
+
+        progresso.relatar(etapa=DOCUMENTO)
+        salvar_documento_ata(transcricao, textos_formais, info_final, caminho_saida, report, cancelamento,
+                             enunciados)
+        report(f"Ata gerada com sucesso: {caminho_saida}")
+        return transcricao, enunciados
+    except Cancelado:
+        report("Pipeline cancelado.")
+        raise
+    finally:
+        transcritores.shutdown(wait=True, cancel_futures=True)
+        redator.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,382 @@
+"""Eventos de progresso tipados, publicados num barramento com coalescência por taxa
+
+Substitui as mensagens livres (e o filtro por emojis da janela principal) por
+eventos com job, etapa, bytes e blocos feitos/total, tokens, tempo decorrido e
+estimativa do restante. Interface gráfica, CLI e exportador de métricas assinam
+o mesmo barramento.
+
+Uma etapa "tagarela" (upload em blocos de 1 MB, polling) não inunda a fila de
+eventos do Qt: por job, no máximo um evento a cada INTERVALO_PADRAO segundos
+chega aos assinantes, sempre o mais recente. Mudança de etapa e eventos finais
+(concluído, cancelado, erro) são entregues na hora.
+
+Quem produz progresso continua recebendo status_callback: um Progresso é
+chamável com uma mensagem (como as funções de str de antes) e também aceita
+campos tipados via relatar(). Os eventos finais ficam com o dono do job
+(worker da interface, servidor de jobs, monitor de pasta), já que um mesmo job
+pode encadear transcrição e ata.
+"""
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INTERVALO_PADRAO = float(os.getenv("PROGRESSO_INTERVALO_S", "0.2"))
+
+# Etapas de um job, na ordem em que costumam aparecer
+INICIO = "inicio"
+UPLOAD = "upload"
+TRANSCRICAO = "transcricao"
+EXTRACAO = "extracao"
+REDACAO = "redacao"
+DOCUMENTO = "documento"
+CONCLUIDO = "concluido"
+CANCELADO = "cancelado"
+ERRO = "erro"
+ETAPAS_FINAIS = {CONCLUIDO, CANCELADO, ERRO}
+
+# Texto para eventos só com quantidades (sem mensagem)
+ROTULOS = {
+    INICIO: "Iniciando", UPLOAD: "Enviando áudio", TRANSCRICAO: "Transcrevendo", EXTRACAO: "Extraindo informações",
+    REDACAO: "Redigindo a ata", DOCUMENTO: "Montando o documento", CONCLUIDO: "Concluído",
+    CANCELADO: "Cancelado", ERRO: "Erro",
+}
+
+CAMPOS_NUMERICOS = ("bytes_feitos", "bytes_total", "blocos_feitos", "blocos_total", "tokens")
+
+
+class EventoProgresso:
+    """Estado de um job num instante
+
+    blocos_*: unidades da etapa (blocos do LLM, janelas de áudio do pipeline).
+    estimado_s: segundos que ainda faltam na etapa, quando há fração conhecida.
+    """
+    __slots__ = ("job_id", "etapa", "mensagem", "bytes_feitos", "bytes_total", "blocos_feitos", "blocos_total",
+                 "tokens", "decorrido_s", "estimado_s", "instante")
+
+    def __init__(self, job_id, etapa, mensagem="", bytes_feitos=None, bytes_total=None, blocos_feitos=None,
+                 blocos_total=None, tokens=None, decorrido_s=0.0, estimado_s=None, instante=None):
+        self.job_id = job_id
+        self.etapa = etapa
+        self.mensagem = mensagem
+        self.bytes_feitos = bytes_feitos
+        self.bytes_total = bytes_total
+        self.blocos_feitos = blocos_feitos
+        self.blocos_total = blocos_total
+        self.tokens = tokens
+        self.decorrido_s = decorrido_s
+        self.estimado_s = estimado_s
+        self.instante = instante if instante is not None else time.time()
+
+    @property
+    def final(self):
+        return self.etapa in ETAPAS_FINAIS
+
+    @property
+    def fracao(self):
+        """Andamento da etapa entre 0 e 1, ou None se a etapa não informa quantidades"""
+        if self.blocos_total:
+            return min(1.0, (self.blocos_feitos or 0) / self.blocos_total)
+        if self.bytes_total:
+            return min(1.0, (self.bytes_feitos or 0) / self.bytes_total)
+        return None
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self):
+        return f"EventoProgresso({self.job_id!r}, {self.etapa!r}, {self.mensagem!r}, fracao={self.fracao})"
+
+
+def formatar_evento(evento):
+    """Linha curta para barra de status e terminal"""
+    partes = [evento.mensagem or ROTULOS.get(evento.etapa, evento.etapa)]
+    if evento.blocos_total:
+        partes.append(f"{evento.blocos_feitos or 0}/{evento.blocos_total}")
+    elif evento.bytes_total:
+        partes.append(f"{(evento.bytes_feitos or 0) / 1e6:.1f}/{evento.bytes_total / 1e6:.1f} MB")
+    if evento.fracao is not None:
+        partes.append(f"{evento.fracao:.0%}")
+    if evento.estimado_s is not None and not evento.final:
+        partes.append(f"~{evento.estimado_s:.0f}s restantes")
+    return " · ".join(partes)
+
+
+class BarramentoProgresso:
+    def __init__(self, intervalo_s=INTERVALO_PADRAO):
+        self.intervalo_s = intervalo_s
+        self.lock = threading.Lock()
+        # Serializa as entregas: o evento retido (thread do timer) nunca chega depois de um mais novo
+        self.lock_entrega = threading.RLock()
+        self.assinantes = []
+        # Por job: instante da última entrega, etapa entregue, evento retido e timer de entrega
+        self.ultima_entrega = {}
+        self.etapa_entregue = {}
+        self.pendentes = {}
+        self.timers = {}
+        self.publicados = 0
+        self.coalescidos = 0
+
+    def assinar(self, callback):
+        """Registra callback(evento); devolve a função que cancela a assinatura
+
+        O callback roda na thread de quem publicou (ou na do timer de entrega):
+        na interface gráfica, repasse por um Signal.
+        """
+        with self.lock:
+            self.assinantes.append(callback)
+
+        def cancelar():
+            with self.lock:
+                if callback in self.assinantes:
+                    self.assinantes.remove(callback)
+        return cancelar
+
+    def publicar(self, evento):
+        with self.lock_entrega:
+            self._publicar(evento)
+
+    def _publicar(self, evento):
+        agora = time.monotonic()
+        with self.lock:
+            self.publicados += 1
+            chave = evento.job_id
+            imediato = (
+                evento.final
+                or evento.etapa != self.etapa_entregue.get(chave)
+                or agora - self.ultima_entrega.get(chave, float("-inf")) >= self.intervalo_s
+            )
+            if not imediato:
+                if chave in self.pendentes:
+                    self.coalescidos += 1
+                self.pendentes[chave] = evento
+                if chave not in self.timers:
+                    espera = self.intervalo_s - (agora - self.ultima_entrega[chave])
+                    timer = threading.Timer(max(espera, 0.0), self._entregar_pendente, (chave,))
+                    timer.daemon = True
+                    self.timers[chave] = timer
+                    timer.start()
+                return
+            # O evento novo substitui o retido, que já ficou velho
+            if self.pendentes.pop(chave, None) is not None:
+                self.coalescidos += 1
+            self._marcar_entrega(chave, evento, agora)
+            assinantes = list(self.assinantes)
+        self._notificar(assinantes, evento)
+
+    def _marcar_entrega(self, chave, evento, agora):
+        timer = self.timers.pop(chave, None)
+        if timer:
+            timer.cancel()
+        if evento.final:
+            # Job encerrado: nada mais a coalescer para ele
+            self.ultima_entrega.pop(chave, None)
+            self.etapa_entregue.pop(chave, None)
+        else:
+            self.ultima_entrega[chave] = agora
+            self.etapa_entregue[chave] = evento.etapa
+
+    def _entregar_pendente(self, chave):
+        with self.lock_entrega:
+            self._entregar_pendente_travado(chave)
+
+    def _entregar_pendente_travado(self, chave):
+        with self.lock:
+            self.timers.pop(chave, None)
+            evento = self.pendentes.pop(chave, None)
+            if evento is None:
+                return
+            self._marcar_entrega(chave, evento, time.monotonic())
+            assinantes = list(self.assinantes)
+        self._notificar(assinantes, evento)
+
+    def descarregar(self):
+        """Entrega na hora todos os eventos retidos (fim do processo, testes)"""
+        with self.lock:
+            chaves = list(self.pendentes)
+        for chave in chaves:
+            self._entregar_pendente(chave)
+
+    @staticmethod
+    def _notificar(assinantes, evento):
+        for callback in assinantes:
+            try:
+                callback(evento)
+            except Exception as e:
+                print(f"Aviso: erro num assinante de progresso: {e}")
+
+
+barramento = BarramentoProgresso()
+
+
+class Progresso:
+    """Emissor de eventos de um job
+
+    Guarda a etapa atual e o instante em que ela começou, para preencher o tempo
+    decorrido e projetar o restante pela fração concluída. callback, se houver,
+    continua recebendo as mensagens em texto (servidor de jobs, monitor).
+    """
+
+    def __init__(self, job_id=None, callback=None, barramento_destino=None):
+        self.job_id = job_id or uuid.uuid4().hex[:8]
+        self.callback = callback
+        self.barramento = barramento_destino or barramento
+        self.etapa = INICIO
+        self.inicio_etapa = time.monotonic()
+        self.campos = {}
+
+    def __call__(self, mensagem):
+        self.relatar(mensagem)
+
+    def relatar(self, mensagem="", etapa=None, **campos):
+        if etapa and etapa != self.etapa:
+            self.etapa = etapa
+            self.inicio_etapa = time.monotonic()
+            self.campos = {}
+        # Campos numéricos valem até mudarem ou a etapa trocar
+        self.campos.update({c: v for c, v in campos.items() if c in CAMPOS_NUMERICOS})
+        decorrido = time.monotonic() - self.inicio_etapa
+        evento = EventoProgresso(self.job_id, self.etapa, mensagem, decorrido_s=decorrido, **self.campos)
+        fracao = evento.fracao
+        if fracao:
+            evento.estimado_s = decorrido / fracao - decorrido
+        self.barramento.publicar(evento)
+        if mensagem and self.callback:
+            self.callback(mensagem)
+
+    def concluir(self, mensagem=""):
+        self.relatar(mensagem, CONCLUIDO)
+
+    def cancelar(self, mensagem=""):
+        self.relatar(mensagem, CANCELADO)
+
+    def falhar(self, mensagem=""):
+        self.relatar(mensagem, ERRO)
+
+
+def como_progresso(status_callback, job_id=None):
+    """Progresso a partir de um status_callback legado (função de str), de um Progresso ou de None"""
+    if isinstance(status_callback, Progresso):
+        return status_callback
+    return Progresso(job_id, callback=status_callback)
+
+
+def relatar(destino, mensagem="", etapa=None, **campos):
+    """Publica campos tipados se destino for um Progresso; para funções de str, só a mensagem"""
+    if isinstance(destino, Progresso):
+        destino.relatar(mensagem, etapa, **campos)
+    elif destino and mensagem:
+        destino(mensagem)
+
+
+def contar_bytes(blocos, total, status_callback):
+    """Repassa os blocos de um upload publicando bytes enviados/total"""
+    enviados = 0
+    for bloco in blocos:
+        enviados += len(bloco)
+        relatar(status_callback, etapa=UPLOAD, bytes_feitos=enviados, bytes_total=total)
+        yield bloco
+
+
+class ImpressoraProgresso:
+    """Assinante do terminal: uma linha por job a cada intervalo_s, com o andamento numérico
+
+    As mensagens em texto já são impressas pelas próprias etapas; aqui entram só
+    os eventos com quantidades (bytes, blocos) e os finais.
+    """
+
+    def __init__(self, intervalo_s=1.0):
+        self.intervalo_s = intervalo_s
+        self.ultima = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, evento):
+        if evento.fracao is None and not evento.final:
+            return
+        agora = time.monotonic()
+        with self.lock:
+            if not evento.final and agora - self.ultima.get(evento.job_id, float("-inf")) < self.intervalo_s:
+                return
+            self.ultima[evento.job_id] = agora
+        print(f"[{evento.job_id}] {evento.etapa}: {formatar_evento(evento)}")
+
+
+class ExportadorMetricas:
+    """Assinante que agrega os eventos no formato texto do Prometheus"""
+
+    MAX_JOBS = 50
+
+    def __init__(self, barramento_origem=None):
+        self.barramento = barramento_origem or barramento
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.eventos_por_etapa = {}
+        self.segundos_por_etapa = {}
+        self.jobs_finalizados = {}
+
+    def __call__(self, evento):
+        with self.lock:
+            self.eventos_por_etapa[evento.etapa] = self.eventos_por_etapa.get(evento.etapa, 0) + 1
+            anterior = self.jobs.get(evento.job_id)
+            if anterior and anterior.etapa != evento.etapa:
+                # Duração da etapa que terminou: último tempo decorrido informado nela
+                self.segundos_por_etapa[anterior.etapa] = (
+                    self.segundos_por_etapa.get(anterior.etapa, 0.0) + anterior.decorrido_s
+                )
+            self.jobs[evento.job_id] = evento
+            if evento.final:
+                self.jobs_finalizados[evento.etapa] = self.jobs_finalizados.get(evento.etapa, 0) + 1
+            # Mantém só os jobs mais recentes
+            while len(self.jobs) > self.MAX_JOBS:
+                self.jobs.pop(next(iter(self.jobs)))
+
+    def texto_prometheus(self):
+        linhas = [
+            "# TYPE transcrever_ata_eventos_publicados_total counter",
+            f"transcrever_ata_eventos_publicados_total {self.barramento.publicados}",
+            "# TYPE transcrever_ata_eventos_coalescidos_total counter",
+            f"transcrever_ata_eventos_coalescidos_total {self.barramento.coalescidos}",
+            "# TYPE transcrever_ata_eventos_total counter",
+        ]
+        with self.lock:
+            for etapa, n in sorted(self.eventos_por_etapa.items()):
+                linhas.append(f'transcrever_ata_eventos_total{{etapa="{etapa}"}} {n}')
+            linhas.append("# TYPE transcrever_ata_etapa_segundos_total counter")
+            for etapa, s in sorted(self.segundos_por_etapa.items()):
+                linhas.append(f'transcrever_ata_etapa_segundos_total{{etapa="{etapa}"}} {s:.3f}')
+            linhas.append("# TYPE transcrever_ata_jobs_finalizados_total counter")
+            for etapa, n in sorted(self.jobs_finalizados.items()):
+                linhas.append(f'transcrever_ata_jobs_finalizados_total{{estado="{etapa}"}} {n}')
+            linhas.append("# TYPE transcrever_ata_job gauge")
+            for job_id, evento in self.jobs.items():
+                rotulos = f'job="{job_id}",etapa="{evento.etapa}"'
+                valores = {"decorrido_segundos": evento.decorrido_s, "restante_segundos": evento.estimado_s,
+                           "fracao": evento.fracao, **{c: getattr(evento, c) for c in CAMPOS_NUMERICOS}}
+                for nome, valor in valores.items():
+                    if valor is not None:
+                        linhas.append(f"transcrever_ata_job_{nome}{{{rotulos}}} {valor:g}")
+        return "\n".join(linhas) + "\n"
+
+
+def servir_metricas(exportador, host="127.0.0.1", porta=9464):
+    """Servidor HTTP em thread daemon com GET /metrics (para o monitor de pasta)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("/metrics", "/metricas"):
+                self.send_error(404)
+                return
+            corpo = exportador.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    httpd = ThreadingHTTPServer((host, porta), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
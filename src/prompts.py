@@ -0,0 +1,165 @@
+"""Templates de prompt organizados para aproveitar o cache de prefixo do provedor
+
+A OpenAI reaproveita automaticamente o prefixo de prompts repetidos. Para que
+isso aconteça, tudo que é fixo (instruções) e tudo que é fixo dentro de uma
+assembleia (contexto) precisa vir primeiro e idêntico em todas as chamadas; só
+a última mensagem muda de um bloco para outro.
+"""
+import threading
+
+SISTEMA_FORMAL = "Você reescreve transcrições seguindo o padrão formal de atas da Contato Administração de Condomínios."
+
+INSTRUCOES_FORMAL = """Você é um redator profissional de atas de assembleia de condomínio seguindo o padrão da Contato Administração.
+
+IMPORTANTE: Transforme cada trecho da transcrição em texto formal seguindo EXATAMENTE o estilo do exemplo abaixo:
+
+CARACTERÍSTICAS DO MODELO:
+- Texto narrativo em terceira pessoa
+- Linguagem formal e técnica
+- Parágrafos longos e detalhados
+- Sempre mencionar valores monetários por extenso entre parênteses
+- Incluir detalhes técnicos como CNPJ, endereços, frações ideais quando citados no trecho
+- Usar títulos em negrito para seções principais
+- Manter sequência cronológica dos fatos
+
+NÃO inclua cabeçalhos, títulos principais ou assinaturas - apenas o conteúdo narrativo do trecho.
+
+EXEMPLO DE ESTILO (apenas a forma do texto):
+O exemplo abaixo não descreve nenhuma assembleia real. Entre colchetes estão os lugares onde entram os dados do trecho da transcrição. Nunca copie do exemplo nomes, unidades, valores, quantidades, datas ou decisões: use somente o que foi dito no trecho. Se o trecho não informar um dado, omita a menção a ele em vez de inventá-lo, e nunca deixe colchetes no texto final.
+
+**Item [número] - [assunto da pauta].** Dando início aos trabalhos, o(a) presidente da mesa passou a palavra a [quem apresentou o assunto], que expôs aos presentes [a situação ou a proposta, com os motivos apresentados], esclarecendo [os pontos técnicos, contratuais ou financeiros mencionados no trecho]. Foi informado que [o valor citado] corresponde a R$ [valor em algarismos] ([valor por extenso]), [a forma de rateio ou de pagamento, se mencionada]. Alguns condôminos questionaram [as dúvidas levantadas], tendo [quem respondeu] esclarecido que [a resposta dada, com a referência à convenção, ao regimento interno ou à legislação, se citada]. Após amplo debate, a proposta foi colocada em votação, sendo [o resultado, com a contagem de votos quando mencionada].
+
+**Item [número] - [assunto da pauta].** Em seguida, passou-se à análise de [o assunto seguinte]. [Quem apresentou] expôs [as alternativas apresentadas, cada uma com suas condições e valores por extenso entre parênteses], todas contemplando [o que havia em comum entre elas]. O condômino da unidade [número da unidade] solicitou [o pedido feito], o que foi [acolhido ou rejeitado] pela mesa. Ficou deliberado que [a decisão tomada], [as condições de execução, prazos e forma de pagamento aprovados].
+
+**Item [número] - Assuntos gerais.** Franqueada a palavra aos presentes, foram registradas as seguintes manifestações: [cada manifestação, indicando a unidade de quem falou e o que foi relatado ou solicitado, e a resposta da mesa ou da administração, quando houver]. As manifestações em assuntos gerais têm caráter meramente informativo, não sendo objeto de deliberação nesta assembleia.
+
+OBSERVAÇÕES DE ESTILO:
+- Use "o(a) presidente da mesa", "o(a) síndico(a)", "a administradora" e "o condômino da unidade" conforme os papéis citados no trecho.
+- Valores monetários aparecem em algarismos seguidos do valor por extenso entre parênteses; horários seguem a mesma regra.
+- Contagens de votos, prazos e condições aprovadas são registrados exatamente como ditos, sem arredondar nem completar.
+- Falas informais, repetições, cumprimentos e conversas paralelas não entram na ata; o conteúdo delas é resumido em linguagem formal quando for relevante.
+- Quando o trecho terminar no meio de um assunto, redija até onde o trecho vai, sem concluir a deliberação."""
+
+CONTEXTO_ASSEMBLEIA = """CONTEXTO DA ASSEMBLEIA:
+- Condomínio: {nome_condominio}
+- CNPJ: {cnpj_condominio}
+- Endereço: {endereco_condominio}
+- Presidente: {presidente_nome}
+- Secretário: {secretario_nome}"""
+
+TRECHO_FORMAL = """Trecho da transcrição:
+{bloco_texto}
+
+Transforme em texto formal seguindo o padrão:"""
+
+
+def contexto_assembleia(info_assembleia):
+    """Bloco de contexto da assembleia (igual para todos os blocos de uma mesma ata)
+
+    Nome, CNPJ e endereço vêm do cadastro de condomínios (via info_assembleia).
+    """
+    return CONTEXTO_ASSEMBLEIA.format(
+        nome_condominio=info_assembleia.get('nome_condominio') or 'N/A',
+        cnpj_condominio=info_assembleia.get('cnpj_condominio') or 'N/A',
+        endereco_condominio=info_assembleia.get('endereco_condominio') or 'N/A',
+        presidente_nome=info_assembleia.get('presidente_nome', 'N/A'),
+        secretario_nome=info_assembleia.get('secretario_nome', 'N/A'),
+    )
+
+
+def mensagens_conteudo_formal(bloco_texto, info_assembleia):
+    """Mensagens do chat com o prefixo estável primeiro e o trecho variável por último"""
+    return [
+        {"role": "system", "content": SISTEMA_FORMAL + "\n\n" + INSTRUCOES_FORMAL},
+        {"role": "user", "content": contexto_assembleia(info_assembleia)},
+        {"role": "user", "content": TRECHO_FORMAL.format(bloco_texto=bloco_texto)},
+    ]
+
+
+# Modo hierárquico (ata_hierarquica.py): notas estruturadas por bloco e seções redigidas a partir delas
+
+SISTEMA_NOTAS = "Você condensa trechos de assembleias de condomínio em notas estruturadas e responde apenas com JSON válido."
+
+INSTRUCOES_NOTAS = """Registre, em JSON, apenas o que for relevante para a ata: assuntos tratados, propostas apresentadas,
+votações (com contagem de votos quando mencionada) e decisões. Ignore cumprimentos, conversas paralelas e repetições.
+Seja conciso: cada resumo deve ter no máximo três frases e preservar valores, prazos, nomes e apartamentos citados.
+
+Formato da resposta (JSON):
+{"topicos": [{"titulo": "...", "resumo": "...", "propostas": ["..."],
+  "votacoes": [{"proposta": "...", "favoraveis": 0, "contrarios": 0, "abstencoes": 0, "resultado": "..."}],
+  "decisoes": ["..."]}]}"""
+
+TRECHO_NOTAS = """Trecho {numero} de {total} da transcrição:
+{bloco_texto}
+
+Responda com o JSON das notas deste trecho:"""
+
+INSTRUCOES_CONSOLIDACAO = """As notas abaixo vêm de trechos consecutivos da mesma assembleia. Junte tópicos que tratam
+do mesmo assunto, preserve a ordem cronológica, some votações repetidas apenas se forem claramente a mesma votação e
+mantenha valores, prazos, nomes e apartamentos. Responda no mesmo formato JSON {"topicos": [...]}, mais curto que a entrada."""
+
+SECAO_FORMAL = """Notas estruturadas de uma parte da assembleia (em ordem cronológica):
+{notas}
+
+Redija o texto formal da ata para esses tópicos, com um título em negrito para cada item, seguindo o padrão:"""
+
+
+def mensagens_notas(bloco_texto, info_assembleia, numero, total):
+    """Prefixo estável (instruções + contexto) e o trecho por último, como em mensagens_conteudo_formal"""
+    return [
+        {"role": "system", "content": SISTEMA_NOTAS + "\n\n" + INSTRUCOES_NOTAS},
+        {"role": "user", "content": contexto_assembleia(info_assembleia)},
+        {"role": "user", "content": TRECHO_NOTAS.format(numero=numero, total=total, bloco_texto=bloco_texto)},
+    ]
+
+
+def mensagens_consolidacao(notas_json, info_assembleia):
+    return [
+        {"role": "system", "content": SISTEMA_NOTAS + "\n\n" + INSTRUCOES_NOTAS + "\n\n" + INSTRUCOES_CONSOLIDACAO},
+        {"role": "user", "content": contexto_assembleia(info_assembleia)},
+        {"role": "user", "content": notas_json},
+    ]
+
+
+def mensagens_secao_formal(notas_json, info_assembleia):
+    """Mesmo prefixo da redação por blocos, para aproveitar o cache entre os dois modos"""
+    return [
+        {"role": "system", "content": SISTEMA_FORMAL + "\n\n" + INSTRUCOES_FORMAL},
+        {"role": "user", "content": contexto_assembleia(info_assembleia)},
+        {"role": "user", "content": SECAO_FORMAL.format(notas=notas_json)},
+    ]
+
+
+class EstatisticasCache:
+    """Acumula os tokens de entrada e os tokens servidos do cache informados em usage
+
+    Uma instância por ata (criada por quem conduz a geração e passada às
+    chamadas): gerações simultâneas no servidor de jobs, no monitor de pasta
+    ou no modo em pipeline não misturam as contagens.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chamadas = 0
+        self.tokens_entrada = 0
+        self.tokens_em_cache = 0
+
+    def registrar(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        detalhes = getattr(usage, "prompt_tokens_details", None)
+        em_cache = getattr(detalhes, "cached_tokens", 0) or 0
+        with self.lock:
+            self.chamadas += 1
+            self.tokens_entrada += usage.prompt_tokens or 0
+            self.tokens_em_cache += em_cache
+
+    @property
+    def proporcao(self):
+        return self.tokens_em_cache / self.tokens_entrada if self.tokens_entrada else 0.0
+
+    def resumo(self):
+        return (f"Cache de prompt: {self.tokens_em_cache}/{self.tokens_entrada} tokens de entrada "
+                f"reaproveitados ({self.proporcao:.0%}) em {self.chamadas} chamadas")
+
@@ -0,0 +1,241 @@
+"""Recorte do áudio de um trecho da transcrição, sem decodificar a gravação
+
+Quando um morador contesta o que foi dito, a secretária precisa ouvir o trecho
+original. Os enunciados guardam início e fim (ms); o recorte usa esses tempos
+direto na gravação:
+
+- com ffmpeg: busca na entrada (-ss antes de -i) e cópia do stream (-c copy),
+  sem decodificar nem reencodar, então o tempo não depende da duração total;
+- MP3 sem ffmpeg: posição em bytes pelo bitrate do primeiro quadro, ajustada
+  para o próximo cabeçalho de quadro, e cópia dos bytes do trecho.
+
+Gravações divididas em vários arquivos usam o MapaArquivos da transcrição
+para achar o arquivo de cada timestamp. Um trecho que atravessa a divisa
+entre dois arquivos é cortado no fim do primeiro.
+"""
+import os
+import re
+import shutil
+import struct
+import subprocess
+
+from concatenar_audio import normalizar_caminhos, tamanho_id3
+from extracao_local import RE_ABSTENCOES, RE_CONTRARIOS, RE_FAVORAVEIS
+
+# Folga antes e depois do trecho: os timestamps marcam a fala, não a respiração antes dela
+MARGEM_MS = int(os.getenv("RECORTE_MARGEM_MS", "1500"))
+# Enunciados anteriores ao resultado que entram no recorte de uma votação (a proposta lida)
+CONTEXTO_VOTACAO = 2
+# Votações mais próximas que isto viram um único recorte, de no máximo MAX_VOTACAO_MS
+JUNTAR_VOTACOES_MS = 30000
+MAX_VOTACAO_MS = 5 * 60 * 1000
+TEMPO_LIMITE_FFMPEG_S = 30
+
+# Além das contagens de votos (extracao_local): anúncio da votação e resultado sem números
+RE_VOTACAO = re.compile(
+    r"\b(?:em votação|votaram|por unanimidade|(?:aprovad|reprovad|rejeitad)[ao]s?\s+(?:por|com|pela))\b",
+    re.IGNORECASE,
+)
+
+# Layer III: kbps por índice (MPEG-1 e MPEG-2/2.5) e taxas de amostragem por versão
+_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+_TAXAS = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Procura do próximo quadro depois de uma posição estimada
+JANELA_SINCRONIA = 64 * 1024
+
+
+def instante_para_nome(ms):
+    segundos = int(ms) // 1000
+    return f"{segundos // 3600:02d}h{segundos // 60 % 60:02d}m{segundos % 60:02d}s"
+
+
+def ler_instante(texto):
+    """"01:02:03", "62:03", "3723" ou "3723.5" (segundos) em ms"""
+    partes = texto.strip().split(":")
+    if len(partes) > 3:
+        raise ValueError(f"Instante inválido: {texto}")
+    segundos = 0.0
+    for parte in partes:
+        segundos = segundos * 60 + float(parte)
+    return int(segundos * 1000)
+
+
+def _cabecalho_mp3(dados):
+    """(bytes por segundo, tamanho do quadro) de um cabeçalho MP3 Layer III válido, senão None"""
+    if len(dados) < 4:
+        return None
+    cabecalho = struct.unpack(">I", dados[:4])[0]
+    if cabecalho >> 21 != 0x7FF:
+        return None
+    versao = (cabecalho >> 19) & 3
+    camada = (cabecalho >> 17) & 3
+    indice_bitrate = (cabecalho >> 12) & 15
+    indice_taxa = (cabecalho >> 10) & 3
+    if versao == 1 or camada != 1 or indice_bitrate in (0, 15) or indice_taxa == 3:
+        return None
+    kbps = (_BITRATES_V1 if versao == 3 else _BITRATES_V2)[indice_bitrate]
+    taxa = _TAXAS[versao][indice_taxa]
+    amostras = 144 if versao == 3 else 72
+    tamanho = amostras * kbps * 1000 // taxa + ((cabecalho >> 9) & 1)
+    return kbps * 125, tamanho
+
+
+def _proximo_quadro(arquivo, posicao):
+    """Posição do primeiro quadro a partir de posicao (dois cabeçalhos seguidos, contra falsos positivos)"""
+    arquivo.seek(posicao)
+    dados = arquivo.read(JANELA_SINCRONIA)
+    i = dados.find(b"\xff")
+    while 0 <= i < len(dados) - 4:
+        quadro = _cabecalho_mp3(dados[i:i + 4])
+        if quadro:
+            seguinte = dados[i + quadro[1]:i + quadro[1] + 4]
+            if len(seguinte) < 4 or _cabecalho_mp3(seguinte):
+                return posicao + i
+        i = dados.find(b"\xff", i + 1)
+    return None
+
+
+def _recortar_mp3(caminho, inicio_ms, fim_ms, destino):
+    """Cópia dos bytes do trecho; posição pelo bitrate (exata em CBR, aproximada em VBR)"""
+    tamanho_arquivo = os.path.getsize(caminho)
+    with open(caminho, "rb") as origem:
+        id3 = tamanho_id3(origem.read(10))
+        primeiro = _proximo_quadro(origem, id3)
+        if primeiro is None:
+            raise RuntimeError(f"{caminho} não parece um MP3 (nenhum quadro encontrado)")
+        origem.seek(primeiro)
+        bytes_por_segundo = _cabecalho_mp3(origem.read(4))[0]
+
+        def posicao(ms):
+            estimada = primeiro + int(ms * bytes_por_segundo / 1000)
+            if estimada >= tamanho_arquivo:
+                return tamanho_arquivo
+            quadro = _proximo_quadro(origem, estimada)
+            return tamanho_arquivo if quadro is None else quadro
+
+        inicio = posicao(inicio_ms)
+        fim = tamanho_arquivo if fim_ms is None else posicao(fim_ms)
+        if fim <= inicio:
+            raise ValueError("Trecho fora da gravação")
+        origem.seek(inicio)
+        with open(destino, "wb") as saida:
+            restante = fim - inicio
+            while restante:
+                bloco = origem.read(min(1024 * 1024, restante))
+                if not bloco:
+                    break
+                saida.write(bloco)
+                restante -= len(bloco)
+    return destino
+
+
+def _recortar_ffmpeg(caminho, inicio_ms, fim_ms, destino):
+    comando = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-ss", f"{inicio_ms / 1000:.3f}"]
+    if fim_ms is not None:
+        comando += ["-t", f"{(fim_ms - inicio_ms) / 1000:.3f}"]
+    comando += ["-i", caminho, "-map", "0:a", "-c", "copy", destino]
+    try:
+        subprocess.run(comando, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       timeout=TEMPO_LIMITE_FFMPEG_S)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg falhou: {e.stderr.decode(errors='replace').strip()}")
+    return destino
+
+
+def localizar_trecho(caminhos, inicio_ms, fim_ms, mapa_arquivos=None):
+    """(arquivo, início e fim em ms dentro dele) de um trecho em tempos da transcrição
+
+    fim None: até o fim do arquivo (trecho que passa para a gravação seguinte).
+    """
+    caminhos = normalizar_caminhos(caminhos)
+    if len(caminhos) == 1 or mapa_arquivos is None:
+        if len(caminhos) > 1:
+            raise ValueError("Gravação em vários arquivos sem o mapa de durações: não é possível localizar o trecho")
+        return caminhos[0], inicio_ms, fim_ms
+    caminho, inicio_local = mapa_arquivos.localizar(inicio_ms)
+    caminho_fim, fim_local = mapa_arquivos.localizar(fim_ms)
+    return caminho, inicio_local, fim_local if caminho_fim == caminho else None
+
+
+def recortar_trecho(caminhos, inicio_ms, fim_ms, destino=None, mapa_arquivos=None, margem_ms=MARGEM_MS):
+    """Grava o áudio de [inicio_ms, fim_ms] (tempos da transcrição) e devolve o caminho
+
+    destino None: ao lado da gravação, com o instante no nome. A extensão do
+    destino deve ser a da gravação (o stream é copiado, não convertido).
+    """
+    if fim_ms <= inicio_ms:
+        raise ValueError("O fim do trecho deve ser depois do início")
+    caminho, inicio, fim = localizar_trecho(caminhos, max(0, inicio_ms - margem_ms), fim_ms + margem_ms,
+                                            mapa_arquivos)
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+    base, extensao = os.path.splitext(caminho)
+    destino = destino or f"{base}_trecho_{instante_para_nome(inicio_ms)}{extensao}"
+    if shutil.which("ffmpeg"):
+        return _recortar_ffmpeg(caminho, inicio, fim, destino)
+    if extensao.lower() == ".mp3":
+        return _recortar_mp3(caminho, inicio, fim, destino)
+    raise RuntimeError("ffmpeg não encontrado: necessário para recortar arquivos que não são MP3")
+
+
+def _tempos(enunciado):
+    inicio = enunciado.get("inicio", enunciado.get("start"))
+    fim = enunciado.get("fim", enunciado.get("end"))
+    return inicio, fim
+
+
+def _texto(enunciado):
+    return enunciado.get("texto", enunciado.get("text")) or ""
+
+
+def trechos_de_votacao(enunciados, contexto=CONTEXTO_VOTACAO, juntar_ms=JUNTAR_VOTACOES_MS,
+                       max_ms=MAX_VOTACAO_MS):
+    """[{"inicio", "fim", "texto"}] das passagens de votação, em ordem
+
+    Enunciados da AssemblyAI (start/end/text) ou do modelo da tabela
+    (inicio/fim/texto). Cada votação leva junto os `contexto` enunciados
+    anteriores (quem colocou a proposta em votação); votações próximas se
+    unem num recorte de até max_ms.
+    """
+    trechos = []
+    for i, enunciado in enumerate(enunciados):
+        texto = _texto(enunciado)
+        if not (RE_VOTACAO.search(texto) or RE_FAVORAVEIS.search(texto) or RE_CONTRARIOS.search(texto)
+                or RE_ABSTENCOES.search(texto)):
+            continue
+        janela = [e for e in enunciados[max(0, i - contexto):i + 1] if None not in _tempos(e)]
+        if not janela:
+            continue
+        inicio, fim = _tempos(janela[0])[0], _tempos(janela[-1])[1]
+        if trechos and inicio - trechos[-1]["fim"] <= juntar_ms and fim - trechos[-1]["inicio"] <= max_ms:
+            anterior = trechos[-1]
+            novos = [e for e in janela if _tempos(e)[0] >= anterior["fim"]]
+            anterior["fim"] = max(anterior["fim"], fim)
+            anterior["texto"] = " ".join([anterior["texto"]] + [_texto(e) for e in novos]).strip()
+        else:
+            trechos.append({"inicio": inicio, "fim": fim, "texto": " ".join(_texto(e) for e in janela).strip()})
+    return trechos
+
+
+def exportar_votacoes(caminhos, enunciados, pasta, mapa_arquivos=None, report=print):
+    """Recorta cada passagem de votação em pasta, com um indice.txt; devolve os caminhos dos recortes"""
+    trechos = trechos_de_votacao(enunciados)
+    if not trechos:
+        report("Nenhuma votação encontrada na transcrição.")
+        return []
+    os.makedirs(pasta, exist_ok=True)
+    extensao = os.path.splitext(normalizar_caminhos(caminhos)[0])[1]
+    recortes, indice = [], []
+    for n, trecho in enumerate(trechos, 1):
+        nome = f"votacao_{n:02d}_{instante_para_nome(trecho['inicio'])}{extensao}"
+        report(f"Recortando votação {n}/{len(trechos)}...")
+        destino = recortar_trecho(caminhos, trecho["inicio"], trecho["fim"], os.path.join(pasta, nome),
+                                  mapa_arquivos)
+        recortes.append(destino)
+        indice.append(f"{os.path.basename(destino)}\t{instante_para_nome(trecho['inicio'])}"
+                      f"-{instante_para_nome(trecho['fim'])}\t{trecho['texto']}")
+    with open(os.path.join(pasta, "indice.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(indice) + "\n")
+    report(f"{len(recortes)} votação(ões) exportada(s) em {pasta}")
+    return recortes
@@ -0,0 +1,277 @@
+"""Escolha do modelo por etapa, com failover e rebaixamento por latência
+
+Cada etapa tem uma lista ordenada de modelos (o primeiro é o preferido), que
+pode ser trocada no .env, por exemplo:
+
+    MODELOS_EXTRACAO=gpt-4o-mini,gpt-4o
+    MODELOS_FORMAL=gpt-4o,gpt-4o-mini
+    LATENCIA_MAXIMA_FORMAL=60
+    TIMEOUT_FORMAL=180
+
+O roteador acompanha a latência e a taxa de erro observadas por etapa e
+modelo: o mesmo modelo é rápido na extração e lento na redação de um bloco
+grande, e cada etapa compara com o próprio limite. Um modelo instável ou mais
+lento que o limite da etapa passa para o fim da fila daquela etapa; um modelo
+limitado (HTTP 429) ou com erro transitório fica em espera em todas as etapas,
+porque o limite de taxa é da conta, não da etapa. Uma chamada que passa do
+TIMEOUT da etapa conta como erro e segue para o próximo modelo.
+
+Os blocos formais de um mesmo documento usam um único modelo (ModeloFixo):
+trocar de modelo no meio da ata muda o estilo do texto e perde o prefixo do
+prompt em cache. O modelo só muda se o fixado falhar.
+
+Com um TokenCancelamento, a resposta vem em streaming e o token é conferido a
+cada pedaço: ao cancelar, a conexão é fechada e o provedor para de gerar (e de
+cobrar) ali. A espera pelo primeiro pedaço, enquanto o provedor lê o prompt,
+não é interrompida.
+"""
+import os
+import threading
+import time
+
+import openai
+from openai.types.chat import ChatCompletion
+
+from cache_local import hash_objeto
+from cancelamento import verificar
+
+ETAPAS_PADRAO = {
+    "extracao": "gpt-4o-mini,gpt-4o",
+    "deteccao": "gpt-4o-mini,gpt-4o",
+    "formal": "gpt-4o,gpt-4o-mini",
+    "notas": "gpt-4o-mini,gpt-4o",
+    "consolidacao": "gpt-4o-mini,gpt-4o",
+}
+
+# Limite (em segundos) de latência média antes de preferir o próximo modelo
+LATENCIA_MAXIMA_PADRAO = {
+    "extracao": 20.0,
+    "deteccao": 15.0,
+    "formal": 90.0,
+    "notas": 30.0,
+    "consolidacao": 30.0,
+}
+
+# Tempo máximo (em segundos) de uma chamada antes de desistir do modelo
+TIMEOUT_PADRAO = {
+    "extracao": 60.0,
+    "deteccao": 45.0,
+    "formal": 180.0,
+    "notas": 90.0,
+    "consolidacao": 90.0,
+}
+
+ERROS_TRANSITORIOS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+ESPERA_LIMITE_TAXA = 60.0   # segundos fora de rotação após HTTP 429
+ESPERA_ERRO = 20.0          # segundos fora de rotação após erro transitório
+REAVALIAR_APOS = 120.0      # segundos até um modelo lento voltar a ser testado
+ALFA = 0.3                  # peso da observação mais recente nas médias móveis
+
+
+class EstatisticasModelo:
+    """Latência e erros de um modelo numa etapa"""
+
+    def __init__(self):
+        self.latencia_media = None
+        self.taxa_erro = 0.0
+        self.chamadas = 0
+        self.erros = 0
+        self.ultima_chamada = 0.0
+
+    def registrar_sucesso(self, latencia):
+        self.chamadas += 1
+        self.ultima_chamada = time.monotonic()
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media = ALFA * latencia + (1 - ALFA) * self.latencia_media
+        self.taxa_erro = (1 - ALFA) * self.taxa_erro
+
+    def registrar_erro(self):
+        self.chamadas += 1
+        self.erros += 1
+        self.ultima_chamada = time.monotonic()
+        self.taxa_erro = ALFA + (1 - ALFA) * self.taxa_erro
+
+
+class ModeloFixo:
+    """Modelo usado em todas as chamadas de uma etapa num mesmo documento
+
+    Começa vazio (o roteador escolhe na primeira chamada) ou com um modelo já
+    decidido, como o do lote enviado à Batch API. Depois de um failover, os
+    blocos seguintes ficam com o substituto.
+    """
+
+    def __init__(self, modelo=None):
+        self.modelo = modelo
+
+
+class RoteadorModelos:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (etapa, modelo) -> EstatisticasModelo
+        self.estatisticas = {}
+        # modelo -> instante (monotonic) até o qual fica fora de rotação em todas as etapas
+        self.indisponivel_ate = {}
+        # Opcional: CacheLocal compartilhado (ex.: servidor de jobs)
+        self.cache = None
+
+    def modelos(self, etapa):
+        """Lista ordenada de modelos configurada para a etapa"""
+        valor = os.getenv(f"MODELOS_{etapa.upper()}") or ETAPAS_PADRAO[etapa]
+        return [m.strip() for m in valor.split(",") if m.strip()]
+
+    def latencia_maxima(self, etapa):
+        valor = os.getenv(f"LATENCIA_MAXIMA_{etapa.upper()}")
+        return float(valor) if valor else LATENCIA_MAXIMA_PADRAO[etapa]
+
+    def timeout(self, etapa):
+        valor = os.getenv(f"TIMEOUT_{etapa.upper()}")
+        return float(valor) if valor else TIMEOUT_PADRAO[etapa]
+
+    def _stats(self, etapa, modelo):
+        chave = (etapa, modelo)
+        if chave not in self.estatisticas:
+            self.estatisticas[chave] = EstatisticasModelo()
+        return self.estatisticas[chave]
+
+    def candidatos(self, etapa):
+        """Modelos na ordem de tentativa: disponíveis e rápidos primeiro"""
+        agora = time.monotonic()
+        limite = self.latencia_maxima(etapa)
+        saudaveis, lentos, em_espera = [], [], []
+        with self.lock:
+            for modelo in self.modelos(etapa):
+                stats = self._stats(etapa, modelo)
+                if self.indisponivel_ate.get(modelo, 0.0) > agora:
+                    em_espera.append(modelo)
+                elif agora - stats.ultima_chamada > REAVALIAR_APOS:
+                    # Sem observações recentes: volta a ser testado na ordem configurada
+                    saudaveis.append(modelo)
+                elif stats.latencia_media is not None and stats.latencia_media > limite:
+                    lentos.append(modelo)
+                elif stats.taxa_erro > 0.5:
+                    lentos.append(modelo)
+                else:
+                    saudaveis.append(modelo)
+        # Modelos em espera ainda são a última opção, para nunca ficar sem nenhum
+        return saudaveis + lentos + em_espera
+
+    def chamar(self, etapa, client, fixo=None, cancelamento=None, **kwargs):
+        """Executa client.chat.completions.create com o melhor modelo da etapa
+
+        fixo: ModeloFixo opcional; o modelo dele é tentado primeiro e passa a ser o que respondeu.
+        cancelamento: TokenCancelamento opcional; a chamada é interrompida no próximo pedaço da resposta.
+        """
+        chave_cache = None
+        if self.cache is not None:
+            chave_cache = hash_objeto({"etapa": etapa, **kwargs})
+            em_cache = self.cache.obter("llm", chave_cache)
+            if em_cache is not None:
+                return ChatCompletion.model_validate(em_cache)
+
+        response = self._chamar_modelos(etapa, client, fixo, cancelamento, **kwargs)
+        if chave_cache is not None:
+            self.cache.guardar("llm", chave_cache, response.model_dump(mode="json"))
+        return response
+
+    def _chamar_modelos(self, etapa, client, fixo=None, cancelamento=None, **kwargs):
+        candidatos = self.candidatos(etapa)
+        if not candidatos:
+            raise ValueError(f"Nenhum modelo configurado para a etapa {etapa}")
+        if fixo is not None and fixo.modelo in candidatos:
+            candidatos.remove(fixo.modelo)
+            candidatos.insert(0, fixo.modelo)
+        timeout = self.timeout(etapa)
+        ultimo_erro = None
+        for i, modelo in enumerate(candidatos):
+            # Sem retentativas internas enquanto houver outro modelo para tentar
+            if i < len(candidatos) - 1:
+                cliente = client.with_options(max_retries=0, timeout=timeout)
+            else:
+                cliente = client.with_options(timeout=timeout)
+            verificar(cancelamento)
+            inicio = time.monotonic()
+            try:
+                if cancelamento is None:
+                    response = cliente.chat.completions.create(model=modelo, **kwargs)
+                else:
+                    response = _criar_em_fluxo(cliente, modelo, cancelamento, timeout, **kwargs)
+            except ERROS_TRANSITORIOS as e:
+                espera = ESPERA_LIMITE_TAXA if isinstance(e, openai.RateLimitError) else ESPERA_ERRO
+                with self.lock:
+                    self._stats(etapa, modelo).registrar_erro()
+                    self.indisponivel_ate[modelo] = time.monotonic() + espera
+                print(f"Modelo {modelo} indisponível na etapa {etapa} ({type(e).__name__}), tentando o próximo...")
+                ultimo_erro = e
+                continue
+            with self.lock:
+                self._stats(etapa, modelo).registrar_sucesso(time.monotonic() - inicio)
+            if fixo is not None:
+                fixo.modelo = modelo
+            return response
+        raise ultimo_erro
+
+    def resumo(self):
+        """{etapa: {modelo: estatísticas}}"""
+        resumo = {}
+        with self.lock:
+            for (etapa, modelo), s in self.estatisticas.items():
+                resumo.setdefault(etapa, {})[modelo] = {
+                    "chamadas": s.chamadas,
+                    "erros": s.erros,
+                    "latencia_media": s.latencia_media,
+                    "taxa_erro": s.taxa_erro,
+                }
+        return resumo
+
+
+def _criar_em_fluxo(cliente, modelo, cancelamento, timeout, **kwargs):
+    """chat.completions.create em streaming, remontado como um ChatCompletion comum
+
+    O timeout do cliente vale por leitura; aqui ele também limita a chamada inteira.
+    """
+    inicio = time.monotonic()
+    fluxo = cliente.chat.completions.create(model=modelo, stream=True, stream_options={"include_usage": True},
+                                            **kwargs)
+    partes, final, uso, ultimo = [], None, None, None
+    try:
+        for pedaco in fluxo:
+            cancelamento.verificar()
+            if time.monotonic() - inicio > timeout:
+                raise openai.APITimeoutError(request=fluxo.response.request)
+            ultimo = pedaco
+            if pedaco.usage is not None:
+                uso = pedaco.usage.model_dump(mode="json")
+            for escolha in pedaco.choices:
+                if escolha.delta.content:
+                    partes.append(escolha.delta.content)
+                if escolha.finish_reason:
+                    final = escolha.finish_reason
+    finally:
+        # Fechar a conexão é o que faz o provedor parar de gerar
+        fluxo.close()
+    cancelamento.verificar()
+    if ultimo is None:
+        raise openai.APIConnectionError(message="Resposta em streaming vazia", request=fluxo.response.request)
+    return ChatCompletion.model_validate({
+        "id": ultimo.id,
+        "object": "chat.completion",
+        "created": ultimo.created,
+        "model": ultimo.model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(partes)},
+            "finish_reason": final or "stop",
+        }],
+        "usage": uso,
+    })
+
+
+roteador = RoteadorModelos()
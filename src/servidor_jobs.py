@@ -0,0 +1,407 @@
+"""Servidor local de jobs: várias estações compartilham o mesmo pool e o mesmo cache
+
+Endpoints:
+    POST /jobs/transcricao        corpo = áudio            -> {"id": ...}
+    POST /jobs/ata                JSON {transcricao, info_assembleia} -> {"id": ...}
+    GET  /jobs/<id>               estado, progresso (texto e último evento tipado) e erro
+    GET  /metricas                métricas de progresso no formato do Prometheus
+    GET  /jobs/<id>/resultado     {"texto": ...} ou o .docx gerado
+    POST /jobs/<id>/cancelar      cancela o job pendente ou em andamento
+
+Toda requisição precisa do cabeçalho X-Token com o token compartilhado
+(TRANSCREVER_SERVIDOR_TOKEN, o mesmo no servidor e nas estações). O cliente se
+identifica pelo cabeçalho X-Cliente. A fila atende os clientes em rodízio, para
+que uma estação com muitos jobs não bloqueie as outras. Uma mesma gravação (ou a
+mesma transcrição + informações) enviada duas vezes reaproveita o job existente
+ou o cache.
+
+Jobs terminados (concluídos, com erro ou cancelados) são esquecidos depois de
+TTL_JOBS segundos, junto com o áudio e o .docx na pasta de trabalho.
+"""
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cache_local import CacheLocal, hash_objeto
+from cancelamento import Cancelado, TokenCancelamento
+from progresso import ExportadorMetricas, Progresso, barramento
+
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+CANCELADO = "cancelado"
+TERMINADOS = (CONCLUIDO, ERRO, CANCELADO)
+
+TOKEN = os.getenv("TRANSCREVER_SERVIDOR_TOKEN") or ""
+# Segundos que um job terminado (e seus arquivos) fica disponível para o cliente buscar o resultado
+TTL_JOBS = float(os.getenv("TRANSCREVER_SERVIDOR_TTL_JOBS", "3600"))
+INTERVALO_LIMPEZA = 60.0
+
+TIPO_DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class FilaJusta:
+    """Fila com rodízio entre clientes (fair queuing)"""
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.filas = OrderedDict()
+        self.fechada = False
+
+    def colocar(self, cliente, item):
+        with self.cond:
+            self.filas.setdefault(cliente, deque()).append(item)
+            self.cond.notify()
+
+    def retirar(self):
+        """Bloqueia até haver item; devolve None quando a fila é fechada"""
+        with self.cond:
+            while not self.filas and not self.fechada:
+                self.cond.wait()
+            if self.fechada:
+                return None
+            cliente, fila = self.filas.popitem(last=False)
+            item = fila.popleft()
+            if fila:
+                # O cliente volta para o fim da vez
+                self.filas[cliente] = fila
+            return item
+
+    def fechar(self):
+        with self.cond:
+            self.fechada = True
+            self.cond.notify_all()
+
+
+class Job:
+    def __init__(self, tipo, cliente, chave, dados):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.cliente = cliente
+        self.chave = chave
+        self.dados = dados
+        self.estado = PENDENTE
+        self.progresso = ""
+        # Último EventoProgresso (como dict) entregue pelo barramento
+        self.evento = None
+        self.emissor = None
+        self.erro = None
+        self.resultado = None
+        self.cancelamento = TokenCancelamento()
+        self.criado_em = time.time()
+        self.terminado_em = None
+
+    def terminar(self, estado):
+        self.estado = estado
+        self.terminado_em = time.time()
+
+    def status(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "cliente": self.cliente,
+            "estado": self.estado,
+            "progresso": self.progresso,
+            "evento": self.evento,
+            "erro": self.erro,
+        }
+
+
+class ServidorJobs:
+    def __init__(self, pasta_trabalho=None, workers=4, cache=None, ttl_jobs=TTL_JOBS):
+        self.pasta_trabalho = pasta_trabalho or os.path.join(tempfile.gettempdir(), "transcrever_ata_servidor")
+        self.ttl_jobs = ttl_jobs
+        os.makedirs(self.pasta_trabalho, exist_ok=True)
+        self.cache = cache or CacheLocal()
+        self.fila = FilaJusta()
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.por_chave = {}
+        self.metricas = ExportadorMetricas()
+        self.cancelar_assinaturas = [barramento.assinar(self.metricas), barramento.assinar(self._registrar_evento)]
+
+        # O cache de LLM passa a valer para todos os jobs do servidor
+        from roteador_modelos import roteador
+        roteador.cache = self.cache
+
+        self.parado = threading.Event()
+        self.threads = [threading.Thread(target=self._trabalhar, daemon=True) for _ in range(workers)]
+        self.threads.append(threading.Thread(target=self._limpar_periodicamente, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def submeter(self, tipo, cliente, chave, dados):
+        """Cria o job, ou devolve o existente com a mesma chave"""
+        with self.lock:
+            existente = self.por_chave.get(chave)
+            if existente and existente.estado not in (ERRO, CANCELADO):
+                return existente, False
+            job = Job(tipo, cliente, chave, dados)
+            self.jobs[job.id] = job
+            self.por_chave[chave] = job
+        self.fila.colocar(cliente, job)
+        return job, True
+
+    def obter(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancelar(self, job_id):
+        """Cancela o job; um pendente nem chega a rodar, um em andamento para no próximo ponto de verificação"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.estado in TERMINADOS:
+                return job
+            job.cancelamento.cancelar()
+            if job.estado == PENDENTE:
+                job.terminar(CANCELADO)
+        return job
+
+    def remover_expirados(self, agora=None):
+        """Esquece os jobs terminados há mais de ttl_jobs segundos e apaga os arquivos deles"""
+        limite = (agora or time.time()) - self.ttl_jobs
+        with self.lock:
+            expirados = [j for j in self.jobs.values() if j.estado in TERMINADOS and j.terminado_em < limite]
+            for job in expirados:
+                del self.jobs[job.id]
+                if self.por_chave.get(job.chave) is job:
+                    del self.por_chave[job.chave]
+        for job in expirados:
+            for caminho in self._arquivos(job):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+        return len(expirados)
+
+    def _caminho_ata(self, job):
+        return os.path.join(self.pasta_trabalho, f"{job.id}.docx")
+
+    def _arquivos(self, job):
+        """Arquivos do job na pasta de trabalho: áudio recebido ou .docx (e o .tmp de uma gravação interrompida)"""
+        if job.tipo == "transcricao":
+            return [job.dados["caminho_audio"]]
+        return [self._caminho_ata(job), self._caminho_ata(job) + ".tmp"]
+
+    def _limpar_periodicamente(self):
+        while not self.parado.wait(INTERVALO_LIMPEZA):
+            try:
+                self.remover_expirados()
+            except Exception as e:
+                print(f"Aviso: falha ao remover jobs expirados: {e}")
+
+    def _trabalhar(self):
+        while True:
+            job = self.fila.retirar()
+            if job is None:
+                return
+            with self.lock:
+                if job.estado == CANCELADO:
+                    # Cancelado enquanto esperava na fila; o áudio sai junto com o job, no fim do TTL
+                    continue
+                job.estado = PROCESSANDO
+            progresso = self._reportar(job)
+            try:
+                if job.tipo == "transcricao":
+                    self._executar_transcricao(job)
+                else:
+                    self._executar_ata(job)
+                job.terminar(CONCLUIDO)
+                progresso.concluir("Concluído")
+            except Cancelado:
+                job.terminar(CANCELADO)
+                progresso.cancelar()
+            except Exception as e:
+                job.erro = f"{str(e)}\n{traceback.format_exc()}"
+                job.terminar(ERRO)
+                progresso.falhar(str(e))
+
+    def _reportar(self, job):
+        """Progresso do job: a mensagem em texto vai direto para job.progresso"""
+        if job.emissor is None:
+            def report(msg):
+                if msg:
+                    job.progresso = msg
+            job.emissor = Progresso(job.id, callback=report)
+        return job.emissor
+
+    def _registrar_evento(self, evento):
+        job = self.obter(evento.job_id)
+        if job is not None:
+            job.evento = evento.como_dict()
+
+    def _executar_transcricao(self, job):
+        from transcrever import transcrever_audio
+
+        em_cache = self.cache.obter("transcricao", job.chave)
+        caminho_audio = job.dados["caminho_audio"]
+        try:
+            if em_cache is not None:
+                job.resultado = em_cache
+                return
+            texto = transcrever_audio(caminho_audio, status_callback=self._reportar(job), cancelamento=job.cancelamento)
+            job.resultado = {"texto": texto}
+            self.cache.guardar("transcricao", job.chave, job.resultado)
+        finally:
+            if os.path.exists(caminho_audio):
+                os.remove(caminho_audio)
+
+    def _executar_ata(self, job):
+        from gerar_ata import gerar_ata_formal
+
+        caminho_saida = self._caminho_ata(job)
+        gerar_ata_formal(
+            job.dados["transcricao"],
+            caminho_saida=caminho_saida,
+            status_callback=self._reportar(job),
+            info_assembleia=job.dados.get("info_assembleia"),
+            cancelamento=job.cancelamento,
+        )
+        job.resultado = {"caminho": caminho_saida}
+
+    def parar(self):
+        self.parado.set()
+        self.fila.fechar()
+        for cancelar in self.cancelar_assinaturas:
+            cancelar()
+
+
+class ServidorJobsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def servidor(self):
+        return self.server.servidor_jobs
+
+    def log_message(self, format, *args):
+        print(f"[servidor] {self.address_string()} {format % args}")
+
+    def _cliente(self):
+        return self.headers.get("X-Cliente") or self.client_address[0]
+
+    def _autorizado(self):
+        """Confere o X-Token; sem ele responde 401 (o corpo enviado é descartado com a conexão)"""
+        if hmac.compare_digest(self.headers.get("X-Token", "").encode("utf-8"), self.server.token.encode("utf-8")):
+            return True
+        self.close_connection = True
+        self._json(401, {"erro": "token inválido ou ausente"})
+        return False
+
+    def _json(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _iterar_corpo(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                tamanho = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if tamanho == 0:
+                    self.rfile.readline()
+                    return
+                yield self.rfile.read(tamanho)
+                self.rfile.readline()
+        restante = int(self.headers.get("Content-Length") or 0)
+        while restante > 0:
+            bloco = self.rfile.read(min(1024 * 1024, restante))
+            if not bloco:
+                return
+            restante -= len(bloco)
+            yield bloco
+
+    def do_POST(self):
+        if not self._autorizado():
+            return
+        partes = [p for p in self.path.split("/") if p]
+        if len(partes) == 3 and partes[0] == "jobs" and partes[2] == "cancelar":
+            job = self.servidor.cancelar(partes[1])
+            if job is None:
+                self._json(404, {"erro": "job inexistente"})
+            else:
+                self._json(200, job.status())
+            return
+        if self.path == "/jobs/transcricao":
+            # Grava o áudio em disco calculando o hash ao mesmo tempo
+            h = hashlib.sha256()
+            arquivo = tempfile.NamedTemporaryFile(dir=self.servidor.pasta_trabalho, suffix=".mp3", delete=False)
+            with arquivo:
+                for bloco in self._iterar_corpo():
+                    h.update(bloco)
+                    arquivo.write(bloco)
+            job, novo = self.servidor.submeter(
+                "transcricao", self._cliente(), "transcricao:" + h.hexdigest(), {"caminho_audio": arquivo.name}
+            )
+            if not novo:
+                os.remove(arquivo.name)
+            self._json(202, job.status())
+        elif self.path == "/jobs/ata":
+            dados = json.loads(b"".join(self._iterar_corpo()) or b"{}")
+            if not dados.get("transcricao"):
+                self._json(400, {"erro": "transcricao obrigatória"})
+                return
+            chave = "ata:" + hash_objeto(dados)
+            job, _ = self.servidor.submeter("ata", self._cliente(), chave, dados)
+            self._json(202, job.status())
+        else:
+            self._json(404, {"erro": "não encontrado"})
+
+    def do_GET(self):
+        if not self._autorizado():
+            return
+        if self.path.rstrip("/") == "/metricas":
+            corpo = self.servidor.metricas.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+            return
+        partes = [p for p in self.path.split("/") if p]
+        if len(partes) < 2 or partes[0] != "jobs":
+            self._json(404, {"erro": "não encontrado"})
+            return
+        job = self.servidor.obter(partes[1])
+        if job is None:
+            self._json(404, {"erro": "job inexistente"})
+            return
+        if len(partes) == 2:
+            self._json(200, job.status())
+            return
+        if partes[2] != "resultado":
+            self._json(404, {"erro": "não encontrado"})
+            return
+        if job.estado != CONCLUIDO:
+            self._json(409, job.status())
+            return
+        if job.tipo == "transcricao":
+            self._json(200, job.resultado)
+            return
+        with open(job.resultado["caminho"], "rb") as f:
+            dados = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_DOCX)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+def criar_servidor(host="127.0.0.1", porta=8765, workers=4, pasta_trabalho=None, cache=None, token=None,
+                   ttl_jobs=TTL_JOBS):
+    token = token or TOKEN
+    if not token:
+        raise ValueError("Defina TRANSCREVER_SERVIDOR_TOKEN (ou --token): o servidor só atende estações com o token")
+    httpd = ThreadingHTTPServer((host, porta), ServidorJobsHandler)
+    httpd.daemon_threads = True
+    httpd.token = token
+    httpd.servidor_jobs = ServidorJobs(pasta_trabalho=pasta_trabalho, workers=workers, cache=cache, ttl_jobs=ttl_jobs)
+    return httpd
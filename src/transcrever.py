@@ -1,12 +1,30 @@
 import requests
+import threading
 import time
 import os
 from dotenv import load_dotenv
 from PySide6.QtCore import QThread, Signal, QTimer
 from PySide6.QtWidgets import QApplication
+from cache_local import hash_objeto, obter_cache
+from cancelamento import Cancelado, TokenCancelamento, esperar, executar, fluxo_cancelavel, verificar
+from concatenar_audio import MapaArquivos, fluxo_concatenado, normalizar_caminhos
+from perfil import medir, perfilado
+from progresso import TRANSCRICAO, UPLOAD, Progresso, como_progresso, contar_bytes, relatar
+from transcricao_paginada import ler_transcricao
 
 load_dotenv()
 API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
+# Permite apontar para servidores locais (ex.: benchmarks/servidores_falsos.py)
+BASE_URL = os.getenv("ASSEMBLYAI_BASE_URL", "https://api.assemblyai.com").rstrip("/")
+INTERVALO_POLLING = float(os.getenv("ASSEMBLYAI_INTERVALO_POLLING", "0") or 0)
+# Timeout (conexão, leitura) das requisições curtas: evita esperas ilimitadas em rede instável
+TIMEOUT_REQUISICAO = (10, 60)
+TAMANHO_BLOCO_UPLOAD = 1024 * 1024
+# upload_url reaproveitado por até este tempo (o áudio enviado expira na AssemblyAI)
+VALIDADE_UPLOAD_S = float(os.getenv("ASSEMBLYAI_VALIDADE_UPLOAD_H", "12")) * 3600
+# UPLOAD_ANTECIPADO=0 desliga o envio ao escolher o arquivo (ex.: conexão limitada)
+UPLOAD_ANTECIPADO = os.getenv("UPLOAD_ANTECIPADO", "1").strip().lower() not in ("0", "false", "nao", "não")
+
 
 class TranscriptionWorker(QThread):
     """Worker corrigido que não trava durante o typing effect"""
@@ -19,7 +37,6 @@ class TranscriptionWorker(QThread):
         super().__init__()
         self.audio_path = audio_path
         self.api_token = API_KEY
-        self.current_text = ""
         self.full_text = ""
         self.typing_timer = None
 
@@ -54,15 +71,16 @@ class TranscriptionWorker(QThread):
 
     def poll_transcription(self, transcript_id):
         """Polling da transcrição"""
-        endpoint = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
+        endpoint = f"{BASE_URL}/v2/transcript/{transcript_id}"
         headers = {"authorization": self.api_token}
         
         start_time = time.time()
         
         while True:
-            response = requests.get(endpoint, headers=headers)
+            response = requests.get(endpoint, headers=headers, stream=True)
             response.raise_for_status()
-            data = response.json()
+            with medir("json"):
+                data = ler_transcricao(response)
 
             status = data["status"]
             
@@ -75,7 +93,7 @@ class TranscriptionWorker(QThread):
             if time.time() - start_time > 600:
                 raise TimeoutError("Timeout: transcrição demorou mais de 10 minutos")
 
-            time.sleep(3)
+            time.sleep(INTERVALO_POLLING or 3)
 
     def start_typing_effect_safe(self):
         """Efeito de typing usando QTimer (não bloqueia a thread)"""
@@ -85,10 +103,11 @@ class TranscriptionWorker(QThread):
             
         # Limpa status e prepara para typing
         self.progress.emit("")
-        self.current_text = ""
         
         # OPÇÃO SIMPLES: Mostra texto por palavras usando QTimer
         words = self.full_text.split()
+        # O texto inteiro já está nas palavras: não guarda outra cópia
+        self.full_text = ""
         self.word_index = 0
         self.words_list = words
         
@@ -97,11 +116,14 @@ class TranscriptionWorker(QThread):
         self.typing_timer.timeout.connect(self.add_next_word)
         self.typing_timer.start(50)  # 50ms entre palavras
     
+    @perfilado("digitacao")
     def add_next_word(self):
         """Adiciona próxima palavra (chamado pelo QTimer)"""
         if self.word_index < len(self.words_list):
-            self.current_text += self.words_list[self.word_index] + " "
-            self.text_update.emit(self.current_text.strip())
+            # Só a palavra nova (a janela acrescenta): reemitir o texto acumulado
+            # criava uma string do tamanho da transcrição a cada palavra
+            self.text_update.emit(self.words_list[self.word_index] + " ")
+            self.words_list[self.word_index] = None
             self.word_index += 1
         else:
             # Terminou o typing
@@ -112,81 +134,222 @@ class TranscriptionWorker(QThread):
 
 
 # Função original para compatibilidade
-def transcrever_audio(caminho_arquivo, status_callback=None):
-    """Função principal de transcrição (fallback)"""
+def transcrever_audio(caminho_arquivo, status_callback=None, cancelamento=None, completo=False):
+    """Função principal de transcrição (fallback)
+
+    caminho_arquivo pode ser um caminho ou uma lista ordenada de gravações
+    da mesma assembleia. Com cancelamento (TokenCancelamento), o upload e o
+    polling param assim que o usuário cancela e a transcrição remota é excluída.
+    completo=True devolve o JSON (text, utterances) em vez de só o texto.
+    """
     if not API_KEY:
         raise Exception("ASSEMBLYAI_API_KEY não encontrada no .env")
 
-    def report(msg):
-        if status_callback:
-            status_callback(msg)
+    progresso = como_progresso(status_callback)
+
+    def report(msg, etapa=None):
+        progresso.relatar(msg, etapa)
         print(msg)
 
+    transcript_id = None
     try:
-        report("📤 Fazendo upload do áudio...")
-        upload_url = upload_file(caminho_arquivo, API_KEY)
+        report("📤 Fazendo upload do áudio...", UPLOAD)
+        upload_url = upload_com_cache(caminho_arquivo, API_KEY, cancelamento=cancelamento, status_callback=progresso)
         
-        report("🚀 Solicitando transcrição...")
-        transcript_id = request_transcription(upload_url, API_KEY)
+        report("🚀 Solicitando transcrição...", TRANSCRICAO)
+        transcript_id = executar(cancelamento, request_transcription, upload_url, API_KEY)
         
         report("⏳ Aguardando processamento...")
-        texto = poll_transcription(transcript_id, API_KEY, status_callback=report)
+        resultado = poll_transcription(transcript_id, API_KEY, status_callback=progresso, cancelamento=cancelamento,
+                                       completo=completo)
         
         report("✅ Transcrição concluída!")
-        return texto
-        
+        return resultado
+
+    except Cancelado:
+        report("Transcrição cancelada.")
+        if transcript_id:
+            excluir_transcricao(transcript_id, API_KEY)
+        raise
     except Exception as e:
         report(f"❌ Erro: {e}")
+        esquecer_upload(caminho_arquivo, API_KEY)
         raise
 
-def poll_transcription(transcript_id, api_key, timeout=600, status_callback=None):
-    """Polling padrão da transcrição"""
-    endpoint = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
+def poll_transcription(transcript_id, api_key, timeout=600, status_callback=None, cancelamento=None, completo=False,
+                       ao_receber_pagina=None):
+    """Polling padrão da transcrição
+
+    completo=True devolve o JSON inteiro (com utterances, sem as palavras) em vez de só o texto.
+    ao_receber_pagina recebe os enunciados em páginas enquanto o JSON final é baixado.
+    """
+    endpoint = f"{BASE_URL}/v2/transcript/{transcript_id}"
     headers = {"authorization": api_key}
     
     start = time.time()
     while True:
-        response = requests.get(endpoint, headers=headers)
+        response = executar(cancelamento, requests.get, endpoint, headers=headers, timeout=TIMEOUT_REQUISICAO,
+                            stream=True)
         response.raise_for_status()
-        data = response.json()
+        with medir("json"):
+            data = ler_transcricao(response, ao_receber_pagina, cancelamento=cancelamento)
 
         status = data["status"]
         
-        if status_callback:
-            status_callback(f"Status: {status}")
+        relatar(status_callback, f"Status: {status}", TRANSCRICAO)
 
         if status == "completed":
-            return data["text"]
+            return data if completo else data["text"]
         elif status == "error":
             raise Exception(f"Transcrição falhou: {data.get('error')}")
 
         if time.time() - start > timeout:
             raise TimeoutError("Timeout na transcrição")
 
-        time.sleep(5)
+        esperar(cancelamento, INTERVALO_POLLING or 5)
 
-def upload_file(filename, api_key):
-    """Upload do arquivo para AssemblyAI"""
-    if not os.path.exists(filename):
-        raise FileNotFoundError(f"Arquivo não encontrado: {filename}")
+def excluir_transcricao(transcript_id, api_key):
+    """Exclui a transcrição na AssemblyAI (melhor esforço, usado no cancelamento)"""
+    try:
+        response = requests.delete(
+            f"{BASE_URL}/v2/transcript/{transcript_id}",
+            headers={"authorization": api_key},
+            timeout=TIMEOUT_REQUISICAO,
+        )
+        if not response.ok:
+            print(f"Aviso: não foi possível excluir a transcrição {transcript_id}: {response.status_code}")
+    except requests.RequestException as e:
+        print(f"Aviso: não foi possível excluir a transcrição {transcript_id}: {e}")
+
+def upload_file(filename, api_key, cancelamento=None, status_callback=None):
+    """Upload do arquivo para AssemblyAI
+
+    Aceita também uma lista ordenada de arquivos, enviados como um único
+    áudio emendado em fluxo (ver concatenar_audio.py). Com cancelamento, o
+    envio é interrompido no próximo bloco de 1 MB; com um Progresso em
+    status_callback, cada bloco publica os bytes enviados.
+    """
+    caminhos = normalizar_caminhos(filename)
+    for caminho in caminhos:
+        if not os.path.exists(caminho):
+            raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
 
     headers = {"authorization": api_key}
+    por_blocos = cancelamento is not None or isinstance(status_callback, Progresso)
+    total = sum(os.path.getsize(c) for c in caminhos)
 
-    with open(filename, "rb") as f:
+    if len(caminhos) > 1:
         response = requests.post(
-            "https://api.assemblyai.com/v2/upload",
+            f"{BASE_URL}/v2/upload",
             headers=headers,
-            data=f
+            data=contar_bytes(fluxo_cancelavel(fluxo_concatenado(caminhos), cancelamento), total, status_callback)
         )
+    else:
+        with open(caminhos[0], "rb") as f:
+            dados = f
+            if por_blocos:
+                blocos = fluxo_cancelavel(iter(lambda: f.read(TAMANHO_BLOCO_UPLOAD), b""), cancelamento)
+                dados = contar_bytes(blocos, total, status_callback)
+            response = requests.post(
+                f"{BASE_URL}/v2/upload",
+                headers=headers,
+                data=dados
+            )
+    verificar(cancelamento)
 
     if not response.ok:
         raise Exception(f"Erro no upload: {response.status_code} - {response.text}")
     
     return response.json()["upload_url"]
 
+def chave_upload(filename, api_key):
+    """Hash de caminho, tamanho e data de modificação de cada gravação, mais a conta/servidor
+
+    Não lê o conteúdo: o clique em Transcrever consulta o cache sem reler
+    gigabytes de áudio, e qualquer alteração no arquivo muda a chave.
+    """
+    arquivos = []
+    for caminho in normalizar_caminhos(filename):
+        info = os.stat(caminho)
+        arquivos.append([os.path.abspath(caminho), info.st_size, info.st_mtime_ns])
+    return hash_objeto({"arquivos": arquivos, "servidor": BASE_URL, "conta": hash_objeto(api_key or "")})
+
+def upload_com_cache(filename, api_key, cancelamento=None, status_callback=None):
+    """upload_file que reaproveita o upload_url de um envio recente do mesmo áudio"""
+    chave = chave_upload(filename, api_key)
+    em_cache = obter_cache().obter("upload_url", chave)
+    if em_cache and time.time() - em_cache["enviado_em"] < VALIDADE_UPLOAD_S:
+        relatar(status_callback, "Áudio já enviado, reaproveitando o upload.", UPLOAD)
+        return em_cache["upload_url"]
+    upload_url = upload_file(filename, api_key, cancelamento=cancelamento, status_callback=status_callback)
+    obter_cache().guardar("upload_url", chave, {"upload_url": upload_url, "enviado_em": time.time()})
+    return upload_url
+
+def esquecer_upload(filename, api_key):
+    """Descarta o upload_url em cache (ex.: a transcrição falhou ao baixar o áudio)"""
+    try:
+        obter_cache().remover("upload_url", chave_upload(filename, api_key))
+    except OSError:
+        pass
+
+class UploadAntecipado:
+    """Upload iniciado ao escolher o arquivo, enquanto o usuário ainda confere as opções
+
+    Roda numa thread própria e guarda o upload_url no cache. Ao clicar em
+    Transcrever, o worker adota o envio em andamento (aguardar) em vez de
+    recomeçar; escolher outro arquivo descarta o envio (descartar).
+    """
+
+    def __init__(self, filename, api_key=None):
+        self.caminhos = normalizar_caminhos(filename)
+        self.api_key = api_key or API_KEY
+        self.cancelamento = TokenCancelamento()
+        # Mesmo job_id do worker que adotar o envio: a janela acompanha um único job
+        self.progresso = Progresso()
+        self.upload_url = None
+        self.erro = None
+        self.concluido = threading.Event()
+        self.thread = threading.Thread(target=self._executar, name="upload-antecipado", daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+        return self
+
+    def _executar(self):
+        try:
+            self.upload_url = upload_com_cache(self.caminhos, self.api_key, cancelamento=self.cancelamento,
+                                               status_callback=self.progresso)
+        except Cancelado:
+            pass
+        except Exception as e:
+            # O worker refaz o upload por conta própria e mostra o erro, se persistir
+            self.erro = e
+            print(f"Aviso: upload antecipado falhou: {e}")
+        finally:
+            self.concluido.set()
+
+    def corresponde(self, filename):
+        return normalizar_caminhos(filename) == self.caminhos
+
+    @property
+    def fracao(self):
+        """Parte do áudio já enviada (1.0 se terminou ou veio do cache)"""
+        if self.upload_url:
+            return 1.0
+        total = self.progresso.campos.get("bytes_total")
+        return self.progresso.campos.get("bytes_feitos", 0) / total if total else 0.0
+
+    def aguardar(self):
+        """upload_url quando o envio terminar; None se falhou ou foi descartado"""
+        self.concluido.wait()
+        return self.upload_url
+
+    def descartar(self):
+        self.cancelamento.cancelar()
+
 def request_transcription(audio_url, api_key):
     """Solicita transcrição na API REST"""
-    endpoint = "https://api.assemblyai.com/v2/transcript"
+    endpoint = f"{BASE_URL}/v2/transcript"
     
     json_data = {
         "audio_url": audio_url,
@@ -201,7 +364,7 @@ def request_transcription(audio_url, api_key):
         "content-type": "application/json"
     }
 
-    response = requests.post(endpoint, json=json_data, headers=headers)
+    response = requests.post(endpoint, json=json_data, headers=headers, timeout=TIMEOUT_REQUISICAO)
     
     if not response.ok:
         raise Exception(f"Erro na requisição: {response.status_code} - {response.text}")
@@ -212,54 +375,96 @@ def request_transcription(audio_url, api_key):
 # Classe legada mantida para compatibilidade (mas corrigida)
 class AssemblyAIStreamWorker(QThread):
     """Versão corrigida da classe original"""
-    partial_transcript = Signal(str)
     finished = Signal()
     error = Signal(str)
     typing_effect = Signal(str)
+    # Páginas de enunciados (transcricao_paginada), antes do texto completo em typing_effect
+    pagina_enunciados = Signal(list)
+    cancelado = Signal()
 
-    def __init__(self, api_token, audio_path):
+    def __init__(self, api_token, audio_path, upload_antecipado=None):
         super().__init__()
         self.api_token = api_token
         self.audio_path = audio_path
+        self.mapa_arquivos = None
+        self.cancelamento = TokenCancelamento()
+        # UploadAntecipado do mesmo áudio, iniciado quando o arquivo foi escolhido
+        self.upload_antecipado = upload_antecipado
+        # Eventos tipados no barramento de progresso (progresso.py), identificados por job_id
+        self.progresso = Progresso(upload_antecipado.progresso.job_id if upload_antecipado else None)
+        self.transcript_id = None
+        # Enunciados (speaker/start/end/text) para a visão em tabela da transcrição
+        self.enunciados = []
 
     def run(self):
         try:
-            self.partial_transcript.emit("🔄 Iniciando transcrição...")
+            self.progresso.relatar("🔄 Iniciando transcrição...")
             texto = self.transcrever_com_updates()
             
             # Emite texto completo diretamente (sem efeito problemático)
             self.typing_effect.emit(texto)
+            self.progresso.concluir("Transcrição concluída!")
             self.finished.emit()
             
+        except Cancelado:
+            if self.upload_antecipado:
+                self.upload_antecipado.descartar()
+            if self.transcript_id:
+                excluir_transcricao(self.transcript_id, self.api_token)
+            self.progresso.cancelar("Transcrição cancelada.")
+            self.cancelado.emit()
         except Exception as e:
+            # O áudio pode ter expirado na AssemblyAI: a próxima tentativa refaz o upload
+            esquecer_upload(self.audio_path, self.api_token)
+            self.progresso.falhar(str(e))
             self.error.emit(str(e))
 
+    def cancelar(self):
+        """Pede a parada; run() termina no próximo ponto de verificação"""
+        self.cancelamento.cancelar()
+
     def transcrever_com_updates(self):
         """Transcreve usando API REST"""
-        self.partial_transcript.emit("📤 Fazendo upload do arquivo...")
-        upload_url = upload_file(self.audio_path, self.api_token)
+        caminhos = normalizar_caminhos(self.audio_path)
+        if len(caminhos) > 1:
+            # Deslocamento de cada gravação, para mapear timestamps ao arquivo de origem
+            self.mapa_arquivos = MapaArquivos(caminhos)
+            self.progresso.relatar(f"📤 Fazendo upload de {len(caminhos)} arquivos emendados...", UPLOAD)
+        else:
+            self.progresso.relatar("📤 Fazendo upload do arquivo...", UPLOAD)
+        upload_url = None
+        if self.upload_antecipado:
+            upload_url = self.cancelamento.executar(self.upload_antecipado.aguardar)
+        if not upload_url:
+            upload_url = upload_com_cache(caminhos, self.api_token, cancelamento=self.cancelamento,
+                                          status_callback=self.progresso)
         
-        self.partial_transcript.emit("🚀 Upload concluído. Iniciando transcrição...")
-        transcript_id = request_transcription(upload_url, self.api_token)
+        self.progresso.relatar("🚀 Upload concluído. Iniciando transcrição...", TRANSCRICAO)
+        self.transcript_id = self.cancelamento.executar(request_transcription, upload_url, self.api_token)
         
-        self.partial_transcript.emit("⏳ Processando áudio...")
-        return self.poll_transcription(transcript_id)
+        self.progresso.relatar("⏳ Processando áudio...")
+        return self.poll_transcription(self.transcript_id)
 
     def poll_transcription(self, transcript_id):
         """Polling da transcrição"""
-        endpoint = f"https://api.assemblyai.com/v2/transcript/{transcript_id}"
+        endpoint = f"{BASE_URL}/v2/transcript/{transcript_id}"
         headers = {"authorization": self.api_token}
         
         start_time = time.time()
         
         while True:
-            response = requests.get(endpoint, headers=headers)
+            response = self.cancelamento.executar(requests.get, endpoint, headers=headers, timeout=TIMEOUT_REQUISICAO,
+                                                  stream=True)
             response.raise_for_status()
-            data = response.json()
+            with medir("json"):
+                # Os enunciados vão para a tabela em páginas enquanto o JSON ainda chega
+                data = ler_transcricao(response, self.pagina_enunciados.emit, cancelamento=self.cancelamento)
 
             status = data["status"]
+            self.progresso.relatar(f"⏳ Processando áudio... ({status})")
             
             if status == "completed":
+                self.enunciados = data.get("utterances") or []
                 return data["text"]
             elif status == "error":
                 raise Exception(f"Erro na transcrição: {data.get('error', 'Erro desconhecido')}")
@@ -267,4 +472,4 @@ class AssemblyAIStreamWorker(QThread):
             if time.time() - start_time > 600:
                 raise TimeoutError("Timeout: transcrição demorou mais de 10 minutos")
 
-            time.sleep(3)
\ No newline at end of file
+            self.cancelamento.esperar(INTERVALO_POLLING or 3)
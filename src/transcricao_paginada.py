@@ -0,0 +1,169 @@
+"""Leitura da transcrição aos pedaços, com os enunciados entregues em páginas
+
+O JSON final da AssemblyAI de uma gravação longa tem vários MB, quase tudo
+palavras com timestamp. Com response.content + json.loads, o corpo inteiro,
+o texto decodificado e os objetos ficam em memória ao mesmo tempo, e nada
+aparece na tela antes de o último byte chegar.
+
+Aqui o corpo é baixado em pedaços (requests com stream=True) e decodificado
+conforme chega:
+
+- consulta de status: se a transcrição ainda está na fila ou processando, a
+  leitura para assim que o campo "status" chega e a conexão é fechada;
+- transcrição concluída: cada enunciado vai para a página atual assim que
+  termina de chegar, já sem as palavras, e a cada TAMANHO_PAGINA enunciados
+  a página é entregue (a tabela da interface começa a encher). As palavras
+  soltas do topo são lidas uma a uma e descartadas.
+
+A AssemblyAI não tem endpoint só de status nem paginação dos enunciados
+(/sentences e /paragraphs devolvem tudo de uma vez, com as palavras), então
+as páginas são montadas deste lado, sobre a mesma requisição.
+"""
+import codecs
+import json
+import os
+import re
+
+from cancelamento import verificar
+
+# Enunciados por página entregue à interface
+TAMANHO_PAGINA = int(os.getenv("TRANSCRICAO_TAMANHO_PAGINA", "200"))
+# Bytes lidos da conexão por vez
+TAMANHO_PEDACO = 64 * 1024
+# Status em que o resto do corpo não interessa
+EM_ANDAMENTO = ("queued", "processing")
+
+_DECODIFICADOR = json.JSONDecoder()
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+_DELIMITADORES = frozenset(",:]} \t\n\r")
+# Listas do topo lidas item a item: os enunciados são guardados, as palavras descartadas
+_LISTAS = ("utterances", "words")
+_INCOMPLETO = object()
+
+
+class LeitorTranscricao:
+    """Decodificador incremental do JSON da transcrição (um objeto no topo)"""
+
+    def __init__(self, ao_receber_pagina=None, tamanho_pagina=TAMANHO_PAGINA):
+        self.ao_receber_pagina = ao_receber_pagina
+        self.tamanho_pagina = tamanho_pagina
+        # Campos do topo, sem "words"; "utterances" cresce conforme os enunciados chegam
+        self.dados = {}
+        self.pagina = []
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        # Só o trecho ainda não consumido fica aqui
+        self._texto = ""
+        self._posicao = 0
+        self._estado = "inicio"
+        self._chave = None
+
+    @property
+    def status(self):
+        return self.dados.get("status")
+
+    @property
+    def concluido(self):
+        return self._estado == "fim"
+
+    def alimentar(self, pedaco, final=False):
+        self._texto = self._texto[self._posicao:] + self._utf8.decode(pedaco, final)
+        self._posicao = 0
+        self._avancar(final)
+
+    def _avancar(self, final):
+        while True:
+            self._posicao = _ESPACOS.match(self._texto, self._posicao).end()
+            if self._posicao >= len(self._texto) or self._estado == "fim":
+                return
+            caractere = self._texto[self._posicao]
+
+            if self._estado == "inicio":
+                self._esperar("{")
+                self._estado = "chave"
+            elif self._estado == "chave":
+                if caractere in ",}":
+                    self._posicao += 1
+                    if caractere == "}":
+                        self._estado = "fim"
+                    continue
+                chave = self._valor(final)
+                if chave is _INCOMPLETO:
+                    return
+                self._chave, self._estado = chave, "dois_pontos"
+            elif self._estado == "dois_pontos":
+                self._esperar(":")
+                self._estado = "valor"
+            elif self._estado == "valor":
+                if self._chave in _LISTAS and caractere == "[":
+                    self._posicao += 1
+                    self._estado = "lista"
+                    if self._chave == "utterances":
+                        self.dados["utterances"] = []
+                    continue
+                valor = self._valor(final)
+                if valor is _INCOMPLETO:
+                    return
+                if self._chave != "words":
+                    self.dados[self._chave] = valor
+                self._estado = "chave"
+            elif self._estado == "lista":
+                if caractere in ",]":
+                    self._posicao += 1
+                    if caractere == "]":
+                        self._estado = "chave"
+                        self.entregar_pagina()
+                    continue
+                item = self._valor(final)
+                if item is _INCOMPLETO:
+                    return
+                if self._chave == "utterances":
+                    item.pop("words", None)
+                    self.dados["utterances"].append(item)
+                    self.pagina.append(item)
+                    if len(self.pagina) >= self.tamanho_pagina:
+                        self.entregar_pagina()
+
+    def _esperar(self, caractere):
+        if self._texto[self._posicao] != caractere:
+            raise ValueError(f"JSON da transcrição inválido perto de: {self._texto[self._posicao:self._posicao + 40]!r}")
+        self._posicao += 1
+
+    def _valor(self, final):
+        """Próximo valor JSON completo, ou _INCOMPLETO se ainda falta chegar parte dele"""
+        try:
+            valor, fim = _DECODIFICADOR.raw_decode(self._texto, self._posicao)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError("JSON da transcrição incompleto ou inválido")
+            return _INCOMPLETO
+        if not final and (fim == len(self._texto) or self._texto[fim] not in _DELIMITADORES):
+            # Um número cortado entre dois pedaços ("-15" + ".5") continua no próximo
+            return _INCOMPLETO
+        self._posicao = fim
+        return valor
+
+    def entregar_pagina(self):
+        if self.pagina and self.ao_receber_pagina:
+            self.ao_receber_pagina(self.pagina)
+        self.pagina = []
+
+
+def ler_transcricao(response, ao_receber_pagina=None, tamanho_pagina=TAMANHO_PAGINA, cancelamento=None):
+    """Campos da transcrição sem as palavras, lendo a resposta (stream=True) aos pedaços
+
+    ao_receber_pagina(lista) recebe os enunciados em páginas enquanto o corpo
+    chega. Em "queued"/"processing" devolve só o que veio até o status.
+    """
+    leitor = LeitorTranscricao(ao_receber_pagina, tamanho_pagina)
+    try:
+        for pedaco in response.iter_content(TAMANHO_PEDACO):
+            verificar(cancelamento)
+            leitor.alimentar(pedaco)
+            if leitor.status in EM_ANDAMENTO:
+                return leitor.dados
+        leitor.alimentar(b"", final=True)
+    finally:
+        response.close()
+    if not leitor.concluido:
+        raise ValueError("Resposta da transcrição incompleta")
+    return leitor.dados
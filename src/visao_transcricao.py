@@ -0,0 +1,199 @@
+"""Transcrição em model/view: uma linha por enunciado (orador, início, fim, texto)
+
+Substitui o QTextEdit único, que em reuniões de várias horas refazia o layout do
+texto inteiro a cada rolagem ou edição. Aqui só as linhas visíveis têm a altura
+calculada, e a edição de uma célula altera apenas aquele enunciado; o texto
+completo só é montado quando a ata é gerada.
+"""
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QPlainTextEdit, QStyledItemDelegate, QTableView
+
+from indice_bm25 import dividir_em_trechos
+
+COLUNA_INICIO = 0
+COLUNA_FIM = 1
+COLUNA_ORADOR = 2
+COLUNA_TEXTO = 3
+CABECALHOS = ["Início", "Fim", "Orador", "Texto"]
+
+
+def formatar_instante(ms):
+    if ms is None:
+        return ""
+    segundos = int(ms) // 1000
+    return f"{segundos // 3600:02d}:{segundos // 60 % 60:02d}:{segundos % 60:02d}"
+
+
+class ModeloTranscricao(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.enunciados = []
+
+    @staticmethod
+    def _linha(e):
+        return {"orador": e.get("speaker") or "", "inicio": e.get("start"), "fim": e.get("end"), "texto": e.get("text", "")}
+
+    def definir_enunciados(self, enunciados):
+        """Carrega os utterances da AssemblyAI (speaker, start, end, text)"""
+        self.beginResetModel()
+        self.enunciados = [self._linha(e) for e in enunciados]
+        self.endResetModel()
+
+    def acrescentar_enunciados(self, enunciados):
+        """Página de utterances no fim da tabela, enquanto a transcrição ainda é baixada"""
+        if not enunciados:
+            return
+        inicio = len(self.enunciados)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(enunciados) - 1)
+        self.enunciados.extend(self._linha(e) for e in enunciados)
+        self.endInsertRows()
+
+    def definir_texto(self, texto):
+        """Texto sem enunciados (servidor de jobs, colagem manual): um parágrafo por linha"""
+        linhas = []
+        for paragrafo in texto.splitlines():
+            if not paragrafo.strip():
+                continue
+            # Parágrafos enormes (texto corrido da API) viram trechos de poucas sentenças
+            trechos = dividir_em_trechos(paragrafo, sentencas_por_trecho=3) if len(paragrafo) > 1000 else [paragrafo]
+            linhas.extend({"orador": "", "inicio": None, "fim": None, "texto": t} for t in trechos)
+        self.beginResetModel()
+        self.enunciados = linhas
+        self.endResetModel()
+
+    def limpar(self):
+        self.definir_enunciados([])
+
+    def texto_completo(self):
+        return "\n".join(e["texto"] for e in self.enunciados if e["texto"].strip())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.enunciados)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CABECALHOS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        enunciado = self.enunciados[index.row()]
+        coluna = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if coluna == COLUNA_INICIO:
+                return formatar_instante(enunciado["inicio"])
+            if coluna == COLUNA_FIM:
+                return formatar_instante(enunciado["fim"])
+            if coluna == COLUNA_ORADOR:
+                return enunciado["orador"]
+            return enunciado["texto"]
+        if role == Qt.TextAlignmentRole and coluna != COLUNA_TEXTO:
+            return int(Qt.AlignHCenter | Qt.AlignTop)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        chave = "orador" if index.column() == COLUNA_ORADOR else "texto"
+        self.enunciados[index.row()][chave] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (COLUNA_ORADOR, COLUNA_TEXTO):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, secao, orientacao, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientacao == Qt.Horizontal:
+            return CABECALHOS[secao]
+        return None
+
+
+class DelegateTexto(QStyledItemDelegate):
+    """Editor de várias linhas para enunciados longos"""
+
+    def createEditor(self, parent, option, index):
+        return QPlainTextEdit(parent)
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.toPlainText(), Qt.EditRole)
+
+
+class VisaoTranscricao(QTableView):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.modelo = ModeloTranscricao(self)
+        self.setModel(self.modelo)
+        self.setItemDelegateForColumn(COLUNA_TEXTO, DelegateTexto(self))
+        self.setWordWrap(True)
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.verticalHeader().hide()
+
+        # Larguras fixas: ResizeToContents mediria todas as linhas
+        cabecalho = self.horizontalHeader()
+        cabecalho.setSectionResizeMode(QHeaderView.Interactive)
+        cabecalho.setStretchLastSection(True)
+        self.setColumnWidth(COLUNA_INICIO, 70)
+        self.setColumnWidth(COLUNA_FIM, 70)
+        self.setColumnWidth(COLUNA_ORADOR, 70)
+
+        # Alturas calculadas sob demanda, só para as linhas que aparecem na tela
+        self.linhas_medidas = set()
+        self.timer_ajuste = QTimer(self)
+        self.timer_ajuste.setSingleShot(True)
+        self.timer_ajuste.setInterval(0)
+        self.timer_ajuste.timeout.connect(self.ajustar_linhas_visiveis)
+        # Via agendar_ajuste: ligado direto, o valor da rolagem viraria o intervalo (ms) de QTimer.start
+        self.verticalScrollBar().valueChanged.connect(self.agendar_ajuste)
+        cabecalho.sectionResized.connect(self.invalidar_alturas)
+        self.modelo.modelReset.connect(self.invalidar_alturas)
+        self.modelo.rowsInserted.connect(self.agendar_ajuste)
+        self.modelo.dataChanged.connect(self.remedir_linhas)
+
+    def agendar_ajuste(self, *_):
+        self.timer_ajuste.start()
+
+    def invalidar_alturas(self, *_):
+        self.linhas_medidas.clear()
+        self.timer_ajuste.start()
+
+    def remedir_linhas(self, inicio, fim, *_):
+        for linha in range(inicio.row(), fim.row() + 1):
+            self.linhas_medidas.discard(linha)
+        self.timer_ajuste.start()
+
+    def ajustar_linhas_visiveis(self):
+        total = self.modelo.rowCount()
+        if not total:
+            return
+        linha = max(self.rowAt(0), 0)
+        altura_visivel = self.viewport().height()
+        while linha < total and self.rowViewportPosition(linha) < altura_visivel:
+            if linha not in self.linhas_medidas:
+                self.resizeRowToContents(linha)
+                self.linhas_medidas.add(linha)
+            linha += 1
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.invalidar_alturas()
+
+    def trecho_selecionado(self):
+        """(início, fim) em ms das linhas selecionadas com tempos, ou None"""
+        linhas = {indice.row() for indice in self.selectionModel().selectedIndexes()}
+        tempos = [(self.modelo.enunciados[l]["inicio"], self.modelo.enunciados[l]["fim"]) for l in linhas]
+        tempos = [t for t in tempos if None not in t]
+        if not tempos:
+            return None
+        return min(inicio for inicio, _ in tempos), max(fim for _, fim in tempos)
+
+    def rolar_para_o_fim(self):
+        self.scrollToBottom()
+        self.timer_ajuste.start()